@@ -2,94 +2,110 @@ import requests
 import psycopg2
 import os
 import argparse
+from itertools import islice
 from psycopg2 import Error
 from dotenv import load_dotenv
 
+from post_ingest import run_post_ingest, refresh_show_documents
+from shared_writes import upsert_shared_entities
+from tmdb_client import API_KEY, tmdb_get, is_not_found, record_dead_letter, clear_dead_letter
+
 # Load environment variables from .env file
 load_dotenv()
 
-# ── TMDB CONFIG ─────────────────────────────
-API_KEY = os.getenv("TMDB_API_KEY")
-BASE_URL = "https://api.themoviedb.org/3"
-
 # ── DB CONFIG ───────────────────────────────
 # Use Neon DB connection string
 DATABASE_URL = os.getenv("DATABASE_URL")
 
+# ── CREDIT DEPTH ────────────────────────────
+# Top-billed cast stored at ingest; hydrate_credits.py stores the full
+# cast later, only for titles users actually open
+CAST_LIMIT = int(os.getenv("CREDIT_CAST_LIMIT", "10"))
+# Crew jobs stored (TMDB job → CrewRole); any other "... Writer" job also
+# counts as Writer while "Writer" is selected
+CREW_JOBS = {
+    "Director": "Director",
+    "Writer": "Writer",
+    "Screenplay": "Writer",
+    "Story": "Writer",
+    "Creator": "Writer",
+}
+
 # ══════════════════════════════════════════════
 # API FETCH FUNCTIONS
 # ══════════════════════════════════════════════
 
 def fetch_popular_tv(page=1):
     """Fetch popular TV shows from TMDB"""
-    url = f"{BASE_URL}/tv/popular"
-    params = {
-        "api_key": API_KEY,
-        "language": "en-US",
-        "page": page
-    }
-    response = requests.get(url, params=params)
-    response.raise_for_status()
-    return response.json()["results"]
+    return tmdb_get("/tv/popular", {"language": "en-US", "page": page})["results"]
 
 
 def fetch_tv_details(tv_id):
     """Fetch TV show details including genres and production companies"""
-    url = f"{BASE_URL}/tv/{tv_id}"
-    params = {"api_key": API_KEY}
-    response = requests.get(url, params=params)
-    response.raise_for_status()
-    return response.json()
+    return tmdb_get(f"/tv/{tv_id}")
 
 
 def fetch_tv_credits(tv_id):
-    """Fetch TV show credits (cast and crew)"""
-    url = f"{BASE_URL}/tv/{tv_id}/credits"
-    params = {"api_key": API_KEY}
-    response = requests.get(url, params=params)
-    response.raise_for_status()
-    return response.json()
+    """Fetch TV show credits (cast and crew of the latest season only)"""
+    return tmdb_get(f"/tv/{tv_id}/credits")
+
+
+def fetch_tv_aggregate_credits(tv_id):
+    """
+    Fetch aggregate credits: everyone who appeared in any episode, with
+    per-role / per-job episode counts, in one call per show
+    """
+    return flatten_aggregate_credits(tmdb_get(f"/tv/{tv_id}/aggregate_credits"))
+
+
+def flatten_aggregate_credits(credits):
+    """
+    Reshape aggregate credits like /credits so select_credits can read them:
+    - cast: one entry per person, most episodes first, with the character of
+      their biggest role and episode_count = total_episode_count
+    - crew: one entry per (person, job) with that job's episode_count
+    """
+    cast = []
+    for actor in sorted(credits.get("cast", []),
+                        key=lambda a: (-(a.get("total_episode_count") or 0), a.get("order", 0))):
+        roles = sorted(actor.get("roles", []), key=lambda r: -(r.get("episode_count") or 0))
+        cast.append({
+            **actor,
+            "character": roles[0].get("character") if roles else None,
+            "roles": roles,
+            "episode_count": actor.get("total_episode_count"),
+        })
+
+    crew = []
+    for member in credits.get("crew", []):
+        for job in member.get("jobs", []):
+            crew.append({**member, "job": job.get("job", ""), "episode_count": job.get("episode_count")})
+
+    return {"id": credits.get("id"), "cast": cast, "crew": crew}
 
 
 def fetch_season_details(tv_id, season_number):
     """Fetch season details including episodes"""
-    url = f"{BASE_URL}/tv/{tv_id}/season/{season_number}"
-    params = {"api_key": API_KEY}
-    response = requests.get(url, params=params)
-    response.raise_for_status()
-    return response.json()
+    return tmdb_get(f"/tv/{tv_id}/season/{season_number}")
 
 
 def search_tv(query):
     """Search for a TV show by name"""
-    url = f"{BASE_URL}/search/tv"
-    params = {
-        "api_key": API_KEY,
-        "query": query,
-        "language": "en-US"
-    }
-    response = requests.get(url, params=params)
-    response.raise_for_status()
-    return response.json()["results"]
+    return tmdb_get("/search/tv", {"query": query, "language": "en-US"})["results"]
 
 
 # ══════════════════════════════════════════════
-# DATABASE INSERT FUNCTIONS
+# ROW BUILDERS
+# (shared with bulk_load.py)
 # ══════════════════════════════════════════════
 
-def insert_media(cursor, tv_show):
-    """Insert into Media table for TV Series"""
+def media_row(tv_show):
+    """Build the Media row tuple for a TMDB TV show"""
     # Get first air date year
     first_air_date = tv_show.get("first_air_date", "")
     release_year = int(first_air_date[:4]) if first_air_date and len(first_air_date) >= 4 else None
-    
-    query = """
-    INSERT INTO Media
-    (MediaID, Title, ReleaseYear, Description, LanguageName, Rating, MediaType, Poster)
-    VALUES (%s, %s, %s, %s, %s, %s, 'TVSeries', %s)
-    ON CONFLICT (MediaID) DO NOTHING;
-    """
-    cursor.execute(query, (
+
+    return (
         tv_show["id"],
         tv_show.get("name") or tv_show.get("title"),
         release_year,
@@ -97,39 +113,24 @@ def insert_media(cursor, tv_show):
         tv_show.get("original_language"),
         tv_show.get("vote_average"),
         tv_show.get("poster_path")
-    ))
+    )
 
 
-def insert_tvseries(cursor, details):
-    """Insert into TVSeries table"""
+def tvseries_row(details):
+    """Build the TVSeries row tuple for a TMDB TV show"""
     # Check if still in production (ongoing)
     is_ongoing = details.get("in_production", False)
     num_seasons = details.get("number_of_seasons", 0)
-    
-    query = """
-    INSERT INTO TVSeries (MediaID, IsOngoing, NumberOfSeasons)
-    VALUES (%s, %s, %s)
-    ON CONFLICT (MediaID) DO NOTHING;
-    """
-    cursor.execute(query, (
-        details["id"],
-        is_ongoing,
-        num_seasons
-    ))
 
+    return (details["id"], is_ongoing, num_seasons)
 
-def insert_season(cursor, tv_id, season):
-    """Insert into Season table"""
+
+def season_row(tv_id, season):
+    """Build the Season row tuple for a TMDB season"""
     # Get release date
     air_date = season.get("air_date")
-    
-    query = """
-    INSERT INTO Season 
-    (MediaID, SeasonNo, SeasonTitle, ReleaseDate, Description, AvgRating, EpisodeCount)
-    VALUES (%s, %s, %s, %s, %s, %s, %s)
-    ON CONFLICT (MediaID, SeasonNo) DO NOTHING;
-    """
-    cursor.execute(query, (
+
+    return (
         tv_id,
         season.get("season_number"),
         season.get("name"),
@@ -137,23 +138,17 @@ def insert_season(cursor, tv_id, season):
         season.get("overview"),
         season.get("vote_average"),
         len(season.get("episodes", []))
-    ))
+    )
 
 
-def insert_episode(cursor, tv_id, season_no, episode):
-    """Insert into Episode table"""
+def episode_row(tv_id, season_no, episode):
+    """Build the Episode row tuple for a TMDB episode"""
     # Duration must be > 0 due to CHECK constraint
     runtime = episode.get("runtime")
     if runtime is not None and runtime <= 0:
         runtime = None
-    
-    query = """
-    INSERT INTO Episode 
-    (MediaID, SeasonNo, EpisodeNo, EpisodeTitle, Description, Duration, AvgRating, StillPath)
-    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-    ON CONFLICT (MediaID, SeasonNo, EpisodeNo) DO NOTHING;
-    """
-    cursor.execute(query, (
+
+    return (
         tv_id,
         season_no,
         episode.get("episode_number"),
@@ -162,20 +157,71 @@ def insert_episode(cursor, tv_id, season_no, episode):
         runtime,
         episode.get("vote_average"),
         episode.get("still_path")
-    ))
+    )
+
+
+def genre_row(genre):
+    """Build the Genre row tuple for a TMDB genre"""
+    return (genre["id"], genre["name"])
 
 
-def insert_genre(cursor, genre):
-    """Insert into Genre table"""
+def studio_row(company):
+    """Build the Studio row tuple for a TMDB production company/network"""
+    return (company["id"], company["name"], company.get("logo_path"))
+
+
+def person_row(person):
+    """Build the Person row tuple for a TMDB cast/crew member"""
+    return (person["id"], person["name"], person.get("profile_path"))
+
+
+# ══════════════════════════════════════════════
+# DATABASE INSERT FUNCTIONS
+# ══════════════════════════════════════════════
+
+def insert_media(cursor, tv_show):
+    """Insert into Media table for TV Series"""
     query = """
-    INSERT INTO Genre (GenreID, GenreName)
-    VALUES (%s, %s)
-    ON CONFLICT (GenreID) DO NOTHING;
+    INSERT INTO Media
+    (MediaID, Title, ReleaseYear, Description, LanguageName, Rating, MediaType, Poster, SearchVector)
+    VALUES (%s, %s, %s, %s, %s, %s, 'TVSeries', %s, fn_media_search_vector(%s, %s))
+    ON CONFLICT (MediaID) DO NOTHING;
+    """
+    row = media_row(tv_show)
+    # Title and Description also feed the full-text search vector
+    cursor.execute(query, row + (row[1], row[3]))
+
+
+def insert_tvseries(cursor, details):
+    """Insert into TVSeries table"""
+    query = """
+    INSERT INTO TVSeries (MediaID, IsOngoing, NumberOfSeasons)
+    VALUES (%s, %s, %s)
+    ON CONFLICT (MediaID) DO NOTHING;
     """
-    cursor.execute(query, (
-        genre["id"],
-        genre["name"]
-    ))
+    cursor.execute(query, tvseries_row(details))
+
+
+def insert_season(cursor, tv_id, season):
+    """Insert into Season table"""
+    query = """
+    INSERT INTO Season 
+    (MediaID, SeasonNo, SeasonTitle, ReleaseDate, Description, AvgRating, EpisodeCount)
+    VALUES (%s, %s, %s, %s, %s, %s, %s)
+    ON CONFLICT (MediaID, SeasonNo) DO NOTHING;
+    """
+    cursor.execute(query, season_row(tv_id, season))
+
+
+def insert_episode(cursor, tv_id, season_no, episode):
+    """Insert into Episode table"""
+    query = """
+    INSERT INTO Episode 
+    (MediaID, SeasonNo, EpisodeNo, EpisodeTitle, Description, Duration, AvgRating, StillPath)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+    ON CONFLICT (MediaID, SeasonNo, EpisodeNo) DO NOTHING;
+    """
+    cursor.execute(query, episode_row(tv_id, season_no, episode))
 
 
 def insert_media_genre(cursor, media_id, genre_id):
@@ -188,20 +234,6 @@ def insert_media_genre(cursor, media_id, genre_id):
     cursor.execute(query, (media_id, genre_id))
 
 
-def insert_studio(cursor, company):
-    """Insert into Studio table (production companies/networks)"""
-    query = """
-    INSERT INTO Studio (StudioID, StudioName, LogoURL)
-    VALUES (%s, %s, %s)
-    ON CONFLICT (StudioID) DO NOTHING;
-    """
-    cursor.execute(query, (
-        company["id"],
-        company["name"],
-        company.get("logo_path")
-    ))
-
-
 def insert_production(cursor, studio_id, media_id):
     """Insert into Production junction table"""
     query = """
@@ -212,32 +244,22 @@ def insert_production(cursor, studio_id, media_id):
     cursor.execute(query, (studio_id, media_id))
 
 
-def insert_person(cursor, person):
-    """Insert into Person table"""
-    query = """
-    INSERT INTO Person (PersonID, FullName, Picture)
-    VALUES (%s, %s, %s)
-    ON CONFLICT (PersonID) DO NOTHING;
-    """
-    cursor.execute(query, (
-        person["id"],
-        person["name"],
-        person.get("profile_path")
-    ))
-
-
-def insert_crew(cursor, person_id, media_id, role, character_name=None):
+def insert_crew(cursor, person_id, media_id, role, character_name=None, episode_count=None):
     """
     Insert into Crew junction table
     - Actor: has CharacterName
     - Director, Writer: CharacterName is NULL
+    - EpisodeCount: from aggregate credits (NULL otherwise); several jobs
+      mapping to one role keep the largest count
     """
     query = """
-    INSERT INTO Crew (PersonID, MediaID, CrewRole, CharacterName)
-    VALUES (%s, %s, %s, %s)
-    ON CONFLICT (PersonID, MediaID, CrewRole) DO NOTHING;
+    INSERT INTO Crew (PersonID, MediaID, CrewRole, CharacterName, EpisodeCount)
+    VALUES (%s, %s, %s, %s, %s)
+    ON CONFLICT (PersonID, MediaID, CrewRole) DO UPDATE
+    SET EpisodeCount = EXCLUDED.EpisodeCount
+    WHERE EXCLUDED.EpisodeCount > COALESCE(Crew.EpisodeCount, 0);
     """
-    cursor.execute(query, (person_id, media_id, role, character_name))
+    cursor.execute(query, (person_id, media_id, role, character_name, episode_count))
 
 
 # ══════════════════════════════════════════════
@@ -245,85 +267,94 @@ def insert_crew(cursor, person_id, media_id, role, character_name=None):
 # ══════════════════════════════════════════════
 
 def process_genres(cursor, media_id, genres):
-    """Process and insert genres for a TV show"""
-    for genre in genres:
-        insert_genre(cursor, genre)
-        insert_media_genre(cursor, media_id, genre["id"])
+    """
+    Process and insert genres for a TV show
+    (Genre rows are committed first, see shared_writes.upsert_shared_entities)
+    """
+    upsert_shared_entities(genres=[genre_row(genre) for genre in genres])
+    for genre_id in sorted({genre["id"] for genre in genres}):
+        insert_media_genre(cursor, media_id, genre_id)
 
 
 def process_studios(cursor, media_id, companies):
     """Process and insert production companies for a TV show"""
-    for company in companies:
-        insert_studio(cursor, company)
-        insert_production(cursor, company["id"], media_id)
+    upsert_shared_entities(studios=[studio_row(company) for company in companies])
+    for studio_id in sorted({company["id"] for company in companies}):
+        insert_production(cursor, studio_id, media_id)
 
 
 def process_networks(cursor, media_id, networks):
     """Process and insert networks (treated as studios) for a TV show"""
-    for network in networks:
-        insert_studio(cursor, network)
-        insert_production(cursor, network["id"], media_id)
+    process_studios(cursor, media_id, networks)
 
 
-def process_credits(cursor, media_id, credits):
+def select_credits(credits, cast_limit=None, crew_jobs=None):
     """
-    Process cast and crew for a TV show
+    Pick the cast and crew we store for a TV show
     
-    Crew roles:
-    - Actor (from cast): has CharacterName
-    - Director (from crew where job='Director'): CharacterName is NULL
-    - Writer (from crew where job contains 'Writer'): CharacterName is NULL
+    Yields (person, role, character_name) tuples:
+    - Actor (top cast_limit of cast, default CAST_LIMIT, 0 = all): has CharacterName
+    - Director / Writer (crew whose job is in crew_jobs, default CREW_JOBS):
+      CharacterName is NULL
     """
+    cast_limit = CAST_LIMIT if cast_limit is None else cast_limit
+    crew_jobs = CREW_JOBS if crew_jobs is None else crew_jobs
+    any_writer = "Writer" in crew_jobs
     
-    # Process ACTORS (from cast array)
-    # Limit to top 10 actors to avoid too much data
-    for actor in credits.get("cast", [])[:10]:
-        insert_person(cursor, actor)
+    # ACTORS (from cast array, already in billing order)
+    for actor in islice(credits.get("cast", []), cast_limit or None):
         # For TV shows, character might be in 'character' or 'roles'
         character = actor.get("character") or ""
         if actor.get("roles"):
             character = actor["roles"][0].get("character", "")
+        yield actor, "Actor", character if character else None
+    
+    # DIRECTORS and WRITERS (from crew array): one dict lookup per entry
+    for crew_member in credits.get("crew", []):
+        job = crew_member.get("job", "")
+        role = crew_jobs.get(job) or ("Writer" if any_writer and "Writer" in job else None)
+        if role:
+            yield crew_member, role, None
+
+
+def process_credits(cursor, media_id, credits, cast_limit=None, crew_jobs=None):
+    """
+    Process cast and crew for a TV show (see select_credits for the rules)
+    Returns the PersonIDs stored as actors
+    """
+    selected = list(select_credits(credits, cast_limit, crew_jobs))
+    cast_count = sum(1 for _, role, _ in selected if role == "Actor")
+    print(f"   → Inserting {cast_count} actors + {len(selected) - cast_count} directors/writers...")
+
+    # Person rows first, in their own transaction; Crew rows in key order
+    upsert_shared_entities(persons=[person_row(person) for person, _, _ in selected])
+    actor_ids = set()
+    for person, role, character_name in sorted(selected, key=lambda c: (c[0]["id"], c[1])):
+        if role == "Actor":
+            actor_ids.add(person["id"])
         insert_crew(
             cursor,
-            person_id=actor["id"],
+            person_id=person["id"],
             media_id=media_id,
-            role="Actor",
-            character_name=character if character else None
+            role=role,
+            character_name=character_name,
+            episode_count=person.get("episode_count")
         )
-    
-    # Process DIRECTORS and WRITERS (from crew array)
-    for crew_member in credits.get("crew", []):
-        job = crew_member.get("job", "")
-        
-        if job == "Director":
-            insert_person(cursor, crew_member)
-            insert_crew(
-                cursor,
-                person_id=crew_member["id"],
-                media_id=media_id,
-                role="Director",
-                character_name=None
-            )
-        
-        elif "Writer" in job or job in ["Screenplay", "Story", "Creator"]:
-            insert_person(cursor, crew_member)
-            insert_crew(
-                cursor,
-                person_id=crew_member["id"],
-                media_id=media_id,
-                role="Writer",
-                character_name=None
-            )
-
-
-def process_seasons_and_episodes(cursor, tv_id, num_seasons):
+    return actor_ids
+
+
+def process_seasons_and_episodes(cursor, tv_id, num_seasons, fetch_season=fetch_season_details):
     """
     Fetch and insert ALL seasons and episodes for a TV show
+    fetch_season(tv_id, season_num) returns the TMDB season payload (or None)
     """
     for season_num in range(1, num_seasons + 1):
         try:
             print(f"      📺 Fetching Season {season_num}...")
-            season_data = fetch_season_details(tv_id, season_num)
+            season_data = fetch_season(tv_id, season_num)
+            if season_data is None:
+                print(f"      ⚠️ Season {season_num} not found, skipping...")
+                continue
             
             # Insert season
             insert_season(cursor, tv_id, season_data)
@@ -346,8 +377,13 @@ def process_seasons_and_episodes(cursor, tv_id, num_seasons):
 # PROCESS SINGLE TV SHOW
 # ══════════════════════════════════════════════
 
-def process_single_tv(cur, tv_id, tv_title=None, fetch_seasons=True):
-    """Process and insert a single TV show with all its data"""
+def process_single_tv(cur, tv_id, tv_title=None, fetch_seasons=True, touched_persons=None,
+                      aggregate_credits=False, cast_limit=None):
+    """
+    Process and insert a single TV show with all its data
+    Actor PersonIDs are added to touched_persons (for the post-ingest hook)
+    aggregate_credits: use /aggregate_credits (every season's cast) instead of /credits
+    """
     try:
         # 1. Fetch detailed TV show info
         details = fetch_tv_details(tv_id)
@@ -355,53 +391,71 @@ def process_single_tv(cur, tv_id, tv_title=None, fetch_seasons=True):
         print(f"\n📺 Processing: {tv_title}")
         
         # 2. Fetch credits (cast and crew)
-        credits = fetch_tv_credits(tv_id)
-        
-        # 3. Insert Media & TVSeries
-        print(f"   → Inserting Media & TVSeries...")
-        insert_media(cur, details)
-        insert_tvseries(cur, details)
-        
-        # 4. Insert Genres & Media_Genre
-        genres = details.get("genres", [])
-        if genres:
-            print(f"   → Inserting {len(genres)} genres...")
-            process_genres(cur, tv_id, genres)
-        
-        # 5. Insert Production Companies & Networks
-        companies = details.get("production_companies", [])
-        networks = details.get("networks", [])
-        total_studios = len(companies) + len(networks)
-        if total_studios > 0:
-            print(f"   → Inserting {total_studios} studios/networks...")
-            process_studios(cur, tv_id, companies)
-            process_networks(cur, tv_id, networks)
-        
-        # 6. Insert Person & Crew
-        cast_count = len(credits.get("cast", [])[:10])
-        crew_count = len([c for c in credits.get("crew", []) 
-                         if c.get("job") in ["Director", "Creator"] or "Writer" in c.get("job", "")])
-        print(f"   → Inserting {cast_count} actors + {crew_count} directors/writers...")
-        process_credits(cur, tv_id, credits)
-        
-        # 7. Fetch and insert Seasons & Episodes
-        if fetch_seasons:
-            num_seasons = details.get("number_of_seasons", 0)
-            if num_seasons > 0:
-                print(f"   → Fetching all {num_seasons} seasons...")
-                process_seasons_and_episodes(cur, tv_id, num_seasons)
+        if aggregate_credits:
+            credits = fetch_tv_aggregate_credits(tv_id)
+        else:
+            credits = fetch_tv_credits(tv_id)
         
+        ingest_tv(cur, details, credits, fetch_seasons, touched_persons, cast_limit=cast_limit)
+        clear_dead_letter(cur, "tv", tv_id)
         return True
     except Exception as e:
         print(f"   ❌ Error processing TV show: {e}")
+        # A title TMDB does not have is not worth retrying
+        if not is_not_found(e):
+            record_dead_letter("tv", tv_id, e)
         return False
 
 
+def ingest_tv(cur, details, credits, fetch_seasons=True, touched_persons=None,
+              fetch_season=fetch_season_details, cast_limit=None):
+    """
+    Insert a TV show from its TMDB details + credits payloads, fetching
+    seasons through fetch_season (synthetic_catalogue.py feeds generated ones)
+    """
+    tv_id = details["id"]
+
+    # 3. Insert Media & TVSeries
+    print(f"   → Inserting Media & TVSeries...")
+    insert_media(cur, details)
+    insert_tvseries(cur, details)
+    
+    # 4. Insert Genres & Media_Genre
+    genres = details.get("genres", [])
+    if genres:
+        print(f"   → Inserting {len(genres)} genres...")
+        process_genres(cur, tv_id, genres)
+    
+    # 5. Insert Production Companies & Networks
+    companies = details.get("production_companies", [])
+    networks = details.get("networks", [])
+    total_studios = len(companies) + len(networks)
+    if total_studios > 0:
+        print(f"   → Inserting {total_studios} studios/networks...")
+        process_studios(cur, tv_id, companies)
+        process_networks(cur, tv_id, networks)
+    
+    # 6. Insert Person & Crew
+    actor_ids = process_credits(cur, tv_id, credits, cast_limit)
+    if touched_persons is not None:
+        touched_persons.update(actor_ids)
+    
+    # 7. Fetch and insert Seasons & Episodes
+    if fetch_seasons:
+        num_seasons = details.get("number_of_seasons", 0)
+        if num_seasons > 0:
+            print(f"   → Fetching all {num_seasons} seasons...")
+            process_seasons_and_episodes(cur, tv_id, num_seasons, fetch_season)
+
+    # 8. Rebuild the prebuilt /tvshows/:id/seasons document
+    refresh_show_documents(cur, [tv_id])
+
+
 # ══════════════════════════════════════════════
 # MAIN FUNCTIONS
 # ══════════════════════════════════════════════
 
-def add_popular_tv(pages=1):
+def add_popular_tv(pages=1, aggregate_credits=False, cast_limit=None):
     """Fetch and add popular TV shows"""
     if not API_KEY:
         raise RuntimeError("TMDB_API_KEY not set. Please check your .env file.")
@@ -409,6 +463,7 @@ def add_popular_tv(pages=1):
     conn = psycopg2.connect(DATABASE_URL)
     cur = conn.cursor()
 
+    touched_persons = set()
     try:
         for page in range(1, pages + 1):
             print(f"\n📥 Fetching popular TV shows (page {page})...")
@@ -419,9 +474,12 @@ def add_popular_tv(pages=1):
                 tv_id = tv["id"]
                 tv_title = tv.get("name") or tv.get("title")
                 print(f"\n[{i}/{len(tv_shows)}] Processing: {tv_title}")
-                process_single_tv(cur, tv_id, tv_title, fetch_seasons=True)
+                process_single_tv(cur, tv_id, tv_title, fetch_seasons=True,
+                                  touched_persons=touched_persons,
+                                  aggregate_credits=aggregate_credits, cast_limit=cast_limit)
 
         conn.commit()
+        run_post_ingest(conn, touched_persons)
         print("\n" + "="*50)
         print("✅ SUCCESS! All TV show data inserted.")
         print("   • Media & TVSeries tables")
@@ -440,7 +498,7 @@ def add_popular_tv(pages=1):
         conn.close()
 
 
-def add_tv_by_id(tv_id):
+def add_tv_by_id(tv_id, aggregate_credits=False, cast_limit=None):
     """Add a single TV show by its TMDB ID"""
     if not API_KEY:
         raise RuntimeError("TMDB_API_KEY not set. Please check your .env file.")
@@ -450,8 +508,11 @@ def add_tv_by_id(tv_id):
 
     try:
         print(f"📥 Fetching TV show with ID: {tv_id}")
-        if process_single_tv(cur, tv_id):
+        touched_persons = set()
+        if process_single_tv(cur, tv_id, touched_persons=touched_persons,
+                             aggregate_credits=aggregate_credits, cast_limit=cast_limit):
             conn.commit()
+            run_post_ingest(conn, touched_persons)
             print("\n✅ TV show added successfully!")
         else:
             conn.rollback()
@@ -473,7 +534,7 @@ def add_tv_by_id(tv_id):
         conn.close()
 
 
-def add_tv_by_search(query):
+def add_tv_by_search(query, aggregate_credits=False, cast_limit=None):
     """Search for a TV show and add it"""
     if not API_KEY:
         raise RuntimeError("TMDB_API_KEY not set. Please check your .env file.")
@@ -503,7 +564,7 @@ def add_tv_by_search(query):
         index = int(choice) - 1
         if 0 <= index < len(results[:10]):
             selected_tv = results[index]
-            add_tv_by_id(selected_tv["id"])
+            add_tv_by_id(selected_tv["id"], aggregate_credits, cast_limit)
         else:
             print("❌ Invalid selection.")
     except ValueError:
@@ -524,6 +585,8 @@ Examples:
   python TVseries_fetcher.py --pages 2             # Fetch 40 popular TV shows
   python TVseries_fetcher.py --search "Breaking Bad"  # Search and add a specific show
   python TVseries_fetcher.py --id 1396             # Add by TMDB ID (Breaking Bad)
+  python TVseries_fetcher.py --id 456 --aggregate-credits --cast-limit 0
+                                                   # Every actor of every season (The Simpsons)
         """
     )
     
@@ -543,16 +606,28 @@ Examples:
         type=int,
         help="Add a TV show by its TMDB ID directly"
     )
+    parser.add_argument(
+        "--aggregate-credits",
+        action="store_true",
+        help="Take cast/crew from every season (one /aggregate_credits call) with episode counts"
+    )
+    parser.add_argument(
+        "--cast-limit",
+        type=int,
+        help=f"Actors stored per show, most episodes first with --aggregate-credits "
+             f"(default: {CAST_LIMIT}, 0 = all)"
+    )
     
     args = parser.parse_args()
     
     # Handle different modes
     if args.search:
-        add_tv_by_search(args.search)
+        add_tv_by_search(args.search, args.aggregate_credits, args.cast_limit)
     elif args.id:
-        add_tv_by_id(args.id)
+        add_tv_by_id(args.id, args.aggregate_credits, args.cast_limit)
     else:
-        add_popular_tv(pages=args.pages)
+        add_popular_tv(pages=args.pages, aggregate_credits=args.aggregate_credits,
+                       cast_limit=args.cast_limit)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,8 @@
+"""
+TMDB fetchers for the Cholochitro database.
+
+The scripts in this directory still run on their own (`python movie_fetcher.py
+--id 550`); `python -m fetchers <command>` runs the same scripts through one
+entry point that imports only the command it dispatches to (see __main__.py).
+Nothing is imported here.
+"""
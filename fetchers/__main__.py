@@ -0,0 +1,59 @@
+import os
+import sys
+import importlib
+
+# The scripts import each other as top-level modules (from post_ingest import ...)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# command → (module, arguments put before the user's, help).
+# Only the module of the command being run is imported, so `--help` and
+# `send` start without requests / psycopg2 / the fetcher modules.
+COMMANDS = {
+    "movie": ("movie_fetcher", [], "Add movies (popular pages, --search, --id)"),
+    "tv": ("TVseries_fetcher", [], "Add TV shows (popular pages, --search, --id)"),
+    "batch-tv": ("batch_add_tv", [], "Add every show in batch_add_tv.TV_SHOWS"),
+    "persons": ("update_persons", [], "Fill in missing person / trailer / still data"),
+    "resolve": ("resolve_titles", [], "Resolve a file of titles to TMDB IDs (no prompts)"),
+    "dead-letters": ("dead_letters", [], "List or retry titles that failed to ingest"),
+    "serve": ("daemon", ["serve"], "Run the fetcher daemon on a local socket"),
+    "send": ("daemon", ["send"], "Send IDs to the daemon: send movie|tv ID [ID ...]"),
+}
+
+USAGE = """usage: python -m fetchers <command> [options]
+
+Commands:
+{commands}
+
+Run `python -m fetchers <command> --help` for a command's options.
+
+Examples:
+  python -m fetchers movie --id 550
+  python -m fetchers tv --search "Breaking Bad"
+  python -m fetchers serve &                      # Long-lived: imports + DB connection once
+  python -m fetchers send movie 550 680           # Per-ID cost is just the work
+  python -m fetchers send tv 1396 --fallback      # In-process if no daemon is running
+"""
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] in ("-h", "--help") or argv[0] not in COMMANDS:
+        commands = "\n".join(f"  {name:<13} {help_text}" for name, (_, _, help_text) in COMMANDS.items())
+        print(USAGE.format(commands=commands))
+        if argv and argv[0] not in ("-h", "--help"):
+            print(f"❌ Unknown command: {argv[0]}")
+            sys.exit(2)
+        return
+
+    command, rest = argv[0], argv[1:]
+    module_name, prefix, _ = COMMANDS[command]
+    # The scripts parse sys.argv themselves; prog shows up in their usage lines.
+    # A prefixed command is a subcommand of its script's parser (daemon.py
+    # serve / send), which adds the name to the usage line itself
+    prog = "python -m fetchers" if prefix else f"python -m fetchers {command}"
+    sys.argv = [prog] + prefix + rest
+    importlib.import_module(module_name).main()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,14 @@
 import psycopg2
 import os
 import time
+import argparse
 from dotenv import load_dotenv
 
 # Import all functions from TVseries_fetcher
 from TVseries_fetcher import (
     search_tv, process_single_tv
 )
+from post_ingest import run_post_ingest
 
 load_dotenv()
 DATABASE_URL = os.getenv("DATABASE_URL")
@@ -82,6 +84,11 @@ TV_SHOWS = [
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Add every show in TV_SHOWS from TMDB")
+    parser.add_argument("--aggregate-credits", action="store_true",
+                        help="Take cast/crew from every season (one /aggregate_credits call per show)")
+    args = parser.parse_args()
+
     conn = psycopg2.connect(DATABASE_URL)
     cur = conn.cursor()
 
@@ -90,6 +97,7 @@ def main():
     skipped = 0
     failed = 0
     failed_names = []
+    touched_persons = set()
 
     print("=" * 60)
     print(f"📺 BATCH ADD TV SHOWS — {total} shows to process")
@@ -114,10 +122,14 @@ def main():
             year = tv.get("first_air_date", "")[:4] or "????"
             print(f"   ✓ Found: {tv_title} ({year}) — TMDB ID: {tv_id}")
 
-            if process_single_tv(cur, tv_id, tv_title, fetch_seasons=True):
+            show_persons = set()
+            if process_single_tv(cur, tv_id, tv_title, fetch_seasons=True,
+                                 touched_persons=show_persons,
+                                 aggregate_credits=args.aggregate_credits):
                 success += 1
                 # Commit after each show so we don't lose progress
                 conn.commit()
+                touched_persons.update(show_persons)
             else:
                 failed += 1
                 failed_names.append(show_name)
@@ -132,6 +144,13 @@ def main():
         # Small delay to respect TMDB rate limit (40 req / 10 sec)
         time.sleep(0.3)
 
+    # Refresh summaries once for every committed show
+    try:
+        run_post_ingest(conn, touched_persons)
+    except Exception as e:
+        print(f"   ❌ Post-ingest refresh failed: {e}")
+        conn.rollback()
+
     cur.close()
     conn.close()
 
@@ -0,0 +1,184 @@
+import psycopg2
+import os
+import random
+import string
+import statistics
+import time
+import argparse
+from psycopg2.extras import execute_values
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# ── DB CONFIG ───────────────────────────────
+# Use Neon DB connection string
+DATABASE_URL = os.getenv("DATABASE_URL")
+
+# The original matcher: one LIKE scan of the text per banned word.
+# Installed inside the benchmark transaction only, for comparison.
+LEGACY_CHECK_PROFANITY = """
+CREATE OR REPLACE FUNCTION fn_check_profanity(p_text TEXT)
+RETURNS TEXT AS $$
+DECLARE
+    v_word TEXT;
+BEGIN
+    IF p_text IS NULL THEN
+        RETURN NULL;
+    END IF;
+
+    SELECT bw.Word INTO v_word
+    FROM Banned_Words bw
+    WHERE LOWER(p_text) LIKE '%' || LOWER(bw.Word) || '%'
+    LIMIT 1;
+
+    RETURN v_word;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+# Blog text is built from these; banned words always contain a digit,
+# so no blog is ever rejected and every check scans the whole text.
+VOCABULARY = (
+    "the movie was a slow burn but the final act pays off with a quiet "
+    "ending that stays with you long after the credits roll and the score "
+    "carries every scene from the opening shot to the last frame"
+).split()
+
+
+# ══════════════════════════════════════════════
+# TEST DATA
+# ══════════════════════════════════════════════
+
+def banned_word(rng):
+    """Random lowercase word with a digit in it, e.g. 'kq7vzx'"""
+    letters = rng.choices(string.ascii_lowercase, k=rng.randint(4, 8))
+    letters.insert(rng.randrange(len(letters)), rng.choice(string.digits))
+    return "".join(letters)
+
+
+def blog_content(rng, size_kb):
+    words = []
+    size = 0
+    while size < size_kb * 1024:
+        word = rng.choice(VOCABULARY)
+        words.append(word)
+        size += len(word) + 1
+    return " ".join(words)
+
+
+def create_bench_user(cursor):
+    cursor.execute("""
+        INSERT INTO Users (FullName, Email, PasswordHash)
+        VALUES ('Profanity Bench', %s, 'x')
+        RETURNING UserID
+    """, (f"profanity-bench-{time.time_ns()}@example.com",))
+    return cursor.fetchone()[0]
+
+
+def add_banned_words(cursor, words):
+    """One INSERT statement → the pattern is rebuilt once by trg_banned_words_changed"""
+    execute_values(cursor, "INSERT INTO Banned_Words (Word) VALUES %s ON CONFLICT DO NOTHING",
+                   [(w,) for w in words], page_size=len(words))
+
+
+# ══════════════════════════════════════════════
+# BENCHMARK
+# ══════════════════════════════════════════════
+
+def time_blog_inserts(cursor, user_id, contents):
+    """Insert each blog once and return per-insert latencies in ms"""
+    latencies = []
+    for i, content in enumerate(contents):
+        started = time.perf_counter()
+        cursor.execute("""
+            INSERT INTO Blog (UserID, BlogTitle, Content)
+            VALUES (%s, %s, %s)
+        """, (user_id, f"Profanity bench {i}", content))
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+def summarize(latencies):
+    ordered = sorted(latencies)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return statistics.median(ordered), p95, statistics.mean(ordered)
+
+
+def bench(word_counts, blog_kb, inserts, seed):
+    """
+    Everything runs in one transaction that is rolled back at the end:
+    bench user, banned words, blogs and the temporary legacy matcher.
+    """
+    rng = random.Random(seed)
+    contents = [blog_content(rng, blog_kb) for _ in range(inserts)]
+
+    conn = psycopg2.connect(DATABASE_URL)
+    cur = conn.cursor()
+    results = []
+
+    print(f"🏁 Profanity filter bench: {inserts} blogs of {blog_kb} KB per run")
+    try:
+        user_id = create_bench_user(cur)
+
+        for count in word_counts:
+            cur.execute("SAVEPOINT word_list")
+            add_banned_words(cur, [banned_word(rng) for _ in range(count)])
+            cur.execute("SELECT COUNT(*) FROM Banned_Words")
+            total_words = cur.fetchone()[0]
+
+            for matcher in ("regex", "legacy LIKE"):
+                cur.execute("SAVEPOINT matcher")
+                if matcher == "legacy LIKE":
+                    cur.execute(LEGACY_CHECK_PROFANITY)
+                latencies = time_blog_inserts(cur, user_id, contents)
+                # Drops the blogs and, for the legacy run, restores the regex matcher
+                cur.execute("ROLLBACK TO SAVEPOINT matcher")
+
+                p50, p95, mean = summarize(latencies)
+                results.append((total_words, matcher, p50, p95, mean))
+                print(f"   {total_words:>6} words | {matcher:<11} | "
+                      f"p50 {p50:8.2f} ms | p95 {p95:8.2f} ms | mean {mean:8.2f} ms")
+
+            cur.execute("ROLLBACK TO SAVEPOINT word_list")
+
+    except Exception as e:
+        print(f"\n❌ Error: {e}")
+
+    finally:
+        # Nothing from the benchmark is kept
+        conn.rollback()
+        cur.close()
+        conn.close()
+
+    return results
+
+
+# ══════════════════════════════════════════════
+# COMMAND LINE INTERFACE
+# ══════════════════════════════════════════════
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare blog insert latency with the regex and legacy LIKE profanity matchers",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python bench_profanity.py                          # 1000 and 3000 banned words, 64 KB blogs
+  python bench_profanity.py --words 500 2000 5000
+  python bench_profanity.py --blog-kb 256 --inserts 20
+
+All changes are made in one transaction and rolled back.
+        """
+    )
+    parser.add_argument("--words", type=int, nargs="+", default=[1000, 3000],
+                        help="Extra banned words per run (default: 1000 3000)")
+    parser.add_argument("--blog-kb", type=int, default=64, help="Blog content size in KB (default: 64)")
+    parser.add_argument("--inserts", type=int, default=50, help="Blogs inserted per run (default: 50)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for words and content")
+    args = parser.parse_args()
+
+    bench(args.words, args.blog_kb, args.inserts, args.seed)
+
+
+if __name__ == "__main__":
+    main()
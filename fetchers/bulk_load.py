@@ -0,0 +1,461 @@
+import psycopg2
+import os
+import io
+import gzip
+import json
+import argparse
+from dotenv import load_dotenv
+
+import movie_fetcher
+import TVseries_fetcher
+from post_ingest import run_post_ingest, refresh_show_documents
+
+load_dotenv()
+
+# ── DB CONFIG ───────────────────────────────
+# Use Neon DB connection string
+DATABASE_URL = os.getenv("DATABASE_URL")
+
+# Titles staged between COPY flushes
+DEFAULT_BATCH_SIZE = 2000
+
+# ══════════════════════════════════════════════
+# STAGING LAYOUT
+# ══════════════════════════════════════════════
+#
+# Every catalogue table gets a TEMP staging twin (same columns, no keys).
+# Rows are streamed into them with COPY and merged into the real tables
+# at the end, in foreign-key order, with ON CONFLICT DO NOTHING so the
+# loader behaves exactly like the fetchers on titles that already exist.
+
+STAGING_COLUMNS = {
+    "Genre":       ["GenreID", "GenreName"],
+    "Studio":      ["StudioID", "StudioName", "LogoURL"],
+    "Person":      ["PersonID", "FullName", "Picture"],
+    "Media":       ["MediaID", "Title", "ReleaseYear", "Description", "LanguageName",
+                    "Rating", "Poster", "MediaType"],
+    "Movie":       ["MediaID", "Duration", "Budget", "Revenue"],
+    "TVSeries":    ["MediaID", "IsOngoing", "NumberOfSeasons"],
+    "Season":      ["MediaID", "SeasonNo", "SeasonTitle", "ReleaseDate", "Description",
+                    "AvgRating", "EpisodeCount"],
+    "Episode":     ["MediaID", "SeasonNo", "EpisodeNo", "EpisodeTitle", "Description",
+                    "Duration", "AvgRating", "StillPath"],
+    "Media_Genre": ["MediaID", "GenreID"],
+    "Production":  ["StudioID", "MediaID"],
+    "Crew":        ["PersonID", "MediaID", "CrewRole", "CharacterName", "EpisodeCount"],
+}
+
+# Merge order respects foreign keys; value is the conflict key used to
+# de-duplicate staged rows before they hit the real table.
+MERGE_ORDER = [
+    ("Genre",       ["GenreID"]),
+    ("Studio",      ["StudioID"]),
+    ("Person",      ["PersonID"]),
+    ("Media",       ["MediaID"]),
+    ("Movie",       ["MediaID"]),
+    ("TVSeries",    ["MediaID"]),
+    ("Season",      ["MediaID", "SeasonNo"]),
+    ("Episode",     ["MediaID", "SeasonNo", "EpisodeNo"]),
+    ("Media_Genre", ["MediaID", "GenreID"]),
+    ("Production",  ["StudioID", "MediaID"]),
+    ("Crew",        ["PersonID", "MediaID", "CrewRole"]),
+]
+
+# Columns computed from other staged columns during the merge (user triggers
+# such as trg_media_base_rating are disabled while loading).
+MERGE_DERIVED_COLUMNS = {
+    "Person":  [("SearchName", "fn_fold_name(FullName)")],
+    "Media":   [("BaseRating", "Rating"),
+                ("SearchVector", "fn_media_search_vector(Title, Description)")],
+    "Episode": [("BaseRating", "AvgRating")],
+}
+
+
+# ══════════════════════════════════════════════
+# COPY HELPERS
+# ══════════════════════════════════════════════
+
+def copy_value(value):
+    """Encode a single value for COPY ... FROM STDIN (text format)"""
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    text = str(value)
+    return (text.replace("\\", "\\\\")
+                .replace("\t", "\\t")
+                .replace("\n", "\\n")
+                .replace("\r", "\\r"))
+
+
+def copy_rows(cursor, table, columns, rows):
+    """Stream row tuples into a table with a single COPY; returns the row count"""
+    buffer = io.StringIO()
+    count = 0
+    for row in rows:
+        buffer.write("\t".join(copy_value(v) for v in row))
+        buffer.write("\n")
+        count += 1
+    if count == 0:
+        return 0
+    buffer.seek(0)
+    cursor.copy_expert(
+        f"COPY {table} ({', '.join(columns)}) FROM STDIN",
+        buffer
+    )
+    return count
+
+
+def staging_table(table):
+    """Name of the TEMP staging twin of a catalogue table"""
+    return f"stg_{table.lower()}"
+
+
+def create_staging_tables(cursor):
+    """Create empty TEMP staging tables shaped like the catalogue tables"""
+    for table, columns in STAGING_COLUMNS.items():
+        cursor.execute(f"""
+            CREATE TEMP TABLE {staging_table(table)} AS
+            SELECT {', '.join(columns)} FROM {table} WITH NO DATA
+        """)
+
+
+# ══════════════════════════════════════════════
+# INDEX / TRIGGER DEFERRAL
+# ══════════════════════════════════════════════
+
+def drop_secondary_indexes(cursor, tables):
+    """
+    Drop non-constraint indexes on the target tables and return their
+    definitions so they can be rebuilt once after the load.
+    Primary keys and UNIQUE constraints stay: the merge relies on them.
+    """
+    cursor.execute("""
+        SELECT i.indexrelid::regclass::text, pg_get_indexdef(i.indexrelid)
+        FROM pg_index i
+        JOIN pg_class t ON t.oid = i.indrelid
+        WHERE t.relname = ANY(%s)
+          AND pg_table_is_visible(t.oid)
+          AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = i.indexrelid)
+    """, ([t.lower() for t in tables],))
+    indexes = cursor.fetchall()
+    for name, _ in indexes:
+        cursor.execute(f"DROP INDEX {name}")
+    return [definition for _, definition in indexes]
+
+
+def set_user_triggers(cursor, tables, enabled):
+    """Enable/disable user-defined triggers (FK checks are left alone)"""
+    action = "ENABLE" if enabled else "DISABLE"
+    for table in tables:
+        cursor.execute(f"ALTER TABLE {table} {action} TRIGGER USER")
+
+
+# ══════════════════════════════════════════════
+# SOURCE READERS
+# ══════════════════════════════════════════════
+
+def open_text(path):
+    """Open a plain or gzipped text file"""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+
+def load_cached(cache_dir, name):
+    """Load <name>.json or <name>.json.gz from the cache dir (None if missing)"""
+    if not cache_dir:
+        return None
+    for candidate in (f"{name}.json", f"{name}.json.gz"):
+        path = os.path.join(cache_dir, candidate)
+        if os.path.exists(path):
+            with open_text(path) as f:
+                return json.load(f)
+    return None
+
+
+def is_detail_record(record):
+    """TMDB detail payloads carry genres; daily ID export lines don't"""
+    return "genres" in record
+
+
+def iter_records(source, cache_dir=None):
+    """
+    Stream TMDB detail records from a source:
+    - a directory of cached <id>.json / <id>.json.gz detail files
+    - a (gzipped) JSON-lines file of detail records
+    - a TMDB daily ID export (gzipped JSON lines of {"id": ...}), in which
+      case each ID is resolved against <cache_dir>/<id>.json
+    Credits and seasons are taken from the record itself (fetched with
+    append_to_response=credits,season/1,...) or from sibling cache files.
+    """
+    if os.path.isdir(source):
+        cache_dir = cache_dir or source
+        names = sorted({
+            f.split(".")[0] for f in os.listdir(source)
+            if f.endswith((".json", ".json.gz")) and f.split(".")[0].isdigit()
+        }, key=int)
+        for name in names:
+            record = load_cached(source, name)
+            if record:
+                yield record, cache_dir
+        return
+
+    with open_text(source) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if is_detail_record(record):
+                yield record, cache_dir
+                continue
+            # ID export line → resolve detail JSON from the local cache
+            if record.get("adult") or record.get("video"):
+                continue
+            details = load_cached(cache_dir, str(record["id"]))
+            if details:
+                yield details, cache_dir
+
+
+def record_credits(record, cache_dir):
+    """
+    Credits appended to the record (aggregate_credits preferred for TV),
+    or <id>_credits.json in the cache
+    """
+    if record.get("aggregate_credits"):
+        return TVseries_fetcher.flatten_aggregate_credits(record["aggregate_credits"])
+    return (record.get("credits")
+            or load_cached(cache_dir, f"{record['id']}_credits")
+            or {})
+
+
+def record_season(record, season_num, cache_dir):
+    """Season payload appended as 'season/N', or <id>_season_<N>.json"""
+    return (record.get(f"season/{season_num}")
+            or load_cached(cache_dir, f"{record['id']}_season_{season_num}"))
+
+
+# ══════════════════════════════════════════════
+# TRANSFORM (reuses the fetchers' row builders)
+# ══════════════════════════════════════════════
+
+def new_batch():
+    return {table: [] for table in STAGING_COLUMNS}
+
+
+def stage_common(batch, fetcher, media_id, details, credits, media_type):
+    """Rows shared by movies and TV shows: Media, genres, studios, credits"""
+    batch["Media"].append(fetcher.media_row(details) + (media_type,))
+
+    for genre in details.get("genres", []):
+        batch["Genre"].append(fetcher.genre_row(genre))
+        batch["Media_Genre"].append((media_id, genre["id"]))
+
+    companies = details.get("production_companies", []) + details.get("networks", [])
+    for company in companies:
+        batch["Studio"].append(fetcher.studio_row(company))
+        batch["Production"].append((company["id"], media_id))
+
+    for person, role, character_name in fetcher.select_credits(credits):
+        batch["Person"].append(fetcher.person_row(person))
+        batch["Crew"].append((person["id"], media_id, role, character_name, person.get("episode_count")))
+
+
+def stage_movie(batch, details, cache_dir):
+    """Turn one cached movie into staged rows"""
+    credits = record_credits(details, cache_dir)
+    stage_common(batch, movie_fetcher, details["id"], details, credits, "Movie")
+    batch["Movie"].append(movie_fetcher.movie_row(details))
+
+
+def stage_tv(batch, details, cache_dir):
+    """Turn one cached TV show (plus any cached seasons) into staged rows"""
+    tv_id = details["id"]
+    credits = record_credits(details, cache_dir)
+    stage_common(batch, TVseries_fetcher, tv_id, details, credits, "TVSeries")
+    batch["TVSeries"].append(TVseries_fetcher.tvseries_row(details))
+
+    for season_num in range(1, (details.get("number_of_seasons") or 0) + 1):
+        season = record_season(details, season_num, cache_dir)
+        if not season:
+            continue
+        batch["Season"].append(TVseries_fetcher.season_row(tv_id, season))
+        for episode in season.get("episodes", []):
+            batch["Episode"].append(TVseries_fetcher.episode_row(tv_id, season_num, episode))
+
+
+def flush_batch(cursor, batch):
+    """COPY a batch of staged rows into the TEMP tables"""
+    for table, rows in batch.items():
+        copy_rows(cursor, staging_table(table), STAGING_COLUMNS[table], rows)
+
+
+# ══════════════════════════════════════════════
+# MERGE
+# ══════════════════════════════════════════════
+
+def merge_staging(cursor):
+    """Merge every staging table into its real table in FK order"""
+    counts = {}
+    for table, key in MERGE_ORDER:
+        derived = MERGE_DERIVED_COLUMNS.get(table, [])
+        columns = ", ".join(STAGING_COLUMNS[table] + [target for target, _ in derived])
+        select_columns = ", ".join(STAGING_COLUMNS[table] + [source for _, source in derived])
+        cursor.execute(f"""
+            INSERT INTO {table} ({columns})
+            SELECT DISTINCT ON ({', '.join(key)}) {select_columns}
+            FROM {staging_table(table)}
+            ORDER BY {', '.join(key)}
+            ON CONFLICT ({', '.join(key)}) DO NOTHING
+        """)
+        counts[table] = cursor.rowcount
+    return counts
+
+
+# ══════════════════════════════════════════════
+# MAIN FUNCTION
+# ══════════════════════════════════════════════
+
+def bulk_load(movie_sources=(), tv_sources=(), cache_dir=None,
+              batch_size=DEFAULT_BATCH_SIZE, defer_indexes=True):
+    """Stream cached TMDB data into the catalogue via COPY + merge"""
+    conn = psycopg2.connect(DATABASE_URL)
+    cur = conn.cursor()
+
+    tables = [table for table, _ in MERGE_ORDER]
+
+    try:
+        create_staging_tables(cur)
+
+        # Nothing is visible to other sessions until COMMIT, so deferring
+        # index maintenance and triggers is safe inside this transaction.
+        # (The DDL locks the catalogue tables for the duration: seed-time only.)
+        index_definitions = []
+        if defer_indexes:
+            index_definitions = drop_secondary_indexes(cur, tables)
+            print(f"⏸️  Deferred {len(index_definitions)} secondary indexes")
+        set_user_triggers(cur, tables, enabled=False)
+
+        staged = 0
+        for kind, sources, stage in (("movies", movie_sources, stage_movie),
+                                     ("TV shows", tv_sources, stage_tv)):
+            for source in sources:
+                print(f"\n📥 Streaming {kind} from {source}...")
+                batch = new_batch()
+                pending = 0
+                for record, record_cache in iter_records(source, cache_dir):
+                    stage(batch, record, record_cache)
+                    pending += 1
+                    if pending >= batch_size:
+                        flush_batch(cur, batch)
+                        staged += pending
+                        print(f"   → {staged} titles staged")
+                        batch, pending = new_batch(), 0
+                flush_batch(cur, batch)
+                staged += pending
+                print(f"   → {staged} titles staged")
+
+        print("\n🔀 Merging staging tables...")
+        counts = merge_staging(cur)
+        for table, count in counts.items():
+            print(f"   • {table:<12} {count} new rows")
+
+        cur.execute(f"SELECT DISTINCT PersonID FROM {staging_table('Crew')} WHERE CrewRole = 'Actor'")
+        loaded_actors = {person_id for person_id, in cur.fetchall()}
+
+        set_user_triggers(cur, tables, enabled=True)
+        if index_definitions:
+            print(f"\n🔨 Rebuilding {len(index_definitions)} indexes...")
+            for definition in index_definitions:
+                cur.execute(definition)
+
+        # Built after the index rebuild: each document is several keyed lookups
+        cur.execute(f"SELECT DISTINCT MediaID FROM {staging_table('TVSeries')}")
+        rebuilt = refresh_show_documents(cur, [media_id for media_id, in cur.fetchall()])
+        if rebuilt:
+            print(f"📄 Built {rebuilt} show documents")
+
+        conn.commit()
+        run_post_ingest(conn, loaded_actors)
+
+        # Refresh planner stats for the freshly loaded rows
+        for table in tables:
+            cur.execute(f"ANALYZE {table}")
+        conn.commit()
+
+        print("\n" + "="*50)
+        print(f"✅ SUCCESS! {staged} titles bulk-loaded.")
+        print("="*50)
+
+    except Exception as e:
+        conn.rollback()
+        print(f"\n❌ Error: {e}")
+
+    finally:
+        cur.close()
+        conn.close()
+
+
+# ══════════════════════════════════════════════
+# COMMAND LINE INTERFACE
+# ══════════════════════════════════════════════
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Seed the catalogue from local TMDB dumps using COPY",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python bulk_load.py --movies cache/movie                      # Directory of <id>.json details
+  python bulk_load.py --movies movies.jsonl.gz                  # JSON lines of detail records
+  python bulk_load.py --tv tv_series_ids_10_19_2026.json.gz --cache-dir cache/tv
+                                                                # TMDB daily ID export + cache
+        """
+    )
+
+    parser.add_argument(
+        "--movies",
+        action="append",
+        default=[],
+        help="Movie source: cache directory, detail JSONL(.gz) or TMDB ID export (repeatable)"
+    )
+    parser.add_argument(
+        "--tv",
+        action="append",
+        default=[],
+        help="TV source: cache directory, detail JSONL(.gz) or TMDB ID export (repeatable)"
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        help="Directory holding cached <id>.json detail files for ID exports"
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help=f"Titles staged per COPY flush (default: {DEFAULT_BATCH_SIZE})"
+    )
+    parser.add_argument(
+        "--keep-indexes",
+        action="store_true",
+        help="Maintain secondary indexes during the load instead of rebuilding them"
+    )
+
+    args = parser.parse_args()
+
+    if not args.movies and not args.tv:
+        parser.error("nothing to load: pass --movies and/or --tv")
+
+    bulk_load(
+        movie_sources=args.movies,
+        tv_sources=args.tv,
+        cache_dir=args.cache_dir,
+        batch_size=args.batch_size,
+        defer_indexes=not args.keep_indexes
+    )
+
+
+if __name__ == "__main__":
+    main()
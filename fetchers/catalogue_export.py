@@ -0,0 +1,394 @@
+import psycopg2
+import os
+import json
+import gzip
+import time
+import argparse
+from datetime import date
+from decimal import Decimal
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# ── DB CONFIG ───────────────────────────────
+# Use Neon DB connection string
+DATABASE_URL = os.getenv("DATABASE_URL")
+
+# Media rows per keyset page (each page is hydrated with a fixed number of queries)
+DEFAULT_PAGE_SIZE = 500
+
+# Parquet output is split into parts so an interrupted export only loses the open part
+DEFAULT_ROWS_PER_PART = 100_000
+
+MEDIA_TYPES = {"movie": "Movie", "tv": "TVSeries"}
+
+# ══════════════════════════════════════════════
+# EXPORT FORMAT
+# ══════════════════════════════════════════════
+#
+# One record per Media row, in MediaID order:
+#   media_id, title, release_year, description, language, rating, rating_count,
+#   media_type, poster, duration, budget, revenue, currency, trailer_link,
+#   is_ongoing, number_of_seasons,
+#   genres  [{id, name}]            studios [{id, name}]
+#   crew    [{person_id, name, role, character, episode_count}]
+#   seasons [{season_no, title, release_date, description, avg_rating,
+#             episode_count, episodes [{episode_no, title, description,
+#             duration, avg_rating, rating_count, still_path}]}]
+#
+# Pages are selected with `WHERE MediaID > last_id ORDER BY MediaID LIMIT n`
+# (a primary key range scan at any depth, unlike /movies?page=N), then
+# hydrated with one `= ANY(page_ids)` query per child table.
+
+PAGE_QUERY = """
+    SELECT m.MediaID, m.Title, m.ReleaseYear, m.Description, m.LanguageName,
+           m.Rating, m.RatingCount, m.MediaType::text, m.Poster,
+           mv.Duration, mv.Budget, mv.Revenue, mv.Currency, mv.TrailerLink,
+           tv.IsOngoing, tv.NumberOfSeasons
+    FROM Media m
+    LEFT JOIN Movie mv ON mv.MediaID = m.MediaID
+    LEFT JOIN TVSeries tv ON tv.MediaID = m.MediaID
+    WHERE m.MediaID > %(after)s
+      AND (%(media_type)s::text IS NULL OR m.MediaType::text = %(media_type)s)
+    ORDER BY m.MediaID
+    LIMIT %(limit)s
+"""
+
+MEDIA_FIELDS = [
+    "media_id", "title", "release_year", "description", "language", "rating", "rating_count",
+    "media_type", "poster", "duration", "budget", "revenue", "currency", "trailer_link",
+    "is_ongoing", "number_of_seasons",
+]
+
+# (record key, query, child fields after the leading MediaID column)
+CHILD_QUERIES = [
+    ("genres", """
+        SELECT mg.MediaID, g.GenreID, g.GenreName
+        FROM Media_Genre mg
+        JOIN Genre g ON g.GenreID = mg.GenreID
+        WHERE mg.MediaID = ANY(%s)
+        ORDER BY mg.MediaID, g.GenreID
+    """, ["id", "name"]),
+    ("studios", """
+        SELECT p.MediaID, s.StudioID, s.StudioName
+        FROM Production p
+        JOIN Studio s ON s.StudioID = p.StudioID
+        WHERE p.MediaID = ANY(%s)
+        ORDER BY p.MediaID, s.StudioID
+    """, ["id", "name"]),
+    ("crew", """
+        SELECT c.MediaID, c.PersonID, p.FullName, c.CrewRole, c.CharacterName, c.EpisodeCount
+        FROM Crew c
+        JOIN Person p ON p.PersonID = c.PersonID
+        WHERE c.MediaID = ANY(%s)
+        ORDER BY c.MediaID, c.CrewRole, c.PersonID
+    """, ["person_id", "name", "role", "character", "episode_count"]),
+    ("seasons", """
+        SELECT MediaID, SeasonNo, SeasonTitle, ReleaseDate, Description, AvgRating, EpisodeCount
+        FROM Season
+        WHERE MediaID = ANY(%s)
+        ORDER BY MediaID, SeasonNo
+    """, ["season_no", "title", "release_date", "description", "avg_rating", "episode_count"]),
+]
+
+EPISODE_QUERY = """
+    SELECT MediaID, SeasonNo, EpisodeNo, EpisodeTitle, Description, Duration,
+           AvgRating, RatingCount, StillPath
+    FROM Episode
+    WHERE MediaID = ANY(%s)
+    ORDER BY MediaID, SeasonNo, EpisodeNo
+"""
+EPISODE_FIELDS = ["episode_no", "title", "description", "duration", "avg_rating", "rating_count", "still_path"]
+
+
+def plain(value):
+    """DECIMAL → float; everything else is already JSON / Arrow friendly"""
+    return float(value) if isinstance(value, Decimal) else value
+
+
+def as_dict(fields, row):
+    return {field: plain(value) for field, value in zip(fields, row)}
+
+
+# ══════════════════════════════════════════════
+# PAGES
+# ══════════════════════════════════════════════
+
+def fetch_page(cursor, after, limit, media_type=None):
+    """
+    Next `limit` Media records after MediaID `after`, fully hydrated.
+    Runs a fixed number of queries regardless of page size.
+    """
+    cursor.execute(PAGE_QUERY, {"after": after, "limit": limit, "media_type": media_type})
+    records = [as_dict(MEDIA_FIELDS, row) for row in cursor.fetchall()]
+    if not records:
+        return records
+
+    by_id = {}
+    for record in records:
+        for key, _, _ in CHILD_QUERIES:
+            record[key] = []
+        by_id[record["media_id"]] = record
+    page_ids = list(by_id)
+
+    for key, query, fields in CHILD_QUERIES:
+        cursor.execute(query, (page_ids,))
+        for row in cursor.fetchall():
+            by_id[row[0]][key].append(as_dict(fields, row[1:]))
+
+    seasons = {}
+    for record in records:
+        for season in record["seasons"]:
+            season["episodes"] = []
+            seasons[(record["media_id"], season["season_no"])] = season
+    if seasons:
+        cursor.execute(EPISODE_QUERY, (page_ids,))
+        for row in cursor.fetchall():
+            season = seasons.get((row[0], row[1]))
+            if season is not None:
+                season["episodes"].append(as_dict(EPISODE_FIELDS, row[2:]))
+
+    return records
+
+
+def iter_pages(conn, after=0, page_size=DEFAULT_PAGE_SIZE, media_type=None):
+    """
+    Yield pages of records in MediaID order. Each page is read in its own
+    short REPEATABLE READ transaction, so no snapshot is held for the whole
+    export and memory is bounded by one page.
+    """
+    while True:
+        with conn.cursor() as cur:
+            records = fetch_page(cur, after, page_size, media_type)
+        conn.rollback()
+        if not records:
+            return
+        after = records[-1]["media_id"]
+        yield records
+
+
+# ══════════════════════════════════════════════
+# WRITERS
+# ══════════════════════════════════════════════
+
+def json_default(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Not JSON serializable: {type(value).__name__}")
+
+
+class NdjsonWriter:
+    """
+    Appends each page to the output (as its own gzip member for .gz) and
+    reports the byte offset after it, so a resume can truncate a page that
+    was written but not recorded in the cursor file.
+    """
+
+    def __init__(self, path, offset=0):
+        self.path = path
+        self.compress = path.endswith(".gz")
+        self.file = open(path, "r+b" if offset else "wb")
+        self.file.truncate(offset)
+        self.file.seek(offset)
+
+    def write_page(self, records):
+        data = "".join(json.dumps(r, default=json_default, ensure_ascii=False) + "\n" for r in records)
+        data = data.encode("utf-8")
+        self.file.write(gzip.compress(data) if self.compress else data)
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        return {"offset": self.file.tell()}
+
+    def close(self):
+        self.file.close()
+        return {"offset": os.path.getsize(self.path)}
+
+
+def parquet_schema(pa):
+    named = pa.list_(pa.struct([("id", pa.int32()), ("name", pa.string())]))
+    episode = pa.struct([
+        ("episode_no", pa.int32()), ("title", pa.string()), ("description", pa.string()),
+        ("duration", pa.int32()), ("avg_rating", pa.float64()), ("rating_count", pa.int32()),
+        ("still_path", pa.string()),
+    ])
+    season = pa.struct([
+        ("season_no", pa.int32()), ("title", pa.string()), ("release_date", pa.date32()),
+        ("description", pa.string()), ("avg_rating", pa.float64()), ("episode_count", pa.int32()),
+        ("episodes", pa.list_(episode)),
+    ])
+    crew = pa.struct([
+        ("person_id", pa.int32()), ("name", pa.string()), ("role", pa.string()), ("character", pa.string()),
+        ("episode_count", pa.int32()),
+    ])
+    return pa.schema([
+        ("media_id", pa.int32()), ("title", pa.string()), ("release_year", pa.int32()),
+        ("description", pa.string()), ("language", pa.string()), ("rating", pa.float64()),
+        ("rating_count", pa.int32()), ("media_type", pa.string()), ("poster", pa.string()),
+        ("duration", pa.int32()), ("budget", pa.float64()), ("revenue", pa.float64()),
+        ("currency", pa.string()), ("trailer_link", pa.string()), ("is_ongoing", pa.bool_()),
+        ("number_of_seasons", pa.int32()),
+        ("genres", named), ("studios", named), ("crew", pa.list_(crew)), ("seasons", pa.list_(season)),
+    ])
+
+
+class ParquetWriter:
+    """
+    Writes <out_dir>/part-NNNNN.parquet, one row group per page. A part is
+    written under a .tmp name and renamed when closed; the cursor only
+    advances past closed parts, so a resume restarts the open part.
+    """
+
+    def __init__(self, out_dir, part=0, rows_per_part=DEFAULT_ROWS_PER_PART):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("❌ Parquet export needs pyarrow (pip install pyarrow), or use .ndjson / .ndjson.gz")
+        self.pa, self.pq = pa, pq
+        self.schema = parquet_schema(pa)
+        self.out_dir = out_dir
+        self.part = part
+        self.rows_per_part = rows_per_part
+        self.writer = None
+        self.rows = 0
+        os.makedirs(out_dir, exist_ok=True)
+
+    def part_path(self):
+        return os.path.join(self.out_dir, f"part-{self.part:05d}.parquet")
+
+    def write_page(self, records):
+        if self.writer is None:
+            self.writer = self.pq.ParquetWriter(self.part_path() + ".tmp", self.schema, compression="zstd")
+        self.writer.write_table(self.pa.Table.from_pylist(records, schema=self.schema))
+        self.rows += len(records)
+        if self.rows >= self.rows_per_part:
+            return self.close()
+        return None
+
+    def close(self):
+        """Finish the open part (if any); returns the cursor fields to persist"""
+        if self.writer is not None:
+            self.writer.close()
+            os.replace(self.part_path() + ".tmp", self.part_path())
+            self.writer = None
+            self.rows = 0
+            self.part += 1
+        return {"part": self.part}
+
+
+# ══════════════════════════════════════════════
+# EXPORT
+# ══════════════════════════════════════════════
+
+def load_cursor(path):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_cursor(path, state):
+    """Write-then-rename, so the cursor file is never half written"""
+    with open(path + ".tmp", "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+def export_catalogue(out, fmt="ndjson", cursor_path=None, resume=False, after=0,
+                     page_size=DEFAULT_PAGE_SIZE, media_type=None, rows_per_part=DEFAULT_ROWS_PER_PART):
+    """Stream the catalogue to `out` (a file for NDJSON, a directory for Parquet)"""
+    cursor_path = cursor_path or (os.path.join(out, "cursor.json") if fmt == "parquet" else f"{out}.cursor.json")
+    state = {"format": fmt, "media_type": media_type, "last_media_id": after, "records": 0}
+
+    if resume:
+        saved = load_cursor(cursor_path)
+        if saved:
+            if saved["format"] != fmt or saved.get("media_type") != media_type:
+                print(f"❌ Cursor {cursor_path} was written by a {saved['format']} / "
+                      f"{saved.get('media_type') or 'all'} export")
+                return
+            state = saved
+            print(f"↩️  Resuming after MediaID {state['last_media_id']} ({state['records']} records written)")
+        else:
+            print(f"⚠️ No cursor at {cursor_path}, starting from the beginning")
+
+    if fmt == "parquet":
+        writer = ParquetWriter(out, state.get("part", 0), rows_per_part)
+    else:
+        writer = NdjsonWriter(out, state.get("offset", 0))
+
+    conn = psycopg2.connect(DATABASE_URL)
+    conn.set_session(isolation_level="REPEATABLE READ", readonly=True)
+
+    # Parquet: the cursor only moves when a part is closed
+    pending = dict(state)
+    started = time.perf_counter()
+    written = 0
+    pages = 0
+    print(f"📤 Exporting {media_type or 'all media'} to {out} ({fmt}, {page_size} per page)")
+    try:
+        for records in iter_pages(conn, state["last_media_id"], page_size, media_type):
+            pending["last_media_id"] = records[-1]["media_id"]
+            pending["records"] += len(records)
+            written += len(records)
+            flushed = writer.write_page(records)
+            if flushed is not None:
+                state = {**pending, **flushed}
+                save_cursor(cursor_path, state)
+            pages += 1
+            if pages % 20 == 0:
+                print(f"   → {pending['records']} records (MediaID {pending['last_media_id']}, "
+                      f"{written / (time.perf_counter() - started):.0f} records/s)")
+
+        state = {**pending, **writer.close()}
+        save_cursor(cursor_path, state)
+        print(f"\n✅ Exported {written} records in {time.perf_counter() - started:.1f}s "
+              f"({state['records']} total, cursor: {cursor_path})")
+
+    except Exception as e:
+        print(f"\n❌ Error: {e}")
+        print(f"   Re-run with --resume to continue after MediaID {state['last_media_id']}")
+
+    finally:
+        conn.close()
+
+
+# ══════════════════════════════════════════════
+# COMMAND LINE INTERFACE
+# ══════════════════════════════════════════════
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Stream the full catalogue (media, genres, studios, crew, seasons, episodes)",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python catalogue_export.py catalogue.ndjson.gz              # Everything, gzipped JSON lines
+  python catalogue_export.py catalogue.ndjson.gz --resume     # Continue an interrupted export
+  python catalogue_export.py movies.ndjson --type movie
+  python catalogue_export.py catalogue_parquet/ --format parquet   # Needs pyarrow
+
+The cursor file (<out>.cursor.json, or cursor.json inside a Parquet
+directory) records the last exported MediaID.
+        """
+    )
+    parser.add_argument("out", help="Output file (NDJSON) or directory (Parquet)")
+    parser.add_argument("--format", choices=["ndjson", "parquet"],
+                        help="Output format (default: parquet if OUT ends in .parquet or /, else ndjson)")
+    parser.add_argument("--type", choices=list(MEDIA_TYPES), help="Only movies or only TV series")
+    parser.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE,
+                        help=f"Media rows per page (default: {DEFAULT_PAGE_SIZE})")
+    parser.add_argument("--rows-per-part", type=int, default=DEFAULT_ROWS_PER_PART,
+                        help=f"Records per Parquet part file (default: {DEFAULT_ROWS_PER_PART})")
+    parser.add_argument("--cursor", help="Cursor file path")
+    parser.add_argument("--resume", action="store_true", help="Continue from the cursor file")
+    parser.add_argument("--after", type=int, default=0, help="Start after this MediaID (ignored with --resume)")
+    args = parser.parse_args()
+
+    fmt = args.format or ("parquet" if args.out.endswith((".parquet", "/")) else "ndjson")
+    export_catalogue(args.out.rstrip("/") if fmt == "parquet" else args.out, fmt, args.cursor, args.resume,
+                     args.after, args.page_size, MEDIA_TYPES.get(args.type), args.rows_per_part)
+
+
+if __name__ == "__main__":
+    main()
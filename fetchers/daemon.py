@@ -0,0 +1,229 @@
+import os
+import sys
+import time
+import signal
+import socket
+import argparse
+
+# dotenv, psycopg2, requests and the fetcher modules are imported by
+# serve() / run_local() only: `send` is the per-ID command cron and webhooks
+# run, and it needs nothing but a socket (so FETCHER_SOCKET has to come from
+# the environment, not .env)
+
+# ── DAEMON CONFIG ───────────────────────────
+SOCKET_PATH = os.getenv("FETCHER_SOCKET", "/tmp/cholochitro-fetcher.sock")
+KINDS = ("movie", "tv")
+
+
+# ══════════════════════════════════════════════
+# INGEST (daemon side)
+# ══════════════════════════════════════════════
+
+_connection = None
+
+
+def daemon_connection():
+    """The daemon's connection, reopened if the server dropped it"""
+    global _connection
+    import psycopg2
+    from dotenv import load_dotenv
+    if _connection is None or _connection.closed:
+        load_dotenv()
+        # Use Neon DB connection string
+        _connection = psycopg2.connect(os.getenv("DATABASE_URL"))
+    return _connection
+
+
+def load_ingesters():
+    """Import the fetchers once; returns {kind: process_single_*}"""
+    from movie_fetcher import process_single_movie
+    from TVseries_fetcher import process_single_tv
+    return {"movie": process_single_movie, "tv": process_single_tv}
+
+
+def ingest_one(ingesters, kind, tmdb_id):
+    """Add one title in its own transaction, same as `--id`; returns True if committed"""
+    from post_ingest import run_post_ingest
+    conn = daemon_connection()
+    cur = conn.cursor()
+    touched_persons = set()
+    try:
+        if ingesters[kind](cur, tmdb_id, touched_persons=touched_persons):
+            conn.commit()
+            run_post_ingest(conn, touched_persons)
+            return True
+        conn.rollback()
+        return False
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+
+
+def handle_line(ingesters, line):
+    """One request line ("movie 550", "tv 1396" or "ping") → one reply line"""
+    parts = line.split()
+    if parts == ["ping"]:
+        return "pong"
+    if len(parts) != 2 or parts[0] not in KINDS or not parts[1].isdigit():
+        return f"error bad request: {line.strip()!r}"
+
+    kind, tmdb_id = parts[0], int(parts[1])
+    started = time.perf_counter()
+    try:
+        ok = ingest_one(ingesters, kind, tmdb_id)
+    except Exception as e:
+        return f"error {kind} {tmdb_id}: {e}"
+    status = "ok" if ok else "failed"
+    return f"{status} {kind} {tmdb_id} {time.perf_counter() - started:.2f}s"
+
+
+def stop(signum, frame):
+    raise KeyboardInterrupt
+
+
+def serve(socket_path=SOCKET_PATH):
+    """
+    Accept request lines on a Unix socket until interrupted. Imports, the
+    DB connection and the shared-entity connection are set up once, so each
+    ID costs only its TMDB calls and inserts. Requests run one at a time.
+    """
+    ingesters = load_ingesters()
+    daemon_connection()
+
+    if os.path.exists(socket_path):
+        if ping(socket_path):
+            print(f"❌ A daemon is already listening on {socket_path}")
+            return
+        os.unlink(socket_path)
+
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(socket_path)
+    os.chmod(socket_path, 0o660)
+    server.listen()
+    signal.signal(signal.SIGTERM, stop)
+    print(f"👂 Listening on {socket_path}")
+
+    handled = 0
+    try:
+        while True:
+            client, _ = server.accept()
+            with client, client.makefile("rw", encoding="utf-8") as stream:
+                for line in stream:
+                    reply = handle_line(ingesters, line)
+                    stream.write(reply + "\n")
+                    stream.flush()
+                    print(f"   {reply}")
+                    handled += 1
+
+    except KeyboardInterrupt:
+        print(f"\n⏹️  Stopped after {handled} requests")
+
+    finally:
+        server.close()
+        os.unlink(socket_path)
+        if _connection is not None:
+            _connection.close()
+
+
+# ══════════════════════════════════════════════
+# CLIENT
+# ══════════════════════════════════════════════
+
+def ping(socket_path=SOCKET_PATH):
+    """True if a daemon answers on socket_path"""
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.settimeout(2)
+            client.connect(socket_path)
+            client.sendall(b"ping\n")
+            return client.makefile("r", encoding="utf-8").readline().strip() == "pong"
+    except OSError:
+        return False
+
+
+def send(kind, tmdb_ids, socket_path=SOCKET_PATH):
+    """Hand IDs to the daemon, printing each reply; returns the number that did not commit"""
+    failed = 0
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(socket_path)
+        with client.makefile("rw", encoding="utf-8") as stream:
+            for tmdb_id in tmdb_ids:
+                stream.write(f"{kind} {tmdb_id}\n")
+                stream.flush()
+                reply = stream.readline().strip()
+                if not reply:
+                    raise ConnectionError("daemon closed the connection")
+                print(("✅ " if reply.startswith("ok ") else "❌ ") + reply)
+                failed += not reply.startswith("ok ")
+    return failed
+
+
+def run_local(kind, tmdb_ids):
+    """No daemon: add the IDs in this process (the `--fallback` path)"""
+    ingesters = load_ingesters()
+    failed = 0
+    try:
+        for tmdb_id in tmdb_ids:
+            reply = handle_line(ingesters, f"{kind} {tmdb_id}")
+            print(("✅ " if reply.startswith("ok ") else "❌ ") + reply)
+            failed += not reply.startswith("ok ")
+    finally:
+        if _connection is not None:
+            _connection.close()
+    return failed
+
+
+# ══════════════════════════════════════════════
+# COMMAND LINE INTERFACE
+# ══════════════════════════════════════════════
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Long-lived fetcher daemon: add TMDB IDs sent over a local socket",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=f"""
+Examples:
+  python daemon.py serve                          # Listen on {SOCKET_PATH}
+  python daemon.py send movie 550 680             # Add two movies through the daemon
+  python daemon.py send tv 1396 --fallback        # Add in-process if no daemon is running
+
+Also available as `python -m fetchers serve` / `python -m fetchers send ...`.
+Set FETCHER_SOCKET to use another socket path. `send` exits 1 if any ID
+was not added.
+        """
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = sub.add_parser("serve", help="Run the daemon")
+
+    send_parser = sub.add_parser("send", help="Send IDs to the daemon")
+    send_parser.add_argument("kind", choices=KINDS)
+    send_parser.add_argument("ids", type=int, nargs="+", metavar="ID")
+    send_parser.add_argument("--fallback", action="store_true",
+                             help="Add the IDs in this process if the daemon is not running")
+
+    for p in (serve_parser, send_parser):
+        p.add_argument("--socket", default=SOCKET_PATH,
+                       help=f"Unix socket path (default: {SOCKET_PATH})")
+
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        serve(args.socket)
+        return
+
+    try:
+        failed = send(args.kind, args.ids, args.socket)
+    except (FileNotFoundError, ConnectionRefusedError):
+        if not args.fallback:
+            print(f"❌ No daemon listening on {args.socket} (start one with `serve`, or pass --fallback)")
+            sys.exit(1)
+        failed = run_local(args.kind, args.ids)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+import psycopg2
+import os
+import argparse
+from dotenv import load_dotenv
+
+from movie_fetcher import process_single_movie
+from TVseries_fetcher import process_single_tv
+from post_ingest import run_post_ingest
+from tmdb_client import clear_dead_letter
+
+load_dotenv()
+
+# ── DB CONFIG ───────────────────────────────
+# Use Neon DB connection string
+DATABASE_URL = os.getenv("DATABASE_URL")
+
+INGESTERS = {"movie": process_single_movie, "tv": process_single_tv}
+
+
+# ══════════════════════════════════════════════
+# DEAD LETTERS
+# ══════════════════════════════════════════════
+
+def load_dead_letters(cursor, media_type=None, limit=None):
+    """Oldest failures first"""
+    cursor.execute("""
+        SELECT MediaType, TmdbID, Failures, Source, Error, LastFailedAt
+        FROM Ingest_Dead_Letter
+        WHERE %(type)s::text IS NULL OR MediaType = %(type)s
+        ORDER BY FirstFailedAt, MediaType, TmdbID
+        LIMIT %(limit)s
+    """, {"type": media_type, "limit": limit})
+    return cursor.fetchall()
+
+
+def list_dead_letters(media_type=None, limit=None):
+    conn = psycopg2.connect(DATABASE_URL)
+    cur = conn.cursor()
+    try:
+        rows = load_dead_letters(cur, media_type, limit)
+        print(f"📭 {len(rows)} dead letters")
+        for kind, tmdb_id, failures, source, error, last_failed in rows:
+            print(f"   {kind:<5} {tmdb_id:>8}  {failures}× (last {last_failed:%Y-%m-%d %H:%M}, {source}): {error}")
+    finally:
+        cur.close()
+        conn.close()
+
+
+def retry_dead_letters(media_type=None, limit=None, queue=False):
+    """
+    Ingest every dead letter again, one commit per title; a title that
+    succeeds (or is already in Media) leaves the list, one that fails again
+    stays with Failures + 1. queue=True hands them to ingest_service.py
+    through Ingest_Request instead.
+    """
+    conn = psycopg2.connect(DATABASE_URL)
+    cur = conn.cursor()
+    done = failed = 0
+    touched_persons = set()
+
+    try:
+        rows = load_dead_letters(cur, media_type, limit)
+        conn.commit()
+        print(f"🔁 Retrying {len(rows)} dead letters" + (" via Ingest_Request" if queue else ""))
+
+        for kind, tmdb_id, *_ in rows:
+            if queue:
+                cur.execute("SELECT fn_request_ingest(%s, %s, %s)", (kind, tmdb_id, "dead_letters"))
+                clear_dead_letter(cur, kind, tmdb_id)
+                conn.commit()
+                done += 1
+                continue
+
+            cur.execute("SELECT 1 FROM Media WHERE MediaID = %s", (tmdb_id,))
+            if cur.fetchone():
+                clear_dead_letter(cur, kind, tmdb_id)
+                conn.commit()
+                done += 1
+                continue
+
+            title_persons = set()
+            # process_single_* takes the title off the list in the transaction it commits
+            if INGESTERS[kind](cur, tmdb_id, touched_persons=title_persons):
+                conn.commit()
+                touched_persons.update(title_persons)
+                done += 1
+            else:
+                # process_single_* recorded the new failure
+                conn.rollback()
+                failed += 1
+
+        run_post_ingest(conn, touched_persons)
+        print(f"\n✅ {done} recovered, {failed} still failing")
+
+    except Exception as e:
+        conn.rollback()
+        print(f"\n❌ Error: {e}")
+
+    finally:
+        cur.close()
+        conn.close()
+
+
+# ══════════════════════════════════════════════
+# COMMAND LINE INTERFACE
+# ══════════════════════════════════════════════
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="List or retry titles the fetchers could not ingest (Ingest_Dead_Letter)",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python dead_letters.py list
+  python dead_letters.py retry                    # Ingest them again here
+  python dead_letters.py retry --type tv --limit 100
+  python dead_letters.py retry --queue            # Hand them to ingest_service.py
+
+Titles land here when TMDB keeps failing through tmdb_client's retries
+(5xx, 429, timeouts) or the insert fails; titles TMDB does not have (404)
+are not recorded.
+        """
+    )
+    parser.add_argument("command", choices=["list", "retry"])
+    parser.add_argument("--type", choices=sorted(INGESTERS), help="Only movies or only TV shows")
+    parser.add_argument("--limit", type=int, help="At most this many, oldest first")
+    parser.add_argument("--queue", action="store_true",
+                        help="retry: queue in Ingest_Request instead of ingesting here")
+    args = parser.parse_args()
+
+    if args.command == "list":
+        list_dead_letters(args.type, args.limit)
+    else:
+        retry_dead_letters(args.type, args.limit, args.queue)
+
+
+if __name__ == "__main__":
+    main()
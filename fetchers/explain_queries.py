@@ -0,0 +1,357 @@
+import psycopg2
+import os
+import re
+import json
+import argparse
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# ── DB CONFIG ───────────────────────────────
+# Use Neon DB connection string
+DATABASE_URL = os.getenv("DATABASE_URL")
+
+# The index pack is read from its migration so the two never drift apart
+INDEX_PACK_MIGRATION = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                    "..", "migrations", "20261019_index_pack.sql")
+
+# ══════════════════════════════════════════════
+# QUERY SET
+# ══════════════════════════════════════════════
+#
+# Shapes copied from server.js endpoints, the fetchers and sp_delete_user.
+# %(name)s parameters are filled from SAMPLE_QUERIES; a query is skipped
+# when one of its samples has no row to come from. Every query runs under
+# a savepoint that is rolled back, so the DELETEs are safe to EXPLAIN ANALYZE.
+
+SAMPLE_QUERIES = {
+    "movie_id":   "SELECT MediaID FROM Crew c JOIN Media m USING (MediaID) WHERE m.MediaType = 'Movie' LIMIT 1",
+    "person_id":  "SELECT PersonID FROM Crew WHERE CrewRole = 'Actor' LIMIT 1",
+    "genre_name": "SELECT GenreName FROM Genre JOIN Media_Genre USING (GenreID) LIMIT 1",
+    "year":       "SELECT ReleaseYear FROM Media WHERE ReleaseYear IS NOT NULL LIMIT 1",
+    "review_media_id": "SELECT MediaID FROM Review WHERE MediaID IS NOT NULL LIMIT 1",
+    "episode":    "SELECT EpisodeMediaID, EpisodeSeasonNo, EpisodeNo FROM Review "
+                  "WHERE EpisodeMediaID IS NOT NULL LIMIT 1",
+    "user_id":    "SELECT UserID FROM Review LIMIT 1",
+    "blog_id":    "SELECT BlogID FROM Comments LIMIT 1",
+}
+
+QUERIES = {
+    "movies_by_rating": """
+        SELECT m.* FROM Media m
+        LEFT JOIN Media_Genre mg ON m.MediaID = mg.MediaID
+        LEFT JOIN Genre g ON mg.GenreID = g.GenreID
+        WHERE m.MediaType = 'Movie'
+        GROUP BY m.MediaID
+        ORDER BY m.Rating DESC NULLS LAST, m.ReleaseYear DESC NULLS LAST
+        LIMIT 20 OFFSET 0
+    """,
+    "movies_by_genre": """
+        SELECT m.* FROM Media m
+        LEFT JOIN Media_Genre mg ON m.MediaID = mg.MediaID
+        LEFT JOIN Genre g ON mg.GenreID = g.GenreID
+        WHERE m.MediaType = 'Movie' AND g.GenreName = %(genre_name)s
+        GROUP BY m.MediaID
+        ORDER BY m.Rating DESC NULLS LAST, m.ReleaseYear DESC NULLS LAST
+        LIMIT 20 OFFSET 0
+    """,
+    "movies_by_year": """
+        SELECT COUNT(DISTINCT m.MediaID) FROM Media m
+        WHERE m.MediaType = 'Movie' AND m.ReleaseYear = %(year)s
+    """,
+    "title_cast": """
+        SELECT p.PersonID, p.FullName, p.Picture, c.CharacterName
+        FROM Person p JOIN Crew c ON p.PersonID = c.PersonID
+        WHERE c.MediaID = %(movie_id)s AND c.CrewRole = 'Actor'
+        LIMIT 20
+    """,
+    "title_genres": """
+        SELECT g.GenreID, g.GenreName
+        FROM Genre g JOIN Media_Genre mg ON g.GenreID = mg.GenreID
+        WHERE mg.MediaID = %(movie_id)s
+    """,
+    "title_studios": """
+        SELECT s.StudioID, s.StudioName
+        FROM Studio s JOIN Production p ON s.StudioID = p.StudioID
+        WHERE p.MediaID = %(movie_id)s
+    """,
+    "person_filmography": """
+        SELECT m.MediaID, m.Title, c.CrewRole, c.CharacterName
+        FROM Media m JOIN Crew c ON m.MediaID = c.MediaID
+        WHERE c.PersonID = %(person_id)s
+        ORDER BY m.ReleaseYear DESC NULLS LAST, m.Title
+    """,
+    "media_reviews": """
+        SELECT r.ReviewID, r.Rating, r.PostDate, u.FullName
+        FROM Review r JOIN Users u ON r.UserID = u.UserID
+        WHERE r.MediaID = %(review_media_id)s
+        ORDER BY r.PostDate DESC
+        LIMIT 50
+    """,
+    "episode_reviews": """
+        SELECT r.ReviewID, r.Rating, r.PostDate
+        FROM Review r
+        WHERE (r.EpisodeMediaID, r.EpisodeSeasonNo, r.EpisodeNo) = %(episode)s
+        ORDER BY r.PostDate DESC
+        LIMIT 50
+    """,
+    "blog_comments": """
+        SELECT c.CommentID, c.CommentText, c.PostDate, u.FullName
+        FROM Comments c JOIN Users u ON c.UserID = u.UserID
+        WHERE c.BlogID = %(blog_id)s
+        ORDER BY c.PostDate ASC
+    """,
+    "delete_user_reviews": """
+        DELETE FROM Review WHERE UserID = %(user_id)s
+    """,
+    "delete_media_cascade": """
+        DELETE FROM Media WHERE MediaID = %(movie_id)s
+    """,
+}
+
+
+# ══════════════════════════════════════════════
+# INDEX PACK
+# ══════════════════════════════════════════════
+
+def load_index_pack(path=INDEX_PACK_MIGRATION):
+    """[(CREATE INDEX statement, index_name)] from the migration file"""
+    with open(path, encoding="utf-8") as f:
+        sql = f.read()
+    return re.findall(r"^(CREATE INDEX IF NOT EXISTS (\w+) ON [^;]+;)", sql, flags=re.MULTILINE)
+
+
+def drop_index_pack(cursor, pack):
+    for _, name in pack:
+        cursor.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+def create_index_pack(cursor, pack):
+    for statement, _ in pack:
+        cursor.execute(statement)
+
+
+# ══════════════════════════════════════════════
+# SYNTHETIC CATALOGUE
+# ══════════════════════════════════════════════
+
+def add_synthetic_catalogue(cursor, titles):
+    """
+    Append `titles` synthetic titles with cast, genres, studios, users
+    and reviews (inside the caller's transaction, never committed)
+    """
+    cursor.execute("SELECT COALESCE(MAX(MediaID), 0), (SELECT COALESCE(MAX(PersonID), 0) FROM Person), "
+                   "(SELECT COALESCE(MAX(GenreID), 0) FROM Genre), (SELECT COALESCE(MAX(StudioID), 0) FROM Studio) "
+                   "FROM Media")
+    media_base, person_base, genre_base, studio_base = cursor.fetchone()
+    persons = titles * 2
+
+    cursor.execute("""
+        INSERT INTO Media (MediaID, Title, ReleaseYear, Rating, MediaType)
+        SELECT %(media)s + g, 'Synthetic title ' || g, 1950 + g %% 75, round((random() * 10)::numeric, 1),
+               (CASE WHEN g %% 5 = 0 THEN 'TVSeries' ELSE 'Movie' END)::media_type_enum
+        FROM generate_series(1, %(titles)s) AS g;
+
+        INSERT INTO Movie (MediaID)
+        SELECT MediaID FROM Media WHERE MediaID > %(media)s AND MediaType = 'Movie';
+
+        INSERT INTO Person (PersonID, FullName)
+        SELECT %(person)s + g, 'Synthetic person ' || g FROM generate_series(1, %(persons)s) AS g;
+
+        INSERT INTO Genre (GenreID, GenreName)
+        SELECT %(genre)s + g, 'Synthetic genre ' || g FROM generate_series(1, 20) AS g;
+
+        INSERT INTO Studio (StudioID, StudioName)
+        SELECT %(studio)s + g, 'Synthetic studio ' || g FROM generate_series(1, 200) AS g;
+
+        -- 10 actors + 1 director per title
+        INSERT INTO Crew (PersonID, MediaID, CrewRole, CharacterName)
+        SELECT %(person)s + 1 + ((g::bigint * 7919 + k * 104729) %% %(persons)s), %(media)s + g,
+               CASE WHEN k = 0 THEN 'Director' ELSE 'Actor' END,
+               CASE WHEN k = 0 THEN NULL ELSE 'Character ' || k END
+        FROM generate_series(1, %(titles)s) AS g, generate_series(0, 10) AS k
+        ON CONFLICT DO NOTHING;
+
+        INSERT INTO Media_Genre (MediaID, GenreID)
+        SELECT %(media)s + g, %(genre)s + 1 + ((g + k * 7) %% 20)
+        FROM generate_series(1, %(titles)s) AS g, generate_series(0, 1) AS k
+        ON CONFLICT DO NOTHING;
+
+        INSERT INTO Production (StudioID, MediaID)
+        SELECT %(studio)s + 1 + (g %% 200), %(media)s + g FROM generate_series(1, %(titles)s) AS g;
+    """, {"media": media_base, "person": person_base, "genre": genre_base,
+          "studio": studio_base, "titles": titles, "persons": persons})
+
+    cursor.execute("""
+        INSERT INTO Users (FullName, Email, PasswordHash)
+        SELECT 'Synthetic user ' || g, 'synthetic-' || %s || '-' || g || '@example.com', 'x'
+        FROM generate_series(1, 1000) AS g
+        RETURNING UserID
+    """, (media_base,))
+    first_user = min(user_id for user_id, in cursor.fetchall())
+
+    # 1-7 reviews per movie, more on the first (lowest MediaID) titles
+    cursor.execute("""
+        INSERT INTO Review (UserID, MediaID, Rating)
+        SELECT %(user)s + ((m.rn * 31 + k * 17) %% 1000), m.MediaID, 1 + floor(random() * 10)::int
+        FROM (SELECT MediaID, row_number() OVER (ORDER BY MediaID) AS rn
+              FROM Media WHERE MediaID > %(media)s AND MediaType = 'Movie') m,
+             generate_series(0, 6) AS k
+        WHERE k <= 6000 / (m.rn + 1000)
+    """, {"media": media_base, "user": first_user})
+
+    for table in ("Media", "Movie", "Person", "Genre", "Studio", "Crew", "Media_Genre",
+                  "Production", "Users", "Review"):
+        cursor.execute(f"ANALYZE {table}")
+    print(f"🧪 Added {titles:,} synthetic titles, {persons:,} persons and their credits/reviews")
+
+
+# ══════════════════════════════════════════════
+# EXPLAIN
+# ══════════════════════════════════════════════
+
+def load_samples(cursor):
+    samples = {}
+    for name, query in SAMPLE_QUERIES.items():
+        cursor.execute(query)
+        row = cursor.fetchone()
+        if row is not None:
+            # Multi-column samples are passed as tuples: (a, b, c) = (1, 2, 3)
+            samples[name] = row[0] if len(row) == 1 else tuple(row)
+    return samples
+
+
+def explain(cursor, query, samples):
+    """EXPLAIN (ANALYZE, BUFFERS) one query under a savepoint; returns the JSON plan"""
+    cursor.execute("SAVEPOINT explain_query")
+    try:
+        cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {query}", samples)
+        return cursor.fetchone()[0][0]
+    finally:
+        cursor.execute("ROLLBACK TO SAVEPOINT explain_query")
+
+
+def plan_scans(node):
+    """'Seq Scan on crew', 'Index Scan using idx_crew_media_role', ... for a plan tree"""
+    scans = []
+    if "Relation Name" in node:
+        if "Index Name" in node:
+            scans.append(f"{node['Node Type']} using {node['Index Name']}")
+        else:
+            scans.append(f"{node['Node Type']} on {node['Relation Name']}")
+    for child in node.get("Plans", []):
+        scans.extend(plan_scans(child))
+    return scans
+
+
+def plan_summary(plan):
+    """Execution time (incl. FK/cascade triggers), shared buffers touched, scans"""
+    root = plan["Plan"]
+    trigger_ms = sum(t.get("Time", 0) for t in plan.get("Triggers", []))
+    return {
+        "ms": plan["Execution Time"],
+        "trigger_ms": trigger_ms,
+        "buffers": root.get("Shared Hit Blocks", 0) + root.get("Shared Read Blocks", 0),
+        "scans": plan_scans(root),
+    }
+
+
+def run_query_set(cursor, samples, names):
+    plans = {}
+    for name in names:
+        plans[name] = explain(cursor, QUERIES[name], samples)
+    return plans
+
+
+def required_samples(query):
+    return set(re.findall(r"%\((\w+)\)s", query))
+
+
+def explain_queries(synthetic_titles=0, only=None, json_path=None):
+    """
+    Run the query set without the index pack, then with it, all inside one
+    transaction that is rolled back. DROP INDEX takes an exclusive lock on
+    each table until then: run this against a scratch / staging database.
+    """
+    conn = psycopg2.connect(DATABASE_URL)
+    cur = conn.cursor()
+    pack = load_index_pack()
+
+    try:
+        if synthetic_titles:
+            add_synthetic_catalogue(cur, synthetic_titles)
+
+        samples = load_samples(cur)
+        names = []
+        for name in only or QUERIES:
+            missing = required_samples(QUERIES[name]) - samples.keys()
+            if missing:
+                print(f"⚠️ Skipping {name}: no data for {', '.join(sorted(missing))}")
+            else:
+                names.append(name)
+
+        print(f"\n🔬 {len(names)} queries, index pack of {len(pack)} indexes")
+
+        drop_index_pack(cur, pack)
+        before = run_query_set(cur, samples, names)
+
+        create_index_pack(cur, pack)
+        for table in {re.search(r" ON (\w+)", statement).group(1) for statement, _ in pack}:
+            cur.execute(f"ANALYZE {table}")
+        after = run_query_set(cur, samples, names)
+
+        print(f"\n{'Query':<22} {'Before ms':>10} {'After ms':>10} {'Buffers':>17}  Scans after")
+        print("-" * 100)
+        for name in names:
+            b, a = plan_summary(before[name]), plan_summary(after[name])
+            b_ms, a_ms = b["ms"] + b["trigger_ms"], a["ms"] + a["trigger_ms"]
+            print(f"{name:<22} {b_ms:>10.2f} {a_ms:>10.2f} {b['buffers']:>8}→{a['buffers']:<8}  "
+                  f"{', '.join(a['scans']) or '-'}")
+
+        if json_path:
+            with open(json_path, "w", encoding="utf-8") as f:
+                json.dump({"samples": samples,
+                           "plans": {name: {"before": before[name], "after": after[name]}
+                                     for name in names}},
+                          f, indent=2, default=str)
+            print(f"\n📝 Full plans written to {json_path}")
+
+    except Exception as e:
+        print(f"\n❌ Error: {e}")
+
+    finally:
+        # Indexes, synthetic rows and deletes are all discarded
+        conn.rollback()
+        cur.close()
+        conn.close()
+
+
+# ══════════════════════════════════════════════
+# COMMAND LINE INTERFACE
+# ══════════════════════════════════════════════
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="EXPLAIN (ANALYZE, BUFFERS) the known query set with and without the index pack",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python explain_queries.py                           # Current data
+  python explain_queries.py --synthetic 200000        # + 200k synthetic titles
+  python explain_queries.py --only title_cast media_reviews --json plans.json
+
+Everything (synthetic rows, index drops, DELETEs) is rolled back, but
+DROP INDEX locks the tables until then: use a scratch database.
+        """
+    )
+    parser.add_argument("--synthetic", type=int, default=0,
+                        help="Synthetic titles to add before explaining (default: 0)")
+    parser.add_argument("--only", nargs="+", choices=sorted(QUERIES), help="Run only these queries")
+    parser.add_argument("--json", help="Write the full before/after JSON plans to this file")
+    args = parser.parse_args()
+
+    explain_queries(args.synthetic, args.only, args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+import psycopg2
+import os
+import time
+import argparse
+from dotenv import load_dotenv
+
+import movie_fetcher
+import TVseries_fetcher
+from post_ingest import run_post_ingest
+
+load_dotenv()
+
+# ── DB CONFIG ───────────────────────────────
+# Use Neon DB connection string
+DATABASE_URL = os.getenv("DATABASE_URL")
+
+DEFAULT_LIMIT = 100
+DEFAULT_MIN_HITS = 5
+
+# Pause between TMDB calls
+REQUEST_DELAY = 0.25
+
+FETCHERS = {
+    "Movie": (movie_fetcher, movie_fetcher.fetch_movie_credits),
+    # Aggregate credits: every season's cast, not just the latest season's
+    "TVSeries": (TVseries_fetcher, TVseries_fetcher.fetch_tv_aggregate_credits),
+}
+
+
+# ══════════════════════════════════════════════
+# CANDIDATES
+# ══════════════════════════════════════════════
+
+def select_candidates(cursor, limit, min_hits, refresh_days=None):
+    """
+    Most viewed titles still holding only the ingest-time top-N credits
+    (or hydrated more than refresh_days ago)
+    """
+    cursor.execute("""
+        SELECT h.MediaID, m.MediaType::text, m.Title, h.HitCount
+        FROM Media_Hits h
+        JOIN Media m ON m.MediaID = h.MediaID
+        WHERE h.HitCount >= %(min_hits)s
+          AND (h.CreditsHydratedAt IS NULL
+               OR (%(refresh_days)s::int IS NOT NULL
+                   AND h.CreditsHydratedAt < CURRENT_TIMESTAMP - make_interval(days => %(refresh_days)s::int)))
+        ORDER BY h.HitCount DESC, h.MediaID
+        LIMIT %(limit)s
+    """, {"min_hits": min_hits, "refresh_days": refresh_days, "limit": limit})
+    return cursor.fetchall()
+
+
+# ══════════════════════════════════════════════
+# HYDRATION
+# ══════════════════════════════════════════════
+
+def hydrate_title(cursor, media_id, media_type, crew_jobs=None):
+    """Store the full cast (and crew_jobs crew) for one title; returns actor PersonIDs"""
+    fetcher, fetch_credits = FETCHERS[media_type]
+    credits = fetch_credits(media_id)
+    if crew_jobs is not None:
+        crew_jobs = {job: fetcher.CREW_JOBS.get(job, job) for job in crew_jobs}
+
+    actor_ids = fetcher.process_credits(cursor, media_id, credits,
+                                        cast_limit=len(credits.get("cast", [])), crew_jobs=crew_jobs)
+    cursor.execute("""
+        UPDATE Media_Hits SET CreditsHydratedAt = CURRENT_TIMESTAMP
+        WHERE MediaID = %s
+    """, (media_id,))
+    return actor_ids
+
+
+def hydrate_credits(limit=DEFAULT_LIMIT, min_hits=DEFAULT_MIN_HITS, refresh_days=None,
+                    crew_jobs=None, dry_run=False):
+    """Fetch full credits for the most viewed titles, one transaction per title"""
+    if not movie_fetcher.API_KEY and not dry_run:
+        raise RuntimeError("TMDB_API_KEY not set. Please check your .env file.")
+
+    conn = psycopg2.connect(DATABASE_URL)
+    cur = conn.cursor()
+
+    touched_persons = set()
+    hydrated = 0
+    failed = 0
+    try:
+        candidates = select_candidates(cur, limit, min_hits, refresh_days)
+        conn.commit()
+        print(f"🎭 {len(candidates)} titles to hydrate (≥ {min_hits} views)")
+
+        for i, (media_id, media_type, title, hits) in enumerate(candidates, 1):
+            print(f"\n[{i}/{len(candidates)}] {title} ({media_type}, {hits} views)")
+            if dry_run:
+                continue
+            try:
+                touched_persons.update(hydrate_title(cur, media_id, media_type, crew_jobs))
+                conn.commit()
+                hydrated += 1
+            except Exception as e:
+                conn.rollback()
+                failed += 1
+                print(f"   ❌ Error: {e}")
+            time.sleep(REQUEST_DELAY)
+
+        run_post_ingest(conn, touched_persons)
+
+        if not dry_run:
+            print(f"\n✅ Full credits stored for {hydrated} titles ({failed} failed)")
+
+    except Exception as e:
+        conn.rollback()
+        print(f"\n❌ Error: {e}")
+
+    finally:
+        cur.close()
+        conn.close()
+
+
+# ══════════════════════════════════════════════
+# COMMAND LINE INTERFACE
+# ══════════════════════════════════════════════
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Fetch full credits only for the titles users actually open (Media_Hits)",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python hydrate_credits.py                       # Top 100 unhydrated titles with ≥ 5 views
+  python hydrate_credits.py --limit 500 --min-hits 20
+  python hydrate_credits.py --refresh-days 30     # Also re-hydrate titles older than 30 days
+  python hydrate_credits.py --crew-jobs Director Writer Screenplay Producer
+  python hydrate_credits.py --dry-run             # List candidates only
+
+Ingest-time depth is set with CREDIT_CAST_LIMIT (default 10) in .env.
+        """
+    )
+    parser.add_argument("--limit", type=int, default=DEFAULT_LIMIT,
+                        help=f"Titles per run (default: {DEFAULT_LIMIT})")
+    parser.add_argument("--min-hits", type=int, default=DEFAULT_MIN_HITS,
+                        help=f"Minimum detail-page views (default: {DEFAULT_MIN_HITS})")
+    parser.add_argument("--refresh-days", type=int, help="Re-hydrate titles hydrated more than N days ago")
+    parser.add_argument("--crew-jobs", nargs="+",
+                        help="TMDB crew jobs to store (default: the fetchers' CREW_JOBS)")
+    parser.add_argument("--dry-run", action="store_true", help="List the candidates without fetching")
+    args = parser.parse_args()
+
+    hydrate_credits(args.limit, args.min_hits, args.refresh_days, args.crew_jobs, args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
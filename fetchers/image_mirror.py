@@ -0,0 +1,294 @@
+import psycopg2
+import os
+import time
+import asyncio
+import hashlib
+import argparse
+from psycopg2.extras import execute_values
+from dotenv import load_dotenv
+
+# Only needed to download (image_thumbnails imports this module without it): pip install aiohttp
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+load_dotenv()
+
+# ── DB CONFIG ───────────────────────────────
+# Use Neon DB connection string
+DATABASE_URL = os.getenv("DATABASE_URL")
+
+# ── IMAGE CONFIG ────────────────────────────
+IMAGE_BASE_URL = "https://image.tmdb.org/t/p"
+# Served by server.js under /images (content-addressed, so cacheable forever)
+IMAGE_CACHE_DIR = os.getenv("IMAGE_CACHE_DIR",
+                            os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "image_cache"))
+DEFAULT_MAX_BYTES = int(os.getenv("IMAGE_CACHE_MAX_BYTES", str(20 * 1024 ** 3)))
+
+DEFAULT_CONCURRENCY = 16
+# Downloads per chunk; each chunk is recorded in one transaction
+CHUNK_SIZE = 500
+
+# Which column holds each kind of image, and the TMDB sizes the frontend uses
+IMAGE_KINDS = {
+    "poster":  {"query": "SELECT Poster FROM Media WHERE Poster LIKE '/%%'",
+                "sizes": ["w92", "w342", "w500"]},
+    "still":   {"query": "SELECT StillPath FROM Episode WHERE StillPath LIKE '/%%'",
+                "sizes": ["w300"]},
+    "profile": {"query": "SELECT Picture FROM Person WHERE Picture LIKE '/%%'",
+                "sizes": ["w92", "w185"]},
+    "logo":    {"query": "SELECT LogoURL FROM Studio WHERE LogoURL LIKE '/%%'",
+                "sizes": ["w92"]},
+}
+
+# WebP thumbnails + LQIP placeholders built by image_thumbnails.py, per kind:
+# the columns hold {"w<width>": "<LocalPath>"} and a data: URI placeholder
+THUMBNAIL_KINDS = {
+    "poster":  {"table": "Media", "path": "Poster", "thumbs": "PosterThumbs", "lqip": "PosterLQIP",
+                "source_size": "w500", "widths": [154, 342]},
+    "still":   {"table": "Episode", "path": "StillPath", "thumbs": "StillThumbs", "lqip": "StillLQIP",
+                "source_size": "w300", "widths": [185, 300]},
+    "profile": {"table": "Person", "path": "Picture", "thumbs": "PictureThumbs", "lqip": "PictureLQIP",
+                "source_size": "w185", "widths": [92, 185]},
+}
+
+EXTENSIONS = {"image/jpeg": ".jpg", "image/png": ".png", "image/svg+xml": ".svg", "image/webp": ".webp"}
+
+
+# ══════════════════════════════════════════════
+# WORK LIST
+# ══════════════════════════════════════════════
+
+def missing_assets(cursor, kinds):
+    """
+    (path, size) pairs referenced by the catalogue but not mirrored yet,
+    de-duplicated by path. Also bumps LastUsedAt on the ones already
+    mirrored and on their WebP thumbnails (image_thumbnails.py), so
+    eviction removes unreferenced images first.
+    """
+    work = []
+    for kind in kinds:
+        spec = IMAGE_KINDS[kind]
+        cursor.execute(f"""
+            UPDATE Image_Asset a SET LastUsedAt = CURRENT_TIMESTAMP
+            FROM ({spec['query']}) refs(path)
+            WHERE a.TmdbPath = refs.path
+              AND (a.Size = ANY(%s) OR a.Size LIKE 'webp-%%')
+        """, (spec["sizes"],))
+        cursor.execute(f"""
+            SELECT DISTINCT refs.path, s.size
+            FROM ({spec['query']}) refs(path)
+            CROSS JOIN unnest(%s::text[]) AS s(size)
+            WHERE NOT EXISTS (
+                SELECT 1 FROM Image_Asset a
+                WHERE a.TmdbPath = refs.path AND a.Size = s.size
+            )
+        """, (spec["sizes"],))
+        work.extend(cursor.fetchall())
+    # The same path can be referenced by several kinds (e.g. reused artwork)
+    return sorted(set(work))
+
+
+# ══════════════════════════════════════════════
+# DOWNLOAD + CONTENT-ADDRESSED STORE
+# ══════════════════════════════════════════════
+
+def store_blob(cache_dir, data, content_type):
+    """Write bytes to <cache>/<sha[:2]>/<sha[2:4]>/<sha>.<ext> (once); returns (sha, relative path)"""
+    sha = hashlib.sha256(data).hexdigest()
+    relative = os.path.join(sha[:2], sha[2:4], sha + EXTENSIONS.get(content_type, ".jpg"))
+    target = os.path.join(cache_dir, relative)
+    if not os.path.exists(target):
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmp = f"{target}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, target)
+    return sha, relative
+
+
+async def download(session, semaphore, cache_dir, path, size):
+    """One image → (path, size, (sha, local path, bytes, content type), None) or (path, size, None, error)"""
+    async with semaphore:
+        try:
+            async with session.get(f"{IMAGE_BASE_URL}/{size}{path}") as response:
+                if response.status != 200:
+                    return path, size, None, f"HTTP {response.status}"
+                data = await response.read()
+                content_type = response.headers.get("Content-Type", "image/jpeg").split(";")[0]
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            return path, size, None, str(e) or type(e).__name__
+    # Hashing and the file write are small; keep them off the event loop anyway
+    sha, relative = await asyncio.to_thread(store_blob, cache_dir, data, content_type)
+    return path, size, (sha, relative, len(data), content_type), None
+
+
+async def download_chunk(session, semaphore, cache_dir, chunk):
+    return await asyncio.gather(*(download(session, semaphore, cache_dir, path, size)
+                                  for path, size in chunk))
+
+
+def record_assets(cursor, rows):
+    execute_values(cursor, """
+        INSERT INTO Image_Asset (TmdbPath, Size, Sha256, LocalPath, Bytes, ContentType)
+        VALUES %s
+        ON CONFLICT (TmdbPath, Size) DO UPDATE
+        SET Sha256 = EXCLUDED.Sha256,
+            LocalPath = EXCLUDED.LocalPath,
+            Bytes = EXCLUDED.Bytes,
+            ContentType = EXCLUDED.ContentType,
+            FetchedAt = CURRENT_TIMESTAMP,
+            LastUsedAt = CURRENT_TIMESTAMP
+    """, rows)
+
+
+# ══════════════════════════════════════════════
+# EVICTION
+# ══════════════════════════════════════════════
+
+def evict(cursor, cache_dir, max_bytes):
+    """
+    Delete least recently used blobs until the store fits in max_bytes.
+    Blobs are shared by every (path, size) with the same content, so usage
+    is taken per blob. Thumbnail columns pointing at a deleted blob are
+    cleared in the same transaction, so the frontend falls back to the TMDB
+    poster and image_thumbnails.py renders them again.
+    """
+    cursor.execute("""
+        SELECT Sha256, MIN(LocalPath), MAX(Bytes), MAX(LastUsedAt) AS last_used
+        FROM Image_Asset
+        GROUP BY Sha256
+        ORDER BY last_used DESC
+    """)
+    total = 0
+    evicted = []
+    for sha, relative, size, _ in cursor.fetchall():
+        total += size
+        if total > max_bytes:
+            evicted.append((sha, relative, size))
+
+    if not evicted:
+        return 0, 0
+
+    for _, relative, _ in evicted:
+        try:
+            os.remove(os.path.join(cache_dir, relative))
+        except FileNotFoundError:
+            pass
+    cursor.execute("DELETE FROM Image_Asset WHERE Sha256 = ANY(%s)", ([sha for sha, _, _ in evicted],))
+    evicted_paths = [relative for _, relative, _ in evicted]
+    for spec in THUMBNAIL_KINDS.values():
+        cursor.execute(f"""
+            UPDATE {spec['table']} t
+            SET {spec['thumbs']} = NULL, {spec['lqip']} = NULL
+            WHERE t.{spec['thumbs']} IS NOT NULL
+              AND EXISTS (
+                  SELECT 1 FROM jsonb_each_text(t.{spec['thumbs']}) AS thumb(width, local_path)
+                  WHERE thumb.local_path = ANY(%s)
+              )
+        """, (evicted_paths,))
+    return len(evicted), sum(size for _, _, size in evicted)
+
+
+# ══════════════════════════════════════════════
+# MAIN FUNCTION
+# ══════════════════════════════════════════════
+
+async def mirror_async(conn, cur, work, cache_dir, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    timeout = aiohttp.ClientTimeout(total=60)
+    connector = aiohttp.TCPConnector(limit=concurrency)
+
+    stored = failed = 0
+    total_bytes = 0
+    started = time.perf_counter()
+    async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+        for start in range(0, len(work), CHUNK_SIZE):
+            results = await download_chunk(session, semaphore, cache_dir, work[start:start + CHUNK_SIZE])
+            rows = []
+            for path, size, asset, error in results:
+                if asset is None:
+                    failed += 1
+                    print(f"   ⚠️ {size}{path}: {error}")
+                    continue
+                sha, relative, length, content_type = asset
+                rows.append((path, size, sha, relative, length, content_type))
+                total_bytes += length
+            if rows:
+                record_assets(cur, rows)
+            conn.commit()
+            stored += len(rows)
+            elapsed = time.perf_counter() - started
+            print(f"   → {stored + failed}/{len(work)} images "
+                  f"({stored / elapsed:.0f} img/s, {total_bytes / 1024 ** 2:.0f} MiB)")
+    return stored, failed
+
+
+def mirror_images(kinds=None, cache_dir=IMAGE_CACHE_DIR, concurrency=DEFAULT_CONCURRENCY,
+                  max_bytes=DEFAULT_MAX_BYTES, limit=None):
+    """Mirror every referenced TMDB image into the local store, then evict down to max_bytes"""
+    if aiohttp is None:
+        raise SystemExit("❌ image_mirror.py needs aiohttp (pip install aiohttp)")
+    kinds = kinds or list(IMAGE_KINDS)
+    conn = psycopg2.connect(DATABASE_URL)
+    cur = conn.cursor()
+
+    try:
+        work = missing_assets(cur, kinds)
+        conn.commit()
+        if limit:
+            work = work[:limit]
+        print(f"🖼️  {len(work)} images to mirror ({', '.join(kinds)}) → {cache_dir}")
+
+        stored, failed = asyncio.run(mirror_async(conn, cur, work, cache_dir, concurrency))
+
+        evicted, freed = evict(cur, cache_dir, max_bytes)
+        conn.commit()
+        if evicted:
+            print(f"🧹 Evicted {evicted} blobs ({freed / 1024 ** 2:.0f} MiB) to stay under "
+                  f"{max_bytes / 1024 ** 3:.1f} GiB")
+        print(f"\n✅ Mirrored {stored} images ({failed} failed)")
+
+    except Exception as e:
+        conn.rollback()
+        print(f"\n❌ Error: {e}")
+
+    finally:
+        cur.close()
+        conn.close()
+
+
+# ══════════════════════════════════════════════
+# COMMAND LINE INTERFACE
+# ══════════════════════════════════════════════
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Mirror TMDB posters, stills, profiles and logos into a local content-addressed store",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python image_mirror.py                          # Everything referenced, every configured size
+  python image_mirror.py --kinds poster profile   # Only posters and profile pictures
+  python image_mirror.py --concurrency 32 --max-gb 50
+
+Run after ingestion; already mirrored (path, size) pairs are skipped.
+Files are served by server.js at /images/<Image_Asset.LocalPath>.
+Needs aiohttp (pip install aiohttp).
+        """
+    )
+    parser.add_argument("--kinds", nargs="+", choices=list(IMAGE_KINDS), help="Image kinds (default: all)")
+    parser.add_argument("--cache-dir", default=IMAGE_CACHE_DIR, help="Store directory (IMAGE_CACHE_DIR)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help=f"Parallel downloads (default: {DEFAULT_CONCURRENCY})")
+    parser.add_argument("--max-gb", type=float, help="Store size limit in GiB (IMAGE_CACHE_MAX_BYTES)")
+    parser.add_argument("--limit", type=int, help="Mirror at most N images this run")
+    args = parser.parse_args()
+
+    max_bytes = int(args.max_gb * 1024 ** 3) if args.max_gb else DEFAULT_MAX_BYTES
+    mirror_images(args.kinds, args.cache_dir, args.concurrency, max_bytes, args.limit)
+
+
+if __name__ == "__main__":
+    main()
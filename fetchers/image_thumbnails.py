@@ -0,0 +1,221 @@
+import psycopg2
+import os
+import io
+import json
+import time
+import base64
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from psycopg2.extras import execute_values
+from dotenv import load_dotenv
+
+# Not needed by the other fetchers: pip install Pillow
+try:
+    from PIL import Image
+except ImportError:
+    raise SystemExit("❌ image_thumbnails.py needs Pillow (pip install Pillow)")
+
+from image_mirror import IMAGE_CACHE_DIR, THUMBNAIL_KINDS, store_blob, record_assets
+
+load_dotenv()
+
+# ── DB CONFIG ───────────────────────────────
+# Use Neon DB connection string
+DATABASE_URL = os.getenv("DATABASE_URL")
+
+# Thumbnails are cut from the largest mirrored size (image_mirror.py) and
+# written to the same content-addressed store, recorded in Image_Asset under
+# Size "webp-w<width>" so image_mirror's eviction sees them. Which columns
+# hold them is THUMBNAIL_KINDS, defined in image_mirror.py (its eviction
+# clears thumbnails whose blobs it removes).
+
+# Image_Asset.Size of a thumbnail is "webp-w<width>" (image_mirror.py bumps
+# LastUsedAt on these along with the sizes it mirrors)
+THUMBNAIL_SIZE_PREFIX = "webp-"
+WEBP_QUALITY = 75
+# Placeholder: 16 px wide, blurred by the browser when scaled up (~200-400 bytes)
+LQIP_WIDTH = 16
+LQIP_QUALITY = 40
+
+# Results written per transaction
+BATCH_SIZE = 500
+
+
+# ══════════════════════════════════════════════
+# IMAGE PROCESSING (runs in worker processes)
+# ══════════════════════════════════════════════
+
+def encode_webp(image, width, quality):
+    height = max(1, round(image.height * width / image.width))
+    resized = image.resize((width, height), Image.LANCZOS)
+    buffer = io.BytesIO()
+    resized.save(buffer, "WEBP", quality=quality, method=6)
+    return buffer.getvalue()
+
+
+def render_thumbnails(job):
+    """
+    (kind, tmdb path, source file, widths, cache dir) →
+    (kind, tmdb path, {"w<width>": local path}, lqip data URI,
+     [Image_Asset row per thumbnail], error)
+    """
+    kind, path, source, widths, cache_dir = job
+    try:
+        with Image.open(source) as image:
+            image = image.convert("RGB")
+            thumbs = {}
+            assets = []
+            for width in widths:
+                # Never upscale: a small source yields its own width under the requested key
+                data = encode_webp(image, min(width, image.width), WEBP_QUALITY)
+                sha, relative = store_blob(cache_dir, data, "image/webp")
+                thumbs[f"w{width}"] = relative
+                assets.append((path, f"{THUMBNAIL_SIZE_PREFIX}w{width}", sha, relative, len(data), "image/webp"))
+            lqip = encode_webp(image, LQIP_WIDTH, LQIP_QUALITY)
+        lqip_uri = "data:image/webp;base64," + base64.b64encode(lqip).decode("ascii")
+        return kind, path, thumbs, lqip_uri, assets, None
+    except Exception as e:
+        return kind, path, None, None, None, str(e)
+
+
+# ══════════════════════════════════════════════
+# WORK LIST + RESULTS
+# ══════════════════════════════════════════════
+
+def pending_images(cursor, kind, rebuild=False):
+    """
+    (path, mirrored source file) for images without thumbnails, or whose
+    thumbnails are not (or no longer, after eviction) in Image_Asset; plus
+    how many lack a mirrored source
+    """
+    spec = THUMBNAIL_KINDS[kind]
+    todo = "" if rebuild else f"""
+        AND (t.{spec['thumbs']} IS NULL OR EXISTS (
+            SELECT 1 FROM unnest(%(thumb_sizes)s::text[]) AS s(size)
+            WHERE NOT EXISTS (
+                SELECT 1 FROM Image_Asset th
+                WHERE th.TmdbPath = t.{spec['path']} AND th.Size = s.size
+            )
+        ))"""
+    params = {
+        "source_size": spec["source_size"],
+        "thumb_sizes": [f"{THUMBNAIL_SIZE_PREFIX}w{width}" for width in spec["widths"]],
+    }
+    cursor.execute(f"""
+        SELECT DISTINCT t.{spec['path']}, a.LocalPath
+        FROM {spec['table']} t
+        JOIN Image_Asset a ON a.TmdbPath = t.{spec['path']} AND a.Size = %(source_size)s
+        WHERE t.{spec['path']} IS NOT NULL {todo}
+    """, params)
+    pending = cursor.fetchall()
+    cursor.execute(f"""
+        SELECT COUNT(DISTINCT t.{spec['path']})
+        FROM {spec['table']} t
+        WHERE t.{spec['path']} IS NOT NULL {todo}
+          AND NOT EXISTS (
+              SELECT 1 FROM Image_Asset a
+              WHERE a.TmdbPath = t.{spec['path']} AND a.Size = %(source_size)s
+          )
+    """, params)
+    return pending, cursor.fetchone()[0]
+
+
+def save_results(cursor, kind, rows):
+    """
+    rows: (tmdb path, thumbs dict, lqip, asset rows); every row using the
+    path is updated and the thumbnails are recorded in Image_Asset
+    """
+    spec = THUMBNAIL_KINDS[kind]
+    execute_values(cursor, f"""
+        UPDATE {spec['table']} t
+        SET {spec['thumbs']} = v.thumbs::jsonb, {spec['lqip']} = v.lqip
+        FROM (VALUES %s) AS v(path, thumbs, lqip)
+        WHERE t.{spec['path']} = v.path
+    """, [(path, json.dumps(thumbs), lqip) for path, thumbs, lqip, _ in rows])
+    record_assets(cursor, [asset for *_, assets in rows for asset in assets])
+
+
+# ══════════════════════════════════════════════
+# MAIN FUNCTION
+# ══════════════════════════════════════════════
+
+def build_thumbnails(kinds=None, cache_dir=IMAGE_CACHE_DIR, workers=None, rebuild=False):
+    """Generate WebP thumbnails + LQIP placeholders for mirrored images in a process pool"""
+    kinds = kinds or list(THUMBNAIL_KINDS)
+    conn = psycopg2.connect(DATABASE_URL)
+    cur = conn.cursor()
+
+    try:
+        jobs = []
+        for kind in kinds:
+            pending, unmirrored = pending_images(cur, kind, rebuild)
+            widths = THUMBNAIL_KINDS[kind]["widths"]
+            jobs.extend((kind, path, os.path.join(cache_dir, local), widths, cache_dir)
+                        for path, local in pending)
+            print(f"🖼️  {kind}: {len(pending)} images to process"
+                  + (f" ({unmirrored} not mirrored yet, run image_mirror.py)" if unmirrored else ""))
+        conn.commit()
+
+        done = failed = 0
+        results = {kind: [] for kind in kinds}
+        started = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for kind, path, thumbs, lqip, assets, error in pool.map(render_thumbnails, jobs, chunksize=16):
+                if error:
+                    failed += 1
+                    print(f"   ⚠️ {path}: {error}")
+                    continue
+                results[kind].append((path, thumbs, lqip, assets))
+                done += 1
+                if len(results[kind]) >= BATCH_SIZE:
+                    save_results(cur, kind, results[kind])
+                    conn.commit()
+                    results[kind] = []
+                    print(f"   → {done}/{len(jobs)} images ({done / (time.perf_counter() - started):.0f} img/s)")
+
+        for kind, rows in results.items():
+            if rows:
+                save_results(cur, kind, rows)
+        conn.commit()
+        print(f"\n✅ Thumbnails built for {done} images ({failed} failed) "
+              f"in {time.perf_counter() - started:.1f}s")
+
+    except Exception as e:
+        conn.rollback()
+        print(f"\n❌ Error: {e}")
+
+    finally:
+        cur.close()
+        conn.close()
+
+
+# ══════════════════════════════════════════════
+# COMMAND LINE INTERFACE
+# ══════════════════════════════════════════════
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Build WebP thumbnails and LQIP placeholders for mirrored TMDB images",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python image_thumbnails.py                      # Every kind, images without thumbnails
+  python image_thumbnails.py --kinds poster --workers 8
+  python image_thumbnails.py --rebuild            # Re-render everything (e.g. new widths)
+
+Run after image_mirror.py; thumbnails are cut from its largest size.
+Thumbnails its eviction removed are rendered again on the next run.
+Needs Pillow (pip install Pillow).
+        """
+    )
+    parser.add_argument("--kinds", nargs="+", choices=list(THUMBNAIL_KINDS), help="Image kinds (default: all)")
+    parser.add_argument("--cache-dir", default=IMAGE_CACHE_DIR, help="Store directory (IMAGE_CACHE_DIR)")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: CPU count)")
+    parser.add_argument("--rebuild", action="store_true", help="Also re-render images that have thumbnails")
+    args = parser.parse_args()
+
+    build_thumbnails(args.kinds, args.cache_dir, args.workers, args.rebuild)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,434 @@
+import psycopg2
+import os
+import csv
+import json
+import time
+import argparse
+from psycopg2 import Error
+from psycopg2.extras import execute_values
+from dotenv import load_dotenv
+
+from bulk_load import open_text, copy_rows
+from post_ingest import refresh_show_documents
+
+load_dotenv()
+
+# ── DB CONFIG ───────────────────────────────
+# Use Neon DB connection string
+DATABASE_URL = os.getenv("DATABASE_URL")
+
+# Reviews per INSERT statement. The rating triggers are statement-level,
+# so every affected movie/episode/season/series is recalculated once per batch.
+DEFAULT_BATCH_SIZE = 1000
+
+# Input field → Review column
+REVIEW_FIELDS = [
+    ("user_id", "UserID"),
+    ("media_id", "MediaID"),
+    ("episode_media_id", "EpisodeMediaID"),
+    ("season_no", "EpisodeSeasonNo"),
+    ("episode_no", "EpisodeNo"),
+    ("rating", "Rating"),
+    ("review_text", "ReviewText"),
+    ("spoiler", "SpoilerFlag"),
+    ("post_date", "PostDate"),
+]
+
+INSERT_QUERY = f"""
+    INSERT INTO Review ({', '.join(column for _, column in REVIEW_FIELDS)})
+    VALUES %s
+"""
+
+# PostDate falls back to the column default when the input has none
+ROW_TEMPLATE = "(%s, %s, %s, %s, %s, %s, %s, %s, COALESCE(%s::timestamp, CURRENT_TIMESTAMP))"
+
+# ── FAST PATH (--fast) ──────────────────────
+# Rows per COPY into the staging table
+STAGE_CHUNK_SIZE = 50000
+
+STAGING_TABLE = "stg_review"
+
+# Checked in order against the staging table; a row keeps the first reason
+# that applies. The profanity check runs last (see flag_profanity).
+REJECT_CHECKS = [
+    # NOT BETWEEN is never true for NULL, so an empty rating needs its own check
+    ("missing rating", "s.Rating IS NULL"),
+    ("rating out of range", "s.Rating NOT BETWEEN 1 AND 10"),
+    ("must target a title or an episode, not both",
+     "(s.MediaID IS NULL) = (s.EpisodeMediaID IS NULL)"),
+    ("unknown user", "NOT EXISTS (SELECT 1 FROM Users u WHERE u.UserID = s.UserID)"),
+    ("unknown title", """s.MediaID IS NOT NULL
+        AND NOT EXISTS (SELECT 1 FROM Media m WHERE m.MediaID = s.MediaID)"""),
+    ("unknown episode", """s.EpisodeMediaID IS NOT NULL
+        AND NOT EXISTS (SELECT 1 FROM Episode e
+                        WHERE e.MediaID = s.EpisodeMediaID
+                          AND e.SeasonNo = s.EpisodeSeasonNo
+                          AND e.EpisodeNo = s.EpisodeNo)"""),
+]
+
+
+# ══════════════════════════════════════════════
+# INPUT
+# ══════════════════════════════════════════════
+
+def parse_int(value):
+    return int(value) if value not in (None, "") else None
+
+
+def parse_bool(value):
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ("1", "true", "t", "yes", "y")
+
+
+def review_row(record):
+    """Input record (CSV row or JSON object) → Review row tuple"""
+    return (
+        parse_int(record.get("user_id")),
+        parse_int(record.get("media_id")),
+        parse_int(record.get("episode_media_id")),
+        parse_int(record.get("season_no")),
+        parse_int(record.get("episode_no")),
+        parse_int(record.get("rating")),
+        record.get("review_text") or None,
+        parse_bool(record.get("spoiler") or False),
+        record.get("post_date") or None,
+    )
+
+
+def iter_reviews(path):
+    """
+    Stream reviews from a CSV (with header) or JSON-lines file, optionally gzipped.
+    Fields: user_id, media_id | episode_media_id + season_no + episode_no,
+            rating, review_text, spoiler, post_date
+    """
+    with open_text(path) as f:
+        if ".csv" in path:
+            for record in csv.DictReader(f):
+                yield review_row(record)
+        else:
+            for line in f:
+                if line.strip():
+                    yield review_row(json.loads(line))
+
+
+def batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# ══════════════════════════════════════════════
+# IMPORT
+# ══════════════════════════════════════════════
+
+def insert_batch(cursor, batch):
+    """One multi-row INSERT → one firing of each statement-level trigger"""
+    execute_values(cursor, INSERT_QUERY, batch, template=ROW_TEMPLATE, page_size=len(batch))
+
+
+def insert_rows_individually(cursor, batch):
+    """
+    Fallback when a batch is rejected (profanity filter, bad FK, CHECK):
+    insert row by row under savepoints and skip the offending rows.
+    """
+    inserted, rejected = 0, []
+    for row in batch:
+        cursor.execute("SAVEPOINT review_row")
+        try:
+            insert_batch(cursor, [row])
+            cursor.execute("RELEASE SAVEPOINT review_row")
+            inserted += 1
+        except Error as e:
+            cursor.execute("ROLLBACK TO SAVEPOINT review_row")
+            rejected.append((row, str(e).strip().splitlines()[0]))
+    return inserted, rejected
+
+
+# ══════════════════════════════════════════════
+# FAST PATH: COPY → SET-WISE CHECKS → ONE INSERT
+# ══════════════════════════════════════════════
+
+def create_review_staging(cursor):
+    """TEMP twin of Review plus the input line number and a rejection reason"""
+    cursor.execute(f"""
+        CREATE TEMP TABLE {STAGING_TABLE} (
+            LineNo BIGINT,
+            UserID INT,
+            MediaID INT,
+            EpisodeMediaID INT,
+            EpisodeSeasonNo INT,
+            EpisodeNo INT,
+            Rating INT,
+            ReviewText TEXT,
+            SpoilerFlag BOOLEAN,
+            PostDate TIMESTAMP,
+            Reject TEXT
+        ) ON COMMIT DROP
+    """)
+
+
+def stage_reviews(cursor, rows, chunk_size=STAGE_CHUNK_SIZE):
+    """COPY every input row into the staging table; returns the row count"""
+    columns = ["LineNo"] + [column for _, column in REVIEW_FIELDS]
+    staged = 0
+    numbered = ((line_no,) + row for line_no, row in enumerate(rows, 1))
+    for chunk in batches(numbered, chunk_size):
+        staged += copy_rows(cursor, STAGING_TABLE, columns, chunk)
+        print(f"   → {staged} rows staged")
+    cursor.execute(f"ANALYZE {STAGING_TABLE}")
+    return staged
+
+
+def flag_profanity(cursor):
+    """
+    One regex scan per review against the compiled Banned_Words_Pattern:
+    the same match fn_filter_review would make, for the whole file at once
+    """
+    cursor.execute(f"""
+        UPDATE {STAGING_TABLE} s
+        SET Reject = 'inappropriate language: "' || substring(LOWER(s.ReviewText) FROM p.Pattern) || '"'
+        FROM Banned_Words_Pattern p
+        WHERE s.Reject IS NULL
+          AND p.Pattern IS NOT NULL
+          AND LOWER(s.ReviewText) ~ p.Pattern
+    """)
+    return cursor.rowcount
+
+
+def flag_rejects(cursor):
+    """Mark every row the constraints or the profanity filter would refuse; returns {reason: count}"""
+    counts = {}
+    for reason, condition in REJECT_CHECKS:
+        cursor.execute(f"""
+            UPDATE {STAGING_TABLE} s SET Reject = %s
+            WHERE s.Reject IS NULL AND ({condition})
+        """, (reason,))
+        counts[reason] = cursor.rowcount
+    counts["inappropriate language"] = flag_profanity(cursor)
+    return {reason: count for reason, count in counts.items() if count}
+
+
+def insert_staged(cursor):
+    """Insert the accepted rows in input order with one statement"""
+    columns = ", ".join(column for _, column in REVIEW_FIELDS)
+    cursor.execute(f"""
+        INSERT INTO Review ({columns})
+        SELECT UserID, MediaID, EpisodeMediaID, EpisodeSeasonNo, EpisodeNo,
+               Rating, ReviewText, COALESCE(SpoilerFlag, FALSE),
+               COALESCE(PostDate, CURRENT_TIMESTAMP)
+        FROM {STAGING_TABLE}
+        WHERE Reject IS NULL
+        ORDER BY LineNo
+    """)
+    return cursor.rowcount
+
+
+def apply_rating_changes(cursor):
+    """
+    What the statement-level rating triggers would have done for one INSERT
+    of every accepted row: fold each movie's and episode's new reviews into
+    its running average, then recompute each affected season and series once.
+    Only rated reviews count, as in recompute_ratings.py
+    """
+    cursor.execute(f"""
+        UPDATE Media m
+        SET Rating      = ROUND(((m.Rating * m.RatingCount) + d.rating_sum)::numeric
+                                / GREATEST(m.RatingCount + d.review_count, 1), 1),
+            RatingCount = GREATEST(m.RatingCount + d.review_count, 1)
+        FROM (
+            SELECT MediaID, COALESCE(SUM(Rating), 0) AS rating_sum, COUNT(Rating) AS review_count
+            FROM {STAGING_TABLE}
+            WHERE Reject IS NULL AND MediaID IS NOT NULL
+            GROUP BY MediaID
+        ) d
+        WHERE m.MediaID = d.MediaID
+          AND m.MediaType = 'Movie'
+    """)
+    movies = cursor.rowcount
+
+    cursor.execute(f"""
+        UPDATE Episode e
+        SET AvgRating   = ROUND(((e.AvgRating * e.RatingCount) + d.rating_sum)::numeric
+                                / GREATEST(e.RatingCount + d.review_count, 1), 1),
+            RatingCount = GREATEST(e.RatingCount + d.review_count, 1)
+        FROM (
+            SELECT EpisodeMediaID, EpisodeSeasonNo, EpisodeNo,
+                   COALESCE(SUM(Rating), 0) AS rating_sum, COUNT(Rating) AS review_count
+            FROM {STAGING_TABLE}
+            WHERE Reject IS NULL AND EpisodeMediaID IS NOT NULL
+            GROUP BY EpisodeMediaID, EpisodeSeasonNo, EpisodeNo
+        ) d
+        WHERE e.MediaID   = d.EpisodeMediaID
+          AND e.SeasonNo  = d.EpisodeSeasonNo
+          AND e.EpisodeNo = d.EpisodeNo
+    """)
+    episodes = cursor.rowcount
+
+    cursor.execute(f"""
+        SELECT DISTINCT EpisodeMediaID, EpisodeSeasonNo
+        FROM {STAGING_TABLE}
+        WHERE Reject IS NULL AND EpisodeMediaID IS NOT NULL
+    """)
+    seasons = cursor.fetchall()
+    if seasons:
+        cursor.execute("SELECT fn_recompute_season_ratings(%s::int[], %s::int[])",
+                       ([media_id for media_id, _ in seasons], [season_no for _, season_no in seasons]))
+    shows = refresh_show_documents(cursor, {media_id for media_id, _ in seasons})
+    return movies, episodes, len(seasons), shows
+
+
+def fetch_rejected(cursor, limit=20):
+    cursor.execute(f"""
+        SELECT LineNo, UserID, MediaID, EpisodeMediaID, EpisodeSeasonNo, EpisodeNo, Reject
+        FROM {STAGING_TABLE}
+        WHERE Reject IS NOT NULL
+        ORDER BY LineNo
+        LIMIT %s
+    """, (limit,))
+    return cursor.fetchall()
+
+
+def import_reviews_fast(path):
+    """
+    Whole file in one transaction: COPY into staging, reject bad rows
+    set-wise, one INSERT with the review triggers bypassed
+    (cholochitro.bulk_review_import), then the rating aggregates once
+    """
+    conn = psycopg2.connect(DATABASE_URL)
+    cur = conn.cursor()
+    started = time.perf_counter()
+
+    print(f"📥 Importing reviews from {path} (fast path)")
+    try:
+        # Only this transaction skips the triggers
+        cur.execute("SET LOCAL cholochitro.bulk_review_import = 'on'")
+        create_review_staging(cur)
+
+        staged = stage_reviews(cur, iter_reviews(path))
+        phase = time.perf_counter()
+        print(f"   Staged {staged} rows in {phase - started:.1f}s")
+
+        rejected = flag_rejects(cur)
+        inserted = insert_staged(cur)
+        print(f"   Checked and inserted {inserted} rows in {time.perf_counter() - phase:.1f}s")
+
+        phase = time.perf_counter()
+        movies, episodes, seasons, shows = apply_rating_changes(cur)
+        print(f"   Ratings updated for {movies} movies, {episodes} episodes, "
+              f"{seasons} seasons, {shows} shows in {time.perf_counter() - phase:.1f}s")
+
+        samples = fetch_rejected(cur)
+        conn.commit()
+
+        total = time.perf_counter() - started
+        print("\n" + "=" * 50)
+        print(f"✅ Imported {inserted} reviews in {total:.1f}s "
+              f"({inserted / max(total, 1e-9):.0f} rows/s)")
+        if rejected:
+            print(f"⚠️ Rejected {sum(rejected.values())} reviews "
+                  f"({', '.join(f'{reason}: {count}' for reason, count in rejected.items())}):")
+            for line_no, user_id, media_id, ep_media_id, season_no, episode_no, reason in samples:
+                target = media_id or (ep_media_id, season_no, episode_no)
+                print(f"   • line {line_no}: user {user_id} → {target}: {reason}")
+        print("=" * 50)
+
+    except Exception as e:
+        conn.rollback()
+        print(f"\n❌ Error: {e}")
+
+    finally:
+        cur.close()
+        conn.close()
+
+
+def import_reviews(path, batch_size=DEFAULT_BATCH_SIZE):
+    """Import reviews in multi-row batches, committing after each batch"""
+    conn = psycopg2.connect(DATABASE_URL)
+    cur = conn.cursor()
+
+    inserted = 0
+    rejected = []
+    started = time.perf_counter()
+
+    print(f"📥 Importing reviews from {path} (batch size {batch_size})")
+    try:
+        for i, batch in enumerate(batches(iter_reviews(path), batch_size), 1):
+            batch_started = time.perf_counter()
+            try:
+                insert_batch(cur, batch)
+                conn.commit()
+                inserted += len(batch)
+            except Error:
+                conn.rollback()
+                ok, bad = insert_rows_individually(cur, batch)
+                conn.commit()
+                inserted += ok
+                rejected.extend(bad)
+            elapsed = time.perf_counter() - batch_started
+            print(f"   [batch {i}] {len(batch)} rows in {elapsed:.2f}s "
+                  f"({len(batch) / max(elapsed, 1e-9):.0f} rows/s)")
+
+    except Exception as e:
+        conn.rollback()
+        print(f"\n❌ Error: {e}")
+
+    finally:
+        cur.close()
+        conn.close()
+
+    total = time.perf_counter() - started
+    print("\n" + "=" * 50)
+    print(f"✅ Imported {inserted} reviews in {total:.1f}s "
+          f"({inserted / max(total, 1e-9):.0f} rows/s)")
+    if rejected:
+        print(f"⚠️ Rejected {len(rejected)} reviews:")
+        for row, reason in rejected[:20]:
+            print(f"   • user {row[0]} → {row[1] or row[2:5]}: {reason}")
+    print("=" * 50)
+
+
+# ══════════════════════════════════════════════
+# COMMAND LINE INTERFACE
+# ══════════════════════════════════════════════
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Bulk-import reviews from CSV / JSON lines",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python import_reviews.py reviews.csv                    # 1000 reviews per statement
+  python import_reviews.py reviews.jsonl.gz --batch-size 5000
+  python import_reviews.py reviews.csv --batch-size 1     # Row-at-a-time baseline
+  python import_reviews.py reviews.csv.gz --fast          # COPY + set-wise checks, one transaction
+
+--fast loads the whole file in one transaction with the review triggers
+bypassed, rejects bad rows (constraints, profanity) in the staging table and
+updates movie / episode / season / series ratings once at the end.
+        """
+    )
+    parser.add_argument("path", help="CSV (with header) or JSON-lines file, optionally .gz")
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help=f"Reviews per INSERT statement (default: {DEFAULT_BATCH_SIZE})"
+    )
+    parser.add_argument("--fast", action="store_true",
+                        help="COPY into staging, check set-wise, update ratings once (ignores --batch-size)")
+    args = parser.parse_args()
+
+    if args.fast:
+        import_reviews_fast(args.path)
+    else:
+        import_reviews(args.path, args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
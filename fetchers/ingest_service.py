@@ -0,0 +1,434 @@
+import psycopg2
+import os
+import time
+import select
+import socket
+import argparse
+import threading
+import requests
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from dotenv import load_dotenv
+
+from movie_fetcher import process_single_movie, fetch_movie_details
+from TVseries_fetcher import process_single_tv, fetch_tv_details
+from post_ingest import run_post_ingest
+from tmdb_client import is_not_found
+
+load_dotenv()
+
+# ── DB CONFIG ───────────────────────────────
+# Use Neon DB connection string
+DATABASE_URL = os.getenv("DATABASE_URL")
+
+# ── SERVICE CONFIG ──────────────────────────
+CHANNEL = "ingest_request"
+DEFAULT_POLL = 5.0            # seconds between queue checks when no NOTIFY arrives
+DEFAULT_LEASE_SECONDS = 300   # a 'running' request older than this is claimed again
+DEFAULT_METRICS_PORT = 9108
+DEFAULT_METRICS_HOST = "127.0.0.1"   # the metrics have no auth, so not exposed unless asked
+MAX_ATTEMPTS = 3
+RETRY_DELAY = 30              # seconds, doubled per failed attempt
+LATENCY_WINDOW = 1000         # recent requests the latency quantiles are taken over
+RECONNECT_DELAY = 2.0         # seconds after a dropped connection, doubled per failed reconnect
+MAX_RECONNECT_DELAY = 60.0
+
+INGESTERS = {"movie": process_single_movie, "tv": process_single_tv}
+DETAIL_FETCHERS = {"movie": fetch_movie_details, "tv": fetch_tv_details}
+
+
+# ══════════════════════════════════════════════
+# METRICS
+# ══════════════════════════════════════════════
+
+class Metrics:
+    """In-process counters + queue gauges, read by the /metrics thread"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.outcomes = {}                       # (media type, outcome) → requests
+        self.latency = {stage: deque(maxlen=LATENCY_WINDOW) for stage in ("wait", "ingest", "total")}
+        self.latency_sum = {stage: 0.0 for stage in self.latency}
+        self.latency_count = {stage: 0 for stage in self.latency}
+        self.queue = {}                          # status → requests
+        self.oldest_pending = 0.0
+        self.coalesced = 0
+        self.started = time.time()
+
+    def record(self, media_type, outcome, wait, ingest):
+        with self.lock:
+            key = (media_type, outcome)
+            self.outcomes[key] = self.outcomes.get(key, 0) + 1
+            for stage, seconds in (("wait", wait), ("ingest", ingest), ("total", wait + ingest)):
+                self.latency[stage].append(seconds)
+                self.latency_sum[stage] += seconds
+                self.latency_count[stage] += 1
+
+    def set_queue(self, counts, oldest_pending, coalesced):
+        with self.lock:
+            self.queue, self.oldest_pending, self.coalesced = counts, oldest_pending, coalesced
+
+    def render(self):
+        """Prometheus text exposition format"""
+        with self.lock:
+            lines = [
+                "# HELP ingest_queue_requests Ingest_Request rows by status",
+                "# TYPE ingest_queue_requests gauge",
+            ]
+            for status in ("pending", "running", "done", "failed"):
+                lines.append(f'ingest_queue_requests{{status="{status}"}} {self.queue.get(status, 0)}')
+            lines += [
+                "# HELP ingest_queue_oldest_pending_seconds Age of the oldest claimable request",
+                "# TYPE ingest_queue_oldest_pending_seconds gauge",
+                f"ingest_queue_oldest_pending_seconds {self.oldest_pending:.3f}",
+                "# HELP ingest_requests_coalesced Duplicate requests folded into queued titles",
+                "# TYPE ingest_requests_coalesced gauge",
+                f"ingest_requests_coalesced {self.coalesced}",
+                "# HELP ingest_requests_total Requests handled by this service",
+                "# TYPE ingest_requests_total counter",
+            ]
+            for (media_type, outcome), count in sorted(self.outcomes.items()):
+                lines.append(f'ingest_requests_total{{media_type="{media_type}",outcome="{outcome}"}} {count}')
+            lines += [
+                "# HELP ingest_request_seconds Queue wait, ingest time and their total per request",
+                "# TYPE ingest_request_seconds summary",
+            ]
+            for stage, samples in self.latency.items():
+                ordered = sorted(samples)
+                for q in (0.5, 0.95, 0.99):
+                    value = ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+                    lines.append(f'ingest_request_seconds{{stage="{stage}",quantile="{q}"}} {value:.4f}')
+                lines.append(f'ingest_request_seconds_sum{{stage="{stage}"}} {self.latency_sum[stage]:.4f}')
+                lines.append(f'ingest_request_seconds_count{{stage="{stage}"}} {self.latency_count[stage]}')
+            lines += [
+                "# HELP ingest_service_uptime_seconds Seconds since the service started",
+                "# TYPE ingest_service_uptime_seconds gauge",
+                f"ingest_service_uptime_seconds {time.time() - self.started:.0f}",
+            ]
+        return "\n".join(lines) + "\n"
+
+
+def serve_metrics(metrics, port, host=DEFAULT_METRICS_HOST):
+    """GET /metrics (Prometheus) and /healthz on a daemon thread"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/metrics":
+                body, content_type = metrics.render().encode(), "text/plain; version=0.0.4"
+            elif self.path == "/healthz":
+                body, content_type = b"ok\n", "text/plain"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# ══════════════════════════════════════════════
+# QUEUE
+# ══════════════════════════════════════════════
+
+def claim_request(cursor, worker_id, lease_seconds):
+    """
+    Claim the oldest claimable request: pending (and past RetryAt), or
+    running with an expired lease. Commit right after, so later requests
+    for the same title only bump RequestCount instead of waiting on it.
+    """
+    cursor.execute("""
+        UPDATE Ingest_Request r
+        SET Status = 'running',
+            ClaimedBy = %s,
+            ClaimedAt = clock_timestamp(),
+            Attempts = r.Attempts + 1
+        FROM (
+            SELECT MediaType, TmdbID
+            FROM Ingest_Request
+            WHERE (Status = 'pending' AND (RetryAt IS NULL OR RetryAt <= clock_timestamp()))
+               OR (Status = 'running' AND ClaimedAt < clock_timestamp() - make_interval(secs => %s))
+            ORDER BY RequestedAt
+            LIMIT 1
+            FOR UPDATE SKIP LOCKED
+        ) c
+        WHERE r.MediaType = c.MediaType AND r.TmdbID = c.TmdbID
+        RETURNING r.MediaType, r.TmdbID, r.Attempts, r.RequestCount,
+                  EXTRACT(EPOCH FROM clock_timestamp() - r.RequestedAt)
+    """, (worker_id, lease_seconds))
+    return cursor.fetchone()
+
+
+def finish_request(cursor, media_type, tmdb_id, worker_id, status, error=None, retry_in=None):
+    """Record the outcome, unless the lease expired and another worker took the request"""
+    cursor.execute("""
+        UPDATE Ingest_Request
+        SET Status = %s,
+            Error = %s,
+            RetryAt = clock_timestamp() + make_interval(secs => %s),
+            FinishedAt = CASE WHEN %s IN ('done', 'failed') THEN clock_timestamp() END,
+            ClaimedBy = NULL
+        WHERE MediaType = %s AND TmdbID = %s AND ClaimedBy = %s
+    """, (status, error, retry_in, status, media_type, tmdb_id, worker_id))
+
+
+def queue_snapshot(cursor):
+    """({status: requests}, oldest claimable pending age in seconds, coalesced duplicates)"""
+    cursor.execute("""
+        SELECT Status, COUNT(*),
+               EXTRACT(EPOCH FROM clock_timestamp() - MIN(RequestedAt)) FILTER (
+                   WHERE Status = 'pending' AND (RetryAt IS NULL OR RetryAt <= clock_timestamp())),
+               SUM(RequestCount - 1)
+        FROM Ingest_Request
+        GROUP BY Status
+    """)
+    counts, oldest, coalesced = {}, 0.0, 0
+    for status, count, age, duplicates in cursor.fetchall():
+        counts[status] = count
+        oldest = max(oldest, float(age or 0))
+        coalesced += int(duplicates or 0)
+    return counts, oldest, coalesced
+
+
+def wait_for_requests(listen_conn, timeout):
+    """Block until a NOTIFY arrives or timeout passes; returns the notifications drained"""
+    if select.select([listen_conn], [], [], timeout) == ([], [], []):
+        return 0
+    listen_conn.poll()
+    received = len(listen_conn.notifies)
+    listen_conn.notifies.clear()
+    return received
+
+
+def open_connections():
+    """(LISTENing autocommit connection, work connection, work cursor)"""
+    listen_conn = psycopg2.connect(DATABASE_URL)
+    try:
+        listen_conn.autocommit = True
+        listen_conn.cursor().execute(f"LISTEN {CHANNEL}")
+        conn = psycopg2.connect(DATABASE_URL)
+    except psycopg2.Error:
+        listen_conn.close()
+        raise
+    return listen_conn, conn, conn.cursor()
+
+
+def close_connections(*connections):
+    for connection in connections:
+        if connection is not None and not connection.closed:
+            connection.close()
+
+
+# ══════════════════════════════════════════════
+# INGEST
+# ══════════════════════════════════════════════
+
+def tmdb_has_title(media_type, tmdb_id):
+    """
+    False only when TMDB answers 404 for the title. Asked after a failed
+    ingest, since process_single_* report every failure the same way
+    """
+    try:
+        DETAIL_FETCHERS[media_type](tmdb_id)
+    except requests.exceptions.RequestException as e:
+        return not is_not_found(e)
+    return True
+
+
+def process_request(conn, cur, worker_id, media_type, tmdb_id, attempts):
+    """Ingest one claimed title and record the outcome in the same transaction"""
+    cur.execute("SELECT 1 FROM Media WHERE MediaID = %s", (tmdb_id,))
+    if cur.fetchone():
+        finish_request(cur, media_type, tmdb_id, worker_id, "done")
+        conn.commit()
+        return "exists"
+
+    touched_persons = set()
+    if INGESTERS[media_type](cur, tmdb_id, touched_persons=touched_persons):
+        finish_request(cur, media_type, tmdb_id, worker_id, "done")
+        conn.commit()
+        try:
+            run_post_ingest(conn, touched_persons)
+        except psycopg2.Error as e:
+            # The title is in; post_ingest.py --full picks the actors up later
+            print(f"   ⚠️ Leaderboard refresh failed: {e}")
+        return "ingested"
+
+    conn.rollback()
+    if not tmdb_has_title(media_type, tmdb_id):
+        # Retrying cannot make TMDB have it
+        finish_request(cur, media_type, tmdb_id, worker_id, "failed", "not found on TMDB")
+        conn.commit()
+        return "not_found"
+    if attempts >= MAX_ATTEMPTS:
+        finish_request(cur, media_type, tmdb_id, worker_id, "failed",
+                       f"ingest failed {attempts} times (see service log)")
+    else:
+        finish_request(cur, media_type, tmdb_id, worker_id, "pending",
+                       "ingest failed, retrying", RETRY_DELAY * 2 ** (attempts - 1))
+    conn.commit()
+    return "failed"
+
+
+def drain_queue(conn, cur, worker_id, lease_seconds, metrics):
+    """Process requests until none are claimable; returns how many were handled"""
+    handled = 0
+    while True:
+        claimed = claim_request(cur, worker_id, lease_seconds)
+        conn.commit()
+        if claimed is None:
+            return handled
+
+        media_type, tmdb_id, attempts, request_count, waited = claimed
+        print(f"\n📨 {media_type} {tmdb_id} (requested {request_count}×, waited {float(waited):.1f}s)")
+        started = time.perf_counter()
+        try:
+            outcome = process_request(conn, cur, worker_id, media_type, tmdb_id, attempts)
+        except psycopg2.Error as e:
+            # Lease runs out and the request is claimed again
+            conn.rollback()
+            print(f"   ❌ Database error: {e}")
+            outcome = "error"
+        metrics.record(media_type, outcome, float(waited), time.perf_counter() - started)
+        handled += 1
+
+
+# ══════════════════════════════════════════════
+# MAIN FUNCTION
+# ══════════════════════════════════════════════
+
+def run_service(poll=DEFAULT_POLL, lease_seconds=DEFAULT_LEASE_SECONDS,
+                metrics_port=DEFAULT_METRICS_PORT, worker_id=None, metrics_host=DEFAULT_METRICS_HOST):
+    """LISTEN for requests and ingest them until interrupted"""
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    metrics = Metrics()
+    if metrics_port:
+        serve_metrics(metrics, metrics_port, metrics_host)
+        print(f"📈 Metrics on http://{metrics_host or '0.0.0.0'}:{metrics_port}/metrics")
+
+    listen_conn, conn, cur = open_connections()
+    print(f"👂 [{worker_id}] Waiting for requests on '{CHANNEL}'")
+
+    delay = RECONNECT_DELAY
+    try:
+        while True:
+            try:
+                drain_queue(conn, cur, worker_id, lease_seconds, metrics)
+                metrics.set_queue(*queue_snapshot(cur))
+                conn.commit()
+                delay = RECONNECT_DELAY
+                wait_for_requests(listen_conn, poll)
+
+            except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+                # Server restart, failover or idle timeout. A request claimed
+                # when it dropped is picked up again once its lease runs out,
+                # and NOTIFYs sent meanwhile are covered by draining the queue
+                print(f"   ⚠️ [{worker_id}] Lost the database connection ({str(e).strip()}), "
+                      f"reconnecting in {delay:.0f}s")
+                close_connections(listen_conn, conn)
+                time.sleep(delay)
+                try:
+                    listen_conn, conn, cur = open_connections()
+                    print(f"👂 [{worker_id}] Reconnected, listening on '{CHANNEL}' again")
+                except psycopg2.Error:
+                    delay = min(delay * 2, MAX_RECONNECT_DELAY)
+
+    except KeyboardInterrupt:
+        if not conn.closed:
+            conn.rollback()
+        print(f"\n⏹️  [{worker_id}] Stopped")
+
+    finally:
+        close_connections(listen_conn, conn)
+
+
+def request_titles(media_type, tmdb_ids, source="cli"):
+    """Queue titles through fn_request_ingest"""
+    conn = psycopg2.connect(DATABASE_URL)
+    cur = conn.cursor()
+    try:
+        for tmdb_id in tmdb_ids:
+            cur.execute("SELECT fn_request_ingest(%s, %s, %s)", (media_type, tmdb_id, source))
+            print(f"   {media_type} {tmdb_id}: {cur.fetchone()[0]}")
+        conn.commit()
+    finally:
+        cur.close()
+        conn.close()
+
+
+def print_status():
+    conn = psycopg2.connect(DATABASE_URL)
+    cur = conn.cursor()
+    try:
+        counts, oldest, coalesced = queue_snapshot(cur)
+        print("📊 Ingest_Request")
+        for status in ("pending", "running", "done", "failed"):
+            print(f"   {status:<8} {counts.get(status, 0):>6}")
+        print(f"   oldest pending: {oldest:.1f}s | coalesced duplicates: {coalesced}")
+    finally:
+        cur.close()
+        conn.close()
+
+
+# ══════════════════════════════════════════════
+# COMMAND LINE INTERFACE
+# ══════════════════════════════════════════════
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Long-running on-demand ingestion service fed by Ingest_Request (LISTEN/NOTIFY)",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=f"""
+Examples:
+  python ingest_service.py serve                  # Metrics on :{DEFAULT_METRICS_PORT}/metrics
+  python ingest_service.py serve --metrics-port 0 --poll 2
+  python ingest_service.py serve --metrics-host 0.0.0.0  # Let Prometheus scrape from other hosts
+  python ingest_service.py request movie 550 680  # Queue titles (same as fn_request_ingest)
+  python ingest_service.py status
+
+Requests come from fn_request_ingest (server.js POST /ingest/requests, or
+any SQL client). Duplicates of a queued or running title only bump its
+RequestCount. Several services can run side by side: requests are claimed
+with FOR UPDATE SKIP LOCKED, and one whose service stops is claimed again
+after --lease-seconds. Failed titles are retried {MAX_ATTEMPTS} times with backoff;
+titles TMDB does not have (404) fail straight away.
+        """
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = sub.add_parser("serve", help="Run the service")
+    serve_parser.add_argument("--poll", type=float, default=DEFAULT_POLL,
+                              help=f"Seconds between queue checks without a NOTIFY (default: {DEFAULT_POLL:g})")
+    serve_parser.add_argument("--lease-seconds", type=int, default=DEFAULT_LEASE_SECONDS,
+                              help=f"Reclaim running requests older than this (default: {DEFAULT_LEASE_SECONDS})")
+    serve_parser.add_argument("--metrics-port", type=int, default=DEFAULT_METRICS_PORT,
+                              help=f"Port for /metrics and /healthz, 0 to disable (default: {DEFAULT_METRICS_PORT})")
+    serve_parser.add_argument("--metrics-host", default=DEFAULT_METRICS_HOST,
+                              help=f"Address the metrics server binds (default: {DEFAULT_METRICS_HOST})")
+
+    request_parser = sub.add_parser("request", help="Queue titles")
+    request_parser.add_argument("media_type", choices=sorted(INGESTERS))
+    request_parser.add_argument("ids", type=int, nargs="+", metavar="ID")
+    request_parser.add_argument("--source", default="cli")
+
+    sub.add_parser("status", help="Queue depth by status")
+
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        run_service(args.poll, args.lease_seconds, args.metrics_port, metrics_host=args.metrics_host)
+    elif args.command == "request":
+        request_titles(args.media_type, args.ids, args.source)
+    else:
+        print_status()
+
+
+if __name__ == "__main__":
+    main()
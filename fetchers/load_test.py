@@ -0,0 +1,392 @@
+import psycopg2
+import os
+import json
+import time
+import random
+import asyncio
+import argparse
+import platform
+from urllib.parse import quote
+from datetime import datetime, timezone
+from dotenv import load_dotenv
+
+# Not needed by the other fetchers: pip install aiohttp
+try:
+    import aiohttp
+except ImportError:
+    raise SystemExit("❌ load_test.py needs aiohttp (pip install aiohttp)")
+
+load_dotenv()
+
+# ── DB CONFIG ───────────────────────────────
+# Use Neon DB connection string
+DATABASE_URL = os.getenv("DATABASE_URL")
+
+# ── API CONFIG ──────────────────────────────
+API_BASE_URL = os.getenv("API_BASE_URL", f"http://localhost:{os.getenv('PORT', '3000')}")
+
+DEFAULT_RATE = 20.0
+DEFAULT_DURATION = 60
+DEFAULT_WARMUP = 5
+DEFAULT_MAX_IN_FLIGHT = 256
+REQUEST_TIMEOUT = 30
+
+PERCENTILES = (50, 90, 95, 99)
+
+# IDs / terms sampled per endpoint; the most rated titles first, so the mix
+# leans towards what users actually open
+SAMPLE_SIZE = 2000
+
+# name → default weight, path template, and the query its parameters are drawn from
+ENDPOINTS = {
+    "movies": {
+        "weight": 30,
+        "path": "/movies?page={page}&sort={sort}{genre}",
+        "query": "SELECT GenreName FROM Genre",
+    },
+    "tvshow_seasons": {
+        "weight": 25,
+        "path": "/tvshows/{id}/seasons",
+        "query": """
+            SELECT m.MediaID FROM Media m
+            WHERE m.MediaType = 'TVSeries'
+            ORDER BY m.RatingCount DESC NULLS LAST
+            LIMIT %(limit)s
+        """,
+    },
+    "search": {
+        "weight": 25,
+        "path": "/search?q={q}",
+        "query": """
+            SELECT m.Title FROM Media m
+            ORDER BY m.RatingCount DESC NULLS LAST
+            LIMIT %(limit)s
+        """,
+    },
+    "actors_top": {
+        "weight": 10,
+        "path": "/actors/top?page={page}",
+        "query": None,
+    },
+    "blog_comments": {
+        "weight": 10,
+        "path": "/blogs/{id}/comments",
+        "query": """
+            SELECT b.BlogID FROM Blog b
+            ORDER BY b.PostDate DESC
+            LIMIT %(limit)s
+        """,
+    },
+}
+
+MOVIE_SORTS = ["rating", "year", "title"]
+MAX_PAGE = 5
+
+
+# ══════════════════════════════════════════════
+# REQUEST MIX
+# ══════════════════════════════════════════════
+
+def load_samples(endpoints):
+    """Real IDs / genres / titles from the catalogue for each endpoint in the mix"""
+    conn = psycopg2.connect(DATABASE_URL)
+    cur = conn.cursor()
+    samples = {}
+    try:
+        for name in endpoints:
+            query = ENDPOINTS[name]["query"]
+            if query is None:
+                samples[name] = []
+                continue
+            cur.execute(query, {"limit": SAMPLE_SIZE})
+            samples[name] = [value for value, in cur.fetchall()]
+    finally:
+        cur.close()
+        conn.close()
+    return samples
+
+
+def search_term(title, rng):
+    """First one or two words of a title: what users type before picking a result"""
+    words = title.split()
+    return " ".join(words[:rng.choice((1, 2))]) or title
+
+
+def build_path(name, samples, rng):
+    values = samples[name]
+    if name == "movies":
+        genre = rng.choice(values) if values and rng.random() < 0.3 else None
+        return ENDPOINTS[name]["path"].format(
+            page=rng.randint(1, MAX_PAGE),
+            sort=rng.choice(MOVIE_SORTS),
+            genre=f"&genre={quote(genre)}" if genre else "",
+        )
+    if name == "actors_top":
+        return ENDPOINTS[name]["path"].format(page=rng.randint(1, MAX_PAGE))
+    if name == "search":
+        return ENDPOINTS[name]["path"].format(q=quote(search_term(rng.choice(values), rng)))
+    return ENDPOINTS[name]["path"].format(id=rng.choice(values))
+
+
+def parse_mix(pairs):
+    """["movies=5", "search=1"] → {"movies": 5.0, "search": 1.0}; default weights when empty"""
+    if not pairs:
+        return {name: spec["weight"] for name, spec in ENDPOINTS.items()}
+    mix = {}
+    for pair in pairs:
+        name, _, weight = pair.partition("=")
+        if name not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint '{name}' (choose from {', '.join(ENDPOINTS)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+# ══════════════════════════════════════════════
+# OPEN-LOOP LOAD GENERATOR
+# ══════════════════════════════════════════════
+
+async def send(session, semaphore, base_url, name, path, scheduled, results):
+    """
+    Latency is measured from the scheduled send time, not from when a
+    connection became free, so a slow server shows up as latency instead
+    of silently lowering the offered rate
+    """
+    async with semaphore:
+        try:
+            async with session.get(base_url + path) as response:
+                await response.read()
+                status = response.status
+                error = None if status < 400 else f"HTTP {status}"
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            status, error = None, type(e).__name__
+    results.append((name, scheduled, (time.perf_counter() - scheduled) * 1000, status, error))
+
+
+async def run_load(base_url, mix, samples, rate, duration, max_in_flight, seed):
+    """Poisson arrivals at `rate` req/s for `duration` seconds, whatever the response times"""
+    rng = random.Random(seed)
+    names = list(mix)
+    weights = [mix[name] for name in names]
+
+    semaphore = asyncio.Semaphore(max_in_flight)
+    timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+    connector = aiohttp.TCPConnector(limit=max_in_flight)
+    results = []
+    tasks = []
+
+    async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+        started = time.perf_counter()
+        next_at = started
+        while next_at - started < duration:
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            name = rng.choices(names, weights)[0]
+            path = build_path(name, samples, rng)
+            tasks.append(asyncio.create_task(
+                send(session, semaphore, base_url, name, path, next_at, results)))
+            next_at += rng.expovariate(rate)
+        await asyncio.gather(*tasks)
+
+    return started, results
+
+
+# ══════════════════════════════════════════════
+# REPORT
+# ══════════════════════════════════════════════
+
+def percentile(ordered, p):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+def summarize(rows, elapsed):
+    latencies = sorted(latency for _, _, latency, _, _ in rows)
+    errors = {}
+    for _, _, _, _, error in rows:
+        if error:
+            errors[error] = errors.get(error, 0) + 1
+    summary = {
+        "requests": len(rows),
+        "throughput": round(len(rows) / elapsed, 2) if elapsed else 0,
+        "error_rate": round(sum(errors.values()) / len(rows), 4) if rows else 0,
+        "errors": errors,
+    }
+    if latencies:
+        summary["latency_ms"] = {
+            **{f"p{p}": round(percentile(latencies, p), 2) for p in PERCENTILES},
+            "mean": round(sum(latencies) / len(latencies), 2),
+            "max": round(latencies[-1], 2),
+        }
+    return summary
+
+
+def check_slo(summary, slo_ms, max_error_rate):
+    """Names of the SLOs a summary breaks, e.g. ["p95 > 200 ms"]"""
+    broken = []
+    latency = summary.get("latency_ms", {})
+    for key, limit in slo_ms.items():
+        if key in latency and latency[key] > limit:
+            broken.append(f"{key} {latency[key]} ms > {limit} ms")
+    if max_error_rate is not None and summary["error_rate"] > max_error_rate:
+        broken.append(f"error rate {summary['error_rate']:.2%} > {max_error_rate:.2%}")
+    return broken
+
+
+def build_report(args, mix, started, results, slo_ms):
+    """Per-endpoint and overall summaries of the requests scheduled after the warm-up"""
+    measured = [row for row in results if row[1] - started >= args.warmup]
+    elapsed = args.duration - args.warmup
+
+    endpoints = {}
+    for name in mix:
+        summary = summarize([row for row in measured if row[0] == name], elapsed)
+        summary["slo_violations"] = check_slo(summary, slo_ms, args.max_error_rate)
+        endpoints[name] = summary
+    overall = summarize(measured, elapsed)
+    overall["slo_violations"] = check_slo(overall, slo_ms, args.max_error_rate)
+
+    return {
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "label": args.label,
+        "config": {
+            "base_url": args.base_url,
+            "rate": args.rate,
+            "duration": args.duration,
+            "warmup": args.warmup,
+            "max_in_flight": args.max_in_flight,
+            "seed": args.seed,
+            "mix": mix,
+            "slo_ms": slo_ms,
+            "max_error_rate": args.max_error_rate,
+            "host": platform.node(),
+        },
+        "overall": overall,
+        "endpoints": endpoints,
+    }
+
+
+def print_report(report, baseline=None):
+    def row(name, summary):
+        latency = summary.get("latency_ms", {})
+        line = (f"   {name:<15} {summary['requests']:>7} req | "
+                + " | ".join(f"p{p} {latency.get(f'p{p}', 0):8.1f}" for p in PERCENTILES)
+                + f" ms | err {summary['error_rate']:6.2%}")
+        if baseline is not None:
+            base = (baseline["endpoints"].get(name) if name != "overall" else baseline["overall"]) or {}
+            base_p95 = base.get("latency_ms", {}).get("p95")
+            if base_p95:
+                line += f" | p95 {(latency.get('p95', 0) - base_p95) / base_p95:+.0%} vs baseline"
+        if summary["slo_violations"]:
+            line += "  ❌ " + ", ".join(summary["slo_violations"])
+        print(line)
+
+    print(f"\n📊 {report['overall']['requests']} requests measured "
+          f"({report['overall']['throughput']} req/s achieved, {report['config']['rate']} offered)")
+    for name, summary in report["endpoints"].items():
+        row(name, summary)
+    row("overall", report["overall"])
+
+
+# ══════════════════════════════════════════════
+# COMMAND LINE INTERFACE
+# ══════════════════════════════════════════════
+
+def parse_slo(pairs):
+    """["p95=200", "p99=800"] → {"p95": 200.0, "p99": 800.0}"""
+    slo = {}
+    for pair in pairs or []:
+        key, _, limit = pair.partition("=")
+        if key not in {f"p{p}" for p in PERCENTILES} | {"mean", "max"}:
+            raise ValueError(f"Unknown SLO '{key}' (use p50/p90/p95/p99/mean/max)")
+        slo[key] = float(limit)
+    return slo
+
+
+DEFAULT_MIX = " ".join(f"{name}={spec['weight']}" for name, spec in ENDPOINTS.items())
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Open-loop HTTP load test of the Express API with per-endpoint latency reports",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python load_test.py --rate 50 --duration 120
+  python load_test.py --mix tvshow_seasons=3 search=1 --rate 100
+  python load_test.py --slo p95=200 p99=800 --max-error-rate 0.01 --output before.json
+  python load_test.py --output after.json --compare before.json
+
+Request parameters (show/blog IDs, search terms, genres) are sampled from
+DATABASE_URL, so point it at the database the server under test uses.
+Arrivals are Poisson at --rate regardless of response times; requests
+scheduled during --warmup are not reported. Exits 1 if an SLO is broken.
+
+Needs aiohttp (pip install aiohttp).
+        """
+    )
+    parser.add_argument("--base-url", default=API_BASE_URL, help=f"API root (default: {API_BASE_URL})")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE,
+                        help=f"Offered load in requests/second (default: {DEFAULT_RATE})")
+    parser.add_argument("--duration", type=float, default=DEFAULT_DURATION,
+                        help=f"Seconds of load, warm-up included (default: {DEFAULT_DURATION})")
+    parser.add_argument("--warmup", type=float, default=DEFAULT_WARMUP,
+                        help=f"Seconds excluded from the report (default: {DEFAULT_WARMUP})")
+    parser.add_argument("--max-in-flight", type=int, default=DEFAULT_MAX_IN_FLIGHT,
+                        help=f"Concurrent connections (default: {DEFAULT_MAX_IN_FLIGHT})")
+    parser.add_argument("--mix", nargs="+", metavar="ENDPOINT=WEIGHT",
+                        help=f"Endpoint weights (default: {DEFAULT_MIX})")
+    parser.add_argument("--slo", nargs="+", metavar="PCT=MS", help="Latency SLOs, e.g. p95=200")
+    parser.add_argument("--max-error-rate", type=float, help="Error-rate SLO, e.g. 0.01")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for arrivals and parameters")
+    parser.add_argument("--label", help="Free-text label stored in the report")
+    parser.add_argument("--output", help="Write the JSON report here")
+    parser.add_argument("--compare", help="Baseline JSON report to compare p95 against")
+    args = parser.parse_args()
+
+    if args.warmup >= args.duration:
+        parser.error("--warmup must be shorter than --duration")
+
+    try:
+        mix = parse_mix(args.mix)
+        slo_ms = parse_slo(args.slo)
+    except ValueError as e:
+        parser.error(str(e))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    samples = load_samples(mix)
+    for name, values in samples.items():
+        # Genres are optional for /movies; the others need at least one ID or title
+        if not values and ENDPOINTS[name]["query"] and name != "movies":
+            print(f"⚠️ No data for {name}; dropped from the mix")
+            del mix[name]
+    if not mix:
+        print("❌ Error: nothing to request (is the catalogue loaded?)")
+        raise SystemExit(1)
+
+    print(f"🚦 {args.rate} req/s for {args.duration:.0f}s against {args.base_url} "
+          f"({', '.join(f'{n}={w:g}' for n, w in mix.items())})")
+    started, results = asyncio.run(run_load(args.base_url, mix, samples, args.rate,
+                                            args.duration, args.max_in_flight, args.seed))
+
+    report = build_report(args, mix, started, results, slo_ms)
+    print_report(report, baseline)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Report written to {args.output}")
+
+    broken = report["overall"]["slo_violations"] or any(
+        summary["slo_violations"] for summary in report["endpoints"].values())
+    if broken:
+        print("\n❌ SLO violated")
+        raise SystemExit(1)
+    print("\n✅ Done")
+
+
+if __name__ == "__main__":
+    main()
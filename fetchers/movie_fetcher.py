@@ -2,81 +2,65 @@ import requests
 import psycopg2
 import os
 import argparse
+from itertools import islice
 from psycopg2 import Error
 from dotenv import load_dotenv
 
+from post_ingest import run_post_ingest
+from shared_writes import upsert_shared_entities
+from tmdb_client import API_KEY, tmdb_get, is_not_found, record_dead_letter, clear_dead_letter
+
 # Load environment variables from .env file
 load_dotenv()
 
-# ── TMDB CONFIG ─────────────────────────────
-API_KEY = os.getenv("TMDB_API_KEY")
-BASE_URL = "https://api.themoviedb.org/3"
-
 # ── DB CONFIG ───────────────────────────────
 # Use Neon DB connection string
 DATABASE_URL = os.getenv("DATABASE_URL")
 
+# ── CREDIT DEPTH ────────────────────────────
+# Top-billed cast stored at ingest; hydrate_credits.py stores the full
+# cast later, only for titles users actually open
+CAST_LIMIT = int(os.getenv("CREDIT_CAST_LIMIT", "10"))
+# Crew jobs stored (TMDB job → CrewRole); everything else is skipped
+CREW_JOBS = {
+    "Director": "Director",
+    "Writer": "Writer",
+    "Screenplay": "Writer",
+    "Story": "Writer",
+}
+
 # ══════════════════════════════════════════════
 # API FETCH FUNCTIONS
 # ══════════════════════════════════════════════
 
 def fetch_popular_movies(page=1):
     """Fetch popular movies from TMDB"""
-    url = f"{BASE_URL}/movie/popular"
-    params = {
-        "api_key": API_KEY,
-        "language": "en-US",
-        "page": page
-    }
-    response = requests.get(url, params=params)
-    response.raise_for_status()
-    return response.json()["results"]
+    return tmdb_get("/movie/popular", {"language": "en-US", "page": page})["results"]
 
 
 def fetch_movie_details(movie_id):
     """Fetch movie details including genres and production companies"""
-    url = f"{BASE_URL}/movie/{movie_id}"
-    params = {"api_key": API_KEY}
-    response = requests.get(url, params=params)
-    response.raise_for_status()
-    return response.json()
+    return tmdb_get(f"/movie/{movie_id}")
 
 
 def fetch_movie_credits(movie_id):
     """Fetch movie credits (cast and crew)"""
-    url = f"{BASE_URL}/movie/{movie_id}/credits"
-    params = {"api_key": API_KEY}
-    response = requests.get(url, params=params)
-    response.raise_for_status()
-    return response.json()
+    return tmdb_get(f"/movie/{movie_id}/credits")
 
 
 def search_movie(query):
     """Search for a movie by name, returns list of results"""
-    url = f"{BASE_URL}/search/movie"
-    params = {
-        "api_key": API_KEY,
-        "query": query,
-        "language": "en-US"
-    }
-    response = requests.get(url, params=params)
-    response.raise_for_status()
-    return response.json()["results"]
+    return tmdb_get("/search/movie", {"query": query, "language": "en-US"})["results"]
 
 
 # ══════════════════════════════════════════════
-# DATABASE INSERT FUNCTIONS
+# ROW BUILDERS
+# (shared with bulk_load.py)
 # ══════════════════════════════════════════════
 
-def insert_media(cursor, movie):
-    """Insert into Media table using TMDB movie ID"""
-    query = """
-    INSERT INTO Media
-    (MediaID, Title, ReleaseYear, Description, LanguageName, Rating, MediaType, Poster)
-    VALUES (%s, %s, %s, %s, %s, %s, 'Movie', %s)
-    ON CONFLICT (MediaID) DO NOTHING;
-    """
-    cursor.execute(query, (
+def media_row(movie):
+    """Build the Media row tuple for a TMDB movie"""
+    return (
         movie["id"],
         movie["title"],
         int(movie["release_date"][:4]) if movie.get("release_date") and len(movie["release_date"]) >= 4 else None,
@@ -84,41 +68,65 @@ def insert_media(cursor, movie):
         movie.get("original_language"),
         movie.get("vote_average"),
         movie.get("poster_path")
-    ))
+    )
 
 
-def insert_movie(cursor, details):
-    """Insert into Movie table"""
+def movie_row(details):
+    """Build the Movie row tuple for a TMDB movie"""
     # Duration must be > 0 due to CHECK constraint
     runtime = details.get("runtime")
     if runtime is not None and runtime <= 0:
         runtime = None
-    
-    query = """
-    INSERT INTO Movie
-    (MediaID, Duration, Budget, Revenue)
-    VALUES (%s, %s, %s, %s)
-    ON CONFLICT (MediaID) DO NOTHING;
-    """
-    cursor.execute(query, (
+
+    return (
         details["id"],
         runtime,
         details.get("budget") or None,
         details.get("revenue") or None
-    ))
+    )
+
+
+def genre_row(genre):
+    """Build the Genre row tuple for a TMDB genre"""
+    return (genre["id"], genre["name"])
+
+
+def studio_row(company):
+    """Build the Studio row tuple for a TMDB production company"""
+    return (company["id"], company["name"], company.get("logo_path"))
 
 
-def insert_genre(cursor, genre):
-    """Insert into Genre table"""
+def person_row(person):
+    """Build the Person row tuple for a TMDB cast/crew member"""
+    return (person["id"], person["name"], person.get("profile_path"))
+
+
+# ══════════════════════════════════════════════
+# DATABASE INSERT FUNCTIONS
+# ══════════════════════════════════════════════
+
+def insert_media(cursor, movie):
+    """Insert into Media table using TMDB movie ID"""
     query = """
-    INSERT INTO Genre (GenreID, GenreName)
-    VALUES (%s, %s)
-    ON CONFLICT (GenreID) DO NOTHING;
+    INSERT INTO Media
+    (MediaID, Title, ReleaseYear, Description, LanguageName, Rating, MediaType, Poster, SearchVector)
+    VALUES (%s, %s, %s, %s, %s, %s, 'Movie', %s, fn_media_search_vector(%s, %s))
+    ON CONFLICT (MediaID) DO NOTHING;
     """
-    cursor.execute(query, (
-        genre["id"],
-        genre["name"]
-    ))
+    row = media_row(movie)
+    # Title and Description also feed the full-text search vector
+    cursor.execute(query, row + (row[1], row[3]))
+
+
+def insert_movie(cursor, details):
+    """Insert into Movie table"""
+    query = """
+    INSERT INTO Movie
+    (MediaID, Duration, Budget, Revenue)
+    VALUES (%s, %s, %s, %s)
+    ON CONFLICT (MediaID) DO NOTHING;
+    """
+    cursor.execute(query, movie_row(details))
 
 
 def insert_media_genre(cursor, media_id, genre_id):
@@ -131,20 +139,6 @@ def insert_media_genre(cursor, media_id, genre_id):
     cursor.execute(query, (media_id, genre_id))
 
 
-def insert_studio(cursor, company):
-    """Insert into Studio table"""
-    query = """
-    INSERT INTO Studio (StudioID, StudioName, LogoURL)
-    VALUES (%s, %s, %s)
-    ON CONFLICT (StudioID) DO NOTHING;
-    """
-    cursor.execute(query, (
-        company["id"],
-        company["name"],
-        company.get("logo_path")
-    ))
-
-
 def insert_production(cursor, studio_id, media_id):
     """Insert into Production junction table"""
     query = """
@@ -155,20 +149,6 @@ def insert_production(cursor, studio_id, media_id):
     cursor.execute(query, (studio_id, media_id))
 
 
-def insert_person(cursor, person):
-    """Insert into Person table"""
-    query = """
-    INSERT INTO Person (PersonID, FullName, Picture)
-    VALUES (%s, %s, %s)
-    ON CONFLICT (PersonID) DO NOTHING;
-    """
-    cursor.execute(query, (
-        person["id"],
-        person["name"],
-        person.get("profile_path")
-    ))
-
-
 def insert_crew(cursor, person_id, media_id, role, character_name=None):
     """
     Insert into Crew junction table
@@ -188,73 +168,79 @@ def insert_crew(cursor, person_id, media_id, role, character_name=None):
 # ══════════════════════════════════════════════
 
 def process_genres(cursor, media_id, genres):
-    """Process and insert genres for a movie"""
-    for genre in genres:
-        insert_genre(cursor, genre)
-        insert_media_genre(cursor, media_id, genre["id"])
+    """
+    Process and insert genres for a movie
+    (Genre rows are committed first, see shared_writes.upsert_shared_entities)
+    """
+    upsert_shared_entities(genres=[genre_row(genre) for genre in genres])
+    for genre_id in sorted({genre["id"] for genre in genres}):
+        insert_media_genre(cursor, media_id, genre_id)
 
 
 def process_studios(cursor, media_id, companies):
     """Process and insert production companies for a movie"""
-    for company in companies:
-        insert_studio(cursor, company)
-        insert_production(cursor, company["id"], media_id)
+    upsert_shared_entities(studios=[studio_row(company) for company in companies])
+    for studio_id in sorted({company["id"] for company in companies}):
+        insert_production(cursor, studio_id, media_id)
 
 
-def process_credits(cursor, media_id, credits):
+def select_credits(credits, cast_limit=None, crew_jobs=None):
     """
-    Process cast and crew for a movie
+    Pick the cast and crew we store for a movie
     
-    Crew roles:
-    - Actor (from cast): has CharacterName
-    - Director (from crew where job='Director'): CharacterName is NULL
-    - Writer (from crew where job='Writer' or 'Screenplay'): CharacterName is NULL
+    Yields (person, role, character_name) tuples:
+    - Actor (top cast_limit of cast, default CAST_LIMIT, 0 = all): has CharacterName
+    - Director / Writer (crew whose job is in crew_jobs, default CREW_JOBS):
+      CharacterName is NULL
     """
+    cast_limit = CAST_LIMIT if cast_limit is None else cast_limit
+    crew_jobs = CREW_JOBS if crew_jobs is None else crew_jobs
+    
+    # ACTORS (from cast array, already in billing order)
+    for actor in islice(credits.get("cast", []), cast_limit or None):
+        yield actor, "Actor", actor.get("character")  # Actor has character name
     
-    # Process ACTORS (from cast array)
-    # Limit to top 10 actors to avoid too much data
-    for actor in credits.get("cast", [])[:10]:
-        insert_person(cursor, actor)
+    # DIRECTORS and WRITERS (from crew array): one dict lookup per entry
+    for crew_member in credits.get("crew", []):
+        role = crew_jobs.get(crew_member.get("job"))
+        if role:
+            yield crew_member, role, None  # Crew has no character name
+
+
+def process_credits(cursor, media_id, credits, cast_limit=None, crew_jobs=None):
+    """
+    Process cast and crew for a movie (see select_credits for the rules)
+    Returns the PersonIDs stored as actors
+    """
+    selected = list(select_credits(credits, cast_limit, crew_jobs))
+    cast_count = sum(1 for _, role, _ in selected if role == "Actor")
+    print(f"   → Inserting {cast_count} actors + {len(selected) - cast_count} directors/writers...")
+
+    # Person rows first, in their own transaction; Crew rows in key order
+    upsert_shared_entities(persons=[person_row(person) for person, _, _ in selected])
+    actor_ids = set()
+    for person, role, character_name in sorted(selected, key=lambda c: (c[0]["id"], c[1])):
+        if role == "Actor":
+            actor_ids.add(person["id"])
         insert_crew(
             cursor,
-            person_id=actor["id"],
+            person_id=person["id"],
             media_id=media_id,
-            role="Actor",
-            character_name=actor.get("character")  # Actor has character name
+            role=role,
+            character_name=character_name
         )
-    
-    # Process DIRECTORS and WRITERS (from crew array)
-    for crew_member in credits.get("crew", []):
-        job = crew_member.get("job", "")
-        
-        # Only process Directors and Writers
-        if job == "Director":
-            insert_person(cursor, crew_member)
-            insert_crew(
-                cursor,
-                person_id=crew_member["id"],
-                media_id=media_id,
-                role="Director",
-                character_name=None  # Director has no character name
-            )
-        
-        elif job in ["Writer", "Screenplay", "Story"]:
-            insert_person(cursor, crew_member)
-            insert_crew(
-                cursor,
-                person_id=crew_member["id"],
-                media_id=media_id,
-                role="Writer",
-                character_name=None  # Writer has no character name
-            )
+    return actor_ids
 
 
 # ══════════════════════════════════════════════
 # PROCESS SINGLE MOVIE
 # ══════════════════════════════════════════════
 
-def process_single_movie(cur, movie_id, movie_title=None):
-    """Process and insert a single movie with all its data"""
+def process_single_movie(cur, movie_id, movie_title=None, touched_persons=None):
+    """
+    Process and insert a single movie with all its data
+    Actor PersonIDs are added to touched_persons (for the post-ingest hook)
+    """
     try:
         # 1. Fetch detailed movie info
         details = fetch_movie_details(movie_id)
@@ -264,36 +250,47 @@ def process_single_movie(cur, movie_id, movie_title=None):
         # 2. Fetch credits (cast and crew)
         credits = fetch_movie_credits(movie_id)
         
-        # 3. Insert Media & Movie
-        print(f"   → Inserting Media & Movie...")
-        insert_media(cur, details)
-        insert_movie(cur, details)
-        
-        # 4. Insert Genres & Media_Genre
-        genres = details.get("genres", [])
-        if genres:
-            print(f"   → Inserting {len(genres)} genres...")
-            process_genres(cur, movie_id, genres)
-        
-        # 5. Insert Studios & Production
-        companies = details.get("production_companies", [])
-        if companies:
-            print(f"   → Inserting {len(companies)} studios...")
-            process_studios(cur, movie_id, companies)
-        
-        # 6. Insert Person & Crew
-        cast_count = len(credits.get("cast", [])[:10])
-        crew_count = len([c for c in credits.get("crew", []) 
-                         if c.get("job") in ["Director", "Writer", "Screenplay", "Story"]])
-        print(f"   → Inserting {cast_count} actors + {crew_count} directors/writers...")
-        process_credits(cur, movie_id, credits)
-        
+        ingest_movie(cur, details, credits, touched_persons)
+        clear_dead_letter(cur, "movie", movie_id)
         return True
     except Exception as e:
         print(f"   ❌ Error processing movie: {e}")
+        # A title TMDB does not have is not worth retrying
+        if not is_not_found(e):
+            record_dead_letter("movie", movie_id, e)
         return False
 
 
+def ingest_movie(cur, details, credits, touched_persons=None):
+    """
+    Insert a movie from its TMDB details + credits payloads
+    (shared with synthetic_catalogue.py, which feeds generated payloads)
+    """
+    movie_id = details["id"]
+
+    # 3. Insert Media & Movie
+    print(f"   → Inserting Media & Movie...")
+    insert_media(cur, details)
+    insert_movie(cur, details)
+    
+    # 4. Insert Genres & Media_Genre
+    genres = details.get("genres", [])
+    if genres:
+        print(f"   → Inserting {len(genres)} genres...")
+        process_genres(cur, movie_id, genres)
+    
+    # 5. Insert Studios & Production
+    companies = details.get("production_companies", [])
+    if companies:
+        print(f"   → Inserting {len(companies)} studios...")
+        process_studios(cur, movie_id, companies)
+    
+    # 6. Insert Person & Crew
+    actor_ids = process_credits(cur, movie_id, credits)
+    if touched_persons is not None:
+        touched_persons.update(actor_ids)
+
+
 # ══════════════════════════════════════════════
 # MAIN FUNCTIONS
 # ══════════════════════════════════════════════
@@ -311,6 +308,7 @@ def add_popular_movies(pages=1, start_page=1):
     print(f"\n🎯 Plan: Fetch pages {start_page}–{end_page} (~{total_movies} movies)")
 
     inserted_count = 0
+    touched_persons = set()
     try:
         for page in range(start_page, end_page + 1):
             print(f"\n📥 Fetching popular movies (page {page}/{end_page})...")
@@ -321,10 +319,11 @@ def add_popular_movies(pages=1, start_page=1):
                 movie_id = movie["id"]
                 movie_title = movie["title"]
                 print(f"\n[Page {page} | {i}/{len(movies)}] Processing: {movie_title}")
-                if process_single_movie(cur, movie_id, movie_title):
+                if process_single_movie(cur, movie_id, movie_title, touched_persons):
                     inserted_count += 1
 
         conn.commit()
+        run_post_ingest(conn, touched_persons)
         print("\n" + "="*50)
         print(f"✅ SUCCESS! {inserted_count} movies processed across pages {start_page}–{end_page}.")
         print("="*50)
@@ -348,8 +347,10 @@ def add_movie_by_id(movie_id):
 
     try:
         print(f"📥 Fetching movie with ID: {movie_id}")
-        if process_single_movie(cur, movie_id):
+        touched_persons = set()
+        if process_single_movie(cur, movie_id, touched_persons=touched_persons):
             conn.commit()
+            run_post_ingest(conn, touched_persons)
             print("\n✅ Movie added successfully!")
         else:
             conn.rollback()
@@ -0,0 +1,250 @@
+import psycopg2
+import os
+import statistics
+import time
+import unicodedata
+import argparse
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# ── DB CONFIG ───────────────────────────────
+# Use Neon DB connection string
+DATABASE_URL = os.getenv("DATABASE_URL")
+
+# Person rows updated per backfill transaction
+DEFAULT_BATCH_SIZE = 10000
+
+DEFAULT_BENCH_SIZES = [1_000_000]
+
+# Target from the /persons/search latency budget
+TARGET_MS = 10
+
+# Synthetic names: a first name plus a 2-3 syllable surname, some with
+# accents, so folded lookups are exercised and names are mostly distinct
+FIRST_NAMES = [
+    "James", "Zoë", "José", "Renée", "Chloé", "Mohammed", "Ana", "Björn", "Søren", "Hiroshi",
+    "Priya", "Élodie", "Mateo", "Noémie", "Ingrid", "Kwame", "Aoife", "Dmitri", "Lucía", "Rafael",
+    "Penélope", "Yuki", "Amara", "François", "Nikolaj", "Saoirse", "Ryūsuke", "Łukasz", "Maïwenn", "Tomás",
+]
+SURNAME_SYLLABLES = [
+    "sal", "da", "ña", "mül", "ler", "nú", "ñez", "kow", "als", "ki", "ør", "sted", "wa", "ta", "na",
+    "bé", "dog", "an", "her", "re", "ra", "lind", "qvist", "o", "ka", "for", "pe", "tro", "vić", "du",
+    "bois", "ku", "ro", "sa", "mar", "tí", "nez", "al", "mo", "dó", "var", "vil", "le", "neu", "ve",
+]
+
+# Lookups sampled from the generated names
+BENCH_LOOKUPS = 10
+
+LEGACY_QUERY = """
+    SELECT PersonID, FullName
+    FROM bench_person
+    WHERE FullName ILIKE %(pattern)s
+    ORDER BY FullName
+    LIMIT 20
+"""
+
+INDEXED_QUERY = """
+    SELECT PersonID, FullName
+    FROM bench_person
+    WHERE SearchName LIKE '%%' || fn_fold_name(%(q)s) || '%%'
+    ORDER BY FullName
+    LIMIT 20
+"""
+
+
+# ══════════════════════════════════════════════
+# BACKFILL
+# ══════════════════════════════════════════════
+
+def backfill(batch_size=DEFAULT_BATCH_SIZE, rebuild=False):
+    """Fill Person.SearchName in PersonID order, committing after each batch"""
+    conn = psycopg2.connect(DATABASE_URL)
+    cur = conn.cursor()
+
+    last_id = -1
+    updated = 0
+    print(f"👤 {'Rebuilding' if rebuild else 'Backfilling'} Person.SearchName (batch size {batch_size})")
+    try:
+        while True:
+            cur.execute(f"""
+                WITH batch AS (
+                    SELECT PersonID FROM Person
+                    WHERE PersonID > %s {'' if rebuild else 'AND SearchName IS NULL'}
+                    ORDER BY PersonID
+                    LIMIT %s
+                )
+                UPDATE Person p
+                SET SearchName = fn_fold_name(p.FullName)
+                FROM batch
+                WHERE p.PersonID = batch.PersonID
+                RETURNING p.PersonID
+            """, (last_id, batch_size))
+            ids = [person_id for person_id, in cur.fetchall()]
+            conn.commit()
+            if not ids:
+                break
+            last_id = max(ids)
+            updated += len(ids)
+            print(f"   → {updated} rows (up to PersonID {last_id})")
+
+        cur.execute("ANALYZE Person")
+        conn.commit()
+        print(f"\n✅ SearchName set on {updated} Person rows")
+
+    except Exception as e:
+        conn.rollback()
+        print(f"\n❌ Error: {e}")
+
+    finally:
+        cur.close()
+        conn.close()
+
+
+# ══════════════════════════════════════════════
+# BENCHMARK
+# ══════════════════════════════════════════════
+
+def fill_bench_table(cursor, rows):
+    """Random first name + syllable surname per row"""
+    cursor.execute("TRUNCATE bench_person")
+    cursor.execute("""
+        INSERT INTO bench_person (PersonID, FullName)
+        SELECT g,
+               f[1 + floor(random() * cardinality(f))::int] || ' ' ||
+               -- (references g so it is evaluated per row, not once)
+               initcap((SELECT string_agg(s[1 + floor(random() * cardinality(s))::int], '')
+                        FROM generate_series(1, 2 + g % 2)))
+        FROM generate_series(1, %s) AS g,
+             (SELECT %s::text[] AS f, %s::text[] AS s) names
+    """, (rows, FIRST_NAMES, SURNAME_SYLLABLES))
+
+
+def strip_accents(text):
+    return "".join(c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c))
+
+
+def sample_queries(cursor, count):
+    """
+    Typed the way users search: accents dropped, lower case, and the
+    surname cut short ("Zoë Saldaña" → "zoe salda")
+    """
+    cursor.execute("SELECT FullName FROM bench_person ORDER BY random() LIMIT %s", (count,))
+    queries = []
+    for full_name, in cursor.fetchall():
+        first, surname = full_name.split(" ", 1)
+        queries.append(strip_accents(f"{first} {surname[:max(3, len(surname) - 2)]}").lower())
+    return queries
+
+
+def time_lookups(cursor, query, queries, repeat):
+    """Run every sampled lookup `repeat` times, return latencies in ms"""
+    latencies = []
+    for _ in range(repeat):
+        for q in queries:
+            started = time.perf_counter()
+            cursor.execute(query, {"q": q, "pattern": f"%{q}%"})
+            cursor.fetchall()
+            latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+def bench(sizes, repeat):
+    """
+    FullName ILIKE (sequential scan, misses unaccented input) vs the folded
+    SearchName trigram lookup, on a TEMP table rolled back at the end
+    """
+    conn = psycopg2.connect(DATABASE_URL)
+    cur = conn.cursor()
+
+    print(f"🏁 Person search bench: {BENCH_LOOKUPS} sampled lookups, {repeat} rounds per size")
+    try:
+        cur.execute("SELECT setseed(0.42)")
+        cur.execute("""
+            CREATE TEMP TABLE bench_person (
+                PersonID INT PRIMARY KEY,
+                FullName VARCHAR(255) NOT NULL,
+                SearchName VARCHAR(255)
+            )
+        """)
+
+        for rows in sizes:
+            cur.execute("SAVEPOINT bench_size")
+            started = time.perf_counter()
+            fill_bench_table(cur, rows)
+            cur.execute("ANALYZE bench_person")
+            print(f"\n📦 {rows:,} persons generated in {time.perf_counter() - started:.1f}s")
+
+            queries = sample_queries(cur, BENCH_LOOKUPS)
+            print(f"   Lookups: {', '.join(queries)}")
+
+            # FullName ILIKE also misses most of these, since they are typed without accents
+            results = [("FullName ILIKE", time_lookups(cur, LEGACY_QUERY, queries, repeat))]
+
+            started = time.perf_counter()
+            cur.execute("UPDATE bench_person SET SearchName = fn_fold_name(FullName)")
+            cur.execute("CREATE INDEX ON bench_person USING GIN (SearchName gin_trgm_ops)")
+            cur.execute("ANALYZE bench_person")
+            print(f"   SearchName + trigram index built in {time.perf_counter() - started:.1f}s")
+
+            results.append(("SearchName trgm", time_lookups(cur, INDEXED_QUERY, queries, repeat)))
+
+            for label, latencies in results:
+                ordered = sorted(latencies)
+                p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+                verdict = "✅" if p95 < TARGET_MS else "⚠️"
+                print(f"   {label:<15} | p50 {statistics.median(ordered):9.2f} ms | "
+                      f"p95 {p95:9.2f} ms | mean {statistics.mean(ordered):9.2f} ms {verdict}")
+
+            cur.execute("ROLLBACK TO SAVEPOINT bench_size")
+
+    except Exception as e:
+        print(f"\n❌ Error: {e}")
+
+    finally:
+        conn.rollback()
+        cur.close()
+        conn.close()
+
+
+# ══════════════════════════════════════════════
+# COMMAND LINE INTERFACE
+# ══════════════════════════════════════════════
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Maintain and benchmark the accent-folded Person name index",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=f"""
+Examples:
+  python person_search.py backfill                # Fill SearchName where missing
+  python person_search.py backfill --rebuild      # Recompute every row
+  python person_search.py bench                   # 1M synthetic persons
+  python person_search.py bench --sizes 100000 1000000 --repeat 20
+
+Bench marks p95 latencies under {TARGET_MS} ms with ✅.
+        """
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    backfill_parser = subparsers.add_parser("backfill", help="Fill Person.SearchName for existing rows")
+    backfill_parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                                 help=f"Rows per transaction (default: {DEFAULT_BATCH_SIZE})")
+    backfill_parser.add_argument("--rebuild", action="store_true",
+                                 help="Recompute rows that already have a search name")
+
+    bench_parser = subparsers.add_parser("bench", help="Time name lookups on synthetic Person tables")
+    bench_parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_BENCH_SIZES,
+                              help="Person counts to test (default: 1000000)")
+    bench_parser.add_argument("--repeat", type=int, default=10, help="Rounds over the queries per size")
+
+    args = parser.parse_args()
+
+    if args.command == "backfill":
+        backfill(args.batch_size, args.rebuild)
+    else:
+        bench(args.sizes, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
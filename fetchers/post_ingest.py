@@ -0,0 +1,110 @@
+import psycopg2
+import os
+import time
+import random
+import argparse
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# ── DB CONFIG ───────────────────────────────
+# Use Neon DB connection string
+DATABASE_URL = os.getenv("DATABASE_URL")
+
+# ── RETRIES ─────────────────────────────────
+# Two runs refreshing overlapping actors can deadlock on the leaderboard
+# rows; the refresh is safe to repeat, so it is rolled back and run again
+REFRESH_RETRYABLE = {"40P01": "deadlock", "40001": "serialization failure"}
+REFRESH_ATTEMPTS = 5
+REFRESH_BASE_DELAY = 0.05  # seconds, doubled per attempt, with jitter
+
+
+# ══════════════════════════════════════════════
+# POST-INGEST HOOKS
+# ══════════════════════════════════════════════
+
+def refresh_actor_leaderboard(cursor, person_ids=None):
+    """Recompute Actor_Leaderboard for these actors (None → every actor)"""
+    if person_ids is not None:
+        person_ids = sorted(person_ids)
+    cursor.execute("SELECT fn_refresh_actor_leaderboard(%s::int[])", (person_ids,))
+    return cursor.fetchone()[0]
+
+
+def refresh_show_documents(cursor, media_ids):
+    """Rebuild TVShow_Document for these shows and take them off the dirty queue"""
+    if not media_ids:
+        return 0
+    cursor.execute("SELECT fn_refresh_show_documents(%s::int[])", (sorted(media_ids),))
+    return cursor.fetchone()[0]
+
+
+def run_post_ingest(conn, touched_persons):
+    """
+    Called by the fetchers once an ingestion run's title transactions have
+    committed, with the PersonIDs whose Crew rows the run wrote. Runs as its
+    own short transaction on conn (retried if a concurrent run's refresh
+    deadlocks with it), so the title rows do not wait on leaderboard locks.
+    """
+    if not touched_persons:
+        return
+    for attempt in range(1, REFRESH_ATTEMPTS + 1):
+        cur = conn.cursor()
+        try:
+            ranked = refresh_actor_leaderboard(cur, touched_persons)
+            conn.commit()
+            break
+        except psycopg2.Error as e:
+            conn.rollback()
+            if e.pgcode not in REFRESH_RETRYABLE or attempt == REFRESH_ATTEMPTS:
+                raise
+            delay = REFRESH_BASE_DELAY * 2 ** (attempt - 1) * (0.5 + random.random())
+            print(f"   ↻ {REFRESH_RETRYABLE[e.pgcode]} refreshing the actor leaderboard, "
+                  f"retrying in {delay * 1000:.0f} ms")
+            time.sleep(delay)
+        finally:
+            cur.close()
+    print(f"🏆 Actor leaderboard refreshed for {len(touched_persons)} actors ({ranked} ranked)")
+
+
+# ══════════════════════════════════════════════
+# COMMAND LINE INTERFACE
+# ══════════════════════════════════════════════
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Refresh summary tables that the fetchers maintain after ingestion",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python post_ingest.py --full               # Rebuild the whole actor leaderboard
+  python post_ingest.py --persons 287 819    # Refresh only these actors
+
+Leaderboard ratings are taken at refresh time; run --full periodically
+to pick up rating changes from new reviews.
+        """
+    )
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--full", action="store_true", help="Refresh every actor")
+    group.add_argument("--persons", type=int, nargs="+", help="PersonIDs to refresh")
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(DATABASE_URL)
+    cur = conn.cursor()
+
+    try:
+        ranked = refresh_actor_leaderboard(cur, None if args.full else args.persons)
+        conn.commit()
+        print(f"✅ Actor leaderboard refreshed ({ranked} rows written)")
+
+    except Exception as e:
+        conn.rollback()
+        print(f"\n❌ Error: {e}")
+
+    finally:
+        cur.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
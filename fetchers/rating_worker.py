@@ -0,0 +1,142 @@
+import psycopg2
+import os
+import time
+import argparse
+from dotenv import load_dotenv
+
+from post_ingest import refresh_show_documents
+
+load_dotenv()
+
+# ── DB CONFIG ───────────────────────────────
+# Use Neon DB connection string
+DATABASE_URL = os.getenv("DATABASE_URL")
+
+# Seasons recomputed per transaction
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_INTERVAL = 2.0
+
+
+# ══════════════════════════════════════════════
+# DIRTY QUEUE
+# ══════════════════════════════════════════════
+
+def claim_dirty_seasons(cursor, batch_size):
+    """
+    Take up to batch_size queued seasons off Rating_Dirty_Seasons, oldest
+    first. SKIP LOCKED lets several workers run side by side; a review
+    committed after the DELETE queues its season again.
+    """
+    cursor.execute("""
+        WITH claimed AS (
+            SELECT MediaID, SeasonNo
+            FROM Rating_Dirty_Seasons
+            ORDER BY QueuedAt
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+        )
+        DELETE FROM Rating_Dirty_Seasons d
+        USING claimed c
+        WHERE d.MediaID = c.MediaID AND d.SeasonNo = c.SeasonNo
+        RETURNING d.MediaID, d.SeasonNo
+    """, (batch_size,))
+    return cursor.fetchall()
+
+
+def queue_lag(cursor):
+    """(queued seasons, seconds since the oldest was queued)"""
+    cursor.execute("""
+        SELECT COUNT(*), EXTRACT(EPOCH FROM CURRENT_TIMESTAMP - MIN(QueuedAt))
+        FROM Rating_Dirty_Seasons
+    """)
+    count, lag = cursor.fetchone()
+    return count, float(lag or 0)
+
+
+def recompute_batch(cursor, seasons):
+    """Season + series averages for the claimed seasons, then their show documents"""
+    media_ids = [media_id for media_id, _ in seasons]
+    season_nos = [season_no for _, season_no in seasons]
+    cursor.execute("SELECT fn_recompute_season_ratings(%s::int[], %s::int[])", (media_ids, season_nos))
+    refresh_show_documents(cursor, set(media_ids))
+    return len(set(media_ids))
+
+
+def drain_dirty_seasons(conn, cur, batch_size=DEFAULT_BATCH_SIZE):
+    """Recompute queued seasons until the queue is empty; returns (seasons, shows)"""
+    seasons_done = shows_done = 0
+    while True:
+        seasons = claim_dirty_seasons(cur, batch_size)
+        if not seasons:
+            conn.commit()
+            return seasons_done, shows_done
+        shows_done += recompute_batch(cur, seasons)
+        conn.commit()
+        seasons_done += len(seasons)
+
+
+# ══════════════════════════════════════════════
+# MAIN FUNCTION
+# ══════════════════════════════════════════════
+
+def run_worker(batch_size=DEFAULT_BATCH_SIZE, watch=None):
+    """Drain the queue once, or every `watch` seconds until interrupted"""
+    conn = psycopg2.connect(DATABASE_URL)
+    cur = conn.cursor()
+
+    try:
+        while True:
+            queued, lag = queue_lag(cur)
+            conn.commit()
+            started = time.perf_counter()
+            seasons, shows = drain_dirty_seasons(conn, cur, batch_size)
+            if seasons or not watch:
+                print(f"⭐ Recomputed {seasons} seasons across {shows} shows "
+                      f"in {time.perf_counter() - started:.2f}s (oldest waited {lag:.1f}s)")
+            if not watch:
+                break
+            time.sleep(watch)
+
+    except KeyboardInterrupt:
+        conn.rollback()
+        print("\n⏹️  Stopped")
+
+    except Exception as e:
+        conn.rollback()
+        print(f"\n❌ Error: {e}")
+
+    finally:
+        cur.close()
+        conn.close()
+
+
+# ══════════════════════════════════════════════
+# COMMAND LINE INTERFACE
+# ══════════════════════════════════════════════
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Recompute season/series ratings queued by the deferred episode rating cascade",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=f"""
+Examples:
+  python rating_worker.py                         # Drain the queue once
+  python rating_worker.py --watch {DEFAULT_INTERVAL:g}               # Keep draining every {DEFAULT_INTERVAL:g} seconds
+  python rating_worker.py --watch 1 --batch-size 2000
+
+Seasons are only queued while cholochitro.deferred_rating_cascade = 'on'
+(see migrations/20261019_deferred_rating_cascade.sql); until the worker
+runs, Season.AvgRating and the series rating lag the episode ratings.
+        """
+    )
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f"Seasons per transaction (default: {DEFAULT_BATCH_SIZE})")
+    parser.add_argument("--watch", type=float, metavar="SECONDS",
+                        help="Poll the queue every SECONDS instead of exiting")
+    args = parser.parse_args()
+
+    run_worker(args.batch_size, args.watch)
+
+
+if __name__ == "__main__":
+    main()
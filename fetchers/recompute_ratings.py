@@ -0,0 +1,336 @@
+import psycopg2
+import os
+import io
+import argparse
+
+# Not needed by the other fetchers: pip install numpy
+try:
+    import numpy as np
+except ImportError:
+    raise SystemExit("❌ recompute_ratings.py needs numpy (pip install numpy)")
+from dotenv import load_dotenv
+
+from bulk_load import copy_rows
+
+load_dotenv()
+
+# ── DB CONFIG ───────────────────────────────
+# Use Neon DB connection string
+DATABASE_URL = os.getenv("DATABASE_URL")
+
+# Weight of the TMDB prior in the weighted-prior formula
+# (RatingCount starts at 1000, see migrations/20260405_*)
+PRIOR_WEIGHT = 1000
+
+# Stored vs recomputed ratings closer than this are considered equal
+TOLERANCE = 1e-6
+
+# ══════════════════════════════════════════════
+# WHAT THE TRIGGERS SHOULD HAVE PRODUCED
+# ══════════════════════════════════════════════
+#
+# Movie / Episode (fn_refresh_movie_rating, fn_cascade_episode_rating):
+#   RatingCount = 1000 + n
+#   Rating      = ROUND((BaseRating * 1000 + SUM(r)) / RatingCount, 1)
+# Season:
+#   AvgRating   = ROUND(AVG(Episode.AvgRating), 1)
+# Series (Media row of a TV show):
+#   Rating      = ROUND(AVG(per-season AVG(Episode.AvgRating)), 1)
+#   RatingCount = SUM(Episode.RatingCount)
+#
+# The triggers apply ROUND(..., 1) to the running value on every review,
+# so long-lived rows drift away from the closed form above. Season and
+# series aggregates are only maintained once a show has episode reviews,
+# so only those are checked.
+
+
+# ══════════════════════════════════════════════
+# BULK READS
+# ══════════════════════════════════════════════
+
+def copy_to_array(cursor, query, columns):
+    """Run COPY (query) TO STDOUT and parse it into a float64 (rows, columns) array"""
+    buffer = io.StringIO()
+    cursor.copy_expert(f"COPY ({query}) TO STDOUT WITH CSV", buffer)
+    if buffer.tell() == 0:
+        return np.empty((0, columns))
+    buffer.seek(0)
+    # Empty CSV fields are NULLs → NaN
+    data = np.genfromtxt(buffer, delimiter=",", dtype=np.float64, filling_values=np.nan)
+    return data.reshape(-1, columns)
+
+
+def episode_key(media_ids, season_nos, episode_nos=0):
+    """Pack (MediaID, SeasonNo, EpisodeNo) into one sortable int64 key"""
+    return ((np.asarray(media_ids, dtype=np.int64) << 32)
+            | (np.asarray(season_nos, dtype=np.int64) << 20)
+            | np.asarray(episode_nos, dtype=np.int64))
+
+
+def media_of(keys):
+    return keys >> 32
+
+
+def round1(values):
+    """PostgreSQL ROUND(x, 1): half away from zero (ratings are positive)"""
+    return np.floor(np.asarray(values) * 10 + 0.5 + 1e-9) / 10
+
+
+def group_sum(keys, values):
+    """Group-by over int64 keys → (unique keys, sums, counts)"""
+    unique, inverse = np.unique(keys, return_inverse=True)
+    sums = np.bincount(inverse, weights=values, minlength=len(unique))
+    counts = np.bincount(inverse, minlength=len(unique))
+    return unique, sums, counts
+
+
+def group_mean(keys, values):
+    """Group-by mean that ignores NaN like SQL AVG ignores NULL"""
+    valid = ~np.isnan(values)
+    unique, inverse = np.unique(keys, return_inverse=True)
+    sums = np.bincount(inverse[valid], weights=values[valid], minlength=len(unique))
+    counts = np.bincount(inverse[valid], minlength=len(unique))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return unique, np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+
+
+def align(stored_keys, group_keys, group_values, fill):
+    """Scatter per-group values onto the rows of a stored table (by key)"""
+    out = np.full(len(stored_keys), fill, dtype=np.float64)
+    if len(group_keys) == 0:
+        return out
+    idx = np.clip(np.searchsorted(group_keys, stored_keys), 0, len(group_keys) - 1)
+    hit = group_keys[idx] == stored_keys
+    out[hit] = np.asarray(group_values, dtype=np.float64)[idx[hit]]
+    return out
+
+
+def media_filter(column, media_ids):
+    """SQL fragment restricting a query to the given MediaIDs (COPY takes no parameters)"""
+    if media_ids is None:
+        return ""
+    return f"AND {column} = ANY('{{{','.join(str(int(m)) for m in media_ids)}}}'::int[])"
+
+
+def load_reviews(cursor, media_ids=None):
+    """All rated reviews as an (n, 5) array: MediaID, EpMediaID, SeasonNo, EpisodeNo, Rating"""
+    return copy_to_array(cursor, f"""
+        SELECT MediaID, EpisodeMediaID, EpisodeSeasonNo, EpisodeNo, Rating
+        FROM Review
+        WHERE Rating IS NOT NULL
+        {media_filter('COALESCE(MediaID, EpisodeMediaID)', media_ids)}
+    """, 5)
+
+
+# ══════════════════════════════════════════════
+# RECOMPUTE
+# ══════════════════════════════════════════════
+
+def recompute(cursor, media_ids=None):
+    """
+    Recompute every rating aggregate from Review rows.
+    Returns {aggregate: (key columns array, stored, expected)} ready for diffing.
+    media_ids limits the work to those movies / shows (None = everything).
+    """
+    reviews = load_reviews(cursor, media_ids)
+    movie_reviews = reviews[~np.isnan(reviews[:, 0])]
+    episode_reviews = reviews[~np.isnan(reviews[:, 1])]
+
+    # ── Movies ──
+    movies = copy_to_array(cursor, f"""
+        SELECT MediaID, BaseRating, Rating, RatingCount
+        FROM Media
+        WHERE MediaType = 'Movie' AND BaseRating IS NOT NULL
+        {media_filter('MediaID', media_ids)}
+    """, 4)
+    movie_keys = movies[:, 0].astype(np.int64)
+    keys, sums, counts = group_sum(movie_reviews[:, 0].astype(np.int64), movie_reviews[:, 4])
+    n = align(movie_keys, keys, counts, 0)
+    s = align(movie_keys, keys, sums, 0)
+    movie_count = PRIOR_WEIGHT + n
+    movie_rating = round1((movies[:, 1] * PRIOR_WEIGHT + s) / movie_count)
+
+    # ── Episodes ──
+    episodes = copy_to_array(cursor, f"""
+        SELECT MediaID, SeasonNo, EpisodeNo, BaseRating, AvgRating, RatingCount
+        FROM Episode
+        WHERE TRUE {media_filter('MediaID', media_ids)}
+        ORDER BY MediaID, SeasonNo, EpisodeNo
+    """, 6)
+    ep_keys = episode_key(episodes[:, 0], episodes[:, 1], episodes[:, 2])
+    keys, sums, counts = group_sum(
+        episode_key(episode_reviews[:, 1], episode_reviews[:, 2], episode_reviews[:, 3]),
+        episode_reviews[:, 4])
+    n = align(ep_keys, keys, counts, 0)
+    s = align(ep_keys, keys, sums, 0)
+    has_base = ~np.isnan(episodes[:, 3])
+    ep_count = np.where(has_base, PRIOR_WEIGHT + n, episodes[:, 5])
+    ep_rating = np.where(has_base,
+                         round1((episodes[:, 3] * PRIOR_WEIGHT + s) / (PRIOR_WEIGHT + n)),
+                         episodes[:, 4])
+
+    # ── Seasons (only those with episode reviews) ──
+    season_of_episode = ep_keys & ~np.int64((1 << 20) - 1)
+    season_keys, season_mean = group_mean(season_of_episode, ep_rating)
+    reviewed_seasons = np.unique(episode_key(episode_reviews[:, 1], episode_reviews[:, 2]))
+
+    seasons = copy_to_array(cursor, f"""
+        SELECT MediaID, SeasonNo, AvgRating
+        FROM Season
+        WHERE TRUE {media_filter('MediaID', media_ids)}
+    """, 3)
+    stored_season_keys = episode_key(seasons[:, 0], seasons[:, 1])
+    seasons = seasons[np.isin(stored_season_keys, reviewed_seasons)]
+    stored_season_keys = episode_key(seasons[:, 0], seasons[:, 1])
+    season_rating = round1(align(stored_season_keys, season_keys, season_mean, np.nan))
+
+    # ── Series (only those with episode reviews) ──
+    series_keys, series_mean = group_mean(media_of(season_keys), season_mean)
+    count_keys, count_sums, _ = group_sum(media_of(ep_keys), ep_count)
+    reviewed_series = np.unique(episode_reviews[:, 1].astype(np.int64))
+
+    series = copy_to_array(cursor, f"""
+        SELECT MediaID, Rating, RatingCount
+        FROM Media
+        WHERE MediaType = 'TVSeries'
+        {media_filter('MediaID', media_ids)}
+    """, 3)
+    series = series[np.isin(series[:, 0].astype(np.int64), reviewed_series)]
+    stored_series_keys = series[:, 0].astype(np.int64)
+    series_rating = round1(align(stored_series_keys, series_keys, series_mean, np.nan))
+    series_count = align(stored_series_keys, count_keys, count_sums, 0)
+
+    return {
+        "movie": (movies[:, [0]], movies[:, 2:4], np.column_stack([movie_rating, movie_count])),
+        "episode": (episodes[:, 0:3], episodes[:, 4:6], np.column_stack([ep_rating, ep_count])),
+        "season": (seasons[:, 0:2], seasons[:, [2]], season_rating.reshape(-1, 1)),
+        "series": (series[:, [0]], series[:, 1:3], np.column_stack([series_rating, series_count])),
+    }
+
+
+def diff(results):
+    """Rows whose stored aggregate differs from the recomputed one"""
+    drifted = {}
+    for name, (keys, stored, expected) in results.items():
+        both_null = np.isnan(stored) & np.isnan(expected)
+        differs = ~both_null & ~(np.abs(stored - expected) <= TOLERANCE)
+        rows = differs.any(axis=1)
+        drifted[name] = (keys[rows], stored[rows], expected[rows])
+    return drifted
+
+
+# ══════════════════════════════════════════════
+# WRITE CORRECTIONS
+# ══════════════════════════════════════════════
+
+CORRECTIONS = {
+    # aggregate: (table, key columns, value columns, extra WHERE)
+    "movie":   ("Media", ["MediaID"], ["Rating", "RatingCount"], "AND t.MediaType = 'Movie'"),
+    "episode": ("Episode", ["MediaID", "SeasonNo", "EpisodeNo"], ["AvgRating", "RatingCount"], ""),
+    "season":  ("Season", ["MediaID", "SeasonNo"], ["AvgRating"], ""),
+    "series":  ("Media", ["MediaID"], ["Rating", "RatingCount"], "AND t.MediaType = 'TVSeries'"),
+}
+
+
+def to_sql_value(value, is_count):
+    if np.isnan(value):
+        return None
+    return int(value) if is_count else f"{value:.1f}"
+
+
+def write_corrections(cursor, drifted):
+    """COPY every correction into a temp table, then one UPDATE ... FROM per table"""
+    written = {}
+    for name, (keys, _, expected) in drifted.items():
+        if len(keys) == 0:
+            written[name] = 0
+            continue
+        table, key_columns, value_columns, extra = CORRECTIONS[name]
+        temp = f"fix_{name}"
+        cursor.execute(f"""
+            CREATE TEMP TABLE {temp} AS
+            SELECT {', '.join(key_columns + value_columns)} FROM {table} WITH NO DATA
+        """)
+        rows = (
+            tuple(int(k) for k in key_row)
+            + tuple(to_sql_value(v, col == "RatingCount") for v, col in zip(value_row, value_columns))
+            for key_row, value_row in zip(keys, expected)
+        )
+        copy_rows(cursor, temp, key_columns + value_columns, rows)
+        cursor.execute(f"""
+            UPDATE {table} t
+            SET {', '.join(f'{c} = f.{c}' for c in value_columns)}
+            FROM {temp} f
+            WHERE {' AND '.join(f't.{c} = f.{c}' for c in key_columns)} {extra}
+        """)
+        written[name] = cursor.rowcount
+        cursor.execute(f"DROP TABLE {temp}")
+    return written
+
+
+# ══════════════════════════════════════════════
+# MAIN
+# ══════════════════════════════════════════════
+
+def print_report(results, drifted, show=10):
+    print("\n📊 Rating aggregate check")
+    print("-" * 50)
+    for name, (keys, stored, expected) in drifted.items():
+        total = len(results[name][0])
+        print(f"  {name:<8} {len(keys):>7} / {total:<7} drifted")
+        if len(keys) == 0:
+            continue
+        drift = np.nan_to_num(np.abs(stored[:, 0] - expected[:, 0]))
+        for i in np.argsort(-drift)[:show]:
+            key = "/".join(str(int(k)) for k in keys[i])
+            print(f"      {key:<20} stored {stored[i].tolist()} → {expected[i].tolist()}")
+    print("-" * 50)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Recompute trigger-maintained rating aggregates from Review rows and repair drift",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python recompute_ratings.py                  # Report drift only
+  python recompute_ratings.py --apply          # Report and write corrections
+  python recompute_ratings.py --media 550 1396 # Only check these movies / shows
+
+Needs numpy (pip install numpy).
+        """
+    )
+    parser.add_argument("--apply", action="store_true", help="Write corrections (default: dry run)")
+    parser.add_argument("--media", type=int, nargs="+", help="Limit to these MediaIDs")
+    parser.add_argument("--show", type=int, default=10, help="Worst rows to print per aggregate")
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(DATABASE_URL)
+    # REPEATABLE READ: reviews and stored aggregates come from one snapshot
+    conn.set_session(isolation_level="REPEATABLE READ")
+    cur = conn.cursor()
+
+    try:
+        results = recompute(cur, args.media)
+        drifted = diff(results)
+        print_report(results, drifted, args.show)
+
+        if args.apply:
+            written = write_corrections(cur, drifted)
+            conn.commit()
+            print(f"✅ Corrections written: {written}")
+        else:
+            conn.rollback()
+            print("ℹ️  Dry run — pass --apply to write corrections.")
+
+    except Exception as e:
+        conn.rollback()
+        print(f"\n❌ Error: {e}")
+
+    finally:
+        cur.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+import psycopg2
+import os
+import re
+import csv
+import math
+import argparse
+import unicodedata
+from difflib import SequenceMatcher
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+
+from movie_fetcher import search_movie, process_single_movie
+from TVseries_fetcher import search_tv, process_single_tv
+from post_ingest import run_post_ingest
+
+load_dotenv()
+
+# ── DB CONFIG ───────────────────────────────
+# Use Neon DB connection string
+DATABASE_URL = os.getenv("DATABASE_URL")
+
+# ── RESOLVER CONFIG ─────────────────────────
+DEFAULT_WORKERS = 8
+DEFAULT_REPORT = "resolution_report.csv"
+
+# Score = weighted title similarity, year agreement and popularity, in 0..1.
+# Without a year hint the year weight is left out and the rest rescaled.
+TITLE_WEIGHT = 0.60
+YEAR_WEIGHT = 0.25
+POPULARITY_WEIGHT = 0.15
+
+# A match is handed to ingestion only if it scores at least MIN_SCORE and
+# beats the runner-up by MIN_MARGIN (remakes with the same title and no
+# year hint land in between and are left for review)
+MIN_SCORE = 0.85
+MIN_MARGIN = 0.10
+
+SEARCH = {"movie": search_movie, "tv": search_tv}
+INGEST = {"movie": process_single_movie, "tv": process_single_tv}
+# TMDB result fields per type: (title fields, date field)
+FIELDS = {
+    "movie": (("title", "original_title"), "release_date"),
+    "tv": (("name", "original_name"), "first_air_date"),
+}
+
+YEAR_HINT = re.compile(r"^(?P<title>.+?)\s*(?:\((?P<paren>\d{4})\)|[,|\t]\s*(?P<sep>\d{4}))\s*$")
+TYPE_PREFIX = re.compile(r"^(?P<type>movie|tv)\s*:\s*", re.IGNORECASE)
+
+
+# ══════════════════════════════════════════════
+# INPUT
+# ══════════════════════════════════════════════
+
+def parse_line(line, default_type):
+    """
+    "Title", "Title (1999)", "Title, 1999", "Title | 1999" or "Title<TAB>1999",
+    optionally prefixed with "movie:" / "tv:" → (type, title, year or None)
+    """
+    text = line.strip()
+    media_type = default_type
+    prefix = TYPE_PREFIX.match(text)
+    if prefix:
+        media_type = prefix.group("type").lower()
+        text = text[prefix.end():]
+
+    hint = YEAR_HINT.match(text)
+    if hint:
+        return media_type, hint.group("title").strip(), int(hint.group("paren") or hint.group("sep"))
+    return media_type, text, None
+
+
+def read_titles(path, default_type):
+    """[(line number, type, title, year)], skipping blank lines and # comments"""
+    entries = []
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            if line.strip() and not line.lstrip().startswith("#"):
+                entries.append((line_no, *parse_line(line, default_type)))
+    return entries
+
+
+# ══════════════════════════════════════════════
+# SCORING
+# ══════════════════════════════════════════════
+
+def normalize_title(title):
+    """Accents, case, punctuation and a leading article removed ("The Office" → "office")"""
+    text = unicodedata.normalize("NFKD", title).encode("ascii", "ignore").decode()
+    text = re.sub(r"[^a-z0-9]+", " ", text.lower().replace("&", " and ")).strip()
+    return re.sub(r"^(the|a|an) ", "", text)
+
+
+def title_similarity(query, candidate):
+    a, b = normalize_title(query), normalize_title(candidate)
+    if not a or not b:
+        return 0.0
+    return 1.0 if a == b else SequenceMatcher(None, a, b).ratio()
+
+
+def year_agreement(hint, candidate_year):
+    """1 for the hinted year, 0.6 one year off (festival vs release date), else 0"""
+    if candidate_year is None:
+        return 0.0
+    return {0: 1.0, 1: 0.6}.get(abs(hint - candidate_year), 0.0)
+
+
+def result_year(result, date_field):
+    date = result.get(date_field) or ""
+    return int(date[:4]) if date[:4].isdigit() else None
+
+
+def score_results(query, year, results, media_type):
+    """[(score, result, year)] best first; popularity is log-scaled against the most popular result"""
+    title_fields, date_field = FIELDS[media_type]
+    top_popularity = max((r.get("popularity") or 0 for r in results), default=0)
+
+    scored = []
+    for result in results:
+        similarity = max(title_similarity(query, result.get(field) or "") for field in title_fields)
+        popularity = (math.log1p(result.get("popularity") or 0) / math.log1p(top_popularity)
+                      if top_popularity > 0 else 0.0)
+        candidate_year = result_year(result, date_field)
+
+        if year is None:
+            score = ((TITLE_WEIGHT * similarity + POPULARITY_WEIGHT * popularity)
+                     / (TITLE_WEIGHT + POPULARITY_WEIGHT))
+        else:
+            score = (TITLE_WEIGHT * similarity
+                     + YEAR_WEIGHT * year_agreement(year, candidate_year)
+                     + POPULARITY_WEIGHT * popularity)
+        scored.append((score, result, candidate_year))
+
+    scored.sort(key=lambda item: item[0], reverse=True)
+    return scored
+
+
+# ══════════════════════════════════════════════
+# RESOLUTION
+# ══════════════════════════════════════════════
+
+def resolve(entry, min_score=MIN_SCORE, min_margin=MIN_MARGIN):
+    """Search one title and pick its best match; returns a report row"""
+    line_no, media_type, query, year = entry
+    row = {"line": line_no, "type": media_type, "query": query, "year_hint": year or "",
+           "status": "not_found", "tmdb_id": "", "title": "", "year": "",
+           "score": "", "margin": "", "runner_up": ""}
+    try:
+        results = SEARCH[media_type](query)
+    except Exception as e:
+        row.update(status="error", runner_up=str(e))
+        return row
+    if not results:
+        return row
+
+    scored = score_results(query, year, results, media_type)
+    best_score, best, best_year = scored[0]
+    margin = best_score - scored[1][0] if len(scored) > 1 else best_score
+    title_field = FIELDS[media_type][0][0]
+    row.update(
+        status="resolved" if best_score >= min_score and margin >= min_margin else "review",
+        tmdb_id=best["id"], title=best.get(title_field, ""), year=best_year or "",
+        score=f"{best_score:.3f}", margin=f"{margin:.3f}",
+    )
+    if len(scored) > 1:
+        runner_score, runner, runner_year = scored[1]
+        row["runner_up"] = f"{runner.get(title_field, '')} ({runner_year or '????'}) {runner_score:.3f}"
+    return row
+
+
+def resolve_all(entries, workers=DEFAULT_WORKERS, min_score=MIN_SCORE, min_margin=MIN_MARGIN):
+    """Run the searches on a thread pool; rows come back in input order"""
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(lambda entry: resolve(entry, min_score, min_margin), entries))
+
+
+def write_report(rows, path):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+# ══════════════════════════════════════════════
+# HAND-OFF TO INGESTION
+# ══════════════════════════════════════════════
+
+def ingest_resolved(rows, mode):
+    """
+    Add every resolved title not yet in Media: in this process, one commit per
+    title (mode "direct"), or through Ingest_Request for ingest_service.py
+    (mode "queue"). Updates each row's status.
+    """
+    conn = psycopg2.connect(DATABASE_URL)
+    cur = conn.cursor()
+    touched_persons = set()
+    seen = set()
+
+    try:
+        for row in rows:
+            if row["status"] != "resolved":
+                continue
+            key = (row["type"], row["tmdb_id"])
+            if key in seen:
+                row["status"] = "duplicate"
+                continue
+            seen.add(key)
+
+            if mode == "queue":
+                cur.execute("SELECT fn_request_ingest(%s, %s, %s)", (row["type"], row["tmdb_id"], "resolve_titles"))
+                row["status"] = cur.fetchone()[0]
+                conn.commit()
+                continue
+
+            cur.execute("SELECT 1 FROM Media WHERE MediaID = %s", (row["tmdb_id"],))
+            if cur.fetchone():
+                row["status"] = "exists"
+                continue
+
+            title_persons = set()
+            if INGEST[row["type"]](cur, row["tmdb_id"], touched_persons=title_persons):
+                conn.commit()
+                touched_persons.update(title_persons)
+                row["status"] = "ingested"
+            else:
+                conn.rollback()
+                row["status"] = "failed"
+
+        run_post_ingest(conn, touched_persons)
+
+    except Exception as e:
+        conn.rollback()
+        print(f"\n❌ Error: {e}")
+
+    finally:
+        cur.close()
+        conn.close()
+
+
+# ══════════════════════════════════════════════
+# MAIN FUNCTION
+# ══════════════════════════════════════════════
+
+def resolve_titles(path, default_type="movie", workers=DEFAULT_WORKERS, report=DEFAULT_REPORT,
+                   ingest=None, min_score=MIN_SCORE, min_margin=MIN_MARGIN):
+    entries = read_titles(path, default_type)
+    if not entries:
+        print("⚠️ No titles in the file")
+        return
+    print(f"🔍 Resolving {len(entries)} titles ({workers} concurrent searches)...")
+
+    rows = resolve_all(entries, workers, min_score, min_margin)
+
+    counts = {}
+    for row in rows:
+        counts[row["status"]] = counts.get(row["status"], 0) + 1
+    print("   " + " | ".join(f"{status}: {count}" for status, count in sorted(counts.items())))
+
+    if ingest and counts.get("resolved"):
+        print(f"\n📥 Handing {counts['resolved']} high-confidence matches to ingestion ({ingest})...")
+        ingest_resolved(rows, ingest)
+
+    write_report(rows, report)
+    for row in rows:
+        if row["status"] in ("review", "not_found", "error", "failed"):
+            hint = f" ({row['year_hint']})" if row["year_hint"] else ""
+            match = f" → {row['title']} ({row['year'] or '????'}) score {row['score']}" if row["title"] else ""
+            print(f"   ⚠️ line {row['line']}: {row['query']}{hint} [{row['status']}]{match}")
+    print(f"\n📄 Report written to {report}")
+
+
+# ══════════════════════════════════════════════
+# COMMAND LINE INTERFACE
+# ══════════════════════════════════════════════
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Resolve a file of titles to TMDB IDs without prompts, and optionally ingest them",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=f"""
+Examples:
+  python resolve_titles.py titles.txt                      # Report only ({DEFAULT_REPORT})
+  python resolve_titles.py shows.txt --type tv --ingest direct
+  python resolve_titles.py titles.txt --ingest queue       # Hand off to ingest_service.py
+  python resolve_titles.py titles.txt --min-score 0.9 --report dune.csv
+
+One title per line, with an optional year hint and type prefix:
+  Dune (2021)
+  tv: The Office, 2005
+  Solaris | 1972
+Blank lines and lines starting with # are skipped.
+
+Each result is scored {TITLE_WEIGHT:g} × title similarity + {YEAR_WEIGHT:g} × year agreement +
+{POPULARITY_WEIGHT:g} × popularity (the year term is dropped without a hint). The best
+match is "resolved" when it scores ≥ --min-score and leads the runner-up
+by ≥ --min-margin, otherwise "review"; only resolved titles are ingested.
+        """
+    )
+    parser.add_argument("file", help="Text file of titles")
+    parser.add_argument("--type", choices=sorted(SEARCH), default="movie",
+                        help="Type of lines without a prefix (default: movie)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"Concurrent TMDB searches (default: {DEFAULT_WORKERS})")
+    parser.add_argument("--report", default=DEFAULT_REPORT,
+                        help=f"CSV report path (default: {DEFAULT_REPORT})")
+    parser.add_argument("--ingest", choices=["direct", "queue"],
+                        help="Ingest resolved titles here (direct) or via Ingest_Request (queue)")
+    parser.add_argument("--min-score", type=float, default=MIN_SCORE,
+                        help=f"Minimum score to resolve (default: {MIN_SCORE})")
+    parser.add_argument("--min-margin", type=float, default=MIN_MARGIN,
+                        help=f"Minimum lead over the runner-up (default: {MIN_MARGIN})")
+    args = parser.parse_args()
+
+    resolve_titles(args.file, args.type, args.workers, args.report,
+                   args.ingest, args.min_score, args.min_margin)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+import psycopg2
+import os
+import statistics
+import time
+import argparse
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# ── DB CONFIG ───────────────────────────────
+# Use Neon DB connection string
+DATABASE_URL = os.getenv("DATABASE_URL")
+
+# Media rows updated per backfill transaction
+DEFAULT_BATCH_SIZE = 5000
+
+DEFAULT_BENCH_SIZES = [10_000, 100_000, 1_000_000]
+
+# Words the synthetic titles / descriptions are drawn from; the bench
+# searches for some of them and for a substring of one of them.
+VOCABULARY = [
+    "dark", "night", "return", "king", "love", "city", "last", "war", "star", "secret",
+    "house", "river", "ghost", "summer", "empire", "shadow", "island", "heart", "storm", "road",
+    "detective", "family", "journey", "murder", "dream", "kingdom", "space", "winter", "legend", "hunter",
+    "lost", "rising", "broken", "silent", "golden", "wild", "final", "hidden", "forgotten", "eternal",
+]
+
+BENCH_TERMS = ["ghost", "dark night", "detective", "forgot", "kingdom"]
+
+# /search (server.js) before and after the search index, against the bench table
+LEGACY_SEARCH_QUERY = """
+    SELECT MediaID, Title,
+           CASE
+               WHEN Title ILIKE %(q)s THEN 3
+               WHEN Title ILIKE %(pattern)s THEN 2
+               WHEN Description ILIKE %(pattern)s THEN 1
+               ELSE 0
+           END AS relevance
+    FROM bench_media
+    WHERE Title ILIKE %(pattern)s OR Description ILIKE %(pattern)s
+    ORDER BY relevance DESC, Rating DESC NULLS LAST
+    LIMIT 20
+"""
+
+INDEXED_SEARCH_QUERY = """
+    SELECT MediaID, Title,
+           CASE
+               WHEN Title ILIKE %(q)s THEN 3
+               WHEN Title ILIKE %(pattern)s THEN 2
+               ELSE 1
+           END AS relevance
+    FROM bench_media
+    WHERE SearchVector @@ websearch_to_tsquery('english', %(q)s)
+       OR Title ILIKE %(pattern)s
+       OR Description ILIKE %(pattern)s
+    ORDER BY relevance DESC,
+             ts_rank(SearchVector, websearch_to_tsquery('english', %(q)s)) DESC,
+             Rating DESC NULLS LAST
+    LIMIT 20
+"""
+
+
+# ══════════════════════════════════════════════
+# BACKFILL
+# ══════════════════════════════════════════════
+
+def backfill(batch_size=DEFAULT_BATCH_SIZE, rebuild=False):
+    """Fill Media.SearchVector in MediaID order, committing after each batch"""
+    conn = psycopg2.connect(DATABASE_URL)
+    cur = conn.cursor()
+
+    last_id = -1
+    updated = 0
+    print(f"🔎 {'Rebuilding' if rebuild else 'Backfilling'} Media.SearchVector (batch size {batch_size})")
+    try:
+        while True:
+            cur.execute(f"""
+                WITH batch AS (
+                    SELECT MediaID FROM Media
+                    WHERE MediaID > %s {'' if rebuild else 'AND SearchVector IS NULL'}
+                    ORDER BY MediaID
+                    LIMIT %s
+                )
+                UPDATE Media m
+                SET SearchVector = fn_media_search_vector(m.Title, m.Description)
+                FROM batch
+                WHERE m.MediaID = batch.MediaID
+                RETURNING m.MediaID
+            """, (last_id, batch_size))
+            ids = [media_id for media_id, in cur.fetchall()]
+            conn.commit()
+            if not ids:
+                break
+            last_id = max(ids)
+            updated += len(ids)
+            print(f"   → {updated} rows (up to MediaID {last_id})")
+
+        cur.execute("ANALYZE Media")
+        conn.commit()
+        print(f"\n✅ SearchVector set on {updated} Media rows")
+
+    except Exception as e:
+        conn.rollback()
+        print(f"\n❌ Error: {e}")
+
+    finally:
+        cur.close()
+        conn.close()
+
+
+# ══════════════════════════════════════════════
+# BENCHMARK
+# ══════════════════════════════════════════════
+
+def fill_bench_table(cursor, rows):
+    """Synthetic catalogue: 2-4 word titles, 25 word descriptions"""
+    cursor.execute("TRUNCATE bench_media")
+    cursor.execute("""
+        INSERT INTO bench_media (MediaID, Title, Description, Rating)
+        SELECT g,
+               initcap((SELECT string_agg(w[1 + floor(random() * cardinality(w))::int], ' ')
+                        FROM generate_series(1, 2 + g % 3))),
+               -- (references g so it is evaluated per row, not once)
+               (SELECT string_agg(w[1 + floor(random() * cardinality(w))::int], ' ')
+                FROM generate_series(1, 25) WHERE g > 0),
+               round((random() * 10)::numeric, 1)
+        FROM generate_series(1, %s) AS g,
+             (SELECT %s::text[] AS w) vocabulary
+    """, (rows, VOCABULARY))
+
+
+def build_bench_indexes(cursor):
+    cursor.execute("UPDATE bench_media SET SearchVector = fn_media_search_vector(Title, Description)")
+    cursor.execute("CREATE INDEX ON bench_media USING GIN (SearchVector)")
+    cursor.execute("CREATE INDEX ON bench_media USING GIN (Title gin_trgm_ops)")
+    cursor.execute("CREATE INDEX ON bench_media USING GIN (Description gin_trgm_ops)")
+    cursor.execute("ANALYZE bench_media")
+
+
+def time_searches(cursor, query, repeat):
+    """Run every bench term `repeat` times, return latencies in ms"""
+    latencies = []
+    for _ in range(repeat):
+        for term in BENCH_TERMS:
+            started = time.perf_counter()
+            cursor.execute(query, {"q": term, "pattern": f"%{term}%"})
+            cursor.fetchall()
+            latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+def bench(sizes, repeat):
+    """
+    Compare the old ILIKE-only /search query (sequential scan) with the
+    indexed one on a TEMP table; everything is rolled back at the end.
+    """
+    conn = psycopg2.connect(DATABASE_URL)
+    cur = conn.cursor()
+
+    print(f"🏁 Search bench: terms {BENCH_TERMS}, {repeat} rounds per size")
+    try:
+        cur.execute("SELECT setseed(0.42)")
+        cur.execute("""
+            CREATE TEMP TABLE bench_media (
+                MediaID INT PRIMARY KEY,
+                Title VARCHAR(255) NOT NULL,
+                Description TEXT,
+                Rating DECIMAL(3, 1),
+                SearchVector TSVECTOR
+            )
+        """)
+
+        for rows in sizes:
+            cur.execute("SAVEPOINT bench_size")
+            started = time.perf_counter()
+            fill_bench_table(cur, rows)
+            cur.execute("ANALYZE bench_media")
+            print(f"\n📦 {rows:,} rows generated in {time.perf_counter() - started:.1f}s")
+
+            results = [("ILIKE scan", time_searches(cur, LEGACY_SEARCH_QUERY, repeat))]
+
+            started = time.perf_counter()
+            build_bench_indexes(cur)
+            print(f"   Search vector + indexes built in {time.perf_counter() - started:.1f}s")
+
+            results.append(("FTS + trigram", time_searches(cur, INDEXED_SEARCH_QUERY, repeat)))
+
+            for label, latencies in results:
+                ordered = sorted(latencies)
+                p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+                print(f"   {label:<14} | p50 {statistics.median(ordered):9.2f} ms | "
+                      f"p95 {p95:9.2f} ms | mean {statistics.mean(ordered):9.2f} ms")
+
+            # Drop the indexes and rows before the next size
+            cur.execute("ROLLBACK TO SAVEPOINT bench_size")
+
+    except Exception as e:
+        print(f"\n❌ Error: {e}")
+
+    finally:
+        conn.rollback()
+        cur.close()
+        conn.close()
+
+
+# ══════════════════════════════════════════════
+# COMMAND LINE INTERFACE
+# ══════════════════════════════════════════════
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Maintain and benchmark the Media full-text search index",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python search_index.py backfill                 # Fill SearchVector where missing
+  python search_index.py backfill --rebuild       # Recompute every row
+  python search_index.py bench                    # 10k / 100k / 1M synthetic rows
+  python search_index.py bench --sizes 10000 50000 --repeat 5
+        """
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    backfill_parser = subparsers.add_parser("backfill", help="Fill Media.SearchVector for existing rows")
+    backfill_parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                                 help=f"Rows per transaction (default: {DEFAULT_BATCH_SIZE})")
+    backfill_parser.add_argument("--rebuild", action="store_true",
+                                 help="Recompute rows that already have a vector")
+
+    bench_parser = subparsers.add_parser("bench", help="Compare search latency on synthetic catalogues")
+    bench_parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_BENCH_SIZES,
+                              help="Catalogue sizes to test (default: 10000 100000 1000000)")
+    bench_parser.add_argument("--repeat", type=int, default=10, help="Rounds over the search terms per size")
+
+    args = parser.parse_args()
+
+    if args.command == "backfill":
+        backfill(args.batch_size, args.rebuild)
+    else:
+        bench(args.sizes, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
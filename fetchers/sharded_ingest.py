@@ -0,0 +1,482 @@
+import requests
+import psycopg2
+import os
+import json
+import math
+import time
+import socket
+import argparse
+import multiprocessing
+from psycopg2.extras import execute_values
+from dotenv import load_dotenv
+
+import movie_fetcher
+import TVseries_fetcher
+from bulk_load import open_text
+from post_ingest import run_post_ingest
+from shared_writes import run_with_retry
+from tmdb_client import is_not_found, record_dead_letter, clear_dead_letter, before_each_attempt
+
+load_dotenv()
+
+# ── DB CONFIG ───────────────────────────────
+# Use Neon DB connection string
+DATABASE_URL = os.getenv("DATABASE_URL")
+
+DEFAULT_SHARD_SIZE = 500
+# A running shard whose worker has not committed a title for this long is
+# considered abandoned and can be claimed again (resuming at Position)
+DEFAULT_LEASE_SECONDS = 600
+
+# ── RATE BUDGET ─────────────────────────────
+# One token bucket for every worker on every machine (Ingest_Rate_Budget)
+BUDGET_NAME = "tmdb"
+DEFAULT_RATE = 4.0    # requests / second (TMDB: 40 req / 10 sec)
+DEFAULT_BURST = 40
+
+
+# ══════════════════════════════════════════════
+# PLAN (coordinator)
+# ══════════════════════════════════════════════
+
+def read_export_ids(path):
+    """TMDB IDs from a daily ID export (gzipped JSON lines of {"id": ...}), skipping adult/video entries"""
+    with open_text(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if record.get("adult") or record.get("video"):
+                continue
+            yield int(record["id"])
+
+
+def partition_ids(ids, partition="range", shard_size=DEFAULT_SHARD_SIZE):
+    """
+    range: consecutive runs of sorted IDs
+    hash:  IDs grouped by id % shard count, so every shard samples the
+           whole ID space (old, well-documented titles and new stubs alike)
+           and shards take similar time
+    """
+    ids = sorted(set(ids))
+    if partition == "range":
+        return [ids[start:start + shard_size] for start in range(0, len(ids), shard_size)]
+    count = max(1, math.ceil(len(ids) / shard_size))
+    buckets = [[] for _ in range(count)]
+    for tmdb_id in ids:
+        buckets[tmdb_id % count].append(tmdb_id)
+    return [bucket for bucket in buckets if bucket]
+
+
+def plan_run(run, media_type, ids, partition="range", shard_size=DEFAULT_SHARD_SIZE, replace=False):
+    """Write the run's shards; refuses to overwrite an existing run unless replace"""
+    shards = partition_ids(ids, partition, shard_size)
+    conn = psycopg2.connect(DATABASE_URL)
+    cur = conn.cursor()
+
+    try:
+        cur.execute("SELECT COUNT(*) FROM Ingest_Shard WHERE RunName = %s", (run,))
+        existing = cur.fetchone()[0]
+        if existing and not replace:
+            print(f"❌ Run '{run}' already has {existing} shards (use --replace to plan it again)")
+            return
+        cur.execute("DELETE FROM Ingest_Shard WHERE RunName = %s", (run,))
+
+        execute_values(cur, """
+            INSERT INTO Ingest_Shard (RunName, MediaType, TmdbIDs)
+            VALUES %s
+        """, [(run, media_type, shard) for shard in shards], template="(%s, %s, %s::int[])")
+        conn.commit()
+        print(f"✅ Planned run '{run}': {sum(len(s) for s in shards)} {media_type} IDs "
+              f"in {len(shards)} shards ({partition})")
+
+    except Exception as e:
+        conn.rollback()
+        print(f"\n❌ Error: {e}")
+
+    finally:
+        cur.close()
+        conn.close()
+
+
+# ══════════════════════════════════════════════
+# SHARED RATE BUDGET
+# ══════════════════════════════════════════════
+
+def set_budget(cursor, rate, burst, name=BUDGET_NAME):
+    cursor.execute("""
+        INSERT INTO Ingest_Rate_Budget (Name, Tokens, Capacity, RefillPerSec)
+        VALUES (%s, %s, %s, %s)
+        ON CONFLICT (Name) DO UPDATE
+        SET Capacity = EXCLUDED.Capacity,
+            RefillPerSec = EXCLUDED.RefillPerSec,
+            Tokens = LEAST(Ingest_Rate_Budget.Tokens, EXCLUDED.Capacity)
+    """, (name, burst, burst, rate))
+
+
+def take_tokens(budget_cur, tokens, name=BUDGET_NAME):
+    """Block until `tokens` TMDB requests may be made (budget_cur is on an autocommit connection)"""
+    while True:
+        budget_cur.execute("SELECT fn_take_rate_tokens(%s, %s)", (name, tokens))
+        wait = budget_cur.fetchone()[0]
+        if wait <= 0:
+            return
+        time.sleep(wait)
+
+
+# ══════════════════════════════════════════════
+# SHARD CLAIMS
+# ══════════════════════════════════════════════
+
+def claim_shard(cursor, run, worker_id, lease_seconds):
+    """
+    Claim the next pending shard (or one whose worker stopped reporting).
+    SKIP LOCKED: concurrent workers never wait on each other's claims.
+    """
+    cursor.execute("""
+        UPDATE Ingest_Shard s
+        SET Status = 'running',
+            ClaimedBy = %(worker)s,
+            HeartbeatAt = CURRENT_TIMESTAMP,
+            Attempts = s.Attempts + 1
+        FROM (
+            SELECT ShardID
+            FROM Ingest_Shard
+            WHERE RunName = %(run)s
+              AND (Status = 'pending'
+                   OR (Status = 'running'
+                       AND HeartbeatAt < CURRENT_TIMESTAMP - make_interval(secs => %(lease)s)))
+            ORDER BY ShardID
+            LIMIT 1
+            FOR UPDATE SKIP LOCKED
+        ) next_shard
+        WHERE s.ShardID = next_shard.ShardID
+        RETURNING s.ShardID, s.MediaType, s.TmdbIDs, s.Position
+    """, {"run": run, "worker": worker_id, "lease": lease_seconds})
+    return cursor.fetchone()
+
+
+def advance_shard(cursor, shard_id, worker_id, position, ingested=0, skipped=0, failed_id=None):
+    """
+    Record progress in the caller's transaction (the title's own, when it
+    succeeded). False when another worker has taken the shard over.
+    """
+    cursor.execute("""
+        UPDATE Ingest_Shard
+        SET Position = %(position)s,
+            HeartbeatAt = CURRENT_TIMESTAMP,
+            Ingested = Ingested + %(ingested)s,
+            Skipped = Skipped + %(skipped)s,
+            FailedIDs = CASE WHEN %(failed)s::int IS NULL THEN FailedIDs
+                             ELSE array_append(FailedIDs, %(failed)s::int) END
+        WHERE ShardID = %(shard)s AND ClaimedBy = %(worker)s AND Status = 'running'
+    """, {"position": position, "ingested": ingested, "skipped": skipped,
+          "failed": failed_id, "shard": shard_id, "worker": worker_id})
+    return cursor.rowcount == 1
+
+
+def finish_shard(cursor, shard_id, worker_id):
+    cursor.execute("""
+        UPDATE Ingest_Shard
+        SET Status = 'done', FinishedAt = CURRENT_TIMESTAMP
+        WHERE ShardID = %s AND ClaimedBy = %s AND Status = 'running'
+    """, (shard_id, worker_id))
+    return cursor.rowcount == 1
+
+
+def existing_media(cursor, ids):
+    cursor.execute("SELECT MediaID FROM Media WHERE MediaID = ANY(%s)", (list(ids),))
+    return {media_id for media_id, in cursor.fetchall()}
+
+
+# ══════════════════════════════════════════════
+# FETCH (no DB locks held) + WRITE (short transaction)
+# ══════════════════════════════════════════════
+
+def fetch_movie(tmdb_id, aggregate_credits=False):
+    return movie_fetcher.fetch_movie_details(tmdb_id), movie_fetcher.fetch_movie_credits(tmdb_id), None
+
+
+def fetch_tv(tmdb_id, aggregate_credits=False):
+    """
+    Details, credits and every season up front, so the write transaction
+    makes no HTTP calls while it holds Person / Genre / Studio row locks
+    """
+    details = TVseries_fetcher.fetch_tv_details(tmdb_id)
+    num_seasons = details.get("number_of_seasons") or 0
+
+    if aggregate_credits:
+        credits = TVseries_fetcher.fetch_tv_aggregate_credits(tmdb_id)
+    else:
+        credits = TVseries_fetcher.fetch_tv_credits(tmdb_id)
+
+    seasons = {}
+    for season_num in range(1, num_seasons + 1):
+        try:
+            seasons[season_num] = TVseries_fetcher.fetch_season_details(tmdb_id, season_num)
+        except requests.exceptions.HTTPError as e:
+            if not is_not_found(e):
+                raise
+            seasons[season_num] = None
+    return details, credits, seasons
+
+
+FETCHERS = {"movie": fetch_movie, "tv": fetch_tv}
+
+
+def write_title(cursor, media_type, payload, touched_persons, cast_limit=None):
+    details, credits, seasons = payload
+    if media_type == "movie":
+        movie_fetcher.ingest_movie(cursor, details, credits, touched_persons)
+    else:
+        TVseries_fetcher.ingest_tv(cursor, details, credits, touched_persons=touched_persons,
+                                   fetch_season=lambda tv_id, season_num: seasons.get(season_num),
+                                   cast_limit=cast_limit)
+
+
+# ══════════════════════════════════════════════
+# WORKER
+# ══════════════════════════════════════════════
+
+class ShardTakenOver(Exception):
+    """Another worker claimed the shard after this worker's lease expired"""
+
+
+def record_progress(cursor, shard_id, worker_id, position, **counts):
+    if not advance_shard(cursor, shard_id, worker_id, position, **counts):
+        raise ShardTakenOver(shard_id)
+
+
+def process_shard(conn, cur, budget_cur, worker_id, shard, aggregate_credits=False, cast_limit=None):
+    """
+    One transaction per title, carrying the shard's progress with it;
+    retried on deadlock / serialization failure (the payload is already fetched)
+    """
+    shard_id, media_type, ids, position = shard
+    print(f"\n📦 [{worker_id}] Shard {shard_id}: {len(ids) - position} {media_type} IDs left")
+
+    present = existing_media(cur, ids[position:])
+    conn.commit()
+
+    touched_persons = set()
+    try:
+        for index in range(position, len(ids)):
+            tmdb_id = ids[index]
+            if tmdb_id in present:
+                run_with_retry(conn, lambda c: record_progress(c, shard_id, worker_id, index + 1, skipped=1))
+                continue
+
+            title_persons = set()
+            try:
+                # One token per HTTP attempt (tmdb_get's retries included),
+                # never several at once: a show can have more seasons than
+                # the bucket holds
+                with before_each_attempt(lambda: take_tokens(budget_cur, 1)):
+                    payload = FETCHERS[media_type](tmdb_id, aggregate_credits)
+
+                def write(c):
+                    title_persons.clear()
+                    write_title(c, media_type, payload, title_persons, cast_limit)
+                    clear_dead_letter(c, media_type, tmdb_id)
+                    record_progress(c, shard_id, worker_id, index + 1, ingested=1)
+
+                run_with_retry(conn, write, label=f"{media_type} {tmdb_id}")
+                touched_persons.update(title_persons)
+
+            except ShardTakenOver:
+                raise
+
+            except Exception as e:
+                not_found = is_not_found(e)
+                if not not_found:
+                    print(f"   ❌ {media_type} {tmdb_id}: {e}")
+                    record_dead_letter(media_type, tmdb_id, e)
+                run_with_retry(conn, lambda c: record_progress(
+                    c, shard_id, worker_id, index + 1,
+                    skipped=int(not_found), failed_id=None if not_found else tmdb_id))
+
+    except ShardTakenOver:
+        print(f"   ⚠️ Shard {shard_id} was taken over, stopping")
+        return False
+
+    run_post_ingest(conn, touched_persons)
+    finished = finish_shard(cur, shard_id, worker_id)
+    conn.commit()
+    return finished
+
+
+def run_worker(run, worker_id=None, lease_seconds=DEFAULT_LEASE_SECONDS, max_shards=None,
+               aggregate_credits=False, cast_limit=None):
+    """Claim and process shards until the run has none left (or max_shards are done)"""
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    conn = psycopg2.connect(DATABASE_URL)
+    cur = conn.cursor()
+    # Budget calls commit immediately so the bucket row is never held
+    budget_conn = psycopg2.connect(DATABASE_URL)
+    budget_conn.autocommit = True
+    budget_cur = budget_conn.cursor()
+
+    done = 0
+    try:
+        while max_shards is None or done < max_shards:
+            shard = claim_shard(cur, run, worker_id, lease_seconds)
+            conn.commit()
+            if shard is None:
+                break
+            if process_shard(conn, cur, budget_cur, worker_id, shard, aggregate_credits, cast_limit):
+                done += 1
+        print(f"\n✅ [{worker_id}] Finished {done} shards")
+
+    except KeyboardInterrupt:
+        conn.rollback()
+        print(f"\n⏹️  [{worker_id}] Stopped; the shard resumes at its last committed title")
+
+    except Exception as e:
+        conn.rollback()
+        print(f"\n❌ [{worker_id}] Error: {e}")
+
+    finally:
+        budget_cur.close()
+        budget_conn.close()
+        cur.close()
+        conn.close()
+
+
+def run_workers(processes, run, **options):
+    """Start `processes` local workers; other machines can run `work` against the same run"""
+    if processes <= 1:
+        run_worker(run, **options)
+        return
+    host = socket.gethostname()
+    workers = [
+        multiprocessing.Process(target=run_worker, args=(run,),
+                                kwargs={**options, "worker_id": f"{host}-{i}"})
+        for i in range(1, processes + 1)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+
+# ══════════════════════════════════════════════
+# STATUS
+# ══════════════════════════════════════════════
+
+def print_status(run):
+    conn = psycopg2.connect(DATABASE_URL)
+    cur = conn.cursor()
+    try:
+        cur.execute("""
+            SELECT Status, COUNT(*), SUM(cardinality(TmdbIDs)), SUM(Position),
+                   SUM(Ingested), SUM(Skipped), SUM(cardinality(FailedIDs)),
+                   COUNT(DISTINCT ClaimedBy) FILTER (WHERE Status = 'running')
+            FROM Ingest_Shard
+            WHERE RunName = %s
+            GROUP BY Status
+            ORDER BY Status
+        """, (run,))
+        rows = cur.fetchall()
+        if not rows:
+            print(f"⚠️ No shards planned for run '{run}'")
+            return
+        print(f"📊 Run '{run}'")
+        for status, shards, ids, position, ingested, skipped, failed, workers in rows:
+            print(f"   {status:<8} {shards:>6} shards | {position}/{ids} IDs done | "
+                  f"{ingested} ingested, {skipped} skipped, {failed} failed"
+                  + (f" | {workers} workers" if workers else ""))
+    finally:
+        cur.close()
+        conn.close()
+
+
+# ══════════════════════════════════════════════
+# COMMAND LINE INTERFACE
+# ══════════════════════════════════════════════
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Coordinator / worker ingestion of TMDB IDs across processes and machines",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python sharded_ingest.py plan --run movies-full --type movie --ids-file movie_ids_10_19_2026.json.gz
+  python sharded_ingest.py plan --run tv-range --type tv --range 1 50000 --partition hash
+  python sharded_ingest.py budget --rate 4 --burst 40     # Shared by every worker
+  python sharded_ingest.py work --run movies-full --processes 4
+  python sharded_ingest.py status --run movies-full
+
+Run `work` on as many machines as needed: shards are claimed with
+FOR UPDATE SKIP LOCKED, each title commits with its shard progress, and
+a shard whose worker stops reporting is taken over after --lease-seconds.
+Titles already in Media are skipped.
+        """
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    plan_parser = sub.add_parser("plan", help="Split TMDB IDs into shards")
+    plan_parser.add_argument("--run", required=True, help="Run name")
+    plan_parser.add_argument("--type", required=True, choices=["movie", "tv"], dest="media_type")
+    source = plan_parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--ids-file", help="TMDB daily ID export (JSON lines, optionally .gz)")
+    source.add_argument("--range", type=int, nargs=2, metavar=("START", "END"), help="Every ID in [START, END]")
+    plan_parser.add_argument("--partition", choices=["range", "hash"], default="range",
+                             help="Consecutive IDs per shard, or IDs spread by id %% shards (default: range)")
+    plan_parser.add_argument("--shard-size", type=int, default=DEFAULT_SHARD_SIZE,
+                             help=f"IDs per shard (default: {DEFAULT_SHARD_SIZE})")
+    plan_parser.add_argument("--replace", action="store_true", help="Discard an existing plan for this run")
+
+    work_parser = sub.add_parser("work", help="Claim and process shards")
+    work_parser.add_argument("--run", required=True, help="Run name")
+    work_parser.add_argument("--processes", type=int, default=1, help="Local worker processes (default: 1)")
+    work_parser.add_argument("--max-shards", type=int, help="Stop each worker after N shards")
+    work_parser.add_argument("--lease-seconds", type=int, default=DEFAULT_LEASE_SECONDS,
+                             help=f"Reclaim shards idle this long (default: {DEFAULT_LEASE_SECONDS})")
+    work_parser.add_argument("--aggregate-credits", action="store_true",
+                             help="TV: take cast/crew from every season (/aggregate_credits)")
+    work_parser.add_argument("--cast-limit", type=int, help="TV: cast members to store (0 = all)")
+
+    status_parser = sub.add_parser("status", help="Progress of a run")
+    status_parser.add_argument("--run", required=True, help="Run name")
+
+    budget_parser = sub.add_parser("budget", help="Set the shared TMDB request budget")
+    budget_parser.add_argument("--rate", type=float, default=DEFAULT_RATE,
+                               help=f"Requests per second across all workers (default: {DEFAULT_RATE})")
+    budget_parser.add_argument("--burst", type=float, default=DEFAULT_BURST,
+                               help=f"Bucket capacity (default: {DEFAULT_BURST})")
+
+    args = parser.parse_args()
+
+    if args.command == "plan":
+        if args.ids_file:
+            ids = list(read_export_ids(args.ids_file))
+        else:
+            ids = list(range(args.range[0], args.range[1] + 1))
+        plan_run(args.run, args.media_type, ids, args.partition, args.shard_size, args.replace)
+
+    elif args.command == "work":
+        if not movie_fetcher.API_KEY:
+            print("❌ Error: TMDB_API_KEY not set. Please check your .env file.")
+            return
+        run_workers(args.processes, args.run, max_shards=args.max_shards,
+                    lease_seconds=args.lease_seconds, aggregate_credits=args.aggregate_credits,
+                    cast_limit=args.cast_limit)
+
+    elif args.command == "status":
+        print_status(args.run)
+
+    else:
+        conn = psycopg2.connect(DATABASE_URL)
+        cur = conn.cursor()
+        try:
+            set_budget(cur, args.rate, args.burst)
+            conn.commit()
+            print(f"✅ TMDB budget: {args.rate:g} req/s, bursts of {args.burst:g}")
+        finally:
+            cur.close()
+            conn.close()
+
+
+if __name__ == "__main__":
+    main()
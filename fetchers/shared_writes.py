@@ -0,0 +1,137 @@
+import psycopg2
+import os
+import time
+import random
+from psycopg2.extras import execute_values
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# ── DB CONFIG ───────────────────────────────
+# Use Neon DB connection string
+DATABASE_URL = os.getenv("DATABASE_URL")
+
+# ── RETRIES ─────────────────────────────────
+# SQLSTATEs worth retrying: the transaction did nothing wrong, it lost a race
+RETRYABLE = {
+    "40P01": "deadlock",
+    "40001": "serialization failure",
+    "55P03": "lock timeout",
+}
+MAX_ATTEMPTS = 5
+BASE_DELAY = 0.05  # seconds, doubled per attempt, with jitter
+
+# Shared-entity transactions touch a few dozen rows; waiting longer than
+# this means another session holds them in a long transaction, so back off
+LOCK_TIMEOUT = "5s"
+
+# Retries per SQLSTATE in this process (stress_shared_writes.py reports them)
+RETRY_COUNTS = {code: 0 for code in RETRYABLE}
+
+GENRE_UPSERT = """
+    INSERT INTO Genre (GenreID, GenreName)
+    VALUES %s
+    ON CONFLICT (GenreID) DO NOTHING
+"""
+
+STUDIO_UPSERT = """
+    INSERT INTO Studio (StudioID, StudioName, LogoURL)
+    VALUES %s
+    ON CONFLICT (StudioID) DO NOTHING
+"""
+
+# FullName also feeds the accent-folded search key
+PERSON_UPSERT = """
+    INSERT INTO Person (PersonID, FullName, Picture, SearchName)
+    VALUES %s
+    ON CONFLICT (PersonID) DO NOTHING
+"""
+PERSON_TEMPLATE = "(%s, %s, %s, fn_fold_name(%s))"
+
+
+# ══════════════════════════════════════════════
+# RETRY WRAPPER
+# ══════════════════════════════════════════════
+
+def is_retryable(error):
+    return getattr(error, "pgcode", None) in RETRYABLE
+
+
+def run_with_retry(conn, work, attempts=MAX_ATTEMPTS, base_delay=BASE_DELAY, label="transaction"):
+    """
+    Run work(cursor) as one transaction and commit it. On a deadlock,
+    serialization failure or lock timeout the transaction is rolled back and
+    run again after an exponential, jittered backoff; any other error is
+    rolled back and raised. work must be safe to repeat.
+    """
+    for attempt in range(1, attempts + 1):
+        cur = conn.cursor()
+        try:
+            result = work(cur)
+            conn.commit()
+            return result
+        except Exception as e:
+            conn.rollback()
+            if not is_retryable(e) or attempt == attempts:
+                raise
+            RETRY_COUNTS[e.pgcode] += 1
+            delay = base_delay * 2 ** (attempt - 1) * (0.5 + random.random())
+            print(f"   ↻ {RETRYABLE[e.pgcode]} in {label}, retrying in {delay * 1000:.0f} ms "
+                  f"({attempt}/{attempts - 1})")
+            time.sleep(delay)
+        finally:
+            cur.close()
+
+
+# ══════════════════════════════════════════════
+# SHARED REFERENCE ROWS (Genre, Studio, Person)
+# ══════════════════════════════════════════════
+
+_connection = None
+
+
+def shared_connection():
+    """This process's connection for shared-entity writes (opened on first use)"""
+    global _connection
+    if _connection is None or _connection.closed:
+        _connection = psycopg2.connect(DATABASE_URL)
+        with _connection.cursor() as cur:
+            cur.execute("SET lock_timeout = %s", (LOCK_TIMEOUT,))
+        _connection.commit()
+    return _connection
+
+
+def sorted_rows(rows):
+    """De-duplicate row tuples by their ID (first element) and sort by it"""
+    by_id = {}
+    for row in rows:
+        by_id.setdefault(row[0], row)
+    return [by_id[key] for key in sorted(by_id)]
+
+
+def upsert_shared_entities(genres=(), studios=(), persons=(), conn=None):
+    """
+    Write Genre / Studio / Person rows (genre_row / studio_row / person_row
+    tuples) in one short transaction of their own, committed before the
+    caller writes its title rows.
+
+    Every writer locks the same tables in the same order (Genre → Studio →
+    Person) and each table's keys in ascending order, so two overlapping
+    ingestion runs can wait on each other but never deadlock; and since the
+    rows are committed right away, the caller's longer title transaction
+    only references them.
+    """
+    genres, studios, persons = sorted_rows(genres), sorted_rows(studios), sorted_rows(persons)
+    if not (genres or studios or persons):
+        return
+
+    def work(cur):
+        if genres:
+            execute_values(cur, GENRE_UPSERT, genres, page_size=len(genres))
+        if studios:
+            execute_values(cur, STUDIO_UPSERT, studios, page_size=len(studios))
+        if persons:
+            execute_values(cur, PERSON_UPSERT, [row + (row[1],) for row in persons],
+                           template=PERSON_TEMPLATE, page_size=len(persons))
+
+    run_with_retry(conn or shared_connection(), work, label="shared entity upsert")
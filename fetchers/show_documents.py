@@ -0,0 +1,145 @@
+import psycopg2
+import os
+import time
+import argparse
+from dotenv import load_dotenv
+
+from post_ingest import refresh_show_documents
+
+load_dotenv()
+
+# ── DB CONFIG ───────────────────────────────
+# Use Neon DB connection string
+DATABASE_URL = os.getenv("DATABASE_URL")
+
+# Shows rebuilt per transaction
+DEFAULT_BATCH_SIZE = 50
+
+
+# ══════════════════════════════════════════════
+# DIRTY QUEUE
+# ══════════════════════════════════════════════
+
+def claim_dirty_shows(cursor, batch_size):
+    """
+    Lock up to batch_size queued shows, oldest first. SKIP LOCKED lets
+    several workers drain the queue side by side.
+    """
+    cursor.execute("""
+        SELECT MediaID FROM TVShow_Document_Dirty
+        ORDER BY QueuedAt
+        LIMIT %s
+        FOR UPDATE SKIP LOCKED
+    """, (batch_size,))
+    return [media_id for media_id, in cursor.fetchall()]
+
+
+def drain_dirty_queue(conn, cur, batch_size=DEFAULT_BATCH_SIZE):
+    """Rebuild queued documents until the queue is empty; returns how many were rebuilt"""
+    rebuilt = 0
+    while True:
+        media_ids = claim_dirty_shows(cur, batch_size)
+        if not media_ids:
+            conn.commit()
+            return rebuilt
+        rebuilt += refresh_show_documents(cur, media_ids)
+        conn.commit()
+
+
+# ══════════════════════════════════════════════
+# MAIN FUNCTIONS
+# ══════════════════════════════════════════════
+
+def drain(batch_size=DEFAULT_BATCH_SIZE, watch=None):
+    """Drain the dirty queue once, or every `watch` seconds until interrupted"""
+    conn = psycopg2.connect(DATABASE_URL)
+    cur = conn.cursor()
+
+    try:
+        while True:
+            started = time.perf_counter()
+            rebuilt = drain_dirty_queue(conn, cur, batch_size)
+            if rebuilt or not watch:
+                print(f"📄 Rebuilt {rebuilt} show documents in {time.perf_counter() - started:.2f}s")
+            if not watch:
+                break
+            time.sleep(watch)
+
+    except KeyboardInterrupt:
+        conn.rollback()
+        print("\n⏹️  Stopped")
+
+    except Exception as e:
+        conn.rollback()
+        print(f"\n❌ Error: {e}")
+
+    finally:
+        cur.close()
+        conn.close()
+
+
+def rebuild(media_ids=None):
+    """Rebuild the documents of these shows (None → every show)"""
+    conn = psycopg2.connect(DATABASE_URL)
+    cur = conn.cursor()
+
+    try:
+        if media_ids is None:
+            cur.execute("SELECT MediaID FROM TVSeries")
+            media_ids = [media_id for media_id, in cur.fetchall()]
+        rebuilt = refresh_show_documents(cur, media_ids)
+        conn.commit()
+        print(f"✅ Rebuilt {rebuilt} show documents")
+
+    except Exception as e:
+        conn.rollback()
+        print(f"\n❌ Error: {e}")
+
+    finally:
+        cur.close()
+        conn.close()
+
+
+# ══════════════════════════════════════════════
+# COMMAND LINE INTERFACE
+# ══════════════════════════════════════════════
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Maintain the prebuilt /tvshows/:id/seasons documents (TVShow_Document)",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python show_documents.py drain                  # Rebuild shows queued by rating changes
+  python show_documents.py drain --watch 5        # Keep draining every 5 seconds
+  python show_documents.py rebuild --all          # Rebuild every show
+  python show_documents.py rebuild --shows 1396 1399
+
+The fetchers rebuild the shows they write; reviews only queue the show
+(TVShow_Document_Dirty), and server.js serves queued shows from the live
+tables until they are drained.
+        """
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    drain_parser = sub.add_parser("drain", help="Rebuild queued shows")
+    drain_parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                              help=f"Shows per transaction (default: {DEFAULT_BATCH_SIZE})")
+    drain_parser.add_argument("--watch", type=float, metavar="SECONDS",
+                              help="Poll the queue every SECONDS instead of exiting")
+
+    rebuild_parser = sub.add_parser("rebuild", help="Rebuild shows whether queued or not")
+    group = rebuild_parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--all", action="store_true", help="Every show")
+    group.add_argument("--shows", type=int, nargs="+", help="TV show MediaIDs")
+
+    args = parser.parse_args()
+
+    if args.command == "drain":
+        drain(args.batch_size, args.watch)
+    else:
+        rebuild(None if args.all else args.shows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,394 @@
+import psycopg2
+import os
+import json
+import argparse
+from datetime import datetime, timezone
+
+# Not needed by the other fetchers: pip install numpy
+try:
+    import numpy as np
+    from numpy.lib.format import open_memmap
+except ImportError:
+    raise SystemExit("❌ snapshot.py needs numpy (pip install numpy)")
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# ── DB CONFIG ───────────────────────────────
+# Use Neon DB connection string
+DATABASE_URL = os.getenv("DATABASE_URL")
+
+# Rows pulled per round trip from the server-side cursor
+FETCH_SIZE = 10000
+
+# ══════════════════════════════════════════════
+# SNAPSHOT LAYOUT
+# ══════════════════════════════════════════════
+#
+# <out>/manifest.json            tables, row counts, column dtypes
+# <out>/<table>/<column>.npy     one array per column (np.load(mmap_mode='r'))
+# <out>/<table>/<column>.null.npy  NULL mask, only for nullable int/bool columns
+#
+# Column kinds:
+#   int    → int32 (NULL = 0 + mask)      float → float64 (NULL = NaN)
+#   bool   → bool  (NULL = False + mask)  str   → fixed-width unicode ('' for NULL)
+#   time   → datetime64[s] (NULL = NaT)
+#
+# Rows are written in primary key order, so MediaID / PersonID / GenreID
+# lookups can use np.searchsorted.
+
+SNAPSHOT_TABLES = {
+    "Media": {
+        "order_by": "MediaID",
+        "columns": [
+            ("MediaID", "int", False),
+            ("Title", "str", False),
+            ("ReleaseYear", "int", True),
+            ("LanguageName", "str", True),
+            ("Rating", "float", True),
+            ("RatingCount", "int", False),
+            ("MediaType", "str", False),
+        ],
+    },
+    "Crew": {
+        "order_by": "MediaID, PersonID, CrewRole",
+        "columns": [
+            ("PersonID", "int", False),
+            ("MediaID", "int", False),
+            ("CrewRole", "str", False),
+            ("CharacterName", "str", True),
+        ],
+    },
+    "Media_Genre": {
+        "order_by": "MediaID, GenreID",
+        "columns": [
+            ("MediaID", "int", False),
+            ("GenreID", "int", False),
+        ],
+    },
+    "Episode": {
+        "order_by": "MediaID, SeasonNo, EpisodeNo",
+        "columns": [
+            ("MediaID", "int", False),
+            ("SeasonNo", "int", False),
+            ("EpisodeNo", "int", False),
+            ("Duration", "int", True),
+            ("AvgRating", "float", True),
+            ("RatingCount", "int", False),
+        ],
+    },
+    "Review": {
+        "order_by": "ReviewID",
+        "columns": [
+            ("ReviewID", "int", False),
+            ("UserID", "int", False),
+            ("MediaID", "int", True),
+            ("EpisodeMediaID", "int", True),
+            ("EpisodeSeasonNo", "int", True),
+            ("EpisodeNo", "int", True),
+            ("Rating", "int", True),
+            ("PostDate", "time", True),
+            ("SpoilerFlag", "bool", True),
+            ("HelpfulCount", "int", True),
+        ],
+    },
+    # Small lookup tables so reports can print names
+    "Person": {
+        "order_by": "PersonID",
+        "columns": [
+            ("PersonID", "int", False),
+            ("FullName", "str", False),
+        ],
+    },
+    "Genre": {
+        "order_by": "GenreID",
+        "columns": [
+            ("GenreID", "int", False),
+            ("GenreName", "str", False),
+        ],
+    },
+}
+
+NULL_FILL = {"int": 0, "float": np.nan, "bool": False, "str": "", "time": None}
+
+
+# ══════════════════════════════════════════════
+# EXPORT
+# ══════════════════════════════════════════════
+
+def column_dtype(kind, width):
+    if kind == "int":
+        return np.dtype("int32")
+    if kind == "float":
+        return np.dtype("float64")
+    if kind == "bool":
+        return np.dtype("bool")
+    if kind == "time":
+        return np.dtype("datetime64[s]")
+    return np.dtype(f"U{max(width, 1)}")
+
+
+def table_shape(cursor, table, spec):
+    """Row count plus max text width of each string column"""
+    str_columns = [name for name, kind, _ in spec["columns"] if kind == "str"]
+    selects = ["COUNT(*)"] + [f"COALESCE(MAX(LENGTH({c})), 0)" for c in str_columns]
+    cursor.execute(f"SELECT {', '.join(selects)} FROM {table}")
+    row = cursor.fetchone()
+    return row[0], dict(zip(str_columns, row[1:]))
+
+
+def convert(value, kind):
+    """Python value from psycopg2 → value storable in the numpy column"""
+    if value is None:
+        return NULL_FILL[kind]
+    if kind == "time":
+        return np.datetime64(value.replace(tzinfo=None), "s")
+    if kind == "float":
+        return float(value)
+    return value
+
+
+def export_table(conn, out_dir, table, spec):
+    """Stream one table into per-column .npy memmaps"""
+    with conn.cursor() as cur:
+        rows, widths = table_shape(cur, table, spec)
+
+    table_dir = os.path.join(out_dir, table)
+    os.makedirs(table_dir, exist_ok=True)
+
+    arrays = []
+    masks = []
+    manifest_columns = []
+    for name, kind, nullable in spec["columns"]:
+        dtype = column_dtype(kind, widths.get(name, 0))
+        arrays.append(open_memmap(os.path.join(table_dir, f"{name}.npy"),
+                                  mode="w+", dtype=dtype, shape=(rows,)))
+        has_mask = nullable and kind in ("int", "bool")
+        masks.append(open_memmap(os.path.join(table_dir, f"{name}.null.npy"),
+                                 mode="w+", dtype=np.bool_, shape=(rows,))
+                     if has_mask else None)
+        manifest_columns.append({"name": name, "kind": kind, "dtype": dtype.str,
+                                 "null_mask": has_mask})
+
+    columns = ", ".join(name for name, _, _ in spec["columns"])
+    kinds = [kind for _, kind, _ in spec["columns"]]
+
+    # Named cursor = server-side: memory stays bounded by FETCH_SIZE
+    with conn.cursor(name=f"snapshot_{table.lower()}") as cur:
+        cur.itersize = FETCH_SIZE
+        cur.execute(f"SELECT {columns} FROM {table} ORDER BY {spec['order_by']}")
+        offset = 0
+        while True:
+            chunk = cur.fetchmany(FETCH_SIZE)
+            if not chunk:
+                break
+            end = offset + len(chunk)
+            for i, (array, mask, kind) in enumerate(zip(arrays, masks, kinds)):
+                values = [row[i] for row in chunk]
+                array[offset:end] = [convert(v, kind) for v in values]
+                if mask is not None:
+                    mask[offset:end] = [v is None for v in values]
+            offset = end
+
+    for array in arrays + [m for m in masks if m is not None]:
+        array.flush()
+
+    return {"rows": rows, "columns": manifest_columns}
+
+
+def export_snapshot(out_dir, tables=None):
+    """Snapshot the analytics tables into a columnar directory"""
+    conn = psycopg2.connect(DATABASE_URL)
+    # One REPEATABLE READ transaction → every table comes from the same snapshot
+    conn.set_session(isolation_level="REPEATABLE READ", readonly=True)
+
+    tables = tables or list(SNAPSHOT_TABLES)
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = {
+        "exported_at": datetime.now(timezone.utc).isoformat(),
+        "tables": {}
+    }
+
+    print(f"📸 Exporting snapshot to {out_dir}")
+    try:
+        for table in tables:
+            print(f"   → {table}...", end=" ")
+            manifest["tables"][table] = export_table(conn, out_dir, table, SNAPSHOT_TABLES[table])
+            print(f"✅ {manifest['tables'][table]['rows']} rows")
+        conn.rollback()
+    finally:
+        conn.close()
+
+    # Manifest last: a snapshot without one is incomplete
+    with open(os.path.join(out_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    print("✅ Snapshot complete!")
+
+
+# ══════════════════════════════════════════════
+# QUERY HELPERS
+# ══════════════════════════════════════════════
+
+def load_snapshot(path):
+    """
+    Open a snapshot: {table: {column: array}} with every array memory-mapped.
+    NULL masks are exposed as '<column>.null' entries.
+    """
+    with open(os.path.join(path, "manifest.json")) as f:
+        manifest = json.load(f)
+
+    snapshot = {}
+    for table, info in manifest["tables"].items():
+        columns = {}
+        for column in info["columns"]:
+            name = column["name"]
+            columns[name] = np.load(os.path.join(path, table, f"{name}.npy"), mmap_mode="r")
+            if column["null_mask"]:
+                columns[f"{name}.null"] = np.load(
+                    os.path.join(path, table, f"{name}.null.npy"), mmap_mode="r")
+        snapshot[table] = columns
+    return snapshot
+
+
+def lookup(keys, sorted_ids, values, missing):
+    """Vectorized key → value lookup against a PK-sorted column"""
+    keys = np.asarray(keys)
+    if len(sorted_ids) == 0:
+        return np.full(len(keys), missing, dtype=object)
+    idx = np.clip(np.searchsorted(sorted_ids, keys), 0, len(sorted_ids) - 1)
+    out = np.asarray(values)[idx]
+    out[sorted_ids[idx] != keys] = missing
+    return out
+
+
+def top_actors(snapshot, limit=20):
+    """Actors ranked by distinct titles, then average title rating (like /actors/top)"""
+    crew = snapshot["Crew"]
+    media = snapshot["Media"]
+    person = snapshot["Person"]
+
+    actors = crew["CrewRole"] == "Actor"
+    pairs = np.unique(np.stack([crew["PersonID"][actors], crew["MediaID"][actors]], axis=1), axis=0)
+    if len(pairs) == 0:
+        return []
+
+    person_ids, inverse, title_counts = np.unique(pairs[:, 0], return_inverse=True, return_counts=True)
+    ratings = lookup(pairs[:, 1], media["MediaID"], media["Rating"], missing=np.nan)
+    rated = ~np.isnan(ratings)
+    rating_sums = np.bincount(inverse[rated], weights=ratings[rated], minlength=len(person_ids))
+    rating_counts = np.bincount(inverse[rated], minlength=len(person_ids))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        avg_ratings = np.round(rating_sums / rating_counts, 1)
+
+    # Sort by title_count DESC, avg_rating DESC NULLS LAST
+    order = np.lexsort((-np.nan_to_num(avg_ratings, nan=-1.0), -title_counts))[:limit]
+    names = lookup(person_ids[order], person["PersonID"], person["FullName"], missing="")
+    return [
+        {
+            "person_id": int(person_ids[i]),
+            "full_name": str(name),
+            "title_count": int(title_counts[i]),
+            "avg_rating": None if np.isnan(avg_ratings[i]) else float(avg_ratings[i]),
+        }
+        for i, name in zip(order, names)
+    ]
+
+
+def genre_distribution(snapshot, media_type=None):
+    """Number of titles per genre, optionally for one MediaType"""
+    media_genre = snapshot["Media_Genre"]
+    genre = snapshot["Genre"]
+
+    genre_ids = np.asarray(media_genre["GenreID"])
+    if media_type:
+        media = snapshot["Media"]
+        types = lookup(media_genre["MediaID"], media["MediaID"], media["MediaType"], missing="")
+        genre_ids = genre_ids[types == media_type]
+
+    ids, counts = np.unique(genre_ids, return_counts=True)
+    names = lookup(ids, genre["GenreID"], genre["GenreName"], missing="")
+    order = np.argsort(-counts, kind="stable")
+    return [(str(names[i]), int(counts[i])) for i in order]
+
+
+def rating_histogram(snapshot, media_type=None, bin_width=0.5):
+    """Histogram of Media.Rating (0–10) → (counts, bin_edges)"""
+    media = snapshot["Media"]
+    ratings = np.asarray(media["Rating"])
+    if media_type:
+        ratings = ratings[media["MediaType"] == media_type]
+    ratings = ratings[~np.isnan(ratings)]
+    return np.histogram(ratings, bins=np.arange(0, 10 + bin_width, bin_width))
+
+
+def review_rating_histogram(snapshot):
+    """Counts of user review scores 1..10"""
+    review = snapshot["Review"]
+    scores = np.asarray(review["Rating"])[~np.asarray(review["Rating.null"])]
+    return np.bincount(scores, minlength=11)[1:]
+
+
+# ══════════════════════════════════════════════
+# COMMAND LINE INTERFACE
+# ══════════════════════════════════════════════
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Export a columnar snapshot of the catalogue and query it offline",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python snapshot.py export --out snapshots/latest        # Snapshot from DATABASE_URL
+  python snapshot.py top-actors --snapshot snapshots/latest --limit 50
+  python snapshot.py genres --snapshot snapshots/latest --media-type Movie
+  python snapshot.py ratings --snapshot snapshots/latest
+
+Needs numpy (pip install numpy).
+        """
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Snapshot the DB to a directory")
+    export_parser.add_argument("--out", required=True, help="Output directory")
+    export_parser.add_argument("--tables", nargs="+", choices=list(SNAPSHOT_TABLES),
+                               help="Only export these tables")
+
+    for name, help_text in (("top-actors", "Top actors by title count"),
+                            ("genres", "Titles per genre"),
+                            ("ratings", "Rating histograms")):
+        sub = subparsers.add_parser(name, help=help_text)
+        sub.add_argument("--snapshot", required=True, help="Snapshot directory")
+        sub.add_argument("--media-type", choices=["Movie", "TVSeries"])
+        sub.add_argument("--limit", type=int, default=20)
+
+    args = parser.parse_args()
+
+    if args.command == "export":
+        export_snapshot(args.out, args.tables)
+        return
+
+    snapshot = load_snapshot(args.snapshot)
+
+    if args.command == "top-actors":
+        for rank, actor in enumerate(top_actors(snapshot, args.limit), 1):
+            print(f"{rank:>4}. {actor['full_name']:<40} {actor['title_count']:>5} titles"
+                  f"  avg {actor['avg_rating']}")
+
+    elif args.command == "genres":
+        for genre_name, count in genre_distribution(snapshot, args.media_type)[:args.limit]:
+            print(f"{genre_name:<25} {count}")
+
+    elif args.command == "ratings":
+        counts, edges = rating_histogram(snapshot, args.media_type)
+        print("Media.Rating")
+        for lo, hi, count in zip(edges[:-1], edges[1:], counts):
+            print(f"  {lo:>4.1f}–{hi:<4.1f} {count}")
+        if "Review" in snapshot:
+            print("Review scores")
+            for score, count in enumerate(review_rating_histogram(snapshot), 1):
+                print(f"  {score:>2} {count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+import psycopg2
+import os
+import time
+import random
+import argparse
+import multiprocessing
+from dotenv import load_dotenv
+
+import shared_writes
+from shared_writes import upsert_shared_entities, RETRYABLE
+
+load_dotenv()
+
+# ── DB CONFIG ───────────────────────────────
+# Use Neon DB connection string
+DATABASE_URL = os.getenv("DATABASE_URL")
+
+# Synthetic Person / Studio / Genre IDs live far above TMDB's, and are
+# deleted before and after the run
+BASE_ID = 1_900_000_000
+
+DEFAULT_WORKERS = 8
+DEFAULT_ROUNDS = 30
+DEFAULT_POOL = 40       # new IDs per round, shared by every worker
+DEFAULT_BATCH = 25      # IDs each worker writes per round
+DEFAULT_HOLD_MS = 2     # pause between rows in naive mode (a title transaction doing other work)
+
+
+# ══════════════════════════════════════════════
+# WORKLOAD
+# ══════════════════════════════════════════════
+
+def round_rows(rng, round_no, pool, batch):
+    """
+    This worker's rows for a round: a random, shuffled subset of IDs that
+    every other worker also draws from, none of them committed yet
+    """
+    ids = [BASE_ID + round_no * pool + offset for offset in rng.sample(range(pool), batch)]
+    rng.shuffle(ids)
+    return {
+        "genres": [(i, f"Stress genre {i}") for i in ids[:max(1, batch // 5)]],
+        "studios": [(i, f"Stress studio {i}", None) for i in ids[:max(1, batch // 2)]],
+        "persons": [(i, f"Stress Person {i}", None) for i in ids],
+    }
+
+
+def write_naive(conn, rows, hold):
+    """The old write path: row by row, input order, one transaction, no retry"""
+    with conn.cursor() as cur:
+        for person in rows["persons"]:
+            cur.execute("""
+                INSERT INTO Person (PersonID, FullName, Picture, SearchName)
+                VALUES (%s, %s, %s, fn_fold_name(%s))
+                ON CONFLICT (PersonID) DO NOTHING
+            """, person + (person[1],))
+            time.sleep(hold)
+        for studio in rows["studios"]:
+            cur.execute("""
+                INSERT INTO Studio (StudioID, StudioName, LogoURL)
+                VALUES (%s, %s, %s)
+                ON CONFLICT (StudioID) DO NOTHING
+            """, studio)
+        for genre in rows["genres"]:
+            cur.execute("""
+                INSERT INTO Genre (GenreID, GenreName)
+                VALUES (%s, %s)
+                ON CONFLICT (GenreID) DO NOTHING
+            """, genre)
+    conn.commit()
+
+
+def stress_worker(job):
+    """One process: every round's rows through the chosen write path; returns counters"""
+    mode, worker_no, rounds, pool, batch, hold, seed = job
+    rng = random.Random(seed * 1000 + worker_no)
+    conn = psycopg2.connect(DATABASE_URL)
+    stats = {"committed": 0, "failed": 0, "deadlocks": 0, "elapsed": 0.0}
+
+    started = time.perf_counter()
+    try:
+        for round_no in range(rounds):
+            rows = round_rows(rng, round_no, pool, batch)
+            try:
+                if mode == "naive":
+                    write_naive(conn, rows, hold)
+                else:
+                    upsert_shared_entities(rows["genres"], rows["studios"], rows["persons"], conn=conn)
+                stats["committed"] += 1
+            except psycopg2.Error as e:
+                conn.rollback()
+                stats["failed"] += 1
+                if e.pgcode == "40P01":
+                    stats["deadlocks"] += 1
+    finally:
+        conn.close()
+    stats["elapsed"] = time.perf_counter() - started
+    stats["retries"] = dict(shared_writes.RETRY_COUNTS)
+    return stats
+
+
+# ══════════════════════════════════════════════
+# RUN
+# ══════════════════════════════════════════════
+
+def cleanup(cursor):
+    for table, key in (("Person", "PersonID"), ("Studio", "StudioID"), ("Genre", "GenreID")):
+        cursor.execute(f"DELETE FROM {table} WHERE {key} >= %s", (BASE_ID,))
+
+
+def run_mode(mode, workers, rounds, pool, batch, hold, seed):
+    jobs = [(mode, n, rounds, pool, batch, hold, seed) for n in range(workers)]
+    started = time.perf_counter()
+    with multiprocessing.Pool(workers) as processes:
+        results = processes.map(stress_worker, jobs)
+    elapsed = time.perf_counter() - started
+
+    committed = sum(r["committed"] for r in results)
+    failed = sum(r["failed"] for r in results)
+    deadlocks = sum(r["deadlocks"] for r in results)
+    retries = {code: sum(r["retries"][code] for r in results) for code in RETRYABLE}
+    print(f"   {mode:<8} {committed:>5} committed | {failed:>4} failed "
+          f"({deadlocks} deadlocks) | retries: "
+          + ", ".join(f"{RETRYABLE[code]} {count}" for code, count in retries.items())
+          + f" | {committed / elapsed:.1f} txn/s")
+    return failed
+
+
+def stress(modes, workers=DEFAULT_WORKERS, rounds=DEFAULT_ROUNDS, pool=DEFAULT_POOL,
+           batch=DEFAULT_BATCH, hold_ms=DEFAULT_HOLD_MS, seed=42):
+    """Overlapping upserts of the same uncommitted Person / Studio / Genre keys from several processes"""
+    conn = psycopg2.connect(DATABASE_URL)
+    cur = conn.cursor()
+    failures = {}
+
+    print(f"🔥 {workers} workers × {rounds} rounds, {batch} of {pool} shared IDs per round")
+    try:
+        for mode in modes:
+            cleanup(cur)
+            conn.commit()
+            failures[mode] = run_mode(mode, workers, rounds, pool, min(batch, pool), hold_ms / 1000, seed)
+
+    finally:
+        cleanup(cur)
+        conn.commit()
+        cur.close()
+        conn.close()
+
+    return failures
+
+
+# ══════════════════════════════════════════════
+# COMMAND LINE INTERFACE
+# ══════════════════════════════════════════════
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Concurrency stress test of the shared-entity write path (Person / Studio / Genre)",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python stress_shared_writes.py                          # naive vs ordered, 8 workers
+  python stress_shared_writes.py --mode ordered --workers 16 --rounds 100
+  python stress_shared_writes.py --hold-ms 10             # Longer naive transactions
+
+naive:   row by row in input order inside one transaction (the old path)
+ordered: shared_writes.upsert_shared_entities (sorted keys, short
+         transaction, retry on deadlock / serialization failure)
+Exits 1 if any ordered transaction fails. Test rows use IDs ≥ 1900000000
+and are deleted afterwards.
+        """
+    )
+    parser.add_argument("--mode", choices=["naive", "ordered", "both"], default="both")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"Concurrent processes (default: {DEFAULT_WORKERS})")
+    parser.add_argument("--rounds", type=int, default=DEFAULT_ROUNDS,
+                        help=f"Transactions per worker (default: {DEFAULT_ROUNDS})")
+    parser.add_argument("--pool", type=int, default=DEFAULT_POOL,
+                        help=f"Shared IDs per round (default: {DEFAULT_POOL})")
+    parser.add_argument("--batch", type=int, default=DEFAULT_BATCH,
+                        help=f"IDs per transaction (default: {DEFAULT_BATCH})")
+    parser.add_argument("--hold-ms", type=float, default=DEFAULT_HOLD_MS,
+                        help=f"Naive mode: pause between rows (default: {DEFAULT_HOLD_MS})")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    modes = ["naive", "ordered"] if args.mode == "both" else [args.mode]
+    failures = stress(modes, args.workers, args.rounds, args.pool, args.batch, args.hold_ms, args.seed)
+
+    if failures.get("ordered"):
+        print("\n❌ Ordered writes failed")
+        raise SystemExit(1)
+    print("\n✅ Done")
+
+
+if __name__ == "__main__":
+    main()
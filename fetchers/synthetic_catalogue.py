@@ -0,0 +1,477 @@
+import psycopg2
+import os
+import json
+import gzip
+import time
+import random
+import argparse
+from bisect import bisect_left
+from datetime import date, datetime, timedelta
+from itertools import accumulate
+from dotenv import load_dotenv
+
+from movie_fetcher import ingest_movie
+from TVseries_fetcher import ingest_tv
+from post_ingest import run_post_ingest
+from bulk_load import bulk_load, open_text
+from import_reviews import import_reviews
+
+load_dotenv()
+
+# ── DB CONFIG ───────────────────────────────
+# Use Neon DB connection string
+DATABASE_URL = os.getenv("DATABASE_URL")
+
+# Synthetic TMDB IDs start here so they never collide with real ones
+# (real TMDB movie / TV / person IDs are well below this)
+ID_OFFSET = 1_000_000_000
+
+# Real TMDB genre IDs, so synthetic titles share the Genre table
+MOVIE_GENRES = [
+    (28, "Action"), (12, "Adventure"), (16, "Animation"), (35, "Comedy"), (80, "Crime"),
+    (99, "Documentary"), (18, "Drama"), (10751, "Family"), (14, "Fantasy"), (36, "History"),
+    (27, "Horror"), (10402, "Music"), (9648, "Mystery"), (10749, "Romance"),
+    (878, "Science Fiction"), (53, "Thriller"), (10752, "War"), (37, "Western"),
+]
+TV_GENRES = [
+    (10759, "Action & Adventure"), (16, "Animation"), (35, "Comedy"), (80, "Crime"),
+    (99, "Documentary"), (18, "Drama"), (10751, "Family"), (10762, "Kids"), (9648, "Mystery"),
+    (10764, "Reality"), (10765, "Sci-Fi & Fantasy"), (10766, "Soap"), (10768, "War & Politics"),
+]
+LANGUAGES = ["en"] * 12 + ["ja", "ko", "fr", "es", "hi", "de", "it", "bn", "zh"]
+
+FIRST_NAMES = ["James", "Maria", "Akira", "Priya", "Liam", "Sofia", "Chen", "Amara", "Lucas", "Noor",
+               "Elena", "Kenji", "Olivia", "Rahul", "Ines", "Mateo", "Hana", "Omar", "Freya", "Diego"]
+LAST_NAMES = ["Smith", "Garcia", "Tanaka", "Khan", "Murphy", "Rossi", "Wang", "Okafor", "Silva", "Haddad",
+              "Novak", "Sato", "Brown", "Sharma", "Costa", "Lopez", "Kim", "Rahman", "Berg", "Torres"]
+WORDS = ["dark", "night", "return", "king", "love", "city", "last", "war", "star", "secret",
+         "house", "river", "ghost", "summer", "empire", "shadow", "island", "heart", "storm", "road",
+         "detective", "family", "journey", "dream", "kingdom", "space", "winter", "legend", "hunter", "rising"]
+
+DEFAULTS = {
+    "movies": 1000,
+    "tv": 100,
+    "persons": 20000,
+    "studios": 2000,
+    "actor_skew": 1.1,         # Zipf exponent: a few actors appear in many titles
+    "long_running": 0.05,      # Share of TV shows with hundreds of episodes
+    "reviews": 20000,
+    "review_skew": 1.2,        # Zipf exponent: a few titles get most reviews
+    "users": 1000,
+}
+
+
+# ══════════════════════════════════════════════
+# SAMPLING HELPERS
+# ══════════════════════════════════════════════
+
+class ZipfSampler:
+    """Draw ranks 0..n-1 with P(rank) ∝ 1 / (rank + 1) ** s"""
+
+    def __init__(self, n, s, rng):
+        self.rng = rng
+        self.cumulative = list(accumulate(1 / (rank + 1) ** s for rank in range(n)))
+
+    def draw(self):
+        return bisect_left(self.cumulative, self.rng.random() * self.cumulative[-1])
+
+    def draw_distinct(self, k):
+        """k distinct ranks (fewer if the population is smaller)"""
+        picked = []
+        seen = set()
+        for _ in range(k * 4):
+            rank = self.draw()
+            if rank not in seen:
+                seen.add(rank)
+                picked.append(rank)
+                if len(picked) == k:
+                    break
+        return picked
+
+
+def random_title(rng, words=(1, 4)):
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(*words))).title()
+
+
+def random_overview(rng, words=40):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def random_date(rng, start_year=1950, end_year=2025):
+    start = date(start_year, 1, 1)
+    return start + timedelta(days=rng.randrange((date(end_year, 12, 31) - start).days))
+
+
+# ══════════════════════════════════════════════
+# TMDB-SHAPED PAYLOADS
+# ══════════════════════════════════════════════
+
+class CatalogueGenerator:
+    """Generates TMDB detail payloads with credits (and seasons) appended"""
+
+    def __init__(self, persons, studios, actor_skew, long_running, seed):
+        self.rng = random.Random(seed)
+        self.persons = persons
+        self.studios = studios
+        self.long_running = long_running
+        # Person rank 0 is the most cast actor; ranks map to shuffled IDs
+        self.person_ids = [ID_OFFSET + i for i in range(persons)]
+        self.rng.shuffle(self.person_ids)
+        self.actors = ZipfSampler(persons, actor_skew, self.rng)
+        self.studio_picker = ZipfSampler(studios, 1.0, self.rng)
+
+    def person(self, rank):
+        person_id = self.person_ids[rank]
+        # Names derived from the ID so the same person always has the same name
+        return {
+            "id": person_id,
+            "name": f"{FIRST_NAMES[person_id % 20]} {LAST_NAMES[(person_id // 20) % 20]} {person_id - ID_OFFSET}",
+            "profile_path": None,
+        }
+
+    def credits(self, tv=False):
+        rng = self.rng
+        cast = []
+        for order, rank in enumerate(self.actors.draw_distinct(rng.randint(8, 40))):
+            member = self.person(rank)
+            character = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+            member["order"] = order
+            if tv:
+                member["roles"] = [{"character": character, "episode_count": rng.randint(1, 100)}]
+            else:
+                member["character"] = character
+            cast.append(member)
+
+        # Directors / writers come from the long tail (uniform over persons)
+        jobs = (["Director"] + ["Writer"] * rng.randint(1, 3) if not tv
+                else ["Creator"] + ["Writer"] * rng.randint(1, 4) + ["Director"] * rng.randint(0, 3))
+        jobs += ["Producer", "Editor", "Original Music Composer"]
+        crew = []
+        for job in jobs:
+            member = self.person(rng.randrange(self.persons))
+            member["job"] = job
+            member["department"] = "Directing" if job == "Director" else "Writing"
+            crew.append(member)
+        return {"cast": cast, "crew": crew}
+
+    def companies(self, count):
+        return [{"id": ID_OFFSET + rank, "name": f"Studio {rank}", "logo_path": None}
+                for rank in self.studio_picker.draw_distinct(count)]
+
+    def movie(self, index):
+        rng = self.rng
+        release = random_date(rng)
+        return {
+            "id": ID_OFFSET + index,
+            "title": random_title(rng),
+            "release_date": release.isoformat(),
+            "overview": random_overview(rng),
+            "original_language": rng.choice(LANGUAGES),
+            "vote_average": round(min(10, max(1, rng.gauss(6.4, 1.1))), 1),
+            "poster_path": None,
+            "runtime": rng.randint(75, 180),
+            "budget": rng.choice([0, rng.randint(1, 250) * 1_000_000]),
+            "revenue": rng.choice([0, rng.randint(1, 900) * 1_000_000]),
+            "genres": [{"id": gid, "name": name} for gid, name in rng.sample(MOVIE_GENRES, rng.randint(1, 3))],
+            "production_companies": self.companies(rng.randint(1, 3)),
+            "credits": self.credits(),
+        }
+
+    def season_shape(self):
+        """(seasons, episodes per season): most shows are short, a few run for hundreds of episodes"""
+        rng = self.rng
+        if rng.random() < self.long_running:
+            return rng.randint(12, 35), rng.randint(18, 26)
+        return rng.randint(1, 6), rng.randint(6, 13)
+
+    def tv_show(self, index):
+        rng = self.rng
+        tv_id = ID_OFFSET + index
+        seasons, episodes = self.season_shape()
+        first_air = random_date(rng, end_year=2024)
+        show = {
+            "id": tv_id,
+            "name": random_title(rng),
+            "first_air_date": first_air.isoformat(),
+            "overview": random_overview(rng),
+            "original_language": rng.choice(LANGUAGES),
+            "vote_average": round(min(10, max(1, rng.gauss(7.0, 1.0))), 1),
+            "poster_path": None,
+            "in_production": rng.random() < 0.3,
+            "number_of_seasons": seasons,
+            "genres": [{"id": gid, "name": name} for gid, name in rng.sample(TV_GENRES, rng.randint(1, 3))],
+            "production_companies": self.companies(rng.randint(0, 2)),
+            "networks": self.companies(1),
+            "credits": self.credits(tv=True),
+        }
+        for season_num in range(1, seasons + 1):
+            air_date = first_air + timedelta(days=365 * (season_num - 1))
+            show[f"season/{season_num}"] = {
+                "season_number": season_num,
+                "name": f"Season {season_num}",
+                "air_date": air_date.isoformat(),
+                "overview": random_overview(rng, 20),
+                "vote_average": show["vote_average"],
+                "episodes": [{
+                    "episode_number": episode_num,
+                    "name": random_title(rng),
+                    "overview": random_overview(rng, 25),
+                    "runtime": rng.randint(20, 60),
+                    "vote_average": round(min(10, max(1, rng.gauss(show["vote_average"], 0.6))), 1),
+                    "still_path": None,
+                } for episode_num in range(1, episodes + 1)],
+            }
+        return show
+
+
+def current_counts():
+    """(movies, TV shows) currently in the catalogue, for --scale"""
+    conn = psycopg2.connect(DATABASE_URL)
+    cur = conn.cursor()
+    try:
+        cur.execute("""
+            SELECT COUNT(*) FILTER (WHERE MediaType = 'Movie'),
+                   COUNT(*) FILTER (WHERE MediaType = 'TVSeries')
+            FROM Media
+        """)
+        return cur.fetchone()
+    finally:
+        cur.close()
+        conn.close()
+
+
+def write_jsonl(path, records):
+    count = 0
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+            count += 1
+    return count
+
+
+def generate(out_dir, movies, tv, persons, studios, actor_skew, long_running, seed):
+    """Write movies.jsonl.gz and tv.jsonl.gz (bulk_load.py detail-record format)"""
+    os.makedirs(out_dir, exist_ok=True)
+    generator = CatalogueGenerator(persons, studios, actor_skew, long_running, seed)
+
+    started = time.perf_counter()
+    movie_path = os.path.join(out_dir, "movies.jsonl.gz")
+    tv_path = os.path.join(out_dir, "tv.jsonl.gz")
+    write_jsonl(movie_path, (generator.movie(i) for i in range(movies)))
+    write_jsonl(tv_path, (generator.tv_show(i) for i in range(tv)))
+
+    print(f"✅ Generated {movies} movies and {tv} TV shows ({persons} persons) "
+          f"in {time.perf_counter() - started:.1f}s → {out_dir}")
+    return movie_path, tv_path
+
+
+# ══════════════════════════════════════════════
+# LOADING
+# ══════════════════════════════════════════════
+
+def iter_payloads(path):
+    with open_text(path) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def load_via_fetchers(movie_path, tv_path, commit_every=100):
+    """Feed the payloads through the fetchers' insert path (ingest_movie / ingest_tv)"""
+    conn = psycopg2.connect(DATABASE_URL)
+    cur = conn.cursor()
+
+    touched_persons = set()
+    loaded = 0
+    started = time.perf_counter()
+    try:
+        for path, kind in ((movie_path, "movie"), (tv_path, "tv")):
+            for details in iter_payloads(path):
+                if kind == "movie":
+                    ingest_movie(cur, details, details["credits"], touched_persons)
+                else:
+                    ingest_tv(cur, details, details["credits"], touched_persons=touched_persons,
+                              fetch_season=lambda _, n, d=details: d.get(f"season/{n}"))
+                loaded += 1
+                if loaded % commit_every == 0:
+                    conn.commit()
+                    print(f"   → {loaded} titles ({loaded / (time.perf_counter() - started):.1f} titles/s)")
+
+        conn.commit()
+        run_post_ingest(conn, touched_persons)
+        print(f"\n✅ {loaded} titles loaded through the fetchers in {time.perf_counter() - started:.1f}s")
+
+    except Exception as e:
+        conn.rollback()
+        print(f"\n❌ Error: {e}")
+
+    finally:
+        cur.close()
+        conn.close()
+
+
+# ══════════════════════════════════════════════
+# REVIEWS
+# ══════════════════════════════════════════════
+
+def ensure_synthetic_users(cursor, count):
+    """UserIDs of `count` synthetic users (created if missing)"""
+    cursor.execute("""
+        INSERT INTO Users (FullName, Email, PasswordHash)
+        SELECT 'Synthetic user ' || g, 'synthetic-user-' || g || '@example.com', 'x'
+        FROM generate_series(1, %s) AS g
+        ON CONFLICT (Email) DO NOTHING
+    """, (count,))
+    cursor.execute("""
+        SELECT UserID FROM Users
+        WHERE Email LIKE 'synthetic-user-%%@example.com'
+        ORDER BY UserID
+        LIMIT %s
+    """, (count,))
+    return [user_id for user_id, in cursor.fetchall()]
+
+
+def review_targets(cursor):
+    """Every movie and episode as (media_id, episode_media_id, season_no, episode_no, base_rating)"""
+    cursor.execute("""
+        SELECT MediaID, NULL, NULL, NULL, COALESCE(BaseRating, Rating, 6)
+        FROM Media WHERE MediaType = 'Movie'
+        UNION ALL
+        SELECT NULL, MediaID, SeasonNo, EpisodeNo, COALESCE(BaseRating, AvgRating, 6)
+        FROM Episode
+    """)
+    return cursor.fetchall()
+
+
+def generate_reviews(path, count, skew, users, seed):
+    """
+    Write a reviews JSON-lines file for import_reviews.py. Targets are the
+    movies / episodes already in the database, ranked in random order and
+    drawn with a Zipf(skew) distribution; one review per user and target.
+    """
+    conn = psycopg2.connect(DATABASE_URL)
+    cur = conn.cursor()
+    rng = random.Random(seed)
+
+    try:
+        user_ids = ensure_synthetic_users(cur, users)
+        conn.commit()
+        targets = review_targets(cur)
+    finally:
+        cur.close()
+        conn.close()
+
+    if not targets:
+        print("❌ No movies or episodes in the database to review.")
+        return 0
+
+    rng.shuffle(targets)
+    picker = ZipfSampler(len(targets), skew, rng)
+    now = datetime.now()
+    written = 0
+    seen = set()
+
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        for _ in range(count * 2):
+            target = targets[picker.draw()]
+            user_id = rng.choice(user_ids)
+            if (user_id, target[:4]) in seen:
+                continue
+            seen.add((user_id, target[:4]))
+            media_id, episode_media_id, season_no, episode_no, base = target
+            f.write(json.dumps({
+                "user_id": user_id,
+                "media_id": media_id,
+                "episode_media_id": episode_media_id,
+                "season_no": season_no,
+                "episode_no": episode_no,
+                "rating": int(min(10, max(1, round(rng.gauss(float(base), 1.8))))),
+                "review_text": random_overview(rng, rng.randint(5, 80)) if rng.random() < 0.7 else None,
+                "spoiler": rng.random() < 0.05,
+                "post_date": (now - timedelta(seconds=rng.randrange(3 * 365 * 86400))).isoformat(" ", "seconds"),
+            }) + "\n")
+            written += 1
+            if written == count:
+                break
+
+    print(f"✅ Wrote {written} reviews over {len(targets)} targets (skew {skew}) → {path}")
+    return written
+
+
+# ══════════════════════════════════════════════
+# COMMAND LINE INTERFACE
+# ══════════════════════════════════════════════
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate a synthetic TMDB-shaped catalogue and reviews for scale testing",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python synthetic_catalogue.py generate out/                        # 1000 movies, 100 shows
+  python synthetic_catalogue.py generate out/ --scale 10             # 10x the current catalogue
+  python synthetic_catalogue.py generate out/ --movies 100000 --tv 5000 --persons 500000
+  python synthetic_catalogue.py load out/ --via bulk                 # COPY + merge (bulk_load.py)
+  python synthetic_catalogue.py load out/ --via fetchers             # ingest_movie / ingest_tv
+  python synthetic_catalogue.py reviews out/reviews.jsonl.gz --count 1000000 --import
+
+Synthetic IDs start at 1,000,000,000 and never collide with real TMDB IDs.
+        """
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    gen = subparsers.add_parser("generate", help="Write movies.jsonl.gz / tv.jsonl.gz")
+    gen.add_argument("out_dir")
+    gen.add_argument("--movies", type=int, default=DEFAULTS["movies"])
+    gen.add_argument("--tv", type=int, default=DEFAULTS["tv"])
+    gen.add_argument("--scale", type=float,
+                     help="Size relative to the current catalogue (overrides --movies/--tv)")
+    gen.add_argument("--persons", type=int, help="Person pool size (default: 20 per title, min 20000)")
+    gen.add_argument("--studios", type=int, default=DEFAULTS["studios"])
+    gen.add_argument("--actor-skew", type=float, default=DEFAULTS["actor_skew"],
+                     help=f"Zipf exponent for actor popularity (default: {DEFAULTS['actor_skew']})")
+    gen.add_argument("--long-running", type=float, default=DEFAULTS["long_running"],
+                     help=f"Share of TV shows with 12-35 seasons (default: {DEFAULTS['long_running']})")
+    gen.add_argument("--seed", type=int, default=42)
+
+    load = subparsers.add_parser("load", help="Load a generated catalogue into the database")
+    load.add_argument("out_dir")
+    load.add_argument("--via", choices=["bulk", "fetchers"], default="bulk")
+    load.add_argument("--commit-every", type=int, default=100, help="Titles per commit (--via fetchers)")
+
+    rev = subparsers.add_parser("reviews", help="Write (and optionally import) skewed reviews")
+    rev.add_argument("path", help="Output .jsonl.gz file")
+    rev.add_argument("--count", type=int, default=DEFAULTS["reviews"])
+    rev.add_argument("--skew", type=float, default=DEFAULTS["review_skew"],
+                     help=f"Zipf exponent for reviews per title (default: {DEFAULTS['review_skew']})")
+    rev.add_argument("--users", type=int, default=DEFAULTS["users"])
+    rev.add_argument("--seed", type=int, default=42)
+    rev.add_argument("--import", dest="do_import", action="store_true", help="Run import_reviews.py on the file")
+
+    args = parser.parse_args()
+
+    if args.command == "generate":
+        movies, tv = args.movies, args.tv
+        if args.scale:
+            current_movies, current_tv = current_counts()
+            movies, tv = int(current_movies * args.scale), int(current_tv * args.scale)
+            print(f"📏 Current catalogue: {current_movies} movies, {current_tv} TV shows × {args.scale}")
+        persons = args.persons or max(20000, 20 * (movies + tv))
+        generate(args.out_dir, movies, tv, persons, args.studios,
+                 args.actor_skew, args.long_running, args.seed)
+
+    elif args.command == "load":
+        movie_path = os.path.join(args.out_dir, "movies.jsonl.gz")
+        tv_path = os.path.join(args.out_dir, "tv.jsonl.gz")
+        if args.via == "bulk":
+            bulk_load([movie_path], [tv_path])
+        else:
+            load_via_fetchers(movie_path, tv_path, args.commit_every)
+
+    else:
+        if generate_reviews(args.path, args.count, args.skew, args.users, args.seed) and args.do_import:
+            import_reviews(args.path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+import requests
+import psycopg2
+import os
+import sys
+import time
+import random
+import threading
+from contextlib import contextmanager
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# ── TMDB CONFIG ─────────────────────────────
+API_KEY = os.getenv("TMDB_API_KEY")
+BASE_URL = "https://api.themoviedb.org/3"
+# One keep-alive session per process: long-running callers (daemon.py,
+# ingest_service.py) reuse its TLS connections across titles
+session = requests.Session()
+TIMEOUT = (5, 30)  # connect, read (seconds)
+
+# ── DB CONFIG ───────────────────────────────
+# Use Neon DB connection string
+DATABASE_URL = os.getenv("DATABASE_URL")
+
+# ── RETRIES ─────────────────────────────────
+# Answers worth asking again: rate limited or TMDB / its CDN having trouble
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+TRANSIENT_ERRORS = (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+)
+MAX_ATTEMPTS = int(os.getenv("TMDB_MAX_ATTEMPTS", "5"))
+BASE_DELAY = 0.5   # seconds, doubled per attempt, with jitter
+MAX_DELAY = 30.0
+
+# ── CIRCUIT BREAKER ─────────────────────────
+# This many transient failures in a row (from any fetcher process, counted in
+# Ingest_Circuit_Breaker) open the circuit: every process waits out the
+# cooldown instead of hammering TMDB; the cooldown doubles while the first
+# requests after it keep failing
+BREAKER_NAME = "tmdb"
+BREAKER_THRESHOLD = 8
+BREAKER_COOLDOWN = 30.0
+BREAKER_MAX_COOLDOWN = 600.0
+BREAKER_POLL = 1.0  # seconds a read of the breaker row is reused for
+
+
+class TMDBUnavailable(requests.exceptions.RequestException):
+    """TMDB kept failing (5xx / 429 / timeouts) through every retry"""
+
+
+def is_not_found(error):
+    return (isinstance(error, requests.exceptions.HTTPError)
+            and error.response is not None
+            and error.response.status_code == 404)
+
+
+# ══════════════════════════════════════════════
+# CLIENT CONNECTION
+# ══════════════════════════════════════════════
+
+_connection = None
+_connection_lock = threading.Lock()
+
+
+def client_query(query, params):
+    """
+    Run one statement on this process's autocommit connection (opened on
+    first use, reopened after errors) and return its first row. Shared by
+    the circuit breaker and the dead-letter list; psycopg2 errors propagate.
+    """
+    global _connection
+    with _connection_lock:
+        try:
+            if _connection is None or _connection.closed:
+                _connection = psycopg2.connect(DATABASE_URL)
+                _connection.autocommit = True
+            with _connection.cursor() as cur:
+                cur.execute(query, params)
+                return cur.fetchone() if cur.description else None
+        except psycopg2.Error:
+            if _connection is not None:
+                _connection.close()
+            raise
+
+
+# ══════════════════════════════════════════════
+# CIRCUIT BREAKER
+# ══════════════════════════════════════════════
+
+class CircuitBreaker:
+    """
+    closed → (threshold failures in a row) → open → (cooldown) → half-open.
+    Half-open lets requests through again: a success closes the circuit,
+    a failure reopens it for twice as long.
+
+    The state is the Ingest_Circuit_Breaker row, shared by every process;
+    wait() re-reads it at most every BREAKER_POLL seconds. If the database
+    cannot be reached the breaker stays closed rather than stop ingestion.
+    """
+
+    def __init__(self, name=BREAKER_NAME, threshold=BREAKER_THRESHOLD,
+                 cooldown=BREAKER_COOLDOWN, max_cooldown=BREAKER_MAX_COOLDOWN):
+        self.lock = threading.Lock()
+        self.name = name
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.checked_at = None
+        self.open_until = 0.0
+        self.failing = False  # the row had failures when last read
+        self.trips = 0
+
+    def query(self, query, params):
+        try:
+            return client_query(query, params)
+        except psycopg2.Error as e:
+            print(f"   ⚠️ Circuit breaker state unavailable, treating it as closed: {e}")
+            return None
+
+    def refresh(self):
+        row = self.query("""
+            SELECT GREATEST(0, EXTRACT(EPOCH FROM OpenUntil - clock_timestamp())),
+                   Failures > 0 OR HalfOpen
+            FROM Ingest_Circuit_Breaker
+            WHERE Name = %s
+        """, (self.name,))
+        remaining, failing = row if row else (0, False)
+        now = time.monotonic()
+        with self.lock:
+            self.checked_at = now
+            self.open_until = now + float(remaining or 0)
+            self.failing = bool(failing)
+
+    def wait(self):
+        """Block while the circuit is open (in any process)"""
+        while True:
+            with self.lock:
+                stale = self.checked_at is None or time.monotonic() - self.checked_at >= BREAKER_POLL
+            if stale:
+                self.refresh()
+            with self.lock:
+                remaining = self.open_until - time.monotonic()
+                if remaining > 0:
+                    self.checked_at = None  # read the row again once the wait is over
+            if remaining <= 0:
+                return
+            time.sleep(remaining)
+
+    def success(self):
+        with self.lock:
+            if not self.failing:
+                return
+            self.failing = False
+        row = self.query("SELECT fn_circuit_breaker_success(%s, %s)", (self.name, self.cooldown))
+        if row and row[0]:
+            print("   ▶️ TMDB is answering again, circuit closed")
+
+    def failure(self):
+        row = self.query("SELECT fn_circuit_breaker_failure(%s, %s, %s, %s)",
+                         (self.name, self.threshold, self.cooldown, self.max_cooldown))
+        opened_for = row[0] if row else 0
+        with self.lock:
+            self.failing = True
+            if not opened_for:
+                return
+            self.checked_at = time.monotonic()
+            self.open_until = self.checked_at + opened_for
+            self.trips += 1
+        print(f"   ⏸️ TMDB failing, pausing all fetchers for {opened_for:.0f}s")
+
+
+breaker = CircuitBreaker()
+
+
+# ══════════════════════════════════════════════
+# REQUESTS
+# ══════════════════════════════════════════════
+
+def retry_after(response):
+    """Seconds from a Retry-After header (TMDB sends delta-seconds), or None"""
+    value = response.headers.get("Retry-After", "")
+    try:
+        return min(MAX_DELAY, max(0.0, float(value)))
+    except ValueError:
+        return None
+
+
+_attempt_hooks = threading.local()
+
+
+@contextmanager
+def before_each_attempt(hook):
+    """
+    Call hook() before every HTTP attempt tmdb_get makes in this thread,
+    retries included (sharded_ingest.py takes a shared rate-limit token)
+    """
+    previous = getattr(_attempt_hooks, "hook", None)
+    _attempt_hooks.hook = hook
+    try:
+        yield
+    finally:
+        _attempt_hooks.hook = previous
+
+
+def tmdb_get(path, params=None, attempts=MAX_ATTEMPTS, before_attempt=None):
+    """
+    GET BASE_URL + path and return the JSON body. 429 / 5xx answers and
+    connection errors or timeouts are retried with jittered exponential
+    backoff (429: as long as Retry-After asks), behind the circuit breaker;
+    TMDBUnavailable once every attempt failed. Other 4xx answers (404 for a
+    missing title) raise requests.exceptions.HTTPError right away.
+    before_attempt (default: the thread's before_each_attempt hook) is
+    called before each request is sent.
+    """
+    url = f"{BASE_URL}{path}"
+    params = {"api_key": API_KEY, **(params or {})}
+    before_attempt = before_attempt or getattr(_attempt_hooks, "hook", None)
+
+    for attempt in range(1, attempts + 1):
+        breaker.wait()
+        if before_attempt:
+            before_attempt()
+        wait = None
+        try:
+            response = session.get(url, params=params, timeout=TIMEOUT)
+        except TRANSIENT_ERRORS as e:
+            error = type(e).__name__
+            breaker.failure()
+        else:
+            if response.status_code not in RETRY_STATUSES:
+                breaker.success()
+                response.raise_for_status()
+                return response.json()
+            error = f"HTTP {response.status_code}"
+            if response.status_code == 429:
+                # Our own request rate, not an outage: back off without tripping the breaker
+                wait = retry_after(response)
+            else:
+                breaker.failure()
+
+        if attempt == attempts:
+            raise TMDBUnavailable(f"{path}: {error} after {attempts} attempts")
+        if wait is None:
+            wait = min(MAX_DELAY, BASE_DELAY * 2 ** (attempt - 1)) * (0.5 + random.random())
+        print(f"   ↻ TMDB {error} on {path}, retrying in {wait:.1f}s ({attempt}/{attempts - 1})")
+        time.sleep(wait)
+
+
+# ══════════════════════════════════════════════
+# DEAD LETTERS
+# ══════════════════════════════════════════════
+
+def record_dead_letter(media_type, tmdb_id, error, source=None):
+    """
+    Remember a title that could not be ingested in Ingest_Dead_Letter
+    (dead_letters.py retries them). Autocommit on the client connection, so
+    it survives the caller rolling back the title; never raises.
+    """
+    source = source or os.path.basename(sys.argv[0])
+    try:
+        client_query("""
+            INSERT INTO Ingest_Dead_Letter AS d (MediaType, TmdbID, Error, Source)
+            VALUES (%s, %s, %s, %s)
+            ON CONFLICT (MediaType, TmdbID) DO UPDATE
+            SET Failures = d.Failures + 1,
+                Error = EXCLUDED.Error,
+                Source = EXCLUDED.Source,
+                LastFailedAt = CURRENT_TIMESTAMP
+        """, (media_type, tmdb_id, str(error)[:1000], source[:50]))
+    except psycopg2.Error as e:
+        print(f"   ⚠️ Could not record {media_type} {tmdb_id} as a dead letter: {e}")
+
+
+def clear_dead_letter(cursor, media_type, tmdb_id):
+    """Take a title off Ingest_Dead_Letter, in the caller's transaction (the one that ingested it)"""
+    cursor.execute("DELETE FROM Ingest_Dead_Letter WHERE MediaType = %s AND TmdbID = %s",
+                   (media_type, tmdb_id))
@@ -1,17 +1,23 @@
 import requests
 import psycopg2
 import os
+import argparse
 from dotenv import load_dotenv
 
+from post_ingest import refresh_show_documents
+from tmdb_client import tmdb_get, is_not_found, TMDBUnavailable
+
 load_dotenv()
 
-API_KEY = os.getenv("TMDB_API_KEY")
-BASE_URL = "https://api.themoviedb.org/3"
 YOUTUBE_BASE = "https://www.youtube.com/watch?v="
 
 # Use Neon DB connection string
 DATABASE_URL = os.getenv("DATABASE_URL")
 
+# Stop the run once this many entities in a row could not be fetched:
+# TMDB is down, and everything still missing is selected again next run
+MAX_UNAVAILABLE_IN_A_ROW = 5
+
 
 # ══════════════════════════════════════════════
 # API FUNCTIONS
@@ -19,61 +25,51 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 
 def fetch_person_details(person_id):
     """Fetch person details from TMDB"""
-    url = f"{BASE_URL}/person/{person_id}"
-    params = {"api_key": API_KEY}
     try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        return response.json()
-    except Exception:
+        return tmdb_get(f"/person/{person_id}")
+    except requests.exceptions.HTTPError as e:
+        if not is_not_found(e):
+            raise
         return None
 
 
 def fetch_movie_videos(movie_id):
     """Fetch movie trailers from TMDB"""
-    url = f"{BASE_URL}/movie/{movie_id}/videos"
-    params = {"api_key": API_KEY}
     try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        return response.json().get("results", [])
-    except Exception:
+        return tmdb_get(f"/movie/{movie_id}/videos").get("results", [])
+    except requests.exceptions.HTTPError as e:
+        if not is_not_found(e):
+            raise
         return []
 
 
 def fetch_season_videos(tv_id, season_number):
     """Fetch season trailers from TMDB"""
-    url = f"{BASE_URL}/tv/{tv_id}/season/{season_number}/videos"
-    params = {"api_key": API_KEY}
     try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        return response.json().get("results", [])
-    except Exception:
+        return tmdb_get(f"/tv/{tv_id}/season/{season_number}/videos").get("results", [])
+    except requests.exceptions.HTTPError as e:
+        if not is_not_found(e):
+            raise
         return []
 
 
 def fetch_season_details(tv_id, season_number):
     """Fetch season details including episodes with still images"""
-    url = f"{BASE_URL}/tv/{tv_id}/season/{season_number}"
-    params = {"api_key": API_KEY}
     try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        return response.json()
-    except Exception:
+        return tmdb_get(f"/tv/{tv_id}/season/{season_number}")
+    except requests.exceptions.HTTPError as e:
+        if not is_not_found(e):
+            raise
         return None
 
 
 def fetch_company_details(company_id):
     """Fetch studio/company details from TMDB"""
-    url = f"{BASE_URL}/company/{company_id}"
-    params = {"api_key": API_KEY}
     try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        return response.json()
-    except Exception:
+        return tmdb_get(f"/company/{company_id}")
+    except requests.exceptions.HTTPError as e:
+        if not is_not_found(e):
+            raise
         return None
 
 
@@ -88,11 +84,57 @@ def get_trailer_url(videos):
     return None
 
 
+# ══════════════════════════════════════════════
+# PER-ENTITY COMMITS
+# ══════════════════════════════════════════════
+
+class EntityCommits:
+    """
+    Commits each person / movie / season / company on its own, so a TMDB
+    outage halfway through keeps the work done so far. Entities TMDB kept
+    failing for are recorded in Update_Dead_Letter (keyed by entity type)
+    and taken off it once they update cleanly.
+    """
+
+    def __init__(self, conn, cur):
+        self.conn = conn
+        self.cur = cur
+        self.unavailable_in_a_row = 0
+        self.failed = 0
+
+    def done(self, entity_type, entity_key):
+        self.cur.execute("DELETE FROM Update_Dead_Letter WHERE EntityType = %s AND EntityKey = %s",
+                         (entity_type, str(entity_key)))
+        self.conn.commit()
+        self.unavailable_in_a_row = 0
+
+    def failed_with(self, entity_type, entity_key, error):
+        """
+        Roll the entity back and record it (TMDBUnavailable after the retries,
+        or an HTTP error other than 404); raises once TMDB looks down
+        """
+        self.conn.rollback()
+        self.cur.execute("""
+            INSERT INTO Update_Dead_Letter AS d (EntityType, EntityKey, Error)
+            VALUES (%s, %s, %s)
+            ON CONFLICT (EntityType, EntityKey) DO UPDATE
+            SET Failures = d.Failures + 1,
+                Error = EXCLUDED.Error,
+                LastFailedAt = CURRENT_TIMESTAMP
+        """, (entity_type, str(entity_key), str(error)[:1000]))
+        self.conn.commit()
+        self.failed += 1
+        self.unavailable_in_a_row += 1
+        print("❌ TMDB request failed")
+        if self.unavailable_in_a_row >= MAX_UNAVAILABLE_IN_A_ROW:
+            raise TMDBUnavailable(f"{self.unavailable_in_a_row} {entity_type} lookups in a row failed ({error})")
+
+
 # ══════════════════════════════════════════════
 # UPDATE FUNCTIONS
 # ══════════════════════════════════════════════
 
-def update_persons(cur):
+def update_persons(cur, commits):
     """Update Person bio, DOB, nationality"""
     cur.execute("""
         SELECT PersonID, FullName FROM Person 
@@ -105,8 +147,13 @@ def update_persons(cur):
     updated = 0
     for i, (person_id, name) in enumerate(persons, 1):
         print(f"  [{i}/{len(persons)}] {name}...", end=" ")
-        details = fetch_person_details(person_id)
+        try:
+            details = fetch_person_details(person_id)
+        except requests.exceptions.RequestException as e:
+            commits.failed_with("person", person_id, e)
+            continue
         if not details:
+            commits.done("person", person_id)
             print("⚠️ Not found")
             continue
 
@@ -118,13 +165,14 @@ def update_persons(cur):
             UPDATE Person SET Biography = %s, DateOfBirth = %s, Nationality = %s
             WHERE PersonID = %s
         """, (biography, dob, nationality, person_id))
+        commits.done("person", person_id)
         updated += 1
         print(f"✅")
 
     print(f"  → Updated {updated}/{len(persons)} persons\n")
 
 
-def update_movie_trailers(cur):
+def update_movie_trailers(cur, commits):
     """Update TrailerLink for all movies"""
     cur.execute("""
         SELECT m.MediaID, m.Title FROM Media m
@@ -137,10 +185,16 @@ def update_movie_trailers(cur):
     updated = 0
     for i, (movie_id, title) in enumerate(movies, 1):
         print(f"  [{i}/{len(movies)}] {title}...", end=" ")
-        videos = fetch_movie_videos(movie_id)
+        try:
+            videos = fetch_movie_videos(movie_id)
+        except requests.exceptions.RequestException as e:
+            commits.failed_with("movie", movie_id, e)
+            continue
         trailer_url = get_trailer_url(videos)
         if trailer_url:
             cur.execute("UPDATE Movie SET TrailerLink = %s WHERE MediaID = %s", (trailer_url, movie_id))
+        commits.done("movie", movie_id)
+        if trailer_url:
             updated += 1
             print(f"✅")
         else:
@@ -149,8 +203,8 @@ def update_movie_trailers(cur):
     print(f"  → Updated {updated}/{len(movies)} movies\n")
 
 
-def update_season_trailers(cur):
-    """Update TrailerLink for all seasons"""
+def update_season_trailers(cur, commits, touched_shows):
+    """Update TrailerLink for all seasons; the MediaIDs of the shows updated go into touched_shows"""
     cur.execute("""
         SELECT s.MediaID, s.SeasonNo, m.Title FROM Season s
         JOIN Media m ON s.MediaID = m.MediaID
@@ -162,14 +216,21 @@ def update_season_trailers(cur):
     updated = 0
     for i, (media_id, season_no, title) in enumerate(seasons, 1):
         print(f"  [{i}/{len(seasons)}] {title} S{season_no}...", end=" ")
-        videos = fetch_season_videos(media_id, season_no)
+        try:
+            videos = fetch_season_videos(media_id, season_no)
+        except requests.exceptions.RequestException as e:
+            commits.failed_with("season", f"{media_id}/{season_no}", e)
+            continue
         trailer_url = get_trailer_url(videos)
         if trailer_url:
             cur.execute(
                 "UPDATE Season SET TrailerLink = %s WHERE MediaID = %s AND SeasonNo = %s",
                 (trailer_url, media_id, season_no)
             )
+        commits.done("season", f"{media_id}/{season_no}")
+        if trailer_url:
             updated += 1
+            touched_shows.add(media_id)
             print(f"✅")
         else:
             print(f"⚠️ No trailer")
@@ -177,7 +238,7 @@ def update_season_trailers(cur):
     print(f"  → Updated {updated}/{len(seasons)} seasons\n")
 
 
-def update_studio_details(cur):
+def update_studio_details(cur, commits):
     """Update WebsiteURL for all studios"""
     cur.execute("SELECT StudioID, StudioName FROM Studio WHERE WebsiteURL IS NULL")
     studios = cur.fetchall()
@@ -186,10 +247,16 @@ def update_studio_details(cur):
     updated = 0
     for i, (studio_id, name) in enumerate(studios, 1):
         print(f"  [{i}/{len(studios)}] {name}...", end=" ")
-        details = fetch_company_details(studio_id)
-        if details and details.get("homepage"):
-            cur.execute("UPDATE Studio SET WebsiteURL = %s WHERE StudioID = %s",
-                        (details["homepage"], studio_id))
+        try:
+            details = fetch_company_details(studio_id)
+        except requests.exceptions.RequestException as e:
+            commits.failed_with("company", studio_id, e)
+            continue
+        website = details.get("homepage") if details else None
+        if website:
+            cur.execute("UPDATE Studio SET WebsiteURL = %s WHERE StudioID = %s", (website, studio_id))
+        commits.done("company", studio_id)
+        if website:
             updated += 1
             print(f"✅")
         else:
@@ -198,8 +265,8 @@ def update_studio_details(cur):
     print(f"  → Updated {updated}/{len(studios)} studios\n")
 
 
-def update_episode_stills(cur):
-    """Update StillPath and Description for all episodes missing them"""
+def update_episode_stills(cur, commits, touched_shows):
+    """Update StillPath and Description for all episodes missing them; the MediaIDs of the shows updated go into touched_shows"""
     cur.execute("""
         SELECT DISTINCT MediaID, SeasonNo FROM Episode 
         WHERE StillPath IS NULL OR Description IS NULL
@@ -212,8 +279,13 @@ def update_episode_stills(cur):
     total_episodes = 0
     for i, (media_id, season_no) in enumerate(seasons, 1):
         print(f"  [{i}/{len(seasons)}] MediaID {media_id} Season {season_no}...", end=" ")
-        season_data = fetch_season_details(media_id, season_no)
+        try:
+            season_data = fetch_season_details(media_id, season_no)
+        except requests.exceptions.RequestException as e:
+            commits.failed_with("season", f"{media_id}/{season_no}", e)
+            continue
         if not season_data:
+            commits.done("season", f"{media_id}/{season_no}")
             print("⚠️ Not found")
             continue
 
@@ -232,9 +304,12 @@ def update_episode_stills(cur):
                       AND (StillPath IS NULL OR Description IS NULL)
                 """, (still_path, overview, media_id, season_no, ep_no))
                 season_updated += cur.rowcount
-        
+        commits.done("season", f"{media_id}/{season_no}")
+
         updated += season_updated
         total_episodes += len(episodes)
+        if season_updated:
+            touched_shows.add(media_id)
         print(f"✅ {season_updated} stills")
 
     print(f"  → Updated {updated} episode stills across {len(seasons)} seasons\n")
@@ -245,6 +320,11 @@ def update_episode_stills(cur):
 # ══════════════════════════════════════════════
 
 def main():
+    parser = argparse.ArgumentParser(
+        description="Fill in missing person, trailer, studio and episode still data from TMDB"
+    )
+    parser.parse_args()
+
     conn = psycopg2.connect(DATABASE_URL)
     cur = conn.cursor()
 
@@ -252,20 +332,35 @@ def main():
     print("🔄 Updating all missing data from TMDB...")
     print("=" * 50)
 
-    # update_persons(cur)
-    # update_movie_trailers(cur)
-    # update_season_trailers(cur)
-    # update_studio_details(cur)
-    update_episode_stills(cur)
+    commits = EntityCommits(conn, cur)
+    touched_shows = set()
+    try:
+        # update_persons(cur, commits)
+        # update_movie_trailers(cur, commits)
+        # update_season_trailers(cur, commits, touched_shows)
+        # update_studio_details(cur, commits)
+        update_episode_stills(cur, commits, touched_shows)
 
-    conn.commit()
+        print("=" * 50)
+        print(f"✅ All updates complete! ({commits.failed} recorded in Update_Dead_Letter)")
+        print("=" * 50)
 
-    print("=" * 50)
-    print("✅ All updates complete!")
-    print("=" * 50)
+    except TMDBUnavailable as e:
+        # Everything committed so far stays; rows still missing data are
+        # selected again by the next run
+        print(f"\n❌ TMDB unavailable, stopping ({e}); run again later")
 
-    cur.close()
-    conn.close()
+    try:
+        # Season/episode changes are served from TVShow_Document; rebuilt
+        # for every show committed, even if the run stopped early
+        rebuilt = refresh_show_documents(cur, touched_shows)
+        conn.commit()
+        if rebuilt:
+            print(f"📄 Rebuilt {rebuilt} show documents")
+
+    finally:
+        cur.close()
+        conn.close()
 
 
 if __name__ == "__main__":
@@ -4,11 +4,18 @@ import { Link } from 'react-router-dom'
 const API_BASE = 'http://localhost:3000'
 const POSTER_BASE = 'https://image.tmdb.org/t/p/w342'
 
-const getPosterUrl = (posterPath) => {
+// Prefer our own WebP thumbnail (fetchers/image_thumbnails.py) over the TMDB original
+const getPosterUrl = (posterPath, thumbs) => {
+    if (thumbs?.w342) return `${API_BASE}/images/${thumbs.w342}`
     if (!posterPath) return null
     return `${POSTER_BASE}${posterPath}`
 }
 
+// Blurred tiny placeholder shown until the poster loads
+const placeholderStyle = (lqip) => (
+    lqip ? { backgroundImage: `url(${lqip})`, backgroundSize: 'cover' } : undefined
+)
+
 function MoviesList({
     sectionTitle = 'Now Playing',
     limit = 12,
@@ -61,10 +68,11 @@ function MoviesList({
                     {movies.map((movie) => (
                         <Link className="card-link" to={`/movies/${movie.mediaid}`} key={movie.mediaid}>
                             <article className="card">
-                                {getPosterUrl(movie.poster) ? (
+                                {getPosterUrl(movie.poster, movie.posterthumbs) ? (
                                     <img
                                         className="poster"
-                                        src={getPosterUrl(movie.poster)}
+                                        src={getPosterUrl(movie.poster, movie.posterthumbs)}
+                                        style={placeholderStyle(movie.posterlqip)}
                                         alt={movie.title}
                                         loading="lazy"
                                     />
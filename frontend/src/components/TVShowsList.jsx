@@ -4,11 +4,18 @@ import { Link } from 'react-router-dom'
 const API_BASE = 'http://localhost:3000'
 const POSTER_BASE = 'https://image.tmdb.org/t/p/w342'
 
-const getPosterUrl = (posterPath) => {
+// Prefer our own WebP thumbnail (fetchers/image_thumbnails.py) over the TMDB original
+const getPosterUrl = (posterPath, thumbs) => {
+    if (thumbs?.w342) return `${API_BASE}/images/${thumbs.w342}`
     if (!posterPath) return null
     return `${POSTER_BASE}${posterPath}`
 }
 
+// Blurred tiny placeholder shown until the poster loads
+const placeholderStyle = (lqip) => (
+    lqip ? { backgroundImage: `url(${lqip})`, backgroundSize: 'cover' } : undefined
+)
+
 function TVShowsList({
     sectionTitle = 'Trending TV Shows',
     limit = 12,
@@ -61,10 +68,11 @@ function TVShowsList({
                     {shows.map((show) => (
                         <Link className="card-link" to={`/tvshows/${show.mediaid}`} key={show.mediaid}>
                             <article className="card">
-                                {getPosterUrl(show.poster) ? (
+                                {getPosterUrl(show.poster, show.posterthumbs) ? (
                                     <img
                                         className="poster"
-                                        src={getPosterUrl(show.poster)}
+                                        src={getPosterUrl(show.poster, show.posterthumbs)}
+                                        style={placeholderStyle(show.posterlqip)}
                                         alt={show.title}
                                         loading="lazy"
                                     />
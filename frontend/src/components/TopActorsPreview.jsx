@@ -4,11 +4,18 @@ import { Link } from 'react-router-dom'
 const API_BASE = 'http://localhost:3000'
 const PROFILE_BASE = 'https://image.tmdb.org/t/p/w185'
 
-const getProfileUrl = (profilePath) => {
+// Prefer our own WebP thumbnail (fetchers/image_thumbnails.py) over the TMDB original
+const getProfileUrl = (profilePath, thumbs) => {
+    if (thumbs?.w185) return `${API_BASE}/images/${thumbs.w185}`
     if (!profilePath) return null
     return `${PROFILE_BASE}${profilePath}`
 }
 
+// Blurred tiny placeholder shown until the photo loads
+const placeholderStyle = (lqip) => (
+    lqip ? { backgroundImage: `url(${lqip})`, backgroundSize: 'cover' } : undefined
+)
+
 function TopActorsPreview({ limit = 8, sectionTitle = 'Top Actors Right Now' }) {
     const [actors, setActors] = useState([])
     const [loading, setLoading] = useState(true)
@@ -52,10 +59,11 @@ function TopActorsPreview({ limit = 8, sectionTitle = 'Top Actors Right Now' })
                             to={`/persons/${actor.personid}`}
                             key={actor.personid}
                         >
-                            {getProfileUrl(actor.picture) ? (
+                            {getProfileUrl(actor.picture, actor.picturethumbs) ? (
                                 <img
                                     className="actor-pic"
-                                    src={getProfileUrl(actor.picture)}
+                                    src={getProfileUrl(actor.picture, actor.picturethumbs)}
+                                    style={placeholderStyle(actor.picturelqip)}
                                     alt={actor.fullname}
                                     loading="lazy"
                                 />
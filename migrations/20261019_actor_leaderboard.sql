@@ -0,0 +1,54 @@
+-- Precomputed top-actors leaderboard for /actors/top. The fetchers refresh
+-- it for the actors each ingestion run touched (fetchers/post_ingest.py).
+
+CREATE TABLE IF NOT EXISTS Actor_Leaderboard (
+    PersonID INT PRIMARY KEY,
+    TitleCount INT NOT NULL,
+    AvgRating DECIMAL(3, 1),
+    RefreshedAt TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (PersonID) REFERENCES Person(PersonID) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS idx_actor_leaderboard_rank
+ON Actor_Leaderboard(TitleCount DESC, AvgRating DESC NULLS LAST, PersonID);
+
+-- Recompute Actor_Leaderboard rows for the given actors (NULL → every actor).
+-- Called by the fetchers after each ingestion run commits, with the PersonIDs
+-- whose Crew rows it wrote; returns the number of leaderboard rows written.
+-- Upsert rather than delete + insert, so two runs refreshing the same actor
+-- at once wait on the row instead of failing with a unique violation; rows
+-- are written in PersonID order so overlapping refreshes do not deadlock.
+CREATE OR REPLACE FUNCTION fn_refresh_actor_leaderboard(p_person_ids INT[])
+RETURNS INT AS $$
+DECLARE
+    v_rows INT;
+BEGIN
+    INSERT INTO Actor_Leaderboard (PersonID, TitleCount, AvgRating)
+    SELECT c.PersonID, COUNT(DISTINCT c.MediaID), ROUND(AVG(m.Rating), 1)
+    FROM Crew c
+    JOIN Media m ON c.MediaID = m.MediaID
+    WHERE c.CrewRole = 'Actor'
+      AND (p_person_ids IS NULL OR c.PersonID = ANY(p_person_ids))
+    GROUP BY c.PersonID
+    ORDER BY c.PersonID
+    ON CONFLICT (PersonID) DO UPDATE
+    SET TitleCount = EXCLUDED.TitleCount,
+        AvgRating = EXCLUDED.AvgRating,
+        RefreshedAt = CURRENT_TIMESTAMP;
+
+    GET DIAGNOSTICS v_rows = ROW_COUNT;
+
+    -- Actors who no longer have any roles leave the leaderboard
+    DELETE FROM Actor_Leaderboard l
+    WHERE (p_person_ids IS NULL OR l.PersonID = ANY(p_person_ids))
+      AND NOT EXISTS (
+          SELECT 1 FROM Crew c
+          WHERE c.PersonID = l.PersonID AND c.CrewRole = 'Actor'
+      );
+
+    RETURN v_rows;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Initial fill
+SELECT fn_refresh_actor_leaderboard(NULL);
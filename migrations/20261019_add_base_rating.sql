@@ -0,0 +1,83 @@
+-- Keep the TMDB prior that the weighted-prior rating triggers start from,
+-- so trigger-maintained aggregates can be verified and recomputed exactly
+-- (see fetchers/recompute_ratings.py).
+--
+-- Weighted prior: Rating = (BaseRating * 1000 + SUM(review ratings)) / RatingCount
+-- where RatingCount starts at 1000 and grows by one per review.
+
+ALTER TABLE Media
+ADD COLUMN IF NOT EXISTS BaseRating DECIMAL(3, 1);
+
+ALTER TABLE Episode
+ADD COLUMN IF NOT EXISTS BaseRating DECIMAL(3, 1);
+
+-- New rows default BaseRating to the TMDB rating they were inserted with.
+CREATE OR REPLACE FUNCTION fn_default_base_rating()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.BaseRating IS NULL THEN
+        IF TG_TABLE_NAME = 'media' THEN
+            NEW.BaseRating := NEW.Rating;
+        ELSE
+            NEW.BaseRating := NEW.AvgRating;
+        END IF;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_media_base_rating ON Media;
+CREATE TRIGGER trg_media_base_rating
+BEFORE INSERT ON Media
+FOR EACH ROW
+EXECUTE FUNCTION fn_default_base_rating();
+
+DROP TRIGGER IF EXISTS trg_episode_base_rating ON Episode;
+CREATE TRIGGER trg_episode_base_rating
+BEFORE INSERT ON Episode
+FOR EACH ROW
+EXECUTE FUNCTION fn_default_base_rating();
+
+-- Backfill existing rows by inverting the incremental formula.
+-- Rows without reviews simply keep their current rating as the prior.
+UPDATE Media m
+SET BaseRating = COALESCE(
+        GREATEST(LEAST(ROUND(
+            ((m.Rating * m.RatingCount) - r.rating_sum)::numeric
+            / NULLIF(m.RatingCount - r.review_count, 0), 1), 10), 0),
+        m.Rating)
+FROM (
+    SELECT MediaID, SUM(Rating) AS rating_sum, COUNT(Rating) AS review_count
+    FROM Review
+    WHERE MediaID IS NOT NULL
+    GROUP BY MediaID
+) r
+WHERE m.MediaID = r.MediaID
+  AND m.MediaType = 'Movie'
+  AND m.BaseRating IS NULL;
+
+UPDATE Media
+SET BaseRating = Rating
+WHERE BaseRating IS NULL;
+
+UPDATE Episode e
+SET BaseRating = COALESCE(
+        GREATEST(LEAST(ROUND(
+            ((e.AvgRating * e.RatingCount) - r.rating_sum)::numeric
+            / NULLIF(e.RatingCount - r.review_count, 0), 1), 10), 0),
+        e.AvgRating)
+FROM (
+    SELECT EpisodeMediaID, EpisodeSeasonNo, EpisodeNo,
+           SUM(Rating) AS rating_sum, COUNT(Rating) AS review_count
+    FROM Review
+    WHERE EpisodeMediaID IS NOT NULL
+    GROUP BY EpisodeMediaID, EpisodeSeasonNo, EpisodeNo
+) r
+WHERE e.MediaID = r.EpisodeMediaID
+  AND e.SeasonNo = r.EpisodeSeasonNo
+  AND e.EpisodeNo = r.EpisodeNo
+  AND e.BaseRating IS NULL;
+
+UPDATE Episode
+SET BaseRating = AvgRating
+WHERE BaseRating IS NULL;
@@ -0,0 +1,210 @@
+-- Fast path for fetchers/import_reviews.py --fast.
+-- The importer runs SET LOCAL cholochitro.bulk_review_import = 'on' in its
+-- transaction: the review profanity filter and both rating triggers return
+-- immediately, the importer checks the whole file set-wise in a staging
+-- table and applies every movie / episode / season / series change once.
+-- Other sessions are unaffected. No schema changes required.
+
+BEGIN;
+
+-- ═══════════════════════════════════════════════
+-- 1. Movie Rating (plpgsql/01_rating_functions.sql)
+-- ═══════════════════════════════════════════════
+
+CREATE OR REPLACE FUNCTION fn_refresh_movie_rating()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_media_ids INT[];
+    v_sums      BIGINT[];
+    v_counts    BIGINT[];
+BEGIN
+    -- import_reviews.py --fast applies the rating changes itself, once
+    IF current_setting('cholochitro.bulk_review_import', true) = 'on' THEN
+        RETURN NULL;
+    END IF;
+
+    -- Net change per movie: new rows add their rating, old rows remove it.
+    -- (Transition tables only exist for the event the trigger was created for.)
+    IF TG_OP = 'INSERT' THEN
+        SELECT array_agg(MediaID), array_agg(rating_sum), array_agg(review_count)
+        INTO v_media_ids, v_sums, v_counts
+        FROM (
+            SELECT MediaID, SUM(Rating) AS rating_sum, COUNT(*) AS review_count
+            FROM new_rows
+            WHERE MediaID IS NOT NULL
+            GROUP BY MediaID
+        ) d;
+    ELSIF TG_OP = 'DELETE' THEN
+        SELECT array_agg(MediaID), array_agg(rating_sum), array_agg(review_count)
+        INTO v_media_ids, v_sums, v_counts
+        FROM (
+            SELECT MediaID, -SUM(Rating) AS rating_sum, -COUNT(*) AS review_count
+            FROM old_rows
+            WHERE MediaID IS NOT NULL
+            GROUP BY MediaID
+        ) d;
+    ELSE
+        SELECT array_agg(MediaID), array_agg(rating_sum), array_agg(review_count)
+        INTO v_media_ids, v_sums, v_counts
+        FROM (
+            SELECT MediaID, SUM(rating) AS rating_sum, SUM(delta) AS review_count
+            FROM (
+                SELECT MediaID, Rating AS rating, 1 AS delta FROM new_rows
+                UNION ALL
+                SELECT MediaID, -Rating, -1 FROM old_rows
+            ) changes
+            WHERE MediaID IS NOT NULL
+            GROUP BY MediaID
+            -- Edits that don't touch the rating (text, helpful counts) are no-ops
+            HAVING SUM(rating) <> 0 OR SUM(delta) <> 0
+        ) d;
+    END IF;
+
+    IF v_media_ids IS NULL THEN
+        RETURN NULL;
+    END IF;
+
+    UPDATE Media m
+    SET Rating      = ROUND(((m.Rating * m.RatingCount) + d.rating_sum)::numeric
+                            / GREATEST(m.RatingCount + d.review_count, 1), 1),
+        RatingCount = GREATEST(m.RatingCount + d.review_count, 1)
+    FROM unnest(v_media_ids, v_sums, v_counts) AS d(MediaID, rating_sum, review_count)
+    WHERE m.MediaID = d.MediaID
+      AND m.MediaType = 'Movie';
+
+    RETURN NULL;  -- AFTER trigger: return value is ignored
+END;
+$$ LANGUAGE plpgsql;
+
+-- ═══════════════════════════════════════════════
+-- 2. Episode → Season → Series Rating Cascade
+-- ═══════════════════════════════════════════════
+
+CREATE OR REPLACE FUNCTION fn_cascade_episode_rating()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_media_ids   INT[];
+    v_season_nos  INT[];
+    v_episode_nos INT[];
+    v_sums        BIGINT[];
+    v_counts      BIGINT[];
+BEGIN
+    -- import_reviews.py --fast applies the rating changes itself, once
+    IF current_setting('cholochitro.bulk_review_import', true) = 'on' THEN
+        RETURN NULL;
+    END IF;
+
+    -- Step 1: Net change per episode touched by this statement
+    IF TG_OP = 'INSERT' THEN
+        SELECT array_agg(media_id), array_agg(season_no), array_agg(episode_no),
+               array_agg(rating_sum), array_agg(review_count)
+        INTO v_media_ids, v_season_nos, v_episode_nos, v_sums, v_counts
+        FROM (
+            SELECT EpisodeMediaID AS media_id, EpisodeSeasonNo AS season_no, EpisodeNo AS episode_no,
+                   SUM(Rating) AS rating_sum, COUNT(*) AS review_count
+            FROM new_rows
+            WHERE EpisodeMediaID IS NOT NULL
+            GROUP BY EpisodeMediaID, EpisodeSeasonNo, EpisodeNo
+        ) d;
+    ELSIF TG_OP = 'DELETE' THEN
+        SELECT array_agg(media_id), array_agg(season_no), array_agg(episode_no),
+               array_agg(rating_sum), array_agg(review_count)
+        INTO v_media_ids, v_season_nos, v_episode_nos, v_sums, v_counts
+        FROM (
+            SELECT EpisodeMediaID AS media_id, EpisodeSeasonNo AS season_no, EpisodeNo AS episode_no,
+                   -SUM(Rating) AS rating_sum, -COUNT(*) AS review_count
+            FROM old_rows
+            WHERE EpisodeMediaID IS NOT NULL
+            GROUP BY EpisodeMediaID, EpisodeSeasonNo, EpisodeNo
+        ) d;
+    ELSE
+        SELECT array_agg(media_id), array_agg(season_no), array_agg(episode_no),
+               array_agg(rating_sum), array_agg(review_count)
+        INTO v_media_ids, v_season_nos, v_episode_nos, v_sums, v_counts
+        FROM (
+            SELECT media_id, season_no, episode_no,
+                   SUM(rating) AS rating_sum, SUM(delta) AS review_count
+            FROM (
+                SELECT EpisodeMediaID AS media_id, EpisodeSeasonNo AS season_no, EpisodeNo AS episode_no,
+                       Rating AS rating, 1 AS delta
+                FROM new_rows
+                UNION ALL
+                SELECT EpisodeMediaID, EpisodeSeasonNo, EpisodeNo, -Rating, -1
+                FROM old_rows
+            ) changes
+            WHERE media_id IS NOT NULL
+            GROUP BY media_id, season_no, episode_no
+            HAVING SUM(rating) <> 0 OR SUM(delta) <> 0
+        ) d;
+    END IF;
+
+    -- Skip if this statement touched no episode ratings
+    IF v_media_ids IS NULL THEN
+        RETURN NULL;
+    END IF;
+
+    UPDATE Episode e
+    SET AvgRating   = ROUND(((e.AvgRating * e.RatingCount) + d.rating_sum)::numeric
+                            / GREATEST(e.RatingCount + d.review_count, 1), 1),
+        RatingCount = GREATEST(e.RatingCount + d.review_count, 1)
+    FROM unnest(v_media_ids, v_season_nos, v_episode_nos, v_sums, v_counts)
+         AS d(MediaID, SeasonNo, EpisodeNo, rating_sum, review_count)
+    WHERE e.MediaID   = d.MediaID
+      AND e.SeasonNo  = d.SeasonNo
+      AND e.EpisodeNo = d.EpisodeNo;
+
+    -- Steps 2-3: Season and series averages, now or (deferred mode) from
+    -- the dirty queue by fetchers/rating_worker.py. Deferred mode is on when
+    -- cholochitro.deferred_rating_cascade = 'on' (session or database setting).
+    IF COALESCE(current_setting('cholochitro.deferred_rating_cascade', true), '') = 'on' THEN
+        INSERT INTO Rating_Dirty_Seasons (MediaID, SeasonNo)
+        SELECT DISTINCT k.MediaID, k.SeasonNo
+        FROM unnest(v_media_ids, v_season_nos) AS k(MediaID, SeasonNo)
+        ORDER BY k.MediaID, k.SeasonNo
+        ON CONFLICT (MediaID, SeasonNo) DO UPDATE SET QueuedAt = CURRENT_TIMESTAMP;
+    ELSE
+        PERFORM fn_recompute_season_ratings(v_media_ids, v_season_nos);
+    END IF;
+
+    -- Step 4: Queue the shows' prebuilt season documents for a rebuild
+    -- (drained by fetchers/show_documents.py). DO UPDATE rather than DO
+    -- NOTHING: the row lock makes a concurrent rebuild wait for this commit.
+    INSERT INTO TVShow_Document_Dirty (MediaID)
+    SELECT DISTINCT media_id FROM unnest(v_media_ids) AS media_id
+    ORDER BY media_id
+    ON CONFLICT (MediaID) DO UPDATE SET QueuedAt = CURRENT_TIMESTAMP;
+
+    RETURN NULL;  -- AFTER trigger: return value is ignored
+END;
+$$ LANGUAGE plpgsql;
+
+-- ═══════════════════════════════════════════════
+-- 3. Review profanity filter (plpgsql/06_profanity_filter.sql)
+-- ═══════════════════════════════════════════════
+
+CREATE OR REPLACE FUNCTION fn_filter_review()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_found TEXT;
+BEGIN
+    -- import_reviews.py --fast checks the whole file set-wise before inserting
+    IF current_setting('cholochitro.bulk_review_import', true) = 'on' THEN
+        RETURN NEW;
+    END IF;
+
+    -- Skip profanity check if this is an UPDATE that didn't touch content
+    IF TG_OP = 'UPDATE'
+       AND NEW.ReviewText IS NOT DISTINCT FROM OLD.ReviewText THEN
+        RETURN NEW;
+    END IF;
+
+    v_found := fn_check_profanity(NEW.ReviewText);
+    IF v_found IS NOT NULL THEN
+        RAISE EXCEPTION 'Review contains inappropriate language: "%"', v_found;
+    END IF;
+
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMIT;
@@ -0,0 +1,5 @@
+-- Episode counts from TMDB /tv/{id}/aggregate_credits
+-- (TVseries_fetcher.py --aggregate-credits). NULL for movies and for shows
+-- ingested from /credits.
+
+ALTER TABLE Crew ADD COLUMN IF NOT EXISTS EpisodeCount INT;
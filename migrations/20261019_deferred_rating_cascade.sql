@@ -0,0 +1,156 @@
+-- Optional deferred season/series rating recomputation.
+-- With cholochitro.deferred_rating_cascade = 'on', an episode review only
+-- updates the episode and queues (MediaID, SeasonNo) in Rating_Dirty_Seasons;
+-- fetchers/rating_worker.py recomputes the queued seasons and their series
+-- in batches. Off (the default), the cascade is unchanged.
+--
+-- Enable for every connection with
+--   ALTER DATABASE <db> SET cholochitro.deferred_rating_cascade = 'on';
+-- and run the worker (python rating_worker.py --watch 2).
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS Rating_Dirty_Seasons (
+    MediaID INT NOT NULL,
+    SeasonNo INT NOT NULL,
+    QueuedAt TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (MediaID, SeasonNo),
+    FOREIGN KEY (MediaID, SeasonNo) REFERENCES Season(MediaID, SeasonNo) ON DELETE CASCADE
+);
+
+-- Steps 2-3 of the episode cascade for a set of (MediaID, SeasonNo) pairs
+-- (parallel arrays, duplicates allowed): each season once, then each series
+-- once. Called by fn_cascade_episode_rating, or by fetchers/rating_worker.py
+-- for seasons queued in Rating_Dirty_Seasons.
+CREATE OR REPLACE FUNCTION fn_recompute_season_ratings(p_media_ids INT[], p_season_nos INT[])
+RETURNS VOID AS $$
+BEGIN
+    -- Step 2: Recalculate each affected Season once (average of its episodes)
+    UPDATE Season s
+    SET AvgRating = sub.avg_r
+    FROM (
+        SELECT e.MediaID, e.SeasonNo, ROUND(AVG(e.AvgRating)::numeric, 1) AS avg_r
+        FROM Episode e
+        JOIN (
+            SELECT DISTINCT MediaID, SeasonNo
+            FROM unnest(p_media_ids, p_season_nos) AS k(MediaID, SeasonNo)
+        ) affected ON affected.MediaID = e.MediaID AND affected.SeasonNo = e.SeasonNo
+        GROUP BY e.MediaID, e.SeasonNo
+    ) sub
+    WHERE s.MediaID = sub.MediaID AND s.SeasonNo = sub.SeasonNo;
+
+    -- Step 3: Recalculate each affected Series once (average of season averages)
+    UPDATE Media m
+    SET Rating      = sub.avg_r,
+        RatingCount = sub.rating_count
+    FROM (
+        SELECT MediaID,
+               ROUND(AVG(season_avg)::numeric, 1) AS avg_r,
+               COALESCE(SUM(season_count), 0)::int AS rating_count
+        FROM (
+            SELECT MediaID, AVG(AvgRating) AS season_avg, SUM(RatingCount) AS season_count
+            FROM Episode
+            WHERE MediaID = ANY(p_media_ids)
+            GROUP BY MediaID, SeasonNo
+        ) per_season
+        GROUP BY MediaID
+    ) sub
+    WHERE m.MediaID = sub.MediaID AND m.MediaType = 'TVSeries';
+END;
+$$ LANGUAGE plpgsql;
+
+
+CREATE OR REPLACE FUNCTION fn_cascade_episode_rating()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_media_ids   INT[];
+    v_season_nos  INT[];
+    v_episode_nos INT[];
+    v_sums        BIGINT[];
+    v_counts      BIGINT[];
+BEGIN
+    -- Step 1: Net change per episode touched by this statement
+    IF TG_OP = 'INSERT' THEN
+        SELECT array_agg(media_id), array_agg(season_no), array_agg(episode_no),
+               array_agg(rating_sum), array_agg(review_count)
+        INTO v_media_ids, v_season_nos, v_episode_nos, v_sums, v_counts
+        FROM (
+            SELECT EpisodeMediaID AS media_id, EpisodeSeasonNo AS season_no, EpisodeNo AS episode_no,
+                   SUM(Rating) AS rating_sum, COUNT(*) AS review_count
+            FROM new_rows
+            WHERE EpisodeMediaID IS NOT NULL
+            GROUP BY EpisodeMediaID, EpisodeSeasonNo, EpisodeNo
+        ) d;
+    ELSIF TG_OP = 'DELETE' THEN
+        SELECT array_agg(media_id), array_agg(season_no), array_agg(episode_no),
+               array_agg(rating_sum), array_agg(review_count)
+        INTO v_media_ids, v_season_nos, v_episode_nos, v_sums, v_counts
+        FROM (
+            SELECT EpisodeMediaID AS media_id, EpisodeSeasonNo AS season_no, EpisodeNo AS episode_no,
+                   -SUM(Rating) AS rating_sum, -COUNT(*) AS review_count
+            FROM old_rows
+            WHERE EpisodeMediaID IS NOT NULL
+            GROUP BY EpisodeMediaID, EpisodeSeasonNo, EpisodeNo
+        ) d;
+    ELSE
+        SELECT array_agg(media_id), array_agg(season_no), array_agg(episode_no),
+               array_agg(rating_sum), array_agg(review_count)
+        INTO v_media_ids, v_season_nos, v_episode_nos, v_sums, v_counts
+        FROM (
+            SELECT media_id, season_no, episode_no,
+                   SUM(rating) AS rating_sum, SUM(delta) AS review_count
+            FROM (
+                SELECT EpisodeMediaID AS media_id, EpisodeSeasonNo AS season_no, EpisodeNo AS episode_no,
+                       Rating AS rating, 1 AS delta
+                FROM new_rows
+                UNION ALL
+                SELECT EpisodeMediaID, EpisodeSeasonNo, EpisodeNo, -Rating, -1
+                FROM old_rows
+            ) changes
+            WHERE media_id IS NOT NULL
+            GROUP BY media_id, season_no, episode_no
+            HAVING SUM(rating) <> 0 OR SUM(delta) <> 0
+        ) d;
+    END IF;
+
+    -- Skip if this statement touched no episode ratings
+    IF v_media_ids IS NULL THEN
+        RETURN NULL;
+    END IF;
+
+    UPDATE Episode e
+    SET AvgRating   = ROUND(((e.AvgRating * e.RatingCount) + d.rating_sum)::numeric
+                            / GREATEST(e.RatingCount + d.review_count, 1), 1),
+        RatingCount = GREATEST(e.RatingCount + d.review_count, 1)
+    FROM unnest(v_media_ids, v_season_nos, v_episode_nos, v_sums, v_counts)
+         AS d(MediaID, SeasonNo, EpisodeNo, rating_sum, review_count)
+    WHERE e.MediaID   = d.MediaID
+      AND e.SeasonNo  = d.SeasonNo
+      AND e.EpisodeNo = d.EpisodeNo;
+
+    -- Steps 2-3: Season and series averages, now or (deferred mode) from
+    -- the dirty queue by fetchers/rating_worker.py. Deferred mode is on when
+    -- cholochitro.deferred_rating_cascade = 'on' (session or database setting).
+    IF COALESCE(current_setting('cholochitro.deferred_rating_cascade', true), '') = 'on' THEN
+        INSERT INTO Rating_Dirty_Seasons (MediaID, SeasonNo)
+        SELECT DISTINCT k.MediaID, k.SeasonNo
+        FROM unnest(v_media_ids, v_season_nos) AS k(MediaID, SeasonNo)
+        ORDER BY k.MediaID, k.SeasonNo
+        ON CONFLICT (MediaID, SeasonNo) DO UPDATE SET QueuedAt = CURRENT_TIMESTAMP;
+    ELSE
+        PERFORM fn_recompute_season_ratings(v_media_ids, v_season_nos);
+    END IF;
+
+    -- Step 4: Queue the shows' prebuilt season documents for a rebuild
+    -- (drained by fetchers/show_documents.py). DO UPDATE rather than DO
+    -- NOTHING: the row lock makes a concurrent rebuild wait for this commit.
+    INSERT INTO TVShow_Document_Dirty (MediaID)
+    SELECT DISTINCT media_id FROM unnest(v_media_ids) AS media_id
+    ORDER BY media_id
+    ON CONFLICT (MediaID) DO UPDATE SET QueuedAt = CURRENT_TIMESTAMP;
+
+    RETURN NULL;  -- AFTER trigger: return value is ignored
+END;
+$$ LANGUAGE plpgsql;
+
+COMMIT;
@@ -0,0 +1,20 @@
+-- Local mirror of TMDB images. fetchers/image_mirror.py downloads every
+-- referenced Poster / StillPath / Picture / LogoURL in the configured sizes
+-- into a content-addressed directory (<sha[:2]>/<sha[2:4]>/<sha>.<ext>) and
+-- records one row per (TMDB path, size). Identical images share one file.
+-- server.js serves the directory under /images/<LocalPath>.
+
+CREATE TABLE IF NOT EXISTS Image_Asset (
+    TmdbPath VARCHAR(512),
+    Size VARCHAR(16),
+    Sha256 CHAR(64) NOT NULL,
+    LocalPath VARCHAR(512) NOT NULL,
+    Bytes INT NOT NULL,
+    ContentType VARCHAR(50),
+    FetchedAt TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    LastUsedAt TIMESTAMP DEFAULT CURRENT_TIMESTAMP, -- bumped while still referenced; LRU eviction
+    PRIMARY KEY (TmdbPath, Size)
+);
+
+-- Eviction deletes every row sharing an evicted blob
+CREATE INDEX IF NOT EXISTS idx_image_asset_sha ON Image_Asset(Sha256);
@@ -0,0 +1,13 @@
+-- Responsive thumbnails for list pages. fetchers/image_thumbnails.py cuts
+-- WebP thumbnails from the mirrored images (image_mirror.py) and stores
+-- {"w<width>": LocalPath} plus a tiny data: URI placeholder (LQIP) on
+-- every row referencing the image. server.js serves LocalPath under /images.
+
+ALTER TABLE Media ADD COLUMN IF NOT EXISTS PosterThumbs JSONB;
+ALTER TABLE Media ADD COLUMN IF NOT EXISTS PosterLQIP TEXT;
+
+ALTER TABLE Episode ADD COLUMN IF NOT EXISTS StillThumbs JSONB;
+ALTER TABLE Episode ADD COLUMN IF NOT EXISTS StillLQIP TEXT;
+
+ALTER TABLE Person ADD COLUMN IF NOT EXISTS PictureThumbs JSONB;
+ALTER TABLE Person ADD COLUMN IF NOT EXISTS PictureLQIP TEXT;
@@ -0,0 +1,24 @@
+-- Index pack for the server's and fetchers' query shapes. Until now only the
+-- vote tables had secondary indexes, so title pages, listings, FK checks and
+-- cascade deletes scanned whole tables. Crew(PersonID, ...) is already
+-- covered by the Crew primary key.
+-- Plans before/after: python fetchers/explain_queries.py
+
+-- Catalogue lookups by title (cast/crew, genres, studios) and the FK
+-- checks / ON DELETE CASCADE scans when a Media row is removed
+CREATE INDEX IF NOT EXISTS idx_crew_media_role ON Crew(MediaID, CrewRole);
+CREATE INDEX IF NOT EXISTS idx_media_genre_genre ON Media_Genre(GenreID);
+CREATE INDEX IF NOT EXISTS idx_production_media ON Production(MediaID);
+CREATE INDEX IF NOT EXISTS idx_list_items_media ON List_Items(MediaID);
+-- /movies and /tvshows listings (default sort, year filter)
+CREATE INDEX IF NOT EXISTS idx_media_type_rating ON Media(MediaType, Rating DESC NULLS LAST);
+CREATE INDEX IF NOT EXISTS idx_media_release_year ON Media(ReleaseYear);
+-- Review pages (newest first) and per-user deletes (sp_delete_user)
+CREATE INDEX IF NOT EXISTS idx_review_media_postdate ON Review(MediaID, PostDate DESC);
+CREATE INDEX IF NOT EXISTS idx_review_episode_postdate ON Review(EpisodeMediaID, EpisodeSeasonNo, EpisodeNo, PostDate DESC);
+CREATE INDEX IF NOT EXISTS idx_review_user ON Review(UserID);
+-- Blog feed, comment threads and per-user deletes
+CREATE INDEX IF NOT EXISTS idx_blog_postdate ON Blog(PostDate DESC);
+CREATE INDEX IF NOT EXISTS idx_blog_user ON Blog(UserID);
+CREATE INDEX IF NOT EXISTS idx_comments_blog_postdate ON Comments(BlogID, PostDate);
+CREATE INDEX IF NOT EXISTS idx_comments_user ON Comments(UserID);
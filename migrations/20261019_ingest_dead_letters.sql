@@ -0,0 +1,19 @@
+-- Dead-letter list for the TMDB client (fetchers/tmdb_client.py). Titles
+-- that still fail after the client's retries (5xx, 429, timeouts) or fail
+-- to insert are recorded here instead of being dropped;
+-- fetchers/dead_letters.py lists and retries them.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS Ingest_Dead_Letter (
+    MediaType VARCHAR(10) NOT NULL CHECK (MediaType IN ('movie', 'tv')),
+    TmdbID INT NOT NULL,
+    Error TEXT,
+    Source VARCHAR(50),
+    Failures INT NOT NULL DEFAULT 1,
+    FirstFailedAt TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    LastFailedAt TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (MediaType, TmdbID)
+);
+
+COMMIT;
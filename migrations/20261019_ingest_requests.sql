@@ -0,0 +1,64 @@
+-- On-demand single-title ingestion (fetchers/ingest_service.py).
+-- fn_request_ingest queues a title in Ingest_Request (duplicates coalesce
+-- into one row) and NOTIFYs ingest_request; the long-running service
+-- LISTENs, claims requests with FOR UPDATE SKIP LOCKED and ingests them
+-- over warm DB / HTTP connections.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS Ingest_Request (
+    MediaType VARCHAR(10) NOT NULL CHECK (MediaType IN ('movie', 'tv')),
+    TmdbID INT NOT NULL,
+    Status VARCHAR(10) NOT NULL DEFAULT 'pending' CHECK (Status IN ('pending', 'running', 'done', 'failed')),
+    RequestCount INT NOT NULL DEFAULT 1,
+    Source VARCHAR(50),
+    RequestedAt TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    LastRequestedAt TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    RetryAt TIMESTAMP,
+    ClaimedBy VARCHAR(100),
+    ClaimedAt TIMESTAMP,
+    Attempts INT NOT NULL DEFAULT 0,
+    FinishedAt TIMESTAMP,
+    Error TEXT,
+    PRIMARY KEY (MediaType, TmdbID)
+);
+
+CREATE INDEX IF NOT EXISTS idx_ingest_request_queue ON Ingest_Request(Status, RequestedAt);
+
+-- Ask fetchers/ingest_service.py for a title. Returns 'exists' (already in
+-- Media), 'queued' (a new request, announced on the ingest_request channel)
+-- or 'coalesced' (already queued or being ingested: only RequestCount
+-- grows). Finished or failed requests for a title still missing are queued
+-- again. The NOTIFY is delivered when the caller commits.
+CREATE OR REPLACE FUNCTION fn_request_ingest(p_media_type TEXT, p_tmdb_id INT, p_source TEXT DEFAULT NULL)
+RETURNS TEXT AS $$
+DECLARE
+    v_now    TIMESTAMP := clock_timestamp();
+    v_queued BOOLEAN;
+BEGIN
+    IF EXISTS (SELECT 1 FROM Media WHERE MediaID = p_tmdb_id) THEN
+        RETURN 'exists';
+    END IF;
+
+    INSERT INTO Ingest_Request AS r (MediaType, TmdbID, Source, RequestedAt, LastRequestedAt)
+    VALUES (p_media_type, p_tmdb_id, p_source, v_now, v_now)
+    ON CONFLICT (MediaType, TmdbID) DO UPDATE
+    SET RequestCount = r.RequestCount + 1,
+        LastRequestedAt = v_now,
+        Status      = CASE WHEN r.Status IN ('pending', 'running') THEN r.Status ELSE 'pending' END,
+        RequestedAt = CASE WHEN r.Status IN ('pending', 'running') THEN r.RequestedAt ELSE v_now END,
+        RetryAt     = CASE WHEN r.Status IN ('pending', 'running') THEN r.RetryAt END,
+        Attempts    = CASE WHEN r.Status IN ('pending', 'running') THEN r.Attempts ELSE 0 END,
+        Error       = CASE WHEN r.Status IN ('pending', 'running') THEN r.Error END
+    RETURNING r.RequestedAt = v_now INTO v_queued;
+
+    IF NOT v_queued THEN
+        RETURN 'coalesced';
+    END IF;
+
+    PERFORM pg_notify('ingest_request', p_media_type || ' ' || p_tmdb_id);
+    RETURN 'queued';
+END;
+$$ LANGUAGE plpgsql;
+
+COMMIT;
@@ -0,0 +1,76 @@
+-- Coordinator / worker ingestion (fetchers/sharded_ingest.py).
+-- `plan` splits TMDB IDs into Ingest_Shard rows; `work` processes (any
+-- number of processes, on any number of machines) claim shards with
+-- FOR UPDATE SKIP LOCKED and share one TMDB request budget through
+-- Ingest_Rate_Budget / fn_take_rate_tokens.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS Ingest_Shard (
+    ShardID SERIAL PRIMARY KEY,
+    RunName VARCHAR(100) NOT NULL,
+    MediaType VARCHAR(10) NOT NULL CHECK (MediaType IN ('movie', 'tv')),
+    TmdbIDs INT[] NOT NULL,
+    Position INT NOT NULL DEFAULT 0, -- TmdbIDs[1..Position] are finished
+    Status VARCHAR(10) NOT NULL DEFAULT 'pending' CHECK (Status IN ('pending', 'running', 'done')),
+    ClaimedBy VARCHAR(100),
+    HeartbeatAt TIMESTAMP,
+    Attempts INT NOT NULL DEFAULT 0,
+    Ingested INT NOT NULL DEFAULT 0,
+    Skipped INT NOT NULL DEFAULT 0,
+    FailedIDs INT[] NOT NULL DEFAULT '{}',
+    FinishedAt TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_ingest_shard_claim ON Ingest_Shard(RunName, Status, ShardID);
+
+CREATE TABLE IF NOT EXISTS Ingest_Rate_Budget (
+    Name VARCHAR(50) PRIMARY KEY,
+    Tokens DOUBLE PRECISION NOT NULL,
+    Capacity DOUBLE PRECISION NOT NULL,
+    RefillPerSec DOUBLE PRECISION NOT NULL CHECK (RefillPerSec > 0),
+    UpdatedAt TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Take p_tokens from a shared token bucket (Ingest_Rate_Budget). Returns 0
+-- when granted, otherwise the seconds to wait before asking again; nothing
+-- is taken then. Unknown buckets are unlimited; asking for more than the
+-- bucket's Capacity is an error (it could never be granted). Run it in its
+-- own short transaction: the bucket row is locked until commit.
+CREATE OR REPLACE FUNCTION fn_take_rate_tokens(p_name TEXT, p_tokens DOUBLE PRECISION)
+RETURNS DOUBLE PRECISION AS $$
+DECLARE
+    v_now       TIMESTAMP := clock_timestamp();
+    v_available DOUBLE PRECISION;
+    v_rate      DOUBLE PRECISION;
+    v_capacity  DOUBLE PRECISION;
+BEGIN
+    SELECT LEAST(Capacity, Tokens + EXTRACT(EPOCH FROM v_now - UpdatedAt) * RefillPerSec),
+           RefillPerSec, Capacity
+    INTO v_available, v_rate, v_capacity
+    FROM Ingest_Rate_Budget
+    WHERE Name = p_name
+    FOR UPDATE;
+
+    IF NOT FOUND THEN
+        RETURN 0;
+    END IF;
+
+    IF p_tokens > v_capacity THEN
+        RAISE EXCEPTION 'Cannot take % tokens from rate budget "%": its capacity is %',
+            p_tokens, p_name, v_capacity;
+    END IF;
+
+    IF v_available < p_tokens THEN
+        RETURN (p_tokens - v_available) / v_rate;
+    END IF;
+
+    UPDATE Ingest_Rate_Budget
+    SET Tokens = v_available - p_tokens,
+        UpdatedAt = v_now
+    WHERE Name = p_name;
+    RETURN 0;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMIT;
@@ -0,0 +1,15 @@
+-- Detail-page view counts. server.js increments a row each time /movies/:id
+-- or /tvshows/:id is served; fetchers/hydrate_credits.py fetches the full
+-- cast only for the most viewed titles and stamps CreditsHydratedAt.
+
+CREATE TABLE IF NOT EXISTS Media_Hits (
+    MediaID INT PRIMARY KEY,
+    HitCount BIGINT NOT NULL DEFAULT 0,
+    LastHitAt TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    CreditsHydratedAt TIMESTAMP, -- NULL until full credits are stored
+    FOREIGN KEY (MediaID) REFERENCES Media(MediaID) ON DELETE CASCADE
+);
+
+-- Hydration candidates: most viewed titles still on top-N credits
+CREATE INDEX IF NOT EXISTS idx_media_hits_unhydrated
+ON Media_Hits(HitCount DESC) WHERE CreditsHydratedAt IS NULL;
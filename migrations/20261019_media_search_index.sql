@@ -0,0 +1,38 @@
+-- Full-text + trigram search for /search. trg_media_search_vector keeps
+-- SearchVector in step with Title and Description; existing rows are filled by
+--   python fetchers/search_index.py backfill
+-- The pg_trgm indexes serve the ILIKE '%q%' title/description matches.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+ALTER TABLE Media
+ADD COLUMN IF NOT EXISTS SearchVector TSVECTOR;
+
+-- Weighted search document for a Media row: Title (A) ranks above
+-- Description (B). IMMUTABLE (fixed 'english' config) so it can be used
+-- at insert time by the fetchers and in index expressions.
+CREATE OR REPLACE FUNCTION fn_media_search_vector(p_title TEXT, p_description TEXT)
+RETURNS TSVECTOR AS $$
+    SELECT setweight(to_tsvector('english'::regconfig, COALESCE(p_title, '')), 'A')
+        || setweight(to_tsvector('english'::regconfig, COALESCE(p_description, '')), 'B');
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Keep Media.SearchVector in step with Title and Description, whoever
+-- writes the row (the fetchers also set it, but edits would not)
+CREATE OR REPLACE FUNCTION fn_set_media_search_vector()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.SearchVector := fn_media_search_vector(NEW.Title, NEW.Description);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_media_search_vector ON Media;
+CREATE TRIGGER trg_media_search_vector
+BEFORE INSERT OR UPDATE OF Title, Description ON Media
+FOR EACH ROW
+EXECUTE FUNCTION fn_set_media_search_vector();
+
+CREATE INDEX IF NOT EXISTS idx_media_search_vector ON Media USING GIN (SearchVector);
+CREATE INDEX IF NOT EXISTS idx_media_title_trgm ON Media USING GIN (Title gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_media_description_trgm ON Media USING GIN (Description gin_trgm_ops);
@@ -0,0 +1,42 @@
+-- Accent-folded person name with a trigram index for /persons/search.
+-- Existing rows are filled here and a trigger keeps SearchName in step with
+-- FullName from then on. On a very large Person table, deploy the column and
+-- trigger first and fill it in batches with
+--   python fetchers/person_search.py backfill
+
+CREATE EXTENSION IF NOT EXISTS unaccent;
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+ALTER TABLE Person
+ADD COLUMN IF NOT EXISTS SearchName VARCHAR(255);
+
+-- Search key for person names: accents stripped, lower-cased, whitespace
+-- collapsed ("Zoë  Saldaña" → "zoe saldana"). unaccent() itself is only
+-- STABLE, so it is called with an explicit dictionary to allow IMMUTABLE
+-- (needed to use it at insert time and in index expressions).
+CREATE OR REPLACE FUNCTION fn_fold_name(p_name TEXT)
+RETURNS TEXT AS $$
+    SELECT lower(regexp_replace(btrim(public.unaccent('public.unaccent'::regdictionary, p_name)),
+                                '\s+', ' ', 'g'));
+$$ LANGUAGE sql IMMUTABLE STRICT;
+
+CREATE INDEX IF NOT EXISTS idx_person_search_name_trgm ON Person USING GIN (SearchName gin_trgm_ops);
+
+-- Keep Person.SearchName in step with FullName, whoever writes the row
+-- (the fetchers also set it, but renames and manual inserts would not)
+CREATE OR REPLACE FUNCTION fn_set_person_search_name()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.SearchName := fn_fold_name(NEW.FullName);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_person_search_name ON Person;
+CREATE TRIGGER trg_person_search_name
+BEFORE INSERT OR UPDATE OF FullName ON Person
+FOR EACH ROW
+EXECUTE FUNCTION fn_set_person_search_name();
+
+-- Backfill: /persons/search filters on SearchName only
+UPDATE Person SET SearchName = fn_fold_name(FullName) WHERE SearchName IS NULL;
@@ -0,0 +1,56 @@
+-- Replace the per-word LIKE scan in fn_check_profanity with one regex
+-- alternation of all banned words, compiled into Banned_Words_Pattern and
+-- rebuilt by a statement trigger whenever Banned_Words changes.
+
+CREATE TABLE IF NOT EXISTS Banned_Words_Pattern (
+    ID BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (ID),
+    Pattern TEXT            -- NULL when there are no banned words
+);
+
+CREATE OR REPLACE FUNCTION fn_rebuild_profanity_pattern()
+RETURNS VOID AS $$
+BEGIN
+    INSERT INTO Banned_Words_Pattern (ID, Pattern)
+    SELECT TRUE,
+           -- Escape regex metacharacters so every word matches literally
+           string_agg(regexp_replace(LOWER(Word), '([.^$*+?()\[\]{}|\\])', '\\\1', 'g'), '|')
+    FROM Banned_Words
+    ON CONFLICT (ID) DO UPDATE SET Pattern = EXCLUDED.Pattern;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION fn_banned_words_changed()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM fn_rebuild_profanity_pattern();
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Single regex scan instead of one LIKE per banned word
+CREATE OR REPLACE FUNCTION fn_check_profanity(p_text TEXT)
+RETURNS TEXT AS $$
+DECLARE
+    v_pattern TEXT;
+BEGIN
+    IF p_text IS NULL THEN
+        RETURN NULL;
+    END IF;
+
+    SELECT Pattern INTO v_pattern FROM Banned_Words_Pattern;
+    IF v_pattern IS NULL THEN
+        RETURN NULL;
+    END IF;
+
+    -- substring() returns the matched banned word, or NULL if none matched
+    RETURN substring(LOWER(p_text) FROM v_pattern);
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_banned_words_changed ON Banned_Words;
+CREATE TRIGGER trg_banned_words_changed
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON Banned_Words
+FOR EACH STATEMENT
+EXECUTE FUNCTION fn_banned_words_changed();
+
+SELECT fn_rebuild_profanity_pattern();
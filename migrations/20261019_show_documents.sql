@@ -0,0 +1,247 @@
+-- Prebuilt per-show season/episode documents. /tvshows/:id/seasons used to
+-- run five queries (show, seasons, episodes, two rating aggregates) on every
+-- request; it now reads one JSONB row from TVShow_Document and only falls
+-- back to the live queries while the show is queued in TVShow_Document_Dirty.
+--
+-- The fetchers rebuild the documents of the shows they write; rating
+-- changes queue the show from fn_cascade_episode_rating, and
+-- fetchers/show_documents.py drains the queue.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS TVShow_Document (
+    MediaID INT PRIMARY KEY,
+    Document JSONB NOT NULL,
+    BuiltAt TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (MediaID) REFERENCES TVSeries(MediaID) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS TVShow_Document_Dirty (
+    MediaID INT PRIMARY KEY,
+    QueuedAt TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (MediaID) REFERENCES TVSeries(MediaID) ON DELETE CASCADE
+);
+
+-- ═══════════════════════════════════════════════
+-- 1. Document builder + refresh (plpgsql/05_utilities.sql)
+-- ═══════════════════════════════════════════════
+
+-- Prebuilt /tvshows/:id/seasons payload: the show, its seasons with their
+-- episodes, and the per-season / per-show rating aggregates, in the same
+-- shape server.js returns when it queries the tables directly.
+CREATE OR REPLACE FUNCTION fn_build_show_document(p_media_id INT)
+RETURNS JSONB AS $$
+    WITH per_season AS (
+        SELECT SeasonNo,
+               AVG(AvgRating) AS season_avg,
+               COALESCE(SUM(RatingCount), 0)::int AS rating_count,
+               jsonb_agg(jsonb_build_object(
+                   'seasonno', SeasonNo,
+                   'episodeno', EpisodeNo,
+                   'episodetitle', EpisodeTitle,
+                   'description', Description,
+                   'duration', Duration,
+                   'avgrating', AvgRating,
+                   'stillpath', StillPath
+               ) ORDER BY EpisodeNo) AS episodes
+        FROM Episode
+        WHERE MediaID = p_media_id
+        GROUP BY SeasonNo
+    ),
+    totals AS (
+        SELECT ROUND(AVG(season_avg)::numeric, 1) AS series_rating,
+               SUM(rating_count)::int AS series_rating_count
+        FROM per_season
+    )
+    SELECT jsonb_build_object(
+        'mediaid', m.MediaID,
+        'title', m.Title,
+        'releaseyear', m.ReleaseYear,
+        'description', m.Description,
+        'rating', r.rating,
+        'ratingcount', r.rating_count,
+        'poster', m.Poster,
+        'languagename', m.LanguageName,
+        'isongoing', tv.IsOngoing,
+        'numberofseasons', tv.NumberOfSeasons,
+        'websiteRating', r.rating,
+        'reviewCount', r.rating_count,
+        'seasons', COALESCE((
+            SELECT jsonb_agg(jsonb_build_object(
+                'seasonno', s.SeasonNo,
+                'seasontitle', s.SeasonTitle,
+                'releasedate', s.ReleaseDate,
+                'description', s.Description,
+                'avgrating', s.AvgRating,
+                'trailerlink', s.TrailerLink,
+                'episodecount', s.EpisodeCount,
+                'websiteSeasonRating', ROUND(ps.season_avg::numeric, 1),
+                'seasonReviewCount', COALESCE(ps.rating_count, 0),
+                'episodes', COALESCE(ps.episodes, '[]'::jsonb)
+            ) ORDER BY s.SeasonNo)
+            FROM Season s
+            LEFT JOIN per_season ps ON ps.SeasonNo = s.SeasonNo
+            WHERE s.MediaID = p_media_id
+        ), '[]'::jsonb)
+    )
+    FROM Media m
+    JOIN TVSeries tv ON tv.MediaID = m.MediaID
+    CROSS JOIN totals t
+    CROSS JOIN LATERAL (
+        SELECT COALESCE(t.series_rating, m.Rating) AS rating,
+               COALESCE(NULLIF(t.series_rating_count, 0), m.RatingCount, 0) AS rating_count
+    ) r
+    WHERE m.MediaID = p_media_id;
+$$ LANGUAGE sql STABLE;
+
+
+-- (Re)build TVShow_Document for the given shows and take them off the
+-- dirty queue; returns the number of documents written. Called by the
+-- fetchers for the shows they wrote and by fetchers/show_documents.py for
+-- shows queued by the rating cascade.
+CREATE OR REPLACE FUNCTION fn_refresh_show_documents(p_media_ids INT[])
+RETURNS INT AS $$
+DECLARE
+    v_rows INT;
+BEGIN
+    -- Dequeue before building: a rating change committed after this DELETE
+    -- is visible to the INSERT below, or queues the show again
+    DELETE FROM TVShow_Document_Dirty WHERE MediaID = ANY(p_media_ids);
+
+    INSERT INTO TVShow_Document (MediaID, Document, BuiltAt)
+    SELECT tv.MediaID, fn_build_show_document(tv.MediaID), CURRENT_TIMESTAMP
+    FROM TVSeries tv
+    WHERE tv.MediaID = ANY(p_media_ids)
+    ON CONFLICT (MediaID) DO UPDATE
+    SET Document = EXCLUDED.Document,
+        BuiltAt  = EXCLUDED.BuiltAt;
+
+    GET DIAGNOSTICS v_rows = ROW_COUNT;
+    RETURN v_rows;
+END;
+$$ LANGUAGE plpgsql;
+
+-- ═══════════════════════════════════════════════
+-- 2. Episode rating cascade now queues the show's document
+-- (plpgsql/01_rating_functions.sql)
+-- ═══════════════════════════════════════════════
+
+CREATE OR REPLACE FUNCTION fn_cascade_episode_rating()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_media_ids   INT[];
+    v_season_nos  INT[];
+    v_episode_nos INT[];
+    v_sums        BIGINT[];
+    v_counts      BIGINT[];
+BEGIN
+    -- Step 1: Net change per episode touched by this statement
+    IF TG_OP = 'INSERT' THEN
+        SELECT array_agg(media_id), array_agg(season_no), array_agg(episode_no),
+               array_agg(rating_sum), array_agg(review_count)
+        INTO v_media_ids, v_season_nos, v_episode_nos, v_sums, v_counts
+        FROM (
+            SELECT EpisodeMediaID AS media_id, EpisodeSeasonNo AS season_no, EpisodeNo AS episode_no,
+                   SUM(Rating) AS rating_sum, COUNT(*) AS review_count
+            FROM new_rows
+            WHERE EpisodeMediaID IS NOT NULL
+            GROUP BY EpisodeMediaID, EpisodeSeasonNo, EpisodeNo
+        ) d;
+    ELSIF TG_OP = 'DELETE' THEN
+        SELECT array_agg(media_id), array_agg(season_no), array_agg(episode_no),
+               array_agg(rating_sum), array_agg(review_count)
+        INTO v_media_ids, v_season_nos, v_episode_nos, v_sums, v_counts
+        FROM (
+            SELECT EpisodeMediaID AS media_id, EpisodeSeasonNo AS season_no, EpisodeNo AS episode_no,
+                   -SUM(Rating) AS rating_sum, -COUNT(*) AS review_count
+            FROM old_rows
+            WHERE EpisodeMediaID IS NOT NULL
+            GROUP BY EpisodeMediaID, EpisodeSeasonNo, EpisodeNo
+        ) d;
+    ELSE
+        SELECT array_agg(media_id), array_agg(season_no), array_agg(episode_no),
+               array_agg(rating_sum), array_agg(review_count)
+        INTO v_media_ids, v_season_nos, v_episode_nos, v_sums, v_counts
+        FROM (
+            SELECT media_id, season_no, episode_no,
+                   SUM(rating) AS rating_sum, SUM(delta) AS review_count
+            FROM (
+                SELECT EpisodeMediaID AS media_id, EpisodeSeasonNo AS season_no, EpisodeNo AS episode_no,
+                       Rating AS rating, 1 AS delta
+                FROM new_rows
+                UNION ALL
+                SELECT EpisodeMediaID, EpisodeSeasonNo, EpisodeNo, -Rating, -1
+                FROM old_rows
+            ) changes
+            WHERE media_id IS NOT NULL
+            GROUP BY media_id, season_no, episode_no
+            HAVING SUM(rating) <> 0 OR SUM(delta) <> 0
+        ) d;
+    END IF;
+
+    -- Skip if this statement touched no episode ratings
+    IF v_media_ids IS NULL THEN
+        RETURN NULL;
+    END IF;
+
+    UPDATE Episode e
+    SET AvgRating   = ROUND(((e.AvgRating * e.RatingCount) + d.rating_sum)::numeric
+                            / GREATEST(e.RatingCount + d.review_count, 1), 1),
+        RatingCount = GREATEST(e.RatingCount + d.review_count, 1)
+    FROM unnest(v_media_ids, v_season_nos, v_episode_nos, v_sums, v_counts)
+         AS d(MediaID, SeasonNo, EpisodeNo, rating_sum, review_count)
+    WHERE e.MediaID   = d.MediaID
+      AND e.SeasonNo  = d.SeasonNo
+      AND e.EpisodeNo = d.EpisodeNo;
+
+    -- Step 2: Recalculate each affected Season once (average of its episodes)
+    UPDATE Season s
+    SET AvgRating = sub.avg_r
+    FROM (
+        SELECT e.MediaID, e.SeasonNo, ROUND(AVG(e.AvgRating)::numeric, 1) AS avg_r
+        FROM Episode e
+        JOIN (
+            SELECT DISTINCT MediaID, SeasonNo
+            FROM unnest(v_media_ids, v_season_nos) AS k(MediaID, SeasonNo)
+        ) affected ON affected.MediaID = e.MediaID AND affected.SeasonNo = e.SeasonNo
+        GROUP BY e.MediaID, e.SeasonNo
+    ) sub
+    WHERE s.MediaID = sub.MediaID AND s.SeasonNo = sub.SeasonNo;
+
+    -- Step 3: Recalculate each affected Series once (average of season averages)
+    UPDATE Media m
+    SET Rating      = sub.avg_r,
+        RatingCount = sub.rating_count
+    FROM (
+        SELECT MediaID,
+               ROUND(AVG(season_avg)::numeric, 1) AS avg_r,
+               COALESCE(SUM(season_count), 0)::int AS rating_count
+        FROM (
+            SELECT MediaID, AVG(AvgRating) AS season_avg, SUM(RatingCount) AS season_count
+            FROM Episode
+            WHERE MediaID = ANY(v_media_ids)
+            GROUP BY MediaID, SeasonNo
+        ) per_season
+        GROUP BY MediaID
+    ) sub
+    WHERE m.MediaID = sub.MediaID AND m.MediaType = 'TVSeries';
+
+    -- Step 4: Queue the shows' prebuilt season documents for a rebuild
+    -- (drained by fetchers/show_documents.py). DO UPDATE rather than DO
+    -- NOTHING: the row lock makes a concurrent rebuild wait for this commit.
+    INSERT INTO TVShow_Document_Dirty (MediaID)
+    SELECT DISTINCT media_id FROM unnest(v_media_ids) AS media_id
+    ORDER BY media_id
+    ON CONFLICT (MediaID) DO UPDATE SET QueuedAt = CURRENT_TIMESTAMP;
+
+    RETURN NULL;  -- AFTER trigger: return value is ignored
+END;
+$$ LANGUAGE plpgsql;
+
+-- ═══════════════════════════════════════════════
+-- 3. Initial build
+-- ═══════════════════════════════════════════════
+
+SELECT fn_refresh_show_documents(ARRAY(SELECT MediaID FROM TVSeries));
+
+COMMIT;
@@ -0,0 +1,222 @@
+-- Replace the row-level rating triggers with statement-level ones.
+-- Each statement on Review now recalculates every affected movie, episode,
+-- season and series exactly once (bulk imports, sp_delete_user).
+-- No schema changes required.
+
+BEGIN;
+
+DROP TRIGGER IF EXISTS trg_refresh_movie_rating ON Review;
+DROP TRIGGER IF EXISTS trg_cascade_episode_rating ON Review;
+
+-- ═══════════════════════════════════════════════
+-- 1. Movie Rating
+-- Fires on Review INSERT/UPDATE/DELETE for Movie reviews
+-- ═══════════════════════════════════════════════
+
+CREATE OR REPLACE FUNCTION fn_refresh_movie_rating()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_media_ids INT[];
+    v_sums      BIGINT[];
+    v_counts    BIGINT[];
+BEGIN
+    -- Net change per movie: new rows add their rating, old rows remove it.
+    -- (Transition tables only exist for the event the trigger was created for.)
+    IF TG_OP = 'INSERT' THEN
+        SELECT array_agg(MediaID), array_agg(rating_sum), array_agg(review_count)
+        INTO v_media_ids, v_sums, v_counts
+        FROM (
+            SELECT MediaID, SUM(Rating) AS rating_sum, COUNT(*) AS review_count
+            FROM new_rows
+            WHERE MediaID IS NOT NULL
+            GROUP BY MediaID
+        ) d;
+    ELSIF TG_OP = 'DELETE' THEN
+        SELECT array_agg(MediaID), array_agg(rating_sum), array_agg(review_count)
+        INTO v_media_ids, v_sums, v_counts
+        FROM (
+            SELECT MediaID, -SUM(Rating) AS rating_sum, -COUNT(*) AS review_count
+            FROM old_rows
+            WHERE MediaID IS NOT NULL
+            GROUP BY MediaID
+        ) d;
+    ELSE
+        SELECT array_agg(MediaID), array_agg(rating_sum), array_agg(review_count)
+        INTO v_media_ids, v_sums, v_counts
+        FROM (
+            SELECT MediaID, SUM(rating) AS rating_sum, SUM(delta) AS review_count
+            FROM (
+                SELECT MediaID, Rating AS rating, 1 AS delta FROM new_rows
+                UNION ALL
+                SELECT MediaID, -Rating, -1 FROM old_rows
+            ) changes
+            WHERE MediaID IS NOT NULL
+            GROUP BY MediaID
+            -- Edits that don't touch the rating (text, helpful counts) are no-ops
+            HAVING SUM(rating) <> 0 OR SUM(delta) <> 0
+        ) d;
+    END IF;
+
+    IF v_media_ids IS NULL THEN
+        RETURN NULL;
+    END IF;
+
+    UPDATE Media m
+    SET Rating      = ROUND(((m.Rating * m.RatingCount) + d.rating_sum)::numeric
+                            / GREATEST(m.RatingCount + d.review_count, 1), 1),
+        RatingCount = GREATEST(m.RatingCount + d.review_count, 1)
+    FROM unnest(v_media_ids, v_sums, v_counts) AS d(MediaID, rating_sum, review_count)
+    WHERE m.MediaID = d.MediaID
+      AND m.MediaType = 'Movie';
+
+    RETURN NULL;  -- AFTER trigger: return value is ignored
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- ═══════════════════════════════════════════════
+-- 2. Episode → Season → Series Rating Cascade
+-- Fires on Review INSERT/UPDATE/DELETE for Episode reviews
+-- ═══════════════════════════════════════════════
+
+CREATE OR REPLACE FUNCTION fn_cascade_episode_rating()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_media_ids   INT[];
+    v_season_nos  INT[];
+    v_episode_nos INT[];
+    v_sums        BIGINT[];
+    v_counts      BIGINT[];
+BEGIN
+    -- Step 1: Net change per episode touched by this statement
+    IF TG_OP = 'INSERT' THEN
+        SELECT array_agg(media_id), array_agg(season_no), array_agg(episode_no),
+               array_agg(rating_sum), array_agg(review_count)
+        INTO v_media_ids, v_season_nos, v_episode_nos, v_sums, v_counts
+        FROM (
+            SELECT EpisodeMediaID AS media_id, EpisodeSeasonNo AS season_no, EpisodeNo AS episode_no,
+                   SUM(Rating) AS rating_sum, COUNT(*) AS review_count
+            FROM new_rows
+            WHERE EpisodeMediaID IS NOT NULL
+            GROUP BY EpisodeMediaID, EpisodeSeasonNo, EpisodeNo
+        ) d;
+    ELSIF TG_OP = 'DELETE' THEN
+        SELECT array_agg(media_id), array_agg(season_no), array_agg(episode_no),
+               array_agg(rating_sum), array_agg(review_count)
+        INTO v_media_ids, v_season_nos, v_episode_nos, v_sums, v_counts
+        FROM (
+            SELECT EpisodeMediaID AS media_id, EpisodeSeasonNo AS season_no, EpisodeNo AS episode_no,
+                   -SUM(Rating) AS rating_sum, -COUNT(*) AS review_count
+            FROM old_rows
+            WHERE EpisodeMediaID IS NOT NULL
+            GROUP BY EpisodeMediaID, EpisodeSeasonNo, EpisodeNo
+        ) d;
+    ELSE
+        SELECT array_agg(media_id), array_agg(season_no), array_agg(episode_no),
+               array_agg(rating_sum), array_agg(review_count)
+        INTO v_media_ids, v_season_nos, v_episode_nos, v_sums, v_counts
+        FROM (
+            SELECT media_id, season_no, episode_no,
+                   SUM(rating) AS rating_sum, SUM(delta) AS review_count
+            FROM (
+                SELECT EpisodeMediaID AS media_id, EpisodeSeasonNo AS season_no, EpisodeNo AS episode_no,
+                       Rating AS rating, 1 AS delta
+                FROM new_rows
+                UNION ALL
+                SELECT EpisodeMediaID, EpisodeSeasonNo, EpisodeNo, -Rating, -1
+                FROM old_rows
+            ) changes
+            WHERE media_id IS NOT NULL
+            GROUP BY media_id, season_no, episode_no
+            HAVING SUM(rating) <> 0 OR SUM(delta) <> 0
+        ) d;
+    END IF;
+
+    -- Skip if this statement touched no episode ratings
+    IF v_media_ids IS NULL THEN
+        RETURN NULL;
+    END IF;
+
+    UPDATE Episode e
+    SET AvgRating   = ROUND(((e.AvgRating * e.RatingCount) + d.rating_sum)::numeric
+                            / GREATEST(e.RatingCount + d.review_count, 1), 1),
+        RatingCount = GREATEST(e.RatingCount + d.review_count, 1)
+    FROM unnest(v_media_ids, v_season_nos, v_episode_nos, v_sums, v_counts)
+         AS d(MediaID, SeasonNo, EpisodeNo, rating_sum, review_count)
+    WHERE e.MediaID   = d.MediaID
+      AND e.SeasonNo  = d.SeasonNo
+      AND e.EpisodeNo = d.EpisodeNo;
+
+    -- Step 2: Recalculate each affected Season once (average of its episodes)
+    UPDATE Season s
+    SET AvgRating = sub.avg_r
+    FROM (
+        SELECT e.MediaID, e.SeasonNo, ROUND(AVG(e.AvgRating)::numeric, 1) AS avg_r
+        FROM Episode e
+        JOIN (
+            SELECT DISTINCT MediaID, SeasonNo
+            FROM unnest(v_media_ids, v_season_nos) AS k(MediaID, SeasonNo)
+        ) affected ON affected.MediaID = e.MediaID AND affected.SeasonNo = e.SeasonNo
+        GROUP BY e.MediaID, e.SeasonNo
+    ) sub
+    WHERE s.MediaID = sub.MediaID AND s.SeasonNo = sub.SeasonNo;
+
+    -- Step 3: Recalculate each affected Series once (average of season averages)
+    UPDATE Media m
+    SET Rating      = sub.avg_r,
+        RatingCount = sub.rating_count
+    FROM (
+        SELECT MediaID,
+               ROUND(AVG(season_avg)::numeric, 1) AS avg_r,
+               COALESCE(SUM(season_count), 0)::int AS rating_count
+        FROM (
+            SELECT MediaID, AVG(AvgRating) AS season_avg, SUM(RatingCount) AS season_count
+            FROM Episode
+            WHERE MediaID = ANY(v_media_ids)
+            GROUP BY MediaID, SeasonNo
+        ) per_season
+        GROUP BY MediaID
+    ) sub
+    WHERE m.MediaID = sub.MediaID AND m.MediaType = 'TVSeries';
+
+    RETURN NULL;  -- AFTER trigger: return value is ignored
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_refresh_movie_rating_ins
+AFTER INSERT ON Review
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION fn_refresh_movie_rating();
+
+CREATE TRIGGER trg_refresh_movie_rating_upd
+AFTER UPDATE ON Review
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION fn_refresh_movie_rating();
+
+CREATE TRIGGER trg_refresh_movie_rating_del
+AFTER DELETE ON Review
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION fn_refresh_movie_rating();
+
+CREATE TRIGGER trg_cascade_episode_rating_ins
+AFTER INSERT ON Review
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION fn_cascade_episode_rating();
+
+CREATE TRIGGER trg_cascade_episode_rating_upd
+AFTER UPDATE ON Review
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION fn_cascade_episode_rating();
+
+CREATE TRIGGER trg_cascade_episode_rating_del
+AFTER DELETE ON Review
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION fn_cascade_episode_rating();
+
+COMMIT;
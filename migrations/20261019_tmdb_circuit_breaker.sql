@@ -0,0 +1,106 @@
+-- Shared TMDB circuit breaker (fetchers/tmdb_client.py). The breaker state
+-- lives in a row instead of each process's memory, so a TMDB outage seen by
+-- one fetcher pauses every fetcher process and worker host.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS Ingest_Circuit_Breaker (
+    Name VARCHAR(50) PRIMARY KEY,
+    Failures INT NOT NULL DEFAULT 0,
+    OpenUntil TIMESTAMP,
+    Cooldown DOUBLE PRECISION NOT NULL,
+    HalfOpen BOOLEAN NOT NULL DEFAULT FALSE,
+    Trips INT NOT NULL DEFAULT 0,
+    UpdatedAt TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Record a failed TMDB request against a shared circuit breaker
+-- (Ingest_Circuit_Breaker, created on first use). p_threshold failures in a
+-- row open it for its cooldown; a failure while half-open (after a cooldown,
+-- before any success) reopens it for twice as long, up to p_max_cooldown.
+-- Failures while it is open are requests sent before it opened and are not
+-- counted. Returns the cooldown in seconds if this failure opened it, else 0.
+CREATE OR REPLACE FUNCTION fn_circuit_breaker_failure(
+    p_name TEXT,
+    p_threshold INT,
+    p_cooldown DOUBLE PRECISION,
+    p_max_cooldown DOUBLE PRECISION
+)
+RETURNS DOUBLE PRECISION AS $$
+DECLARE
+    v_now     TIMESTAMP := clock_timestamp();
+    v_breaker Ingest_Circuit_Breaker%ROWTYPE;
+BEGIN
+    INSERT INTO Ingest_Circuit_Breaker (Name, Cooldown)
+    VALUES (p_name, p_cooldown)
+    ON CONFLICT (Name) DO NOTHING;
+
+    SELECT * INTO v_breaker
+    FROM Ingest_Circuit_Breaker
+    WHERE Name = p_name
+    FOR UPDATE;
+
+    IF v_breaker.OpenUntil > v_now THEN
+        RETURN 0;
+    END IF;
+
+    v_breaker.Failures := v_breaker.Failures + 1;
+
+    IF NOT v_breaker.HalfOpen AND v_breaker.Failures < p_threshold THEN
+        UPDATE Ingest_Circuit_Breaker
+        SET Failures = v_breaker.Failures,
+            UpdatedAt = v_now
+        WHERE Name = p_name;
+        RETURN 0;
+    END IF;
+
+    IF v_breaker.HalfOpen THEN
+        v_breaker.Cooldown := LEAST(v_breaker.Cooldown * 2, p_max_cooldown);
+    END IF;
+
+    UPDATE Ingest_Circuit_Breaker
+    SET Failures = v_breaker.Failures,
+        Cooldown = v_breaker.Cooldown,
+        OpenUntil = v_now + v_breaker.Cooldown * INTERVAL '1 second',
+        HalfOpen = TRUE,
+        Trips = Trips + 1,
+        UpdatedAt = v_now
+    WHERE Name = p_name;
+
+    RETURN v_breaker.Cooldown;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Record a successful TMDB request: the failure count and cooldown reset,
+-- and a half-open breaker closes (returns TRUE then). Successes while it is
+-- open are requests sent before it opened and are ignored.
+CREATE OR REPLACE FUNCTION fn_circuit_breaker_success(p_name TEXT, p_cooldown DOUBLE PRECISION)
+RETURNS BOOLEAN AS $$
+DECLARE
+    v_now       TIMESTAMP := clock_timestamp();
+    v_half_open BOOLEAN;
+BEGIN
+    SELECT HalfOpen INTO v_half_open
+    FROM Ingest_Circuit_Breaker
+    WHERE Name = p_name
+      AND (Failures > 0 OR HalfOpen)
+      AND (OpenUntil IS NULL OR OpenUntil <= v_now)
+    FOR UPDATE;
+
+    IF NOT FOUND THEN
+        RETURN FALSE;
+    END IF;
+
+    UPDATE Ingest_Circuit_Breaker
+    SET Failures = 0,
+        HalfOpen = FALSE,
+        Cooldown = p_cooldown,
+        UpdatedAt = v_now
+    WHERE Name = p_name;
+
+    RETURN v_half_open;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMIT;
@@ -0,0 +1,19 @@
+-- Dead-letter list for fetchers/update_persons.py. It now commits each
+-- person / movie / season / company on its own; the ones TMDB kept failing
+-- for (through tmdb_client's retries) are recorded here, keyed by entity
+-- type, and removed when a later run updates them. Seasons are keyed
+-- "MediaID/SeasonNo".
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS Update_Dead_Letter (
+    EntityType VARCHAR(10) NOT NULL CHECK (EntityType IN ('person', 'movie', 'season', 'company')),
+    EntityKey VARCHAR(30) NOT NULL,
+    Error TEXT,
+    Failures INT NOT NULL DEFAULT 1,
+    FirstFailedAt TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    LastFailedAt TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (EntityType, EntityKey)
+);
+
+COMMIT;
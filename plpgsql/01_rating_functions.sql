@@ -1,74 +1,88 @@
+-- ═══════════════════════════════════════════════
+-- Rating triggers are statement-level: each INSERT/UPDATE/DELETE on Review
+-- folds all of its rows (via transition tables) into one delta per movie /
+-- episode, so bulk imports and sp_delete_user recalculate every affected
+-- movie, episode, season and series once per statement.
+--
+-- Weighted prior: RatingCount starts at 1000 and the TMDB rating acts as
+-- 1000 virtual reviews; each real review is folded into the running average.
+--
+-- Bulk imports (cholochitro.bulk_review_import = 'on', set by
+-- fetchers/import_reviews.py --fast for its own transaction) skip both
+-- triggers; the importer updates the aggregates once for the whole file.
+--
+-- Deferred mode (cholochitro.deferred_rating_cascade = 'on'): episode
+-- reviews only update the episode and queue the season in
+-- Rating_Dirty_Seasons; fetchers/rating_worker.py recomputes season and
+-- series averages in batches.
+-- ═══════════════════════════════════════════════
+
+-- ═══════════════════════════════════════════════
+-- 1. Movie Rating
+-- Fires on Review INSERT/UPDATE/DELETE for Movie reviews
+-- ═══════════════════════════════════════════════
 
 CREATE OR REPLACE FUNCTION fn_refresh_movie_rating()
 RETURNS TRIGGER AS $$
 DECLARE
-    v_media_id INT;
-    v_old_rating DECIMAL(3, 1);
-    v_old_count INT;
-    v_new_rating DECIMAL(3, 1);
-    v_new_count INT;
+    v_media_ids INT[];
+    v_sums      BIGINT[];
+    v_counts    BIGINT[];
 BEGIN
-    -- Determine which MediaID was affected
-    IF TG_OP = 'DELETE' THEN
-        v_media_id := OLD.MediaID;
-    ELSIF TG_OP = 'UPDATE' THEN
-        v_media_id := NEW.MediaID;
-    ELSE
-        v_media_id := NEW.MediaID;
-    END IF;
-
-    -- Only for movie reviews (MediaID is non-null for movies, NULL for episodes)
-    IF v_media_id IS NULL THEN
-        RETURN NULL;
-    END IF;
-
-    SELECT Rating, RatingCount
-    INTO v_old_rating, v_old_count
-    FROM Media
-    WHERE MediaID = v_media_id
-      AND MediaType = 'Movie';
-
-    IF v_old_count IS NULL THEN
+    -- import_reviews.py --fast applies the rating changes itself, once
+    IF current_setting('cholochitro.bulk_review_import', true) = 'on' THEN
         RETURN NULL;
     END IF;
 
+    -- Net change per movie: new rows add their rating, old rows remove it.
+    -- (Transition tables only exist for the event the trigger was created for.)
     IF TG_OP = 'INSERT' THEN
-        v_new_count := v_old_count + 1;
-        v_new_rating := ROUND(((v_old_rating * v_old_count) + NEW.Rating)::numeric / v_new_count, 1);
+        SELECT array_agg(MediaID), array_agg(rating_sum), array_agg(review_count)
+        INTO v_media_ids, v_sums, v_counts
+        FROM (
+            SELECT MediaID, SUM(Rating) AS rating_sum, COUNT(*) AS review_count
+            FROM new_rows
+            WHERE MediaID IS NOT NULL
+            GROUP BY MediaID
+        ) d;
     ELSIF TG_OP = 'DELETE' THEN
-        v_new_count := GREATEST(v_old_count - 1, 1);
-        v_new_rating := ROUND(((v_old_rating * v_old_count) - OLD.Rating)::numeric / v_new_count, 1);
+        SELECT array_agg(MediaID), array_agg(rating_sum), array_agg(review_count)
+        INTO v_media_ids, v_sums, v_counts
+        FROM (
+            SELECT MediaID, -SUM(Rating) AS rating_sum, -COUNT(*) AS review_count
+            FROM old_rows
+            WHERE MediaID IS NOT NULL
+            GROUP BY MediaID
+        ) d;
     ELSE
-        v_new_count := v_old_count;
-        v_new_rating := ROUND(((v_old_rating * v_old_count) - OLD.Rating + NEW.Rating)::numeric / v_new_count, 1);
+        SELECT array_agg(MediaID), array_agg(rating_sum), array_agg(review_count)
+        INTO v_media_ids, v_sums, v_counts
+        FROM (
+            SELECT MediaID, SUM(rating) AS rating_sum, SUM(delta) AS review_count
+            FROM (
+                SELECT MediaID, Rating AS rating, 1 AS delta FROM new_rows
+                UNION ALL
+                SELECT MediaID, -Rating, -1 FROM old_rows
+            ) changes
+            WHERE MediaID IS NOT NULL
+            GROUP BY MediaID
+            -- Edits that don't touch the rating (text, helpful counts) are no-ops
+            HAVING SUM(rating) <> 0 OR SUM(delta) <> 0
+        ) d;
     END IF;
 
-    UPDATE Media
-    SET Rating = v_new_rating,
-        RatingCount = v_new_count
-    WHERE MediaID = v_media_id
-      AND MediaType = 'Movie';
-
-    -- For UPDATE: if MediaID changed, also recalculate the old one
-    IF TG_OP = 'UPDATE' AND OLD.MediaID IS NOT NULL AND OLD.MediaID <> NEW.MediaID THEN
-        SELECT Rating, RatingCount
-        INTO v_old_rating, v_old_count
-        FROM Media
-        WHERE MediaID = OLD.MediaID
-          AND MediaType = 'Movie';
-
-        IF v_old_count IS NOT NULL AND v_old_count > 1 THEN
-            v_new_count := v_old_count - 1;
-            v_new_rating := ROUND(((v_old_rating * v_old_count) - OLD.Rating)::numeric / v_new_count, 1);
-
-            UPDATE Media
-            SET Rating = v_new_rating,
-                RatingCount = v_new_count
-            WHERE MediaID = OLD.MediaID
-              AND MediaType = 'Movie';
-        END IF;
+    IF v_media_ids IS NULL THEN
+        RETURN NULL;
     END IF;
 
+    UPDATE Media m
+    SET Rating      = ROUND(((m.Rating * m.RatingCount) + d.rating_sum)::numeric
+                            / GREATEST(m.RatingCount + d.review_count, 1), 1),
+        RatingCount = GREATEST(m.RatingCount + d.review_count, 1)
+    FROM unnest(v_media_ids, v_sums, v_counts) AS d(MediaID, rating_sum, review_count)
+    WHERE m.MediaID = d.MediaID
+      AND m.MediaType = 'Movie';
+
     RETURN NULL;  -- AFTER trigger: return value is ignored
 END;
 $$ LANGUAGE plpgsql;
@@ -79,85 +93,141 @@ $$ LANGUAGE plpgsql;
 -- Fires on Review INSERT/UPDATE/DELETE for Episode reviews
 -- ═══════════════════════════════════════════════
 
-CREATE OR REPLACE FUNCTION fn_cascade_episode_rating()
-RETURNS TRIGGER AS $$
-DECLARE
-    v_media_id   INT;
-    v_season_no  INT;
-    v_episode_no INT;
-    v_episode_rating DECIMAL(3, 1);
-    v_episode_count INT;
-    v_episode_new_rating DECIMAL(3, 1);
-    v_episode_new_count INT;
+-- Steps 2-3 of the episode cascade for a set of (MediaID, SeasonNo) pairs
+-- (parallel arrays, duplicates allowed): each season once, then each series
+-- once. Called by fn_cascade_episode_rating, or by fetchers/rating_worker.py
+-- for seasons queued in Rating_Dirty_Seasons.
+CREATE OR REPLACE FUNCTION fn_recompute_season_ratings(p_media_ids INT[], p_season_nos INT[])
+RETURNS VOID AS $$
 BEGIN
-    IF TG_OP = 'DELETE' THEN
-        v_media_id   := OLD.EpisodeMediaID;
-        v_season_no  := OLD.EpisodeSeasonNo;
-        v_episode_no := OLD.EpisodeNo;
-    ELSE
-        v_media_id   := NEW.EpisodeMediaID;
-        v_season_no  := NEW.EpisodeSeasonNo;
-        v_episode_no := NEW.EpisodeNo;
-    END IF;
+    -- Step 2: Recalculate each affected Season once (average of its episodes)
+    UPDATE Season s
+    SET AvgRating = sub.avg_r
+    FROM (
+        SELECT e.MediaID, e.SeasonNo, ROUND(AVG(e.AvgRating)::numeric, 1) AS avg_r
+        FROM Episode e
+        JOIN (
+            SELECT DISTINCT MediaID, SeasonNo
+            FROM unnest(p_media_ids, p_season_nos) AS k(MediaID, SeasonNo)
+        ) affected ON affected.MediaID = e.MediaID AND affected.SeasonNo = e.SeasonNo
+        GROUP BY e.MediaID, e.SeasonNo
+    ) sub
+    WHERE s.MediaID = sub.MediaID AND s.SeasonNo = sub.SeasonNo;
 
-    -- Skip if this isn't an episode review
-    IF v_media_id IS NULL THEN
-        RETURN NULL;
-    END IF;
+    -- Step 3: Recalculate each affected Series once (average of season averages)
+    UPDATE Media m
+    SET Rating      = sub.avg_r,
+        RatingCount = sub.rating_count
+    FROM (
+        SELECT MediaID,
+               ROUND(AVG(season_avg)::numeric, 1) AS avg_r,
+               COALESCE(SUM(season_count), 0)::int AS rating_count
+        FROM (
+            SELECT MediaID, AVG(AvgRating) AS season_avg, SUM(RatingCount) AS season_count
+            FROM Episode
+            WHERE MediaID = ANY(p_media_ids)
+            GROUP BY MediaID, SeasonNo
+        ) per_season
+        GROUP BY MediaID
+    ) sub
+    WHERE m.MediaID = sub.MediaID AND m.MediaType = 'TVSeries';
+END;
+$$ LANGUAGE plpgsql;
 
-    SELECT AvgRating, RatingCount
-    INTO v_episode_rating, v_episode_count
-    FROM Episode
-    WHERE MediaID = v_media_id
-      AND SeasonNo = v_season_no
-      AND EpisodeNo = v_episode_no;
 
-    IF v_episode_count IS NULL THEN
+CREATE OR REPLACE FUNCTION fn_cascade_episode_rating()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_media_ids   INT[];
+    v_season_nos  INT[];
+    v_episode_nos INT[];
+    v_sums        BIGINT[];
+    v_counts      BIGINT[];
+BEGIN
+    -- import_reviews.py --fast applies the rating changes itself, once
+    IF current_setting('cholochitro.bulk_review_import', true) = 'on' THEN
         RETURN NULL;
     END IF;
 
+    -- Step 1: Net change per episode touched by this statement
     IF TG_OP = 'INSERT' THEN
-        v_episode_new_count := v_episode_count + 1;
-        v_episode_new_rating := ROUND(((v_episode_rating * v_episode_count) + NEW.Rating)::numeric / v_episode_new_count, 1);
+        SELECT array_agg(media_id), array_agg(season_no), array_agg(episode_no),
+               array_agg(rating_sum), array_agg(review_count)
+        INTO v_media_ids, v_season_nos, v_episode_nos, v_sums, v_counts
+        FROM (
+            SELECT EpisodeMediaID AS media_id, EpisodeSeasonNo AS season_no, EpisodeNo AS episode_no,
+                   SUM(Rating) AS rating_sum, COUNT(*) AS review_count
+            FROM new_rows
+            WHERE EpisodeMediaID IS NOT NULL
+            GROUP BY EpisodeMediaID, EpisodeSeasonNo, EpisodeNo
+        ) d;
     ELSIF TG_OP = 'DELETE' THEN
-        v_episode_new_count := GREATEST(v_episode_count - 1, 1);
-        v_episode_new_rating := ROUND(((v_episode_rating * v_episode_count) - OLD.Rating)::numeric / v_episode_new_count, 1);
+        SELECT array_agg(media_id), array_agg(season_no), array_agg(episode_no),
+               array_agg(rating_sum), array_agg(review_count)
+        INTO v_media_ids, v_season_nos, v_episode_nos, v_sums, v_counts
+        FROM (
+            SELECT EpisodeMediaID AS media_id, EpisodeSeasonNo AS season_no, EpisodeNo AS episode_no,
+                   -SUM(Rating) AS rating_sum, -COUNT(*) AS review_count
+            FROM old_rows
+            WHERE EpisodeMediaID IS NOT NULL
+            GROUP BY EpisodeMediaID, EpisodeSeasonNo, EpisodeNo
+        ) d;
     ELSE
-        v_episode_new_count := v_episode_count;
-        v_episode_new_rating := ROUND(((v_episode_rating * v_episode_count) - OLD.Rating + NEW.Rating)::numeric / v_episode_new_count, 1);
+        SELECT array_agg(media_id), array_agg(season_no), array_agg(episode_no),
+               array_agg(rating_sum), array_agg(review_count)
+        INTO v_media_ids, v_season_nos, v_episode_nos, v_sums, v_counts
+        FROM (
+            SELECT media_id, season_no, episode_no,
+                   SUM(rating) AS rating_sum, SUM(delta) AS review_count
+            FROM (
+                SELECT EpisodeMediaID AS media_id, EpisodeSeasonNo AS season_no, EpisodeNo AS episode_no,
+                       Rating AS rating, 1 AS delta
+                FROM new_rows
+                UNION ALL
+                SELECT EpisodeMediaID, EpisodeSeasonNo, EpisodeNo, -Rating, -1
+                FROM old_rows
+            ) changes
+            WHERE media_id IS NOT NULL
+            GROUP BY media_id, season_no, episode_no
+            HAVING SUM(rating) <> 0 OR SUM(delta) <> 0
+        ) d;
     END IF;
 
-    UPDATE Episode e
-    SET AvgRating   = v_episode_new_rating,
-        RatingCount = v_episode_new_count
-    WHERE e.MediaID   = v_media_id
-      AND e.SeasonNo  = v_season_no
-      AND e.EpisodeNo = v_episode_no;
+    -- Skip if this statement touched no episode ratings
+    IF v_media_ids IS NULL THEN
+        RETURN NULL;
+    END IF;
 
-    -- Step 2: Recalculate this Season's AvgRating (average of its episodes)
-    UPDATE Season s
-    SET AvgRating = sub.avg_r
-    FROM (
-        SELECT ROUND(AVG(AvgRating)::numeric, 1) AS avg_r
-        FROM Episode
-        WHERE MediaID = v_media_id AND SeasonNo = v_season_no
-    ) sub
-    WHERE s.MediaID = v_media_id AND s.SeasonNo = v_season_no;
+    UPDATE Episode e
+    SET AvgRating   = ROUND(((e.AvgRating * e.RatingCount) + d.rating_sum)::numeric
+                            / GREATEST(e.RatingCount + d.review_count, 1), 1),
+        RatingCount = GREATEST(e.RatingCount + d.review_count, 1)
+    FROM unnest(v_media_ids, v_season_nos, v_episode_nos, v_sums, v_counts)
+         AS d(MediaID, SeasonNo, EpisodeNo, rating_sum, review_count)
+    WHERE e.MediaID   = d.MediaID
+      AND e.SeasonNo  = d.SeasonNo
+      AND e.EpisodeNo = d.EpisodeNo;
+
+    -- Steps 2-3: Season and series averages, now or (deferred mode) from
+    -- the dirty queue by fetchers/rating_worker.py. Deferred mode is on when
+    -- cholochitro.deferred_rating_cascade = 'on' (session or database setting).
+    IF COALESCE(current_setting('cholochitro.deferred_rating_cascade', true), '') = 'on' THEN
+        INSERT INTO Rating_Dirty_Seasons (MediaID, SeasonNo)
+        SELECT DISTINCT k.MediaID, k.SeasonNo
+        FROM unnest(v_media_ids, v_season_nos) AS k(MediaID, SeasonNo)
+        ORDER BY k.MediaID, k.SeasonNo
+        ON CONFLICT (MediaID, SeasonNo) DO UPDATE SET QueuedAt = CURRENT_TIMESTAMP;
+    ELSE
+        PERFORM fn_recompute_season_ratings(v_media_ids, v_season_nos);
+    END IF;
 
-    -- Step 3: Recalculate Series' overall Rating (average of season averages)
-    UPDATE Media m
-    SET Rating      = sub.avg_r,
-        RatingCount = COALESCE((SELECT COUNT(*)::int FROM Review WHERE EpisodeMediaID = v_media_id), 0)
-    FROM (
-        SELECT ROUND(AVG(season_avg)::numeric, 1) AS avg_r
-        FROM (
-            SELECT AVG(AvgRating) AS season_avg
-            FROM Episode
-            WHERE MediaID = v_media_id
-            GROUP BY SeasonNo
-        ) per_season
-    ) sub
-    WHERE m.MediaID = v_media_id AND m.MediaType = 'TVSeries';
+    -- Step 4: Queue the shows' prebuilt season documents for a rebuild
+    -- (drained by fetchers/show_documents.py). DO UPDATE rather than DO
+    -- NOTHING: the row lock makes a concurrent rebuild wait for this commit.
+    INSERT INTO TVShow_Document_Dirty (MediaID)
+    SELECT DISTINCT media_id FROM unnest(v_media_ids) AS media_id
+    ORDER BY media_id
+    ON CONFLICT (MediaID) DO UPDATE SET QueuedAt = CURRENT_TIMESTAMP;
 
     RETURN NULL;  -- AFTER trigger: return value is ignored
 END;
@@ -2,16 +2,45 @@
 -- RATING TRIGGERS (from 01_rating_functions.sql)
 -- ═══════════════════════════════════════════════
 
+-- Statement-level: one trigger per event, since a trigger with transition
+-- tables can only fire on a single event.
+
 -- Movie rating auto-recalculation
-CREATE TRIGGER trg_refresh_movie_rating
-AFTER INSERT OR UPDATE OR DELETE ON Review
-FOR EACH ROW
+CREATE TRIGGER trg_refresh_movie_rating_ins
+AFTER INSERT ON Review
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION fn_refresh_movie_rating();
+
+CREATE TRIGGER trg_refresh_movie_rating_upd
+AFTER UPDATE ON Review
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION fn_refresh_movie_rating();
+
+CREATE TRIGGER trg_refresh_movie_rating_del
+AFTER DELETE ON Review
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT
 EXECUTE FUNCTION fn_refresh_movie_rating();
 
 -- Episode → Season → Series cascade
-CREATE TRIGGER trg_cascade_episode_rating
-AFTER INSERT OR UPDATE OR DELETE ON Review
-FOR EACH ROW
+CREATE TRIGGER trg_cascade_episode_rating_ins
+AFTER INSERT ON Review
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION fn_cascade_episode_rating();
+
+CREATE TRIGGER trg_cascade_episode_rating_upd
+AFTER UPDATE ON Review
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION fn_cascade_episode_rating();
+
+CREATE TRIGGER trg_cascade_episode_rating_del
+AFTER DELETE ON Review
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT
 EXECUTE FUNCTION fn_cascade_episode_rating();
 
 -- ═══════════════════════════════════════════════
@@ -33,6 +62,34 @@ BEFORE UPDATE ON Review
 FOR EACH ROW
 EXECUTE FUNCTION fn_set_edited_at();
 
+-- ═══════════════════════════════════════════════
+-- BASE RATING TRIGGERS (from 05_utilities.sql)
+-- ═══════════════════════════════════════════════
+
+CREATE TRIGGER trg_media_base_rating
+BEFORE INSERT ON Media
+FOR EACH ROW
+EXECUTE FUNCTION fn_default_base_rating();
+
+CREATE TRIGGER trg_episode_base_rating
+BEFORE INSERT ON Episode
+FOR EACH ROW
+EXECUTE FUNCTION fn_default_base_rating();
+
+-- ═══════════════════════════════════════════════
+-- SEARCH KEY TRIGGERS (from 05_utilities.sql)
+-- ═══════════════════════════════════════════════
+
+CREATE TRIGGER trg_media_search_vector
+BEFORE INSERT OR UPDATE OF Title, Description ON Media
+FOR EACH ROW
+EXECUTE FUNCTION fn_set_media_search_vector();
+
+CREATE TRIGGER trg_person_search_name
+BEFORE INSERT OR UPDATE OF FullName ON Person
+FOR EACH ROW
+EXECUTE FUNCTION fn_set_person_search_name();
+
 -- ═══════════════════════════════════════════════
 -- PROFANITY FILTER TRIGGERS (from 06_profanity_filter.sql)
 -- ═══════════════════════════════════════════════
@@ -51,3 +108,9 @@ CREATE TRIGGER trg_filter_review
 BEFORE INSERT OR UPDATE ON Review
 FOR EACH ROW
 EXECUTE FUNCTION fn_filter_review();
+
+-- Recompile the banned-word regex whenever the word list changes
+CREATE TRIGGER trg_banned_words_changed
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON Banned_Words
+FOR EACH STATEMENT
+EXECUTE FUNCTION fn_banned_words_changed();
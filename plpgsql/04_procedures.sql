@@ -29,7 +29,8 @@ BEGIN
     -- Delete user's blogs
     DELETE FROM Blog WHERE UserID = p_user_id;
 
-    -- Delete user's reviews (rating triggers will auto-recalculate)
+    -- Delete user's reviews (statement-level rating triggers recalculate
+    -- every affected movie/episode/season/series once)
     DELETE FROM Review WHERE UserID = p_user_id;
 
     -- Delete user's list items and lists
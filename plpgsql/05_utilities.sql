@@ -23,3 +23,367 @@ BEGIN
     RETURN NEW;
 END;
 $$ LANGUAGE plpgsql;
+
+
+-- Default BaseRating (the weighted-rating prior) to the TMDB rating a
+-- Media/Episode row is inserted with.
+CREATE OR REPLACE FUNCTION fn_default_base_rating()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.BaseRating IS NULL THEN
+        IF TG_TABLE_NAME = 'media' THEN
+            NEW.BaseRating := NEW.Rating;
+        ELSE
+            NEW.BaseRating := NEW.AvgRating;
+        END IF;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Recompute Actor_Leaderboard rows for the given actors (NULL → every actor).
+-- Called by the fetchers after each ingestion run commits, with the PersonIDs
+-- whose Crew rows it wrote; returns the number of leaderboard rows written.
+-- Upsert rather than delete + insert, so two runs refreshing the same actor
+-- at once wait on the row instead of failing with a unique violation; rows
+-- are written in PersonID order so overlapping refreshes do not deadlock.
+CREATE OR REPLACE FUNCTION fn_refresh_actor_leaderboard(p_person_ids INT[])
+RETURNS INT AS $$
+DECLARE
+    v_rows INT;
+BEGIN
+    INSERT INTO Actor_Leaderboard (PersonID, TitleCount, AvgRating)
+    SELECT c.PersonID, COUNT(DISTINCT c.MediaID), ROUND(AVG(m.Rating), 1)
+    FROM Crew c
+    JOIN Media m ON c.MediaID = m.MediaID
+    WHERE c.CrewRole = 'Actor'
+      AND (p_person_ids IS NULL OR c.PersonID = ANY(p_person_ids))
+    GROUP BY c.PersonID
+    ORDER BY c.PersonID
+    ON CONFLICT (PersonID) DO UPDATE
+    SET TitleCount = EXCLUDED.TitleCount,
+        AvgRating = EXCLUDED.AvgRating,
+        RefreshedAt = CURRENT_TIMESTAMP;
+
+    GET DIAGNOSTICS v_rows = ROW_COUNT;
+
+    -- Actors who no longer have any roles leave the leaderboard
+    DELETE FROM Actor_Leaderboard l
+    WHERE (p_person_ids IS NULL OR l.PersonID = ANY(p_person_ids))
+      AND NOT EXISTS (
+          SELECT 1 FROM Crew c
+          WHERE c.PersonID = l.PersonID AND c.CrewRole = 'Actor'
+      );
+
+    RETURN v_rows;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Weighted search document for a Media row: Title (A) ranks above
+-- Description (B). IMMUTABLE (fixed 'english' config) so it can be used
+-- at insert time by the fetchers and in index expressions.
+CREATE OR REPLACE FUNCTION fn_media_search_vector(p_title TEXT, p_description TEXT)
+RETURNS TSVECTOR AS $$
+    SELECT setweight(to_tsvector('english'::regconfig, COALESCE(p_title, '')), 'A')
+        || setweight(to_tsvector('english'::regconfig, COALESCE(p_description, '')), 'B');
+$$ LANGUAGE sql IMMUTABLE;
+
+
+-- Keep Media.SearchVector in step with Title and Description, whoever
+-- writes the row (the fetchers also set it, but edits would not)
+CREATE OR REPLACE FUNCTION fn_set_media_search_vector()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.SearchVector := fn_media_search_vector(NEW.Title, NEW.Description);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Search key for person names: accents stripped, lower-cased, whitespace
+-- collapsed ("Zoë  Saldaña" → "zoe saldana"). unaccent() itself is only
+-- STABLE, so it is called with an explicit dictionary to allow IMMUTABLE
+-- (needed to use it at insert time and in index expressions).
+CREATE OR REPLACE FUNCTION fn_fold_name(p_name TEXT)
+RETURNS TEXT AS $$
+    SELECT lower(regexp_replace(btrim(public.unaccent('public.unaccent'::regdictionary, p_name)),
+                                '\s+', ' ', 'g'));
+$$ LANGUAGE sql IMMUTABLE STRICT;
+
+
+-- Keep Person.SearchName in step with FullName, whoever writes the row
+-- (the fetchers also set it, but renames and manual inserts would not)
+CREATE OR REPLACE FUNCTION fn_set_person_search_name()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.SearchName := fn_fold_name(NEW.FullName);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Prebuilt /tvshows/:id/seasons payload: the show, its seasons with their
+-- episodes, and the per-season / per-show rating aggregates, in the same
+-- shape server.js returns when it queries the tables directly.
+CREATE OR REPLACE FUNCTION fn_build_show_document(p_media_id INT)
+RETURNS JSONB AS $$
+    WITH per_season AS (
+        SELECT SeasonNo,
+               AVG(AvgRating) AS season_avg,
+               COALESCE(SUM(RatingCount), 0)::int AS rating_count,
+               jsonb_agg(jsonb_build_object(
+                   'seasonno', SeasonNo,
+                   'episodeno', EpisodeNo,
+                   'episodetitle', EpisodeTitle,
+                   'description', Description,
+                   'duration', Duration,
+                   'avgrating', AvgRating,
+                   'stillpath', StillPath
+               ) ORDER BY EpisodeNo) AS episodes
+        FROM Episode
+        WHERE MediaID = p_media_id
+        GROUP BY SeasonNo
+    ),
+    totals AS (
+        SELECT ROUND(AVG(season_avg)::numeric, 1) AS series_rating,
+               SUM(rating_count)::int AS series_rating_count
+        FROM per_season
+    )
+    SELECT jsonb_build_object(
+        'mediaid', m.MediaID,
+        'title', m.Title,
+        'releaseyear', m.ReleaseYear,
+        'description', m.Description,
+        'rating', r.rating,
+        'ratingcount', r.rating_count,
+        'poster', m.Poster,
+        'languagename', m.LanguageName,
+        'isongoing', tv.IsOngoing,
+        'numberofseasons', tv.NumberOfSeasons,
+        'websiteRating', r.rating,
+        'reviewCount', r.rating_count,
+        'seasons', COALESCE((
+            SELECT jsonb_agg(jsonb_build_object(
+                'seasonno', s.SeasonNo,
+                'seasontitle', s.SeasonTitle,
+                'releasedate', s.ReleaseDate,
+                'description', s.Description,
+                'avgrating', s.AvgRating,
+                'trailerlink', s.TrailerLink,
+                'episodecount', s.EpisodeCount,
+                'websiteSeasonRating', ROUND(ps.season_avg::numeric, 1),
+                'seasonReviewCount', COALESCE(ps.rating_count, 0),
+                'episodes', COALESCE(ps.episodes, '[]'::jsonb)
+            ) ORDER BY s.SeasonNo)
+            FROM Season s
+            LEFT JOIN per_season ps ON ps.SeasonNo = s.SeasonNo
+            WHERE s.MediaID = p_media_id
+        ), '[]'::jsonb)
+    )
+    FROM Media m
+    JOIN TVSeries tv ON tv.MediaID = m.MediaID
+    CROSS JOIN totals t
+    CROSS JOIN LATERAL (
+        SELECT COALESCE(t.series_rating, m.Rating) AS rating,
+               COALESCE(NULLIF(t.series_rating_count, 0), m.RatingCount, 0) AS rating_count
+    ) r
+    WHERE m.MediaID = p_media_id;
+$$ LANGUAGE sql STABLE;
+
+
+-- (Re)build TVShow_Document for the given shows and take them off the
+-- dirty queue; returns the number of documents written. Called by the
+-- fetchers for the shows they wrote and by fetchers/show_documents.py for
+-- shows queued by the rating cascade.
+CREATE OR REPLACE FUNCTION fn_refresh_show_documents(p_media_ids INT[])
+RETURNS INT AS $$
+DECLARE
+    v_rows INT;
+BEGIN
+    -- Dequeue before building: a rating change committed after this DELETE
+    -- is visible to the INSERT below, or queues the show again
+    DELETE FROM TVShow_Document_Dirty WHERE MediaID = ANY(p_media_ids);
+
+    INSERT INTO TVShow_Document (MediaID, Document, BuiltAt)
+    SELECT tv.MediaID, fn_build_show_document(tv.MediaID), CURRENT_TIMESTAMP
+    FROM TVSeries tv
+    WHERE tv.MediaID = ANY(p_media_ids)
+    ON CONFLICT (MediaID) DO UPDATE
+    SET Document = EXCLUDED.Document,
+        BuiltAt  = EXCLUDED.BuiltAt;
+
+    GET DIAGNOSTICS v_rows = ROW_COUNT;
+    RETURN v_rows;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Take p_tokens from a shared token bucket (Ingest_Rate_Budget). Returns 0
+-- when granted, otherwise the seconds to wait before asking again; nothing
+-- is taken then. Unknown buckets are unlimited; asking for more than the
+-- bucket's Capacity is an error (it could never be granted). Run it in its
+-- own short transaction: the bucket row is locked until commit.
+CREATE OR REPLACE FUNCTION fn_take_rate_tokens(p_name TEXT, p_tokens DOUBLE PRECISION)
+RETURNS DOUBLE PRECISION AS $$
+DECLARE
+    v_now       TIMESTAMP := clock_timestamp();
+    v_available DOUBLE PRECISION;
+    v_rate      DOUBLE PRECISION;
+    v_capacity  DOUBLE PRECISION;
+BEGIN
+    SELECT LEAST(Capacity, Tokens + EXTRACT(EPOCH FROM v_now - UpdatedAt) * RefillPerSec),
+           RefillPerSec, Capacity
+    INTO v_available, v_rate, v_capacity
+    FROM Ingest_Rate_Budget
+    WHERE Name = p_name
+    FOR UPDATE;
+
+    IF NOT FOUND THEN
+        RETURN 0;
+    END IF;
+
+    IF p_tokens > v_capacity THEN
+        RAISE EXCEPTION 'Cannot take % tokens from rate budget "%": its capacity is %',
+            p_tokens, p_name, v_capacity;
+    END IF;
+
+    IF v_available < p_tokens THEN
+        RETURN (p_tokens - v_available) / v_rate;
+    END IF;
+
+    UPDATE Ingest_Rate_Budget
+    SET Tokens = v_available - p_tokens,
+        UpdatedAt = v_now
+    WHERE Name = p_name;
+    RETURN 0;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Ask fetchers/ingest_service.py for a title. Returns 'exists' (already in
+-- Media), 'queued' (a new request, announced on the ingest_request channel)
+-- or 'coalesced' (already queued or being ingested: only RequestCount
+-- grows). Finished or failed requests for a title still missing are queued
+-- again. The NOTIFY is delivered when the caller commits.
+CREATE OR REPLACE FUNCTION fn_request_ingest(p_media_type TEXT, p_tmdb_id INT, p_source TEXT DEFAULT NULL)
+RETURNS TEXT AS $$
+DECLARE
+    v_now    TIMESTAMP := clock_timestamp();
+    v_queued BOOLEAN;
+BEGIN
+    IF EXISTS (SELECT 1 FROM Media WHERE MediaID = p_tmdb_id) THEN
+        RETURN 'exists';
+    END IF;
+
+    INSERT INTO Ingest_Request AS r (MediaType, TmdbID, Source, RequestedAt, LastRequestedAt)
+    VALUES (p_media_type, p_tmdb_id, p_source, v_now, v_now)
+    ON CONFLICT (MediaType, TmdbID) DO UPDATE
+    SET RequestCount = r.RequestCount + 1,
+        LastRequestedAt = v_now,
+        Status      = CASE WHEN r.Status IN ('pending', 'running') THEN r.Status ELSE 'pending' END,
+        RequestedAt = CASE WHEN r.Status IN ('pending', 'running') THEN r.RequestedAt ELSE v_now END,
+        RetryAt     = CASE WHEN r.Status IN ('pending', 'running') THEN r.RetryAt END,
+        Attempts    = CASE WHEN r.Status IN ('pending', 'running') THEN r.Attempts ELSE 0 END,
+        Error       = CASE WHEN r.Status IN ('pending', 'running') THEN r.Error END
+    RETURNING r.RequestedAt = v_now INTO v_queued;
+
+    IF NOT v_queued THEN
+        RETURN 'coalesced';
+    END IF;
+
+    PERFORM pg_notify('ingest_request', p_media_type || ' ' || p_tmdb_id);
+    RETURN 'queued';
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Record a failed TMDB request against a shared circuit breaker
+-- (Ingest_Circuit_Breaker, created on first use). p_threshold failures in a
+-- row open it for its cooldown; a failure while half-open (after a cooldown,
+-- before any success) reopens it for twice as long, up to p_max_cooldown.
+-- Failures while it is open are requests sent before it opened and are not
+-- counted. Returns the cooldown in seconds if this failure opened it, else 0.
+CREATE OR REPLACE FUNCTION fn_circuit_breaker_failure(
+    p_name TEXT,
+    p_threshold INT,
+    p_cooldown DOUBLE PRECISION,
+    p_max_cooldown DOUBLE PRECISION
+)
+RETURNS DOUBLE PRECISION AS $$
+DECLARE
+    v_now     TIMESTAMP := clock_timestamp();
+    v_breaker Ingest_Circuit_Breaker%ROWTYPE;
+BEGIN
+    INSERT INTO Ingest_Circuit_Breaker (Name, Cooldown)
+    VALUES (p_name, p_cooldown)
+    ON CONFLICT (Name) DO NOTHING;
+
+    SELECT * INTO v_breaker
+    FROM Ingest_Circuit_Breaker
+    WHERE Name = p_name
+    FOR UPDATE;
+
+    IF v_breaker.OpenUntil > v_now THEN
+        RETURN 0;
+    END IF;
+
+    v_breaker.Failures := v_breaker.Failures + 1;
+
+    IF NOT v_breaker.HalfOpen AND v_breaker.Failures < p_threshold THEN
+        UPDATE Ingest_Circuit_Breaker
+        SET Failures = v_breaker.Failures,
+            UpdatedAt = v_now
+        WHERE Name = p_name;
+        RETURN 0;
+    END IF;
+
+    IF v_breaker.HalfOpen THEN
+        v_breaker.Cooldown := LEAST(v_breaker.Cooldown * 2, p_max_cooldown);
+    END IF;
+
+    UPDATE Ingest_Circuit_Breaker
+    SET Failures = v_breaker.Failures,
+        Cooldown = v_breaker.Cooldown,
+        OpenUntil = v_now + v_breaker.Cooldown * INTERVAL '1 second',
+        HalfOpen = TRUE,
+        Trips = Trips + 1,
+        UpdatedAt = v_now
+    WHERE Name = p_name;
+
+    RETURN v_breaker.Cooldown;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Record a successful TMDB request: the failure count and cooldown reset,
+-- and a half-open breaker closes (returns TRUE then). Successes while it is
+-- open are requests sent before it opened and are ignored.
+CREATE OR REPLACE FUNCTION fn_circuit_breaker_success(p_name TEXT, p_cooldown DOUBLE PRECISION)
+RETURNS BOOLEAN AS $$
+DECLARE
+    v_now       TIMESTAMP := clock_timestamp();
+    v_half_open BOOLEAN;
+BEGIN
+    SELECT HalfOpen INTO v_half_open
+    FROM Ingest_Circuit_Breaker
+    WHERE Name = p_name
+      AND (Failures > 0 OR HalfOpen)
+      AND (OpenUntil IS NULL OR OpenUntil <= v_now)
+    FOR UPDATE;
+
+    IF NOT FOUND THEN
+        RETURN FALSE;
+    END IF;
+
+    UPDATE Ingest_Circuit_Breaker
+    SET Failures = 0,
+        HalfOpen = FALSE,
+        Cooldown = p_cooldown,
+        UpdatedAt = v_now
+    WHERE Name = p_name;
+
+    RETURN v_half_open;
+END;
+$$ LANGUAGE plpgsql;
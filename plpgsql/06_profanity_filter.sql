@@ -17,22 +17,55 @@ INSERT INTO Banned_Words (Word) VALUES
     ('jerk')
 ON CONFLICT DO NOTHING;
 
--- 3. Generic check function — returns the first banned word found (or NULL)
+-- 3. All banned words compiled into one regex alternation (single row).
+--    Rebuilt by trg_banned_words_changed whenever Banned_Words changes, so
+--    each check is one regex scan of the text instead of a LIKE per word.
+--    PostgreSQL caches compiled regexes per session, so the pattern is only
+--    compiled once per connection.
+CREATE TABLE IF NOT EXISTS Banned_Words_Pattern (
+    ID BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (ID),
+    Pattern TEXT            -- NULL when there are no banned words
+);
+
+CREATE OR REPLACE FUNCTION fn_rebuild_profanity_pattern()
+RETURNS VOID AS $$
+BEGIN
+    INSERT INTO Banned_Words_Pattern (ID, Pattern)
+    SELECT TRUE,
+           -- Escape regex metacharacters so every word matches literally
+           string_agg(regexp_replace(LOWER(Word), '([.^$*+?()\[\]{}|\\])', '\\\1', 'g'), '|')
+    FROM Banned_Words
+    ON CONFLICT (ID) DO UPDATE SET Pattern = EXCLUDED.Pattern;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION fn_banned_words_changed()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM fn_rebuild_profanity_pattern();
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT fn_rebuild_profanity_pattern();
+
+-- 4. Generic check function — returns the first banned word found (or NULL)
 CREATE OR REPLACE FUNCTION fn_check_profanity(p_text TEXT)
 RETURNS TEXT AS $$
 DECLARE
-    v_word TEXT;
+    v_pattern TEXT;
 BEGIN
     IF p_text IS NULL THEN
         RETURN NULL;
     END IF;
 
-    SELECT bw.Word INTO v_word
-    FROM Banned_Words bw
-    WHERE LOWER(p_text) LIKE '%' || LOWER(bw.Word) || '%'
-    LIMIT 1;
+    SELECT Pattern INTO v_pattern FROM Banned_Words_Pattern;
+    IF v_pattern IS NULL THEN
+        RETURN NULL;
+    END IF;
 
-    RETURN v_word;
+    -- substring() returns the matched banned word, or NULL if none matched
+    RETURN substring(LOWER(p_text) FROM v_pattern);
 END;
 $$ LANGUAGE plpgsql;
 
@@ -96,6 +129,11 @@ RETURNS TRIGGER AS $$
 DECLARE
     v_found TEXT;
 BEGIN
+    -- import_reviews.py --fast checks the whole file set-wise before inserting
+    IF current_setting('cholochitro.bulk_review_import', true) = 'on' THEN
+        RETURN NEW;
+    END IF;
+
     -- Skip profanity check if this is an UPDATE that didn't touch content
     IF TG_OP = 'UPDATE'
        AND NEW.ReviewText IS NOT DISTINCT FROM OLD.ReviewText THEN
@@ -1,3 +1,7 @@
+-- Trigram indexes for substring (ILIKE '%q%') search
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+-- Accent folding for person name search (fn_fold_name)
+CREATE EXTENSION IF NOT EXISTS unaccent;
 -- Enum for the Superclass discriminator
 CREATE TYPE media_type_enum AS ENUM ('Movie', 'TVSeries');
 -- Users table - KEEP SERIAL (user-generated, not from TMDB)
@@ -15,7 +19,10 @@ CREATE TABLE Person (
     Picture VARCHAR(512),
     Biography TEXT,
     Nationality VARCHAR(100),
-    DateOfBirth DATE
+    DateOfBirth DATE,
+    SearchName VARCHAR(255), -- fn_fold_name(FullName), kept by trg_person_search_name
+    PictureThumbs JSONB, -- {"w<width>": LocalPath} WebP thumbnails (fetchers/image_thumbnails.py)
+    PictureLQIP TEXT -- tiny data: URI placeholder
 );
 -- Studio table - INT (uses TMDB company IDs)
 CREATE TABLE Studio (
@@ -42,8 +49,12 @@ CREATE TABLE Media (
     LanguageName VARCHAR(100),
     Rating DECIMAL(3, 1),
     RatingCount INT NOT NULL DEFAULT 1000,
+    BaseRating DECIMAL(3, 1), -- TMDB prior the weighted rating starts from
     MediaType media_type_enum NOT NULL,
-    Poster VARCHAR(512)
+    Poster VARCHAR(512),
+    SearchVector TSVECTOR, -- fn_media_search_vector(Title, Description), kept by trg_media_search_vector
+    PosterThumbs JSONB, -- {"w<width>": LocalPath} WebP thumbnails (fetchers/image_thumbnails.py)
+    PosterLQIP TEXT -- tiny data: URI placeholder
 );
 CREATE TABLE Movie (
     MediaID INT PRIMARY KEY,
@@ -84,7 +95,10 @@ CREATE TABLE Episode (
     Duration INT CHECK (Duration > 0),
     AvgRating DECIMAL(3, 1),
     RatingCount INT NOT NULL DEFAULT 1000,
+    BaseRating DECIMAL(3, 1), -- TMDB prior the weighted rating starts from
     StillPath VARCHAR(512),
+    StillThumbs JSONB, -- {"w<width>": LocalPath} WebP thumbnails (fetchers/image_thumbnails.py)
+    StillLQIP TEXT, -- tiny data: URI placeholder
     PRIMARY KEY (MediaID, SeasonNo, EpisodeNo),
     FOREIGN KEY (MediaID, SeasonNo) REFERENCES Season(MediaID, SeasonNo) ON DELETE CASCADE
 );
@@ -214,6 +228,7 @@ CREATE TABLE Crew (
     MediaID INT,
     CrewRole VARCHAR(100),
     CharacterName VARCHAR(255),
+    EpisodeCount INT, -- TV aggregate credits: episodes in this role (NULL otherwise)
     PRIMARY KEY (PersonID, MediaID, CrewRole),
     FOREIGN KEY (PersonID) REFERENCES Person(PersonID) ON DELETE CASCADE,
     FOREIGN KEY (MediaID) REFERENCES Media(MediaID) ON DELETE CASCADE
@@ -256,6 +271,172 @@ CREATE TABLE IF NOT EXISTS CommentVotes (
     FOREIGN KEY (UserID) REFERENCES Users(UserID) ON DELETE CASCADE,
     UNIQUE (CommentID, UserID, VoteType)
 );
+-- Top-actors leaderboard: precomputed Person ⋈ Crew ⋈ Media summary,
+-- refreshed by the fetchers for the actors each ingestion run touched
+CREATE TABLE IF NOT EXISTS Actor_Leaderboard (
+    PersonID INT PRIMARY KEY,
+    TitleCount INT NOT NULL,
+    AvgRating DECIMAL(3, 1),
+    RefreshedAt TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (PersonID) REFERENCES Person(PersonID) ON DELETE CASCADE
+);
+-- Detail-page views per title (server.js), used to pick the titles whose
+-- full credits are worth fetching (fetchers/hydrate_credits.py)
+CREATE TABLE IF NOT EXISTS Media_Hits (
+    MediaID INT PRIMARY KEY,
+    HitCount BIGINT NOT NULL DEFAULT 0,
+    LastHitAt TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    CreditsHydratedAt TIMESTAMP, -- NULL until full credits are stored
+    FOREIGN KEY (MediaID) REFERENCES Media(MediaID) ON DELETE CASCADE
+);
+-- Local mirror of TMDB images (fetchers/image_mirror.py): one row per
+-- (TMDB path, size), pointing at a content-addressed file that server.js
+-- serves under /images/<LocalPath>
+CREATE TABLE IF NOT EXISTS Image_Asset (
+    TmdbPath VARCHAR(512),
+    Size VARCHAR(16),
+    Sha256 CHAR(64) NOT NULL,
+    LocalPath VARCHAR(512) NOT NULL,
+    Bytes INT NOT NULL,
+    ContentType VARCHAR(50),
+    FetchedAt TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    LastUsedAt TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (TmdbPath, Size)
+);
+-- Prebuilt /tvshows/:id/seasons payload per show (fn_build_show_document),
+-- rebuilt by the fetchers for the shows they write
+CREATE TABLE IF NOT EXISTS TVShow_Document (
+    MediaID INT PRIMARY KEY,
+    Document JSONB NOT NULL,
+    BuiltAt TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (MediaID) REFERENCES TVSeries(MediaID) ON DELETE CASCADE
+);
+-- Shows whose document is stale after an episode rating change; drained
+-- by fetchers/show_documents.py
+CREATE TABLE IF NOT EXISTS TVShow_Document_Dirty (
+    MediaID INT PRIMARY KEY,
+    QueuedAt TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (MediaID) REFERENCES TVSeries(MediaID) ON DELETE CASCADE
+);
+-- Seasons whose AvgRating (and series Rating) await recomputation when
+-- cholochitro.deferred_rating_cascade is on; drained by fetchers/rating_worker.py
+CREATE TABLE IF NOT EXISTS Rating_Dirty_Seasons (
+    MediaID INT NOT NULL,
+    SeasonNo INT NOT NULL,
+    QueuedAt TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (MediaID, SeasonNo),
+    FOREIGN KEY (MediaID, SeasonNo) REFERENCES Season(MediaID, SeasonNo) ON DELETE CASCADE
+);
+-- Sharded ingestion (fetchers/sharded_ingest.py): each shard is a list of
+-- TMDB IDs claimed by one worker at a time; Position advances in the same
+-- transaction as each title, so a reclaimed shard resumes without repeats
+CREATE TABLE IF NOT EXISTS Ingest_Shard (
+    ShardID SERIAL PRIMARY KEY,
+    RunName VARCHAR(100) NOT NULL,
+    MediaType VARCHAR(10) NOT NULL CHECK (MediaType IN ('movie', 'tv')),
+    TmdbIDs INT[] NOT NULL,
+    Position INT NOT NULL DEFAULT 0, -- TmdbIDs[1..Position] are finished
+    Status VARCHAR(10) NOT NULL DEFAULT 'pending' CHECK (Status IN ('pending', 'running', 'done')),
+    ClaimedBy VARCHAR(100),
+    HeartbeatAt TIMESTAMP,
+    Attempts INT NOT NULL DEFAULT 0,
+    Ingested INT NOT NULL DEFAULT 0,
+    Skipped INT NOT NULL DEFAULT 0,
+    FailedIDs INT[] NOT NULL DEFAULT '{}',
+    FinishedAt TIMESTAMP
+);
+-- Token bucket shared by every ingestion worker (fn_take_rate_tokens)
+CREATE TABLE IF NOT EXISTS Ingest_Rate_Budget (
+    Name VARCHAR(50) PRIMARY KEY,
+    Tokens DOUBLE PRECISION NOT NULL,
+    Capacity DOUBLE PRECISION NOT NULL,
+    RefillPerSec DOUBLE PRECISION NOT NULL CHECK (RefillPerSec > 0),
+    UpdatedAt TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+-- On-demand single-title ingestion (fetchers/ingest_service.py). One row per
+-- title: repeated requests bump RequestCount instead of queueing it again.
+-- A claimed request is 'running' until ClaimedAt + the service's lease
+CREATE TABLE IF NOT EXISTS Ingest_Request (
+    MediaType VARCHAR(10) NOT NULL CHECK (MediaType IN ('movie', 'tv')),
+    TmdbID INT NOT NULL,
+    Status VARCHAR(10) NOT NULL DEFAULT 'pending' CHECK (Status IN ('pending', 'running', 'done', 'failed')),
+    RequestCount INT NOT NULL DEFAULT 1,
+    Source VARCHAR(50),
+    RequestedAt TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    LastRequestedAt TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    RetryAt TIMESTAMP,
+    ClaimedBy VARCHAR(100),
+    ClaimedAt TIMESTAMP,
+    Attempts INT NOT NULL DEFAULT 0,
+    FinishedAt TIMESTAMP,
+    Error TEXT,
+    PRIMARY KEY (MediaType, TmdbID)
+);
+-- Titles whose ingestion failed for a reason other than "not on TMDB"
+-- (tmdb_client.record_dead_letter), kept until fetchers/dead_letters.py
+-- retries them successfully
+CREATE TABLE IF NOT EXISTS Ingest_Dead_Letter (
+    MediaType VARCHAR(10) NOT NULL CHECK (MediaType IN ('movie', 'tv')),
+    TmdbID INT NOT NULL,
+    Error TEXT,
+    Source VARCHAR(50),
+    Failures INT NOT NULL DEFAULT 1,
+    FirstFailedAt TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    LastFailedAt TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (MediaType, TmdbID)
+);
+-- Persons, movies, seasons ("MediaID/SeasonNo") and companies that
+-- fetchers/update_persons.py could not fetch through tmdb_client's retries;
+-- removed when a later run updates them
+CREATE TABLE IF NOT EXISTS Update_Dead_Letter (
+    EntityType VARCHAR(10) NOT NULL CHECK (EntityType IN ('person', 'movie', 'season', 'company')),
+    EntityKey VARCHAR(30) NOT NULL,
+    Error TEXT,
+    Failures INT NOT NULL DEFAULT 1,
+    FirstFailedAt TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    LastFailedAt TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (EntityType, EntityKey)
+);
+-- TMDB circuit breaker shared by every fetcher process (tmdb_client.py):
+-- failures seen by any process count towards opening it, and while
+-- OpenUntil is in the future none of them call TMDB
+CREATE TABLE IF NOT EXISTS Ingest_Circuit_Breaker (
+    Name VARCHAR(50) PRIMARY KEY,
+    Failures INT NOT NULL DEFAULT 0,
+    OpenUntil TIMESTAMP,
+    Cooldown DOUBLE PRECISION NOT NULL,
+    HalfOpen BOOLEAN NOT NULL DEFAULT FALSE,
+    Trips INT NOT NULL DEFAULT 0,
+    UpdatedAt TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
 -- Create indexes for faster lookups
 CREATE INDEX IF NOT EXISTS idx_blog_votes_user_blog ON BlogVotes(UserID, BlogID);
-CREATE INDEX IF NOT EXISTS idx_comment_votes_user_comment ON CommentVotes(UserID, CommentID);
\ No newline at end of file
+CREATE INDEX IF NOT EXISTS idx_comment_votes_user_comment ON CommentVotes(UserID, CommentID);
+CREATE INDEX IF NOT EXISTS idx_actor_leaderboard_rank ON Actor_Leaderboard(TitleCount DESC, AvgRating DESC NULLS LAST, PersonID);
+CREATE INDEX IF NOT EXISTS idx_media_search_vector ON Media USING GIN (SearchVector);
+CREATE INDEX IF NOT EXISTS idx_media_title_trgm ON Media USING GIN (Title gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_media_description_trgm ON Media USING GIN (Description gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_person_search_name_trgm ON Person USING GIN (SearchName gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_media_hits_unhydrated ON Media_Hits(HitCount DESC) WHERE CreditsHydratedAt IS NULL;
+CREATE INDEX IF NOT EXISTS idx_image_asset_sha ON Image_Asset(Sha256);
+CREATE INDEX IF NOT EXISTS idx_ingest_shard_claim ON Ingest_Shard(RunName, Status, ShardID);
+CREATE INDEX IF NOT EXISTS idx_ingest_request_queue ON Ingest_Request(Status, RequestedAt);
+
+-- Catalogue lookups by title (cast/crew, genres, studios) and the FK
+-- checks / ON DELETE CASCADE scans when a Media row is removed
+CREATE INDEX IF NOT EXISTS idx_crew_media_role ON Crew(MediaID, CrewRole);
+CREATE INDEX IF NOT EXISTS idx_media_genre_genre ON Media_Genre(GenreID);
+CREATE INDEX IF NOT EXISTS idx_production_media ON Production(MediaID);
+CREATE INDEX IF NOT EXISTS idx_list_items_media ON List_Items(MediaID);
+-- /movies and /tvshows listings (default sort, year filter)
+CREATE INDEX IF NOT EXISTS idx_media_type_rating ON Media(MediaType, Rating DESC NULLS LAST);
+CREATE INDEX IF NOT EXISTS idx_media_release_year ON Media(ReleaseYear);
+-- Review pages (newest first) and per-user deletes (sp_delete_user)
+CREATE INDEX IF NOT EXISTS idx_review_media_postdate ON Review(MediaID, PostDate DESC);
+CREATE INDEX IF NOT EXISTS idx_review_episode_postdate ON Review(EpisodeMediaID, EpisodeSeasonNo, EpisodeNo, PostDate DESC);
+CREATE INDEX IF NOT EXISTS idx_review_user ON Review(UserID);
+-- Blog feed, comment threads and per-user deletes
+CREATE INDEX IF NOT EXISTS idx_blog_postdate ON Blog(PostDate DESC);
+CREATE INDEX IF NOT EXISTS idx_blog_user ON Blog(UserID);
+CREATE INDEX IF NOT EXISTS idx_comments_blog_postdate ON Comments(BlogID, PostDate);
+CREATE INDEX IF NOT EXISTS idx_comments_user ON Comments(UserID);
@@ -1,4 +1,5 @@
 const express = require('express');
+const path = require('path');
 const { Pool } = require('pg');
 const cors = require('cors');
 const bcrypt = require('bcryptjs');
@@ -64,6 +65,18 @@ const getOptionalUserIdFromRequest = (req) => {
     }
 };
 
+// Count a detail-page view; fetchers/hydrate_credits.py fetches full credits
+// for the most viewed titles. Fire-and-forget: a failed count never fails the page.
+const recordMediaHit = (mediaId) => {
+    pool.query(`
+        INSERT INTO Media_Hits (MediaID, HitCount, LastHitAt)
+        VALUES ($1, 1, CURRENT_TIMESTAMP)
+        ON CONFLICT (MediaID) DO UPDATE
+        SET HitCount = Media_Hits.HitCount + 1,
+            LastHitAt = CURRENT_TIMESTAMP
+    `, [mediaId]).catch((error) => console.error('Error recording media hit:', error.message));
+};
+
 
 
 // Enable CORS 
@@ -78,6 +91,11 @@ app.use((req, res, next) => {
     next();
 });
 
+// Mirrored TMDB images (fetchers/image_mirror.py), addressed by Image_Asset.LocalPath.
+// File names are content hashes, so responses never change and can be cached forever.
+const IMAGE_CACHE_DIR = process.env.IMAGE_CACHE_DIR || path.join(__dirname, 'image_cache');
+app.use('/images', express.static(IMAGE_CACHE_DIR, { immutable: true, maxAge: '365d', index: false }));
+
 // DATABASE CONNECTION
 
 const pool = new Pool({
@@ -87,9 +105,9 @@ const pool = new Pool({
     } : false
 });
 
-// Rating recalculation is now handled by PL/pgSQL triggers:
-// - trg_refresh_movie_rating  (for Movie reviews)
-// - trg_cascade_episode_rating (for Episode → Season → Series)
+// Rating recalculation is now handled by statement-level PL/pgSQL triggers:
+// - trg_refresh_movie_rating_*  (for Movie reviews)
+// - trg_cascade_episode_rating_* (for Episode → Season → Series)
 
 // Test connection on startup
 pool.connect((err, client, release) => {
@@ -305,7 +323,7 @@ app.get('/reviews/media/:mediaId', async (req, res) => {
 });
 
 // POST media review - creates or updates the user's review for the title
-// Rating recalculation is handled by trg_refresh_movie_rating trigger
+// Rating recalculation is handled by trg_refresh_movie_rating_* triggers
 app.post('/reviews/media/:mediaId', requireAuth, async (req, res) => {
     const client = await pool.connect();
     let transactionStarted = false;
@@ -511,7 +529,7 @@ app.get('/reviews/episode/:mediaId/:seasonNo/:episodeNo', async (req, res) => {
 });
 
 // POST episode review - one review per user per episode (update if existing)
-// Rating cascade (Episode → Season → Series) handled by trg_cascade_episode_rating trigger
+// Rating cascade (Episode → Season → Series) handled by trg_cascade_episode_rating_* triggers
 app.post('/reviews/episode/:mediaId/:seasonNo/:episodeNo', requireAuth, async (req, res) => {
     const client = await pool.connect();
     let transactionStarted = false;
@@ -653,6 +671,13 @@ app.post('/reviews/episode/:mediaId/:seasonNo/:episodeNo', requireAuth, async (r
 });
 
 
+// Media columns for the /movies and /tvshows lists: everything but SearchVector,
+// which is only used for matching and would bloat every response
+const MEDIA_LIST_COLUMNS = `
+    m.MediaID, m.Title, m.ReleaseYear, m.Description, m.LanguageName,
+    m.Rating, m.RatingCount, m.BaseRating, m.MediaType, m.Poster,
+    m.PosterThumbs, m.PosterLQIP`;
+
 // GET all movies
 app.get('/movies', async (req, res) => {
     try {
@@ -668,7 +693,7 @@ app.get('/movies', async (req, res) => {
         const currentYear = new Date().getFullYear();
 
         let query = `
-            SELECT m.*
+            SELECT ${MEDIA_LIST_COLUMNS}
             FROM Media m
             LEFT JOIN Media_Genre mg ON m.MediaID = mg.MediaID
             LEFT JOIN Genre g ON mg.GenreID = g.GenreID
@@ -841,6 +866,8 @@ app.get('/movies/:id', async (req, res) => {
             });
         }
 
+        recordMediaHit(movieResult.rows[0].mediaid);
+
         // Combine all data into one object
         const movie = movieResult.rows[0];
         movie.genres = genreResult.rows;
@@ -877,7 +904,7 @@ app.get('/tvshows', async (req, res) => {
         const ongoing = req.query.ongoing;
 
         let query = `
-            SELECT m.*, tv.IsOngoing, tv.NumberOfSeasons
+            SELECT ${MEDIA_LIST_COLUMNS}, tv.IsOngoing, tv.NumberOfSeasons
             FROM Media m
             JOIN TVSeries tv ON m.MediaID = tv.MediaID
             LEFT JOIN Media_Genre mg ON m.MediaID = mg.MediaID
@@ -1017,28 +1044,26 @@ app.get('/actors/top', async (req, res) => {
         const offset = (page - 1) * limit;
         const maxTotal = 200; // Max 200 actors total
 
+        // Actor_Leaderboard is refreshed by the fetchers after each ingestion run
         const query = `
             SELECT
                 p.PersonID,
                 p.FullName,
                 p.Picture,
-                COUNT(DISTINCT c.MediaID) as title_count,
-                ROUND(AVG(m.Rating), 1) as avg_rating
-            FROM Person p
-            JOIN Crew c ON p.PersonID = c.PersonID
-            JOIN Media m ON c.MediaID = m.MediaID
-            WHERE c.CrewRole = 'Actor'
-            GROUP BY p.PersonID, p.FullName, p.Picture
-            ORDER BY title_count DESC, avg_rating DESC NULLS LAST
+                p.PictureThumbs,
+                p.PictureLQIP,
+                al.TitleCount as title_count,
+                al.AvgRating as avg_rating
+            FROM Actor_Leaderboard al
+            JOIN Person p ON p.PersonID = al.PersonID
+            ORDER BY al.TitleCount DESC, al.AvgRating DESC NULLS LAST, al.PersonID
             LIMIT $1 OFFSET $2
         `;
 
+        // Only the first maxTotal actors are ever paged through
         const countQuery = `
-            SELECT COUNT(DISTINCT p.PersonID) as total
-            FROM Person p
-            JOIN Crew c ON p.PersonID = c.PersonID
-            JOIN Media m ON c.MediaID = m.MediaID
-            WHERE c.CrewRole = 'Actor'
+            SELECT COUNT(*) as total
+            FROM (SELECT 1 FROM Actor_Leaderboard LIMIT ${maxTotal}) ranked
         `;
 
         const [result, countResult] = await Promise.all([
@@ -1072,8 +1097,26 @@ app.get('/tvshows/:id/seasons', async (req, res) => {
     try {
         const { id } = req.params;
 
+        // Prebuilt document (fn_build_show_document), unless a rating change
+        // has queued it for a rebuild; then fall through to the live queries
+        const documentResult = await pool.query(`
+            SELECT d.Document
+            FROM TVShow_Document d
+            WHERE d.MediaID = $1
+              AND NOT EXISTS (
+                  SELECT 1 FROM TVShow_Document_Dirty q WHERE q.MediaID = d.MediaID
+              )
+        `, [id]);
+
+        if (documentResult.rows.length > 0) {
+            return res.json({
+                success: true,
+                data: documentResult.rows[0].document
+            });
+        }
+
         const tvQuery = `
-            SELECT 
+            SELECT
                 m.MediaID,
                 m.Title,
                 m.ReleaseYear,
@@ -1223,16 +1266,18 @@ app.get('/tvshows/:id', async (req, res) => {
             WHERE mg.MediaID = $1
         `;
 
-        // 3. Get cast (actors)
+        // 3. Get cast (actors), series regulars first when aggregate credits were stored
         const castQuery = `
             SELECT 
                 p.PersonID,
                 p.FullName,
                 p.Picture,
-                c.CharacterName
+                c.CharacterName,
+                c.EpisodeCount
             FROM Person p
             JOIN Crew c ON p.PersonID = c.PersonID
             WHERE c.MediaID = $1 AND c.CrewRole = 'Actor'
+            ORDER BY c.EpisodeCount DESC NULLS LAST
             LIMIT 20
         `;
 
@@ -1333,6 +1378,8 @@ app.get('/tvshows/:id', async (req, res) => {
             });
         }
 
+        recordMediaHit(tvResult.rows[0].mediaid);
+
         // Combine all data
         const tvShow = tvResult.rows[0];
         tvShow.genres = genreResult.rows;
@@ -1393,34 +1440,31 @@ app.get('/persons/search', async (req, res) => {
         const limit = parseInt(req.query.limit) || 20;
         const offset = (page - 1) * limit;
 
-        // Search persons by name and count their filmography
+        // Search persons by accent-folded name (trigram index on SearchName)
+        // and count the filmography of the returned page only
         const searchQuery = `
             SELECT 
                 p.PersonID,
                 p.FullName,
                 p.Picture,
                 p.Biography,
-                COUNT(DISTINCT c.MediaID) as title_count
+                (SELECT COUNT(DISTINCT c.MediaID) FROM Crew c WHERE c.PersonID = p.PersonID) as title_count
             FROM Person p
-            LEFT JOIN Crew c ON p.PersonID = c.PersonID
-            WHERE p.FullName ILIKE $1
-            GROUP BY p.PersonID, p.FullName, p.Picture, p.Biography
+            WHERE p.SearchName LIKE '%' || fn_fold_name($1) || '%'
             ORDER BY p.FullName ASC
             LIMIT $2 OFFSET $3
         `;
 
         // Count total results
         const countQuery = `
-            SELECT COUNT(DISTINCT p.PersonID) as total
+            SELECT COUNT(*) as total
             FROM Person p
-            WHERE p.FullName ILIKE $1
+            WHERE p.SearchName LIKE '%' || fn_fold_name($1) || '%'
         `;
-
-        const searchPattern = `%${query}%`;  // Add wildcards for partial matching
         
         const [result, countResult] = await Promise.all([
-            pool.query(searchQuery, [searchPattern, limit, offset]),
-            pool.query(countQuery, [searchPattern])
+            pool.query(searchQuery, [query, limit, offset]),
+            pool.query(countQuery, [query])
         ]);
 
         const total = parseInt(countResult.rows[0].total);
@@ -1549,6 +1593,7 @@ app.get('/search', async (req, res) => {
         let searchQuery;
         let countQuery;
         let searchParams;
+        let countParams;
 
         if (titleOnly) {
             searchQuery = `
@@ -1577,7 +1622,10 @@ app.get('/search', async (req, res) => {
             `;
 
             searchParams = [searchPattern, limit, offset];
+            countParams = [searchPattern];
         } else {
+            // SearchVector (GIN) matches whole words in title/description;
+            // the ILIKE fallbacks keep substring matches and use the trigram indexes
             searchQuery = `
                 SELECT 
                     MediaID,
@@ -1590,12 +1638,15 @@ app.get('/search', async (req, res) => {
                     CASE 
                         WHEN Title ILIKE $1 THEN 3          -- Exact match = highest priority
                         WHEN Title ILIKE $2 THEN 2          -- Contains query = medium
-                        WHEN Description ILIKE $2 THEN 1    -- In description = lowest
-                        ELSE 0
+                        ELSE 1                              -- Word or substring in description = lowest
                     END as relevance
                 FROM Media
-                WHERE Title ILIKE $2 OR Description ILIKE $2
-                ORDER BY relevance DESC, Rating DESC NULLS LAST
+                WHERE SearchVector @@ websearch_to_tsquery('english', $1)
+                   OR Title ILIKE $2
+                   OR Description ILIKE $2
+                ORDER BY relevance DESC,
+                         ts_rank(SearchVector, websearch_to_tsquery('english', $1)) DESC,
+                         Rating DESC NULLS LAST
                 LIMIT $3 OFFSET $4
             `;
 
@@ -1603,15 +1654,18 @@ app.get('/search', async (req, res) => {
             countQuery = `
                 SELECT COUNT(*) as total
                 FROM Media
-                WHERE Title ILIKE $1 OR Description ILIKE $1
+                WHERE SearchVector @@ websearch_to_tsquery('english', $1)
+                   OR Title ILIKE $2
+                   OR Description ILIKE $2
             `;
 
             searchParams = [query, searchPattern, limit, offset];
+            countParams = [query, searchPattern];
         }
         
         const [result, countResult] = await Promise.all([
             pool.query(searchQuery, searchParams),
-            pool.query(countQuery, [searchPattern])
+            pool.query(countQuery, countParams)
         ]);
 
         const total = parseInt(countResult.rows[0].total);
@@ -1637,6 +1691,34 @@ app.get('/search', async (req, res) => {
     }
 });
 
+// Ask fetchers/ingest_service.py for a title we don't have yet (e.g. after a
+// search with no results). Duplicate requests coalesce into one queued row.
+app.post('/ingest/requests', requireAuth, async (req, res) => {
+    try {
+        const { mediaType } = req.body;
+        const tmdbId = parseInt(req.body.tmdbId);
+
+        if (!['movie', 'tv'].includes(mediaType) || !Number.isInteger(tmdbId) || tmdbId <= 0) {
+            return res.status(400).json({
+                success: false,
+                error: 'mediaType (movie or tv) and a positive tmdbId are required'
+            });
+        }
+
+        const result = await pool.query(
+            'SELECT fn_request_ingest($1, $2, $3) AS status',
+            [mediaType, tmdbId, 'web']
+        );
+        const status = result.rows[0].status;
+
+        // 'exists' → already in the catalogue; 'queued' / 'coalesced' → on its way
+        return res.status(status === 'exists' ? 200 : 202).json({ success: true, status });
+    } catch (error) {
+        console.error('Error requesting ingest:', error);
+        return res.status(500).json({ success: false, error: 'Failed to request title' });
+    }
+});
+
 app.get('/lists/search', async (req, res) => {
     try {
         const query = req.query.q;